@@ -2,13 +2,43 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import sqlite3
+import threading
+import functools
+import inspect
+import pickle
+import re
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 import os
-import plotly.express as px
+import importlib
 import hashlib
 import json
 import base64
 import io
+import shutil
+import zipfile
+
+from leitura_planilhas import EXTENSOES_PLANILHA, ler_planilhas_em_paralelo
+
+class _ModuloTardio:
+    """Adia a importação de um módulo pesado até o primeiro acesso a um atributo."""
+
+    def __init__(self, nome: str):
+        self._nome = nome
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nome)
+        return getattr(self._modulo, atributo)
+
+# O plotly só é carregado quando o primeiro gráfico é desenhado
+px = _ModuloTardio("plotly.express")
+openpyxl = _ModuloTardio("openpyxl")
 
 st.set_page_config(
     page_title="Dashboard de Frotas - Açúcar Alegre",
@@ -159,13 +189,554 @@ ALERTAS_MANUTENCAO = {
     'QUILÔMETROS': { 'default': 500 }
 }
 
+# ---------------------------
+# Conexões com o banco
+# ---------------------------
+
+# Aplicados a toda conexão aberta pelo gerenciador
+PRAGMAS_CONEXAO = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+MAX_CONEXOES_LIVRES = 8
+TAMANHO_CACHE_COMANDOS = 256
+
+class _ConexaoReutilizavel(sqlite3.Connection):
+    """Conexão do pool: close() devolve a conexão ao pool em vez de fechá-la."""
+    _devolver = None
+    _em_uso = False
+
+    def close(self):
+        if self._devolver is not None:
+            self._devolver(self)
+
+    def __exit__(self, *exc):
+        resultado = super().__exit__(*exc)
+        self.close()
+        return resultado
+
+    def fechar(self):
+        super().close()
+
+@st.cache_resource
+def _obter_gerenciador_conexoes(db_path: str) -> dict:
+    """Pool de conexões e conexão de escrita, compartilhados por todas as sessões do processo.
+
+    Não pode ser descartado com st.cache_resource.clear(): um segundo gerenciador
+    traria uma segunda conexão de escrita com outro lock.
+    """
+    return {
+        'lock': threading.Lock(),
+        'livres': [],
+        'lock_escrita': threading.RLock(),
+        'escrita': None,
+        'profundidade_escrita': 0,
+    }
+
+def _abrir_conexao(db_path: str) -> _ConexaoReutilizavel:
+    conn = sqlite3.connect(
+        db_path, timeout=5.0, check_same_thread=False,
+        cached_statements=TAMANHO_CACHE_COMANDOS, factory=_ConexaoReutilizavel,
+    )
+    for pragma in PRAGMAS_CONEXAO:
+        conn.execute(pragma)
+    return conn
+
+def _devolver_conexao(gerenciador: dict, conn: _ConexaoReutilizavel):
+    if not conn._em_uso:
+        return
+    conn._em_uso = False
+    try:
+        # Mesmo efeito de fechar a conexão: o que não teve commit é descartado
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = None
+    except sqlite3.Error:
+        conn.fechar()
+        return
+    with gerenciador['lock']:
+        if len(gerenciador['livres']) < MAX_CONEXOES_LIVRES:
+            gerenciador['livres'].append(conn)
+            return
+    conn.fechar()
+
+def obter_conexao(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Empresta uma conexão do pool do processo.
+
+    Use como o retorno de sqlite3.connect: conn.close() ou o fim de um bloco
+    `with` (que faz commit ou rollback antes) devolvem a conexão ao pool.
+    """
+    gerenciador = _obter_gerenciador_conexoes(db_path)
+    with gerenciador['lock']:
+        conn = gerenciador['livres'].pop() if gerenciador['livres'] else None
+    if conn is None:
+        conn = _abrir_conexao(db_path)
+        conn._devolver = functools.partial(_devolver_conexao, gerenciador)
+    conn._em_uso = True
+    return conn
+
+# Tabelas de que componentes_status e consumo_mensal são calculadas
+FONTES_DERIVADOS = ('abastecimentos', 'frotas', 'componentes_regras', 'componentes_historico', 'precos_combustivel_historico')
+_FILTRO_FONTES_DERIVADOS = f"tabela IN ({', '.join('?' * len(FONTES_DERIVADOS))})"
+
+def _derivados_em_dia(conn):
+    """(data_version, total_changes, fontes com derivados em dia) no início de um bloco de escrita.
+
+    None se _versoes_tabelas ainda não tiver a coluna versao_derivados.
+    """
+    try:
+        em_dia = [r[0] for r in conn.execute(
+            f"SELECT tabela FROM _versoes_tabelas WHERE versao_derivados IS versao AND {_FILTRO_FONTES_DERIVADOS}",
+            FONTES_DERIVADOS,
+        )]
+    except sqlite3.Error:
+        return None
+    return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes, em_dia
+
+def _marcar_derivados_em_dia(conn, inicio):
+    """Ao final de um bloco de escrita, mantém em dia as fontes que já estavam em dia no início.
+
+    As escritas do app recalculam as tabelas derivadas na própria transação. Se
+    outra conexão gravou durante o bloco, nada é marcado e sincronizar_derivados
+    recalcula tudo na próxima execução.
+    """
+    if inicio is None:
+        return
+    data_version, alteracoes, em_dia = inicio
+    if not em_dia or conn.total_changes == alteracoes:
+        return
+    if conn.execute("PRAGMA data_version").fetchone()[0] != data_version:
+        return
+    conn.executemany(
+        "UPDATE _versoes_tabelas SET versao_derivados = versao WHERE tabela = ? AND versao_derivados IS NOT versao",
+        [(tabela,) for tabela in em_dia],
+    )
+
+@contextmanager
+def conexao_escrita(db_path: str = DB_PATH):
+    """Conexão dedicada às escritas, usada por uma thread de cada vez.
+
+    Faz commit ao final do bloco mais externo ou rollback em caso de erro.
+    """
+    gerenciador = _obter_gerenciador_conexoes(db_path)
+    with gerenciador['lock_escrita']:
+        if gerenciador['escrita'] is None:
+            gerenciador['escrita'] = _abrir_conexao(db_path)
+        conn = gerenciador['escrita']
+        gerenciador['profundidade_escrita'] += 1
+        externo = gerenciador['profundidade_escrita'] == 1
+        if externo:
+            inicio = _derivados_em_dia(conn)
+        try:
+            yield conn
+            if externo:
+                _marcar_derivados_em_dia(conn, inicio)
+                conn.commit()
+        except BaseException:
+            if externo and conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            gerenciador['profundidade_escrita'] -= 1
+            if externo:
+                conn.row_factory = None
+
+# ---------------------------
+# Migrações do esquema
+# ---------------------------
+
+# Índices dos caminhos de consulta mais usados: (nome, tabela, colunas)
+INDICES_CONSULTAS = (
+    ('idx_componentes_historico_equip_comp_data', 'componentes_historico', ('Cod_Equip', 'nome_componente', 'Data', 'Hod_Hor_No_Servico')),
+    ('idx_componentes_regras_classe_comp', 'componentes_regras', ('classe_operacional', 'nome_componente')),
+    ('idx_frotas_cod_equipamento', 'frotas', ('COD_EQUIPAMENTO',)),
+    ('idx_checklist_historico_equip_titulo', 'checklist_historico', ('Cod_Equip', 'titulo_checklist', 'data_preenchimento', 'turno')),
+    ('idx_pneus_historico_chave', 'pneus_historico', ('Cod_Equip', 'posicao', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao')),
+    ('idx_lubrificantes_nome', 'lubrificantes', ('nome',)),
+    ('idx_manutencoes_cod_equip', 'manutencoes', ('Cod_Equip',)),
+)
+
+def criar_indices(conn, tabelas=None):
+    """Cria os índices de INDICES_CONSULTAS para as tabelas existentes (ou apenas para `tabelas`)."""
+    for nome, tabela, colunas in INDICES_CONSULTAS:
+        if tabelas is not None and tabela not in tabelas:
+            continue
+        existentes = {c[1] for c in conn.execute(f'PRAGMA table_info("{tabela}")').fetchall()}
+        if not set(colunas) <= existentes:
+            continue
+        lista_colunas = ", ".join(f'"{c}"' for c in colunas)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {nome} ON "{tabela}" ({lista_colunas})')
+
+def _migracao_indices(db_path: str):
+    with conexao_escrita(db_path) as conn:
+        criar_indices(conn)
+
+# Chave de equipamento normalizada de abastecimentos: "Cód. Equip." chega como texto
+# ou inteiro conforme a origem da planilha; a view expõe sempre cod_equip INTEGER.
+EXPRESSAO_COD_EQUIP = 'CAST("Cód. Equip." AS INTEGER)'
+SQL_VIEW_ABASTECIMENTOS_EQUIP = f"""
+            CREATE VIEW IF NOT EXISTS abastecimentos_equip AS
+            SELECT rowid AS rowid, {EXPRESSAO_COD_EQUIP} AS cod_equip, *
+            FROM abastecimentos
+            """
+SQL_INDICE_ABASTECIMENTOS_EQUIP = f"""
+            CREATE INDEX IF NOT EXISTS idx_abastecimentos_equip_data
+            ON abastecimentos ({EXPRESSAO_COD_EQUIP}, Data, Hod_Hor_Atual)
+            """
+
+def _migracao_chave_equipamento(db_path: str):
+    with conexao_escrita(db_path) as conn:
+        colunas = {c[1] for c in conn.execute("PRAGMA table_info(abastecimentos)").fetchall()}
+        if not {'Cód. Equip.', 'Data', 'Hod_Hor_Atual'} <= colunas:
+            return
+        conn.execute(SQL_INDICE_ABASTECIMENTOS_EQUIP)
+        conn.execute(SQL_VIEW_ABASTECIMENTOS_EQUIP)
+        # Substituído pelo índice de expressão acima
+        conn.execute("DROP INDEX IF EXISTS idx_abastecimentos_cod_equip_data")
+
+def _migracao_chaves_importacao(db_path: str):
+    with conexao_escrita(db_path) as conn:
+        criar_indices(conn, ('pneus_historico',))
+        # O índice da chave natural começa por Cod_Equip e atende também às consultas por frota
+        conn.execute("DROP INDEX IF EXISTS idx_pneus_historico_cod_equip")
+
+def _migracao(funcao):
+    """Adapta uma função (ok, msg) de esquema para migração: falhas interrompem a atualização."""
+    def migracao(db_path: str):
+        ok, msg = funcao(db_path)
+        if not ok:
+            raise RuntimeError(msg)
+    return migracao
+
+# Migrações em ordem de versão; a última aplicada fica em PRAGMA user_version.
+# Cada uma recebe o caminho do banco e deve ser idempotente; as funções de esquema
+# são definidas mais adiante no módulo, por isso entram via lambda.
+MIGRACOES = (
+    (1, "Índices das consultas frequentes", _migracao_indices),
+    (2, "Coluna tipo_combustivel em frotas", _migracao(lambda db_path: add_tipo_combustivel_column(db_path))),
+    (3, "Tabela de motoristas", _migracao(lambda db_path: ensure_motoristas_schema(db_path))),
+    (4, "Tabela de preços de combustível", _migracao(lambda db_path: ensure_precos_combustivel_schema(db_path))),
+    (5, "Tabelas de lubrificantes e almoxarifados", _migracao(lambda db_path: ensure_lubrificantes_schema(db_path))),
+    (6, "Tabela de histórico de pneus", _migracao(lambda db_path: ensure_pneus_schema(db_path))),
+    (7, "Números e datas de abastecimentos como REAL/ISO", _migracao(lambda db_path: normalizar_abastecimentos(db_path))),
+    (8, "Tipo de controle das frotas", _migracao(lambda db_path: ensure_tipo_controle_frotas(db_path))),
+    (9, "Chave de equipamento normalizada em abastecimentos", _migracao_chave_equipamento),
+    (10, "Índice da chave natural de pneus", _migracao_chaves_importacao),
+    (11, "Tabela de importações em segundo plano", _migracao(lambda db_path: ensure_import_jobs_schema(db_path))),
+    (12, "Situação materializada dos componentes", _migracao(lambda db_path: ensure_componentes_status_schema(db_path))),
+    (13, "Colunas de serviço e lubrificante dos componentes", _migracao(lambda db_path: ensure_colunas_componentes(db_path))),
+    (14, "Consumo mensal agregado", _migracao(lambda db_path: ensure_consumo_mensal_schema(db_path))),
+    (15, "Histórico de preços de combustível", _migracao(lambda db_path: ensure_precos_combustivel_schema(db_path))),
+    (16, "Classe da frota no consumo mensal", _migracao(lambda db_path: ensure_consumo_mensal_schema(db_path))),
+    (17, "Classe da frota na situação dos componentes", _migracao(lambda db_path: ensure_componentes_status_schema(db_path))),
+    (18, "Versões das tabelas derivadas", _migracao(lambda db_path: ensure_versoes_tabelas_schema(db_path))),
+    (19, "Consumo mensal sem a classe do abastecimento", _migracao(lambda db_path: ensure_consumo_mensal_schema(db_path))),
+)
+
+def aplicar_migracoes(db_path: str = DB_PATH):
+    """Aplica, cada uma em sua transação, as migrações com versão acima de PRAGMA user_version.
+
+    Depois da primeira execução no processo não há mais nada a fazer: o esquema
+    não é mais verificado a cada rerun.
+    """
+    try:
+        with obter_conexao(db_path) as conn:
+            versao_atual = conn.execute("PRAGMA user_version").fetchone()[0]
+        pendentes = [m for m in MIGRACOES if m[0] > versao_atual]
+        aplicadas = []
+        for versao, descricao, migracao in pendentes:
+            with conexao_escrita(db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Outro processo pode ter aplicado a migração enquanto esperávamos o lock
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= versao:
+                    continue
+                migracao(db_path)
+                conn.execute(f"PRAGMA user_version = {int(versao)}")
+            aplicadas.append(descricao)
+        if not aplicadas:
+            return True, "Esquema do banco atualizado"
+        return True, f"Migrações aplicadas: {', '.join(aplicadas)}"
+    except Exception as e:
+        return False, f"Erro ao aplicar migrações: {e}"
+
+@st.cache_resource
+def _aplicar_migracoes_uma_vez(db_path: str) -> bool:
+    """Executa aplicar_migracoes uma única vez por processo."""
+    ok, msg = aplicar_migracoes(db_path)
+    if not ok:
+        raise RuntimeError(msg)
+    return True
+
+# Consultas dos caminhos mais usados; verificar_planos_consulta confere que todas usam índice
+SQL_ULTIMA_MANUTENCAO_COMPONENTE = """
+            SELECT Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes
+            FROM componentes_historico
+            WHERE Cod_Equip = ? AND nome_componente = ?
+            ORDER BY Data DESC, Hod_Hor_No_Servico DESC
+            LIMIT 1
+            """
+SQL_CONTAGEM_MANUTENCOES_COMPONENTE = """
+            SELECT COUNT(*) as total_manutencoes,
+                   COUNT(CASE WHEN tipo_servico = 'Troca' THEN 1 END) as total_trocas,
+                   COUNT(CASE WHEN tipo_servico = 'Remonta' THEN 1 END) as total_remontas
+            FROM componentes_historico
+            WHERE Cod_Equip = ? AND nome_componente = ?
+            """
+SQL_REGRA_COMPONENTE_EQUIPAMENTO = """
+            SELECT intervalo_padrao, lubrificante_id, tipo_manutencao
+            FROM componentes_regras cr
+            JOIN frotas f ON cr.classe_operacional = f."Classe Operacional"
+            WHERE f.COD_EQUIPAMENTO = ? AND cr.nome_componente = ?
+            """
+# Regras da classe com lubrificante, contagens e últimos serviços do equipamento, de uma vez
+SQL_COMPONENTES_EQUIPAMENTO = """
+            WITH historico AS (
+                SELECT nome_componente, Data, Hod_Hor_No_Servico, tipo_servico,
+                       COALESCE(tipo_servico, 'Troca') = 'Troca' AS eh_troca,
+                       ROW_NUMBER() OVER (PARTITION BY nome_componente ORDER BY Data DESC) AS ordem,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY nome_componente, COALESCE(tipo_servico, 'Troca') = 'Troca' ORDER BY Data DESC
+                       ) AS ordem_tipo
+                FROM componentes_historico
+                WHERE Cod_Equip = ?
+            ), resumo AS (
+                SELECT nome_componente,
+                       COUNT(*) AS total_manutencoes,
+                       COUNT(CASE WHEN tipo_servico = 'Troca' THEN 1 END) AS total_trocas,
+                       COUNT(CASE WHEN tipo_servico = 'Remonta' THEN 1 END) AS total_remontas,
+                       MAX(CASE WHEN ordem = 1 THEN Data END) AS data_ultima_manutencao,
+                       MAX(CASE WHEN ordem = 1 THEN tipo_servico END) AS tipo_ultima_manutencao,
+                       MAX(CASE WHEN eh_troca AND ordem_tipo = 1 THEN Data END) AS data_ultima_troca,
+                       MAX(CASE WHEN eh_troca AND ordem_tipo = 1 THEN Hod_Hor_No_Servico END) AS hod_ultima_troca
+                FROM historico
+                GROUP BY nome_componente
+            )
+            SELECT cr.nome_componente, cr.intervalo_padrao, cr.lubrificante_id, cr.tipo_manutencao,
+                   l.nome AS lubrificante_nome, l.viscosidade AS lubrificante_viscosidade,
+                   COALESCE(r.total_manutencoes, 0) AS total_manutencoes,
+                   COALESCE(r.total_trocas, 0) AS total_trocas,
+                   COALESCE(r.total_remontas, 0) AS total_remontas,
+                   r.data_ultima_manutencao, r.tipo_ultima_manutencao, r.data_ultima_troca, r.hod_ultima_troca
+            FROM componentes_regras cr
+            LEFT JOIN lubrificantes l ON l.id = cr.lubrificante_id
+            LEFT JOIN resumo r ON r.nome_componente = cr.nome_componente
+            WHERE cr.classe_operacional = ?
+            ORDER BY cr.rowid
+            """
+SQL_HISTORICO_COMPONENTES_EQUIPAMENTO = """
+            SELECT rowid, * FROM componentes_historico
+            WHERE Cod_Equip = ?
+            ORDER BY Data DESC
+            """
+SQL_CHECKLIST_PREENCHIDO = "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?"
+SQL_PNEUS_EQUIPAMENTO = "SELECT * FROM pneus_historico WHERE Cod_Equip = ?"
+SQL_LUBRIFICANTE_POR_NOME = "SELECT id FROM lubrificantes WHERE nome = ?"
+SQL_CONTAGEM_ABASTECIMENTOS_EQUIPAMENTO = "SELECT COUNT(*) FROM abastecimentos_equip WHERE cod_equip = CAST(? AS INTEGER)"
+SQL_ULTIMA_LEITURA_EQUIPAMENTO = """
+            SELECT Hod_Hor_Atual FROM abastecimentos_equip
+            WHERE cod_equip = CAST(? AS INTEGER) AND Hod_Hor_Atual IS NOT NULL
+            ORDER BY Data DESC, Hod_Hor_Atual DESC
+            LIMIT 1
+            """
+SQL_EQUIPAMENTOS_COM_ABASTECIMENTO = "SELECT DISTINCT cod_equip FROM abastecimentos_equip"
+SQL_CONTAGEM_MANUTENCOES_EQUIPAMENTO = "SELECT COUNT(*) FROM manutencoes WHERE Cod_Equip = ?"
+
+CONSULTAS_FREQUENTES = {
+    'Última manutenção do componente': SQL_ULTIMA_MANUTENCAO_COMPONENTE,
+    'Contagem de manutenções do componente': SQL_CONTAGEM_MANUTENCOES_COMPONENTE,
+    'Regra do componente por equipamento': SQL_REGRA_COMPONENTE_EQUIPAMENTO,
+    'Histórico de componentes do equipamento': SQL_HISTORICO_COMPONENTES_EQUIPAMENTO,
+    'Checklist já preenchido': SQL_CHECKLIST_PREENCHIDO,
+    'Pneus do equipamento': SQL_PNEUS_EQUIPAMENTO,
+    'Lubrificante por nome': SQL_LUBRIFICANTE_POR_NOME,
+    'Abastecimentos do equipamento': SQL_CONTAGEM_ABASTECIMENTOS_EQUIPAMENTO,
+    'Última leitura do equipamento': SQL_ULTIMA_LEITURA_EQUIPAMENTO,
+    'Manutenções do equipamento': SQL_CONTAGEM_MANUTENCOES_EQUIPAMENTO,
+}
+
+def verificar_planos_consulta(db_path: str = DB_PATH) -> pd.DataFrame:
+    """Roda EXPLAIN QUERY PLAN nas CONSULTAS_FREQUENTES e indica quais fazem varredura completa de tabela.
+
+    Uma consulta que nem chega a ser preparada (tabela ou coluna ausente) também
+    fica marcada como falha.
+    """
+    linhas = []
+    with obter_conexao(db_path) as conn:
+        for nome, sql in CONSULTAS_FREQUENTES.items():
+            try:
+                plano = conn.execute(f"EXPLAIN QUERY PLAN {sql}", (None,) * sql.count('?')).fetchall()
+            except sqlite3.OperationalError as e:
+                # Tabela ou coluna ausente neste banco: a consulta falharia também no painel
+                linhas.append({'Consulta': nome, 'Plano': f"erro: {e}", 'Varredura Completa': True})
+                continue
+            detalhes = [p[-1] for p in plano]
+            linhas.append({
+                'Consulta': nome,
+                'Plano': ' | '.join(detalhes),
+                'Varredura Completa': any(d.startswith('SCAN') for d in detalhes),
+            })
+    return pd.DataFrame(linhas, columns=['Consulta', 'Plano', 'Varredura Completa'])
+
+# ---------------------------
+# Cache com dependência por tabela
+# ---------------------------
+
+@st.cache_resource
+def _obter_registro_cache() -> dict:
+    """Entradas e contadores do cache, compartilhados por todas as sessões do processo."""
+    return {'lock': threading.Lock(), 'funcoes': {}, 'versoes': {}}
+
+def _valor_para_chave(valor):
+    """Converte um argumento em algo que possa compor a chave do cache."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        try:
+            conteudo = pd.util.hash_pandas_object(valor, index=True).values.tobytes()
+        except TypeError:
+            conteudo = pickle.dumps(valor)
+        colunas = tuple(map(str, valor.columns)) if isinstance(valor, pd.DataFrame) else (str(valor.name),)
+        return (type(valor).__name__, colunas, hashlib.sha1(conteudo).hexdigest())
+    if isinstance(valor, dict):
+        return tuple(sorted((str(k), _valor_para_chave(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_valor_para_chave(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted((_valor_para_chave(v) for v in valor), key=repr))
+    try:
+        hash(valor)
+        return valor
+    except TypeError:
+        return repr(valor)
+
+def _copiar_resultado(valor):
+    """Devolve uma cópia dos DataFrames para que quem chama não altere a entrada guardada."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy()
+    if isinstance(valor, tuple):
+        return tuple(_copiar_resultado(v) for v in valor)
+    return valor
+
+def _assinatura_tabelas(tabelas, db_path: str = DB_PATH) -> tuple:
+    """Versão atual de cada tabela; sem controle de versões usa a data de modificação do arquivo."""
+    if not tabelas:
+        return ()
+    versoes = ler_versoes_tabelas(db_path)
+    if not versoes:
+        return (int(os.path.getmtime(db_path)) if os.path.exists(db_path) else 0,)
+    return tuple(versoes.get(t, 0) for t in tabelas)
+
+def cache_por_tabelas(tabelas=(), max_entradas: int = 32, ttl: float = None, mensagem: str = None):
+    """Decorador de cache em memória invalidado apenas pelas escritas nas tabelas declaradas.
+
+    Cada entrada guarda a versão de `tabelas` no momento do cálculo e deixa de
+    valer quando alguma delas muda. Argumentos iniciados por "_" não entram na
+    chave, como no st.cache_data. As versões são lidas do banco recebido no
+    argumento `db_path`, quando a função o tem. Cada função mantém no máximo
+    `max_entradas` entradas (descarte LRU) e contadores de acertos e falhas.
+    """
+    tabelas = tuple(tabelas)
+
+    def decorador(func):
+        nome = func.__name__
+        assinatura_func = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            registro = _obter_registro_cache()
+            argumentos = assinatura_func.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            chave = tuple(
+                (nome_arg, _valor_para_chave(valor))
+                for nome_arg, valor in argumentos.arguments.items()
+                if not nome_arg.startswith('_')
+            )
+            versoes = _assinatura_tabelas(tabelas, argumentos.arguments.get('db_path', DB_PATH))
+
+            with registro['lock']:
+                info = registro['funcoes'].setdefault(nome, {
+                    'tabelas': tabelas, 'entradas': OrderedDict(),
+                    'acertos': 0, 'falhas': 0, 'invalidacoes': 0,
+                })
+                entrada = info['entradas'].get(chave)
+                if entrada is not None and entrada[0] == versoes and (ttl is None or time.monotonic() - entrada[1] < ttl):
+                    info['entradas'].move_to_end(chave)
+                    info['acertos'] += 1
+                    return _copiar_resultado(entrada[2])
+                info['falhas'] += 1
+
+            if mensagem:
+                with st.spinner(mensagem):
+                    valor = func(*args, **kwargs)
+            else:
+                valor = func(*args, **kwargs)
+
+            with registro['lock']:
+                entradas = info['entradas']
+                entradas[chave] = (versoes, time.monotonic(), valor)
+                entradas.move_to_end(chave)
+                while len(entradas) > max_entradas:
+                    entradas.popitem(last=False)
+            return _copiar_resultado(valor)
+
+        wrapper.tabelas = tabelas
+        return wrapper
+    return decorador
+
+def invalidar_tabelas(*tabelas):
+    """Descarta as entradas de cache das funções que dependem de alguma das tabelas.
+
+    Sem argumentos, compara a versão atual de cada tabela com a última vista e
+    invalida apenas os dependentes das tabelas que mudaram.
+    """
+    registro = _obter_registro_cache()
+    if not tabelas:
+        versoes = ler_versoes_tabelas(DB_PATH)
+        with registro['lock']:
+            anteriores = registro['versoes']
+            tabelas = [t for t, v in versoes.items() if anteriores.get(t) != v] if anteriores else list(versoes)
+            registro['versoes'] = versoes
+    alvo = set(tabelas)
+    with registro['lock']:
+        for info in registro['funcoes'].values():
+            if alvo.intersection(info['tabelas']) and info['entradas']:
+                info['entradas'].clear()
+                info['invalidacoes'] += 1
+
+def limpar_cache():
+    """Descarta todas as entradas de cache (mantém os contadores)."""
+    registro = _obter_registro_cache()
+    with registro['lock']:
+        for info in registro['funcoes'].values():
+            info['entradas'].clear()
+
+def estatisticas_cache() -> pd.DataFrame:
+    """Retorna, por função em cache, as tabelas de que depende, entradas e acertos/falhas."""
+    registro = _obter_registro_cache()
+    with registro['lock']:
+        linhas = [
+            {
+                'Função': nome,
+                'Tabelas': ', '.join(info['tabelas']) or '—',
+                'Entradas': len(info['entradas']),
+                'Acertos': info['acertos'],
+                'Falhas': info['falhas'],
+                'Invalidações': info['invalidacoes'],
+                'Taxa de Acerto (%)': round(100 * info['acertos'] / (info['acertos'] + info['falhas']), 1) if (info['acertos'] + info['falhas']) else 0.0,
+            }
+            for nome, info in sorted(registro['funcoes'].items())
+        ]
+    return pd.DataFrame(linhas, columns=['Função', 'Tabelas', 'Entradas', 'Acertos', 'Falhas', 'Invalidações', 'Taxa de Acerto (%)'])
+
 def formatar_brasileiro(valor: float, prefixo='') -> str:
     """Formata um número com casas decimais para o padrão brasileiro."""
     if pd.isna(valor) or not np.isfinite(valor):
         return "–"
     return f"{prefixo}{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-@st.cache_data(ttl=300)
+@cache_por_tabelas(max_entradas=16, ttl=300)
 def para_csv(df: pd.DataFrame):
     """Converte um DataFrame para CSV para download."""
     return df.to_csv(index=False, sep=';', decimal=',').encode('utf-8-sig')
@@ -176,16 +747,31 @@ def formatar_brasileiro_int(valor: float) -> str:
         return "–"
     return f"{int(valor):,}".replace(",", ".")
 
+# Termos que indicam controle por quilômetros; os demais equipamentos são controlados por horas
+PADRAO_CONTROLE_KM = re.compile(r'CAMINH|VE[IÍ]CULO|PICK-?UP|CAVALO MEC[AÂ]NICO')
+TIPOS_CONTROLE = ('HORAS', 'QUILÔMETROS')
+
+def classificar_tipo_controle(descricao: pd.Series, classe: pd.Series, unidade: pd.Series = None) -> pd.Series:
+    """Classifica cada equipamento em 'HORAS' ou 'QUILÔMETROS'.
+
+    A unidade informada, quando é um dos TIPOS_CONTROLE, prevalece. Sem ela,
+    um termo de PADRAO_CONTROLE_KM na descrição ou na classe indica
+    quilômetros. O regex roda uma vez por par distinto de descrição e classe.
+    """
+    texto = (descricao.fillna('').astype(str) + ' ' + classe.fillna('').astype(str)).str.upper()
+    codigos, unicos = pd.factorize(texto)
+    eh_km = pd.Series(unicos, dtype=object).str.contains(PADRAO_CONTROLE_KM).to_numpy(dtype=bool)
+    tipos = pd.Series(np.where(eh_km, 'QUILÔMETROS', 'HORAS')[codigos], index=texto.index, dtype=object)
+    if unidade is not None:
+        tipos = unidade.where(unidade.isin(TIPOS_CONTROLE)).fillna(tipos)
+    return tipos
+
 def detect_equipment_type(df_completo: pd.DataFrame) -> pd.DataFrame:
     df = df_completo.copy()
-    df['Tipo_Controle'] = df.get('Unid', pd.Series(index=df.index)).map({'HORAS': 'HORAS', 'QUILÔMETROS': 'QUILÔMETROS'})
-    def inferir_tipo_por_classe(row):
-        if pd.notna(row['Tipo_Controle']): return row['Tipo_Controle']
-        classe = str(row.get('Classe_Operacional', '')).upper()
-        if any(p in classe for p in ['TRATOR', 'COLHEITADEIRA', 'PULVERIZADOR', 'PLANTADEIRA', 'PÁ CARREGADEIRA', 'RETROESCAVADEIRA']): return 'HORAS'
-        if any(p in classe for p in ['CAMINHÃO', 'CAMINHAO', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']): return 'QUILÔMETROS'
-        return 'HORAS'
-    df['Tipo_Controle'] = df.apply(inferir_tipo_por_classe, axis=1)
+    vazia = pd.Series('', index=df.index)
+    df['Tipo_Controle'] = classificar_tipo_controle(
+        df.get('DESCRICAO_EQUIPAMENTO', vazia), df.get('Classe_Operacional', vazia), df.get('Unid')
+    )
     return df
 
 def hash_password(password):
@@ -195,7 +781,7 @@ def hash_password(password):
 def check_login_db(username, password):
     """Verifica as credenciais contra a base de dados."""
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn = obter_conexao(DB_PATH)
         cursor = conn.cursor()
         cursor.execute("SELECT password_hash, role FROM utilizadores WHERE username = ?", (username,))
         result = cursor.fetchone()
@@ -211,20 +797,17 @@ def check_login_db(username, password):
 
 def get_all_users():
     """Busca todos os utilizadores da base de dados."""
-    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+    with obter_conexao(DB_PATH) as conn:
         return pd.read_sql_query("SELECT id, username, role FROM utilizadores", conn)
 
 def add_user(username, password, role):
     """Adiciona um novo utilizador à base de dados."""
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO utilizadores (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, hash_password(password), role)
-        )
-        conn.commit()
-        conn.close()
+        with conexao_escrita(DB_PATH) as conn:
+            conn.execute(
+                "INSERT INTO utilizadores (username, password_hash, role) VALUES (?, ?, ?)",
+                (username, hash_password(password), role)
+            )
         return True, "Utilizador adicionado com sucesso!"
     except sqlite3.IntegrityError:
         return False, f"Erro: O nome de utilizador '{username}' já existe."
@@ -234,14 +817,11 @@ def add_user(username, password, role):
 def update_user(user_id, new_username, new_role):
     """Atualiza o nome e a função de um utilizador."""
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE utilizadores SET username = ?, role = ? WHERE id = ?",
-            (new_username, new_role, user_id)
-        )
-        conn.commit()
-        conn.close()
+        with conexao_escrita(DB_PATH) as conn:
+            conn.execute(
+                "UPDATE utilizadores SET username = ?, role = ? WHERE id = ?",
+                (new_username, new_role, user_id)
+            )
         return True, "Utilizador atualizado com sucesso!"
     except Exception as e:
         return False, f"Ocorreu um erro: {e}"
@@ -249,140 +829,588 @@ def update_user(user_id, new_username, new_role):
 def delete_user(user_id):
     """Remove um utilizador da base de dados."""
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM utilizadores WHERE id = ?", (user_id,))
-        conn.commit()
-        conn.close()
+        with conexao_escrita(DB_PATH) as conn:
+            conn.execute("DELETE FROM utilizadores WHERE id = ?", (user_id,))
         return True, "Utilizador removido com sucesso!"
     except Exception as e:
         return False, f"Ocorreu um erro: {e}"
 
     
-# APAGUE A SUA FUNÇÃO "load_data_from_db" INTEIRA E SUBSTITUA-A POR ESTE BLOCO FINAL
+# ---------------------------
+# Carga incremental dos dados
+# ---------------------------
 
-@st.cache_data(show_spinner="Carregando e processando dados...", ttl=300)
-def load_data_from_db(db_path: str, ver_frotas: int=None, ver_abast: int=None, ver_manut: int=None, ver_comp: int=None, ver_chk: int=None):
-    if not os.path.exists(db_path):
-        st.error(f"Arquivo de banco de dados '{db_path}' não encontrado.")
-        st.stop()
+# Tabelas lidas por load_data_from_db. O valor indica se a coluna rowid
+# faz parte do DataFrame devolvido (usada nas telas de edição/exclusão).
+TABELAS_CARGA = {
+    'abastecimentos': True,
+    'frotas': False,
+    'manutencoes': True,
+    'componentes_regras': False,
+    'componentes_historico': True,
+    'checklist_regras': False,
+    'checklist_itens': False,
+    'checklist_historico': True,
+    'motoristas': False,
+}
 
+# Acima deste número de linhas alteradas a tabela é relida por inteiro
+LIMITE_RELEITURA_PARCIAL = 1000
+# Quantidade de marcadores já aplicados que dispara a limpeza do registro
+LIMITE_REGISTRO_ALTERACOES = 5000
+
+def ensure_registro_alteracoes_schema(db_path: str = DB_PATH):
+    """Garante a tabela de marcadores de alteração e os gatilhos de UPDATE/DELETE usados pela carga incremental."""
     try:
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            df_abast = pd.read_sql_query("SELECT rowid, * FROM abastecimentos", conn)
-            df_frotas = pd.read_sql_query("SELECT * FROM frotas", conn)
-            df_manutencoes = pd.read_sql_query("SELECT rowid, * FROM manutencoes", conn)
-            df_comp_regras = pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-            df_comp_historico = pd.read_sql_query("SELECT rowid, * FROM componentes_historico", conn)
-            df_checklist_regras = pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-            df_checklist_itens = pd.read_sql_query("SELECT * FROM checklist_itens", conn)
-            df_checklist_historico = pd.read_sql_query("SELECT rowid, * FROM checklist_historico", conn)
-
-        # --- Início do Processamento Integrado ---
-        
-        # Renomeia colunas para um padrão consistente
-        df_abast = df_abast.rename(columns={"Cód. Equip.": "Cod_Equip", "Qtde Litros": "Qtde Litros", "Mês": "Mes", "Média": "Media"}, errors='ignore')
-        df_frotas = df_frotas.rename(columns={"COD_EQUIPAMENTO": "Cod_Equip", "Classe Operacional": "Classe_Operacional"}, errors='ignore')
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS _registro_alteracoes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tabela TEXT NOT NULL,
+                    linha INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            existentes = {r[0] for r in cursor.fetchall()}
+            for tabela in TABELAS_CARGA:
+                if tabela not in existentes:
+                    continue
+                # Inserções são detectadas pela marca de rowid; apenas UPDATE e DELETE deixam marcador
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{tabela}_alteracao AFTER UPDATE ON {tabela}
+                    BEGIN
+                        INSERT INTO _registro_alteracoes (tabela, linha) VALUES ('{tabela}', OLD.rowid);
+                        INSERT INTO _registro_alteracoes (tabela, linha) SELECT '{tabela}', NEW.rowid WHERE NEW.rowid <> OLD.rowid;
+                    END
+                """)
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{tabela}_exclusao AFTER DELETE ON {tabela}
+                    BEGIN
+                        INSERT INTO _registro_alteracoes (tabela, linha) VALUES ('{tabela}', OLD.rowid);
+                    END
+                """)
+            conn.commit()
+        return True, "Registro de alterações verificado"
+    except Exception as e:
+        return False, f"Erro ao verificar registro de alterações: {e}"
 
-        # Cria o dataframe principal mesclando abastecimentos e frotas
-        df_merged = pd.merge(df_abast, df_frotas, on="Cod_Equip", how="left")
-        
-        # Trata colunas de classe operacional que podem ter vindo da mesclagem
-        if 'Classe_Operacional_x' in df_merged.columns:
-            df_merged['Classe_Operacional'] = np.where(df_merged['Classe_Operacional_x'].notna(), df_merged['Classe_Operacional_x'], df_merged['Classe_Operacional_y'])
-            df_merged.drop(columns=['Classe_Operacional_x', 'Classe_Operacional_y'], inplace=True)
-        
-        # Converte a coluna de data e cria colunas de tempo
-        df_merged["Data"] = pd.to_datetime(df_merged["Data"], errors='coerce')
-        df_merged.dropna(subset=["Data"], inplace=True)
-        df_merged["Ano"] = df_merged["Data"].dt.year
-        df_merged["AnoMes"] = df_merged["Data"].dt.to_period("M").astype(str)
-        
-        # Limpa e converte colunas numéricas
-        for col in ["Qtde Litros", "Media", "Hod_Hor_Atual"]:
-            if col in df_merged.columns:
-                series = df_merged[col].astype(str)
-                series = series.str.replace(',', '.', regex=False).str.replace('-', '', regex=False).str.strip()
-                df_merged[col] = pd.to_numeric(series, errors='coerce')
-        
-        # Cria a coluna "label" no dataframe de frotas para uso em seletores
-        df_frotas["label"] = df_frotas["Cod_Equip"].astype(str) + " - " + df_frotas.get("DESCRICAO_EQUIPAMENTO", "").fillna("") + " (" + df_frotas.get("PLACA", "").fillna("Sem Placa") + ")"
+def ensure_versoes_tabelas_schema(db_path: str = DB_PATH):
+    """Garante a tabela de versões e os gatilhos que incrementam a versão de cada tabela a cada escrita.
 
-        # Vincula informações de motorista aos abastecimentos (merge durante o load)
-        try:
-            with sqlite3.connect(db_path, check_same_thread=False) as conn:
-                df_motoristas = pd.read_sql_query("SELECT codigo_pessoa, matricula, nome FROM motoristas", conn)
-            if not df_motoristas.empty:
-                df_merged = df_merged.merge(
-                    df_motoristas.rename(columns={"codigo_pessoa": "Cod_Pessoa", "matricula": "Matricula", "nome": "Nome_Motorista"}),
-                    on=["Cod_Pessoa", "Matricula"], how="left"
+    `versao_derivados` é a versão da tabela com que componentes_status e
+    consumo_mensal estão em dia; NULL força o recálculo em sincronizar_derivados.
+    """
+    try:
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS _versoes_tabelas (
+                    tabela TEXT PRIMARY KEY,
+                    versao INTEGER NOT NULL DEFAULT 0,
+                    versao_derivados INTEGER
                 )
-        except Exception:
-            pass
-        
-        # Garante que a classe operacional em df_frotas está atualizada
-        classe_map = df_merged.dropna(subset=['Classe_Operacional']).groupby('Cod_Equip')['Classe_Operacional'].first()
-        df_frotas['Classe_Operacional'] = df_frotas['Cod_Equip'].map(classe_map).fillna(df_frotas.get('Classe_Operacional'))
+            """)
+            colunas = {c[1] for c in cursor.execute("PRAGMA table_info(_versoes_tabelas)").fetchall()}
+            if 'versao_derivados' not in colunas:
+                cursor.execute("ALTER TABLE _versoes_tabelas ADD COLUMN versao_derivados INTEGER")
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite%' AND substr(name, 1, 1) <> '_'")
+            tabelas = [r[0] for r in cursor.fetchall()]
+            for tabela in tabelas:
+                criar_gatilhos_versao(cursor, tabela)
+            conn.commit()
+        return True, "Versões das tabelas verificadas"
+    except Exception as e:
+        return False, f"Erro ao verificar versões das tabelas: {e}"
+
+def criar_gatilhos_versao(conn, tabela: str):
+    """Registra `tabela` em _versoes_tabelas e cria os gatilhos que incrementam sua versão."""
+    conn.execute("INSERT OR IGNORE INTO _versoes_tabelas (tabela, versao) VALUES (?, 0)", (tabela,))
+    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS "trg_{tabela}_versao_{evento.lower()}" AFTER {evento} ON "{tabela}"
+            BEGIN
+                UPDATE _versoes_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}';
+            END
+        """)
+
+@st.cache_resource
+def _inicializar_versoes_tabelas(db_path: str) -> bool:
+    """Cria os gatilhos de versão uma única vez por processo."""
+    ok, msg = ensure_versoes_tabelas_schema(db_path)
+    if not ok:
+        # Exceções não ficam em cache: a próxima execução tenta novamente
+        raise RuntimeError(msg)
+    return True
+
+def _ler_versoes(conn):
+    """Retorna {tabela: versao} ou None se a tabela de versões não existir."""
+    try:
+        return dict(conn.execute("SELECT tabela, versao FROM _versoes_tabelas").fetchall())
+    except sqlite3.Error:
+        return None
+
+def sincronizar_derivados(db_path: str = DB_PATH) -> bool:
+    """Recalcula componentes_status e consumo_mensal se alguma fonte foi escrita fora do app.
+
+    Programas externos gravam direto no banco sem atualizar as tabelas
+    derivadas; os gatilhos de versão deixam essas fontes com versao_derivados
+    para trás. Retorna True se houve recálculo.
+    """
+    sql_defasadas = f"SELECT COUNT(*) FROM _versoes_tabelas WHERE versao_derivados IS NOT versao AND {_FILTRO_FONTES_DERIVADOS}"
+    try:
+        _inicializar_versoes_tabelas(db_path)
+        with obter_conexao(db_path) as conn:
+            if not conn.execute(sql_defasadas, FONTES_DERIVADOS).fetchone()[0]:
+                return False
+        with conexao_escrita(db_path) as conn:
+            atualizar_derivados_abastecimentos(conn)
+            conn.execute(f"UPDATE _versoes_tabelas SET versao_derivados = versao WHERE {_FILTRO_FONTES_DERIVADOS}", FONTES_DERIVADOS)
+        return True
+    except Exception:
+        return False
+
+def ler_versoes_tabelas(db_path: str = DB_PATH) -> dict:
+    """Retorna a versão atual de cada tabela; dicionário vazio se o controle de versões não estiver disponível."""
+    try:
+        _inicializar_versoes_tabelas(db_path)
+        with obter_conexao(db_path) as conn:
+            return _ler_versoes(conn) or {}
+    except Exception:
+        return {}
+
+@st.cache_resource
+def _obter_estado_carga(db_path: str) -> dict:
+    """Estado da carga incremental, compartilhado por todas as sessões do processo."""
+    ensure_registro_alteracoes_schema(db_path)
+    estado = {'lock': threading.Lock()}
+    _reiniciar_estado_carga(estado)
+    return estado
+
+def _reiniciar_estado_carga(estado: dict):
+    """Descarta os DataFrames mantidos em memória, forçando uma releitura completa."""
+    estado['tabelas'] = {}        # tabela -> DataFrame com a coluna rowid
+    estado['marcas'] = {}         # tabela -> maior rowid já lido
+    estado['versoes'] = {}        # tabela -> versão correspondente ao DataFrame mantido
+    estado['ultima_alteracao'] = 0
+    estado['ultima_poda'] = 0
+    estado['versao_esquema'] = None
+    estado['df_merged'] = None
+
+def _ler_linhas(conn, tabela: str, filtro: str = "", params=()) -> pd.DataFrame:
+    return pd.read_sql_query(f"SELECT rowid AS rowid, * FROM {tabela} {filtro}", conn, params=params)
+
+def _ler_alteracoes_pendentes(conn, ultima: int):
+    """Lê os marcadores de alteração posteriores a `ultima`.
+
+    Retorna ({tabela: {rowids}}, novo_ultimo_id). O dicionário é None quando
+    não é possível garantir a sequência completa de marcadores (tabela ausente
+    ou marcadores já podados), caso em que tudo deve ser relido.
+    """
+    try:
+        registros = conn.execute(
+            "SELECT id, tabela, linha FROM _registro_alteracoes WHERE id > ? ORDER BY id", (ultima,)
+        ).fetchall()
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = '_registro_alteracoes'").fetchone()
+    except sqlite3.Error:
+        return None, 0
+    seq = seq[0] if seq else 0
+    if seq - ultima != len(registros):
+        return None, seq
+    pendentes = {}
+    for _, tabela, linha in registros:
+        pendentes.setdefault(tabela, set()).add(linha)
+    return pendentes, seq
+
+# ---------------------------
+# Normalização de abastecimentos
+# ---------------------------
+
+# Colunas numéricas de abastecimentos e formato em que as datas são gravadas
+COLUNAS_NUMERICAS_ABASTECIMENTO = ("Qtde Litros", "Média", "Hod_Hor_Atual")
+FORMATO_DATA_BANCO = "%Y-%m-%d %H:%M:%S"
+
+def _normalizar_numeros(serie: pd.Series) -> pd.Series:
+    """Converte para float com a regra histórica: vírgula vira ponto e hífens são descartados."""
+    if pd.api.types.is_numeric_dtype(serie):
+        # Já tipada: só o descarte do sinal, que a regra por texto também fazia
+        return serie.astype(float).abs()
+    texto = serie.astype(str).str.replace(',', '.', regex=False).str.replace('-', '', regex=False).str.strip()
+    return pd.to_numeric(texto, errors='coerce')
+
+def _normalizar_datas(serie: pd.Series) -> pd.Series:
+    """Converte para datetime; o ISO gravado pelo app é lido sem inferência de formato."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    datas = pd.to_datetime(serie, errors='coerce', format='ISO8601')
+    restantes = datas.isna() & serie.notna()
+    if restantes.any():
+        datas[restantes] = pd.to_datetime(serie[restantes], errors='coerce')
+    return datas
+
+def _normalizar_numero(valor):
+    """Versão escalar de _normalizar_numeros, para gravações linha a linha."""
+    convertido = _normalizar_numeros(pd.Series([valor], dtype=object)).iloc[0]
+    return None if pd.isna(convertido) else float(convertido)
+
+def _normalizar_data(valor):
+    """Versão escalar de _normalizar_datas; devolve o texto no formato do banco."""
+    data = _normalizar_datas(pd.Series([valor], dtype=object)).iloc[0]
+    return None if pd.isna(data) else data.strftime(FORMATO_DATA_BANCO)
+
+def normalizar_abastecimentos(db_path: str = DB_PATH):
+    """Regrava como REAL os números e no formato ISO as datas guardados como texto em abastecimentos.
+
+    Textos que não contêm um número ou uma data válida são mantidos como estão.
+    """
+    try:
+        with conexao_escrita(db_path) as conn:
+            colunas = [c[1] for c in conn.execute("PRAGMA table_info(abastecimentos)").fetchall()]
+            numericas = [c for c in COLUNAS_NUMERICAS_ABASTECIMENTO if c in colunas]
+            condicoes = [f"typeof(\"{c}\") = 'text'" for c in numericas]
+            if 'Data' in colunas:
+                condicoes.append("typeof(Data) = 'text' AND Data NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'")
+            if not condicoes:
+                return True, "Tabela de abastecimentos sem colunas a normalizar"
+
+            alvo = numericas + (['Data'] if 'Data' in colunas else [])
+            lista_colunas = ", ".join(f'"{c}"' for c in alvo)
+            df = pd.read_sql_query(
+                f"SELECT rowid AS rowid, {lista_colunas} FROM abastecimentos WHERE {' OR '.join(condicoes)}", conn
+            )
+            if df.empty:
+                return True, "Abastecimentos já normalizados"
+
+            novos = {}
+            for col in numericas:
+                original = df[col]
+                convertido = _normalizar_numeros(original)
+                vazio = original.isna() | original.astype(str).str.strip().isin(['', 'None', 'nan'])
+                novos[col] = convertido.astype(object).where(convertido.notna(), original.where(~vazio, None))
+            if 'Data' in colunas:
+                datas = _normalizar_datas(df['Data'])
+                novos['Data'] = datas.dt.strftime(FORMATO_DATA_BANCO).astype(object).where(datas.notna(), df['Data'])
+
+            atribuicoes = ", ".join(f'"{c}" = ?' for c in alvo)
+            registros = list(zip(*(novos[c].tolist() for c in alvo), df['rowid'].tolist()))
+            conn.executemany(f"UPDATE abastecimentos SET {atribuicoes} WHERE rowid = ?", registros)
+        return True, f"{len(registros)} abastecimentos normalizados"
+    except Exception as e:
+        return False, f"Erro ao normalizar abastecimentos: {e}"
+
+def _preparar_abastecimentos(df_abast: pd.DataFrame) -> pd.DataFrame:
+    """Renomeia e limpa um lote de abastecimentos (datas e colunas numéricas)."""
+    df_abast = df_abast.rename(columns={"Cód. Equip.": "Cod_Equip", "Qtde Litros": "Qtde Litros", "Mês": "Mes", "Média": "Media"}, errors='ignore')
+
+    # Converte a coluna de data e cria colunas de tempo
+    df_abast["Data"] = _normalizar_datas(df_abast["Data"])
+    df_abast.dropna(subset=["Data"], inplace=True)
+    df_abast["Ano"] = df_abast["Data"].dt.year
+    df_abast["AnoMes"] = df_abast["Data"].dt.to_period("M").astype(str)
+
+    # Colunas já gravadas como REAL não passam pelo tratamento de texto
+    for col in ["Qtde Litros", "Media", "Hod_Hor_Atual"]:
+        if col in df_abast.columns:
+            df_abast[col] = _normalizar_numeros(df_abast[col])
+    return df_abast.reset_index(drop=True)
+
+# Ajustes aplicados a cada lote lido antes de guardá-lo no estado
+PREPARADORES_CARGA = {
+    'abastecimentos': _preparar_abastecimentos,
+}
+
+def _atualizar_tabela(conn, estado: dict, tabela: str, linhas_alteradas):
+    """Aplica ao estado as linhas novas (rowid acima da marca) e as marcadas como alteradas.
+
+    Retorna None se a tabela não mudou, ou (lote, linhas_removidas) com as
+    linhas lidas agora e os rowids descartados do estado; linhas_removidas é
+    None quando a tabela foi relida por inteiro.
+    """
+    preparar = PREPARADORES_CARGA.get(tabela, lambda df_lote: df_lote)
+    atual = estado['tabelas'].get(tabela)
+    marca = estado['marcas'].get(tabela)
+
+    if atual is None or marca is None or linhas_alteradas is None or len(linhas_alteradas) > max(LIMITE_RELEITURA_PARCIAL, len(atual) // 2):
+        lote = _ler_linhas(conn, tabela)
+        estado['marcas'][tabela] = int(lote['rowid'].max()) if not lote.empty else 0
+        lote = preparar(lote)
+        estado['tabelas'][tabela] = lote
+        return lote, None
+
+    if linhas_alteradas:
+        # Sem AUTOINCREMENT o SQLite reaproveita o rowid da maior linha excluída, e a
+        # inserção que o reaproveita não deixa marcador: a marca desce para o maior rowid
+        # que ainda existe, lido antes das linhas novas
+        restante = conn.execute(f"SELECT MAX(rowid) FROM {tabela} WHERE rowid <= ?", (marca,)).fetchone()[0]
+        estado['marcas'][tabela] = restante or 0
+
+    novas = _ler_linhas(conn, tabela, "WHERE rowid > ?", (marca,))
+    if novas.empty and not linhas_alteradas:
+        return None
+
+    lotes = []
+    linhas = sorted(linhas_alteradas)
+    for i in range(0, len(linhas), 500):
+        bloco = linhas[i:i + 500]
+        placeholders = ", ".join(["?"] * len(bloco))
+        lotes.append(_ler_linhas(conn, tabela, f"WHERE rowid IN ({placeholders}) AND rowid <= ?", (*bloco, marca)))
+    lotes.append(novas)
+    if not novas.empty:
+        estado['marcas'][tabela] = int(novas['rowid'].max())
+
+    lotes = [l for l in lotes if not l.empty]
+    lote = preparar(pd.concat(lotes, ignore_index=True) if lotes else novas)
+    estado['tabelas'][tabela] = _combinar_lote(atual, lote, linhas_alteradas)
+    return lote, set(linhas_alteradas)
+
+# Dimensões de baixa cardinalidade do DataFrame de abastecimentos, guardadas como
+# categóricas, e os valores que o painel usa para preencher vazios nelas
+COLUNAS_CATEGORICAS = {
+    'Classe_Operacional': (),
+    'tipo_combustivel': ('Diesel S500',),
+    'Safra': (),
+    'Matricula': (),
+    'Nome_Motorista': (),
+    'AnoMes': (),
+}
+
+def compactar_abastecimentos(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte as dimensões repetidas em categóricas e reduz os inteiros ao menor tipo que os comporta."""
+    df = df.copy()
+    for col, extras in COLUNAS_CATEGORICAS.items():
+        if col not in df.columns:
+            continue
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+        faltando = [v for v in extras if v not in df[col].cat.categories]
+        if faltando:
+            df[col] = df[col].cat.add_categories(faltando)
+    for col in ('Ano', 'Mes'):
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+def relatorio_memoria(quadros: dict) -> pd.DataFrame:
+    """Memória ocupada por DataFrame (contando o conteúdo dos textos)."""
+    linhas = []
+    for nome, df in quadros.items():
+        if not isinstance(df, pd.DataFrame):
+            continue
+        linhas.append({
+            'DataFrame': nome,
+            'Linhas': len(df),
+            'Colunas': df.shape[1],
+            'Categóricas': sum(isinstance(tipo, pd.CategoricalDtype) for tipo in df.dtypes),
+            'Memória (MB)': round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+        })
+    return pd.DataFrame(linhas, columns=['DataFrame', 'Linhas', 'Colunas', 'Categóricas', 'Memória (MB)'])
+
+def _combinar_lote(atual: pd.DataFrame, lote: pd.DataFrame, linhas_removidas) -> pd.DataFrame:
+    """Remove de `atual` as linhas alteradas e acrescenta o lote, mantendo a ordem por rowid."""
+    if linhas_removidas:
+        atual = atual[~atual['rowid'].isin(linhas_removidas)]
+    if lote.empty:
+        return atual.reset_index(drop=True)
+    combinado = pd.concat([atual, lote], ignore_index=True) if not atual.empty else lote.reset_index(drop=True)
+    if linhas_removidas:
+        combinado = combinado.sort_values('rowid', kind='stable', ignore_index=True)
+    return combinado
+
+def _mesclar_abastecimentos(df_abast: pd.DataFrame, df_frotas: pd.DataFrame, df_motoristas: pd.DataFrame) -> pd.DataFrame:
+    """Mescla abastecimentos já limpos com frotas e motoristas."""
+    df_merged = pd.merge(df_abast, df_frotas, on="Cod_Equip", how="left")
+
+    # Trata colunas de classe operacional que podem ter vindo da mesclagem
+    if 'Classe_Operacional_x' in df_merged.columns:
+        df_merged['Classe_Operacional'] = np.where(df_merged['Classe_Operacional_x'].notna(), df_merged['Classe_Operacional_x'], df_merged['Classe_Operacional_y'])
+        df_merged.drop(columns=['Classe_Operacional_x', 'Classe_Operacional_y'], inplace=True)
+
+    # Vincula informações de motorista aos abastecimentos
+    try:
+        if not df_motoristas.empty:
+            df_merged = df_merged.merge(
+                df_motoristas[["codigo_pessoa", "matricula", "nome"]].rename(columns={"codigo_pessoa": "Cod_Pessoa", "matricula": "Matricula", "nome": "Nome_Motorista"}),
+                on=["Cod_Pessoa", "Matricula"], how="left"
+            )
+    except Exception:
+        pass
+    return df_merged
+
+def _preparar_frotas(df_frotas: pd.DataFrame, df_merged: pd.DataFrame) -> pd.DataFrame:
+    """Completa o cadastro de frotas com rótulo, classe, combustível e tipo de controle."""
+    df_frotas = df_frotas.copy()
+
+    # Cria a coluna "label" no dataframe de frotas para uso em seletores
+    df_frotas["label"] = df_frotas["Cod_Equip"].astype(str) + " - " + df_frotas.get("DESCRICAO_EQUIPAMENTO", "").fillna("") + " (" + df_frotas.get("PLACA", "").fillna("Sem Placa") + ")"
+
+    # Garante que a classe operacional em df_frotas está atualizada
+    classe_map = df_merged.dropna(subset=['Classe_Operacional']).groupby('Cod_Equip')['Classe_Operacional'].first().astype(object)
+    df_frotas['Classe_Operacional'] = df_frotas['Cod_Equip'].map(classe_map).fillna(df_frotas.get('Classe_Operacional'))
+
+    # Adiciona coluna de tipo de combustível se não existir
+    if 'tipo_combustivel' not in df_frotas.columns:
+        df_frotas['tipo_combustivel'] = 'Diesel S500'  # Valor padrão
+    else:
+        # Se a coluna existe, apenas preencher valores nulos com padrão
+        df_frotas['tipo_combustivel'] = df_frotas['tipo_combustivel'].fillna('Diesel S500')
+
+    # Tipo de controle (Horas ou Quilômetros): usa o gravado em frotas e classifica só o que faltar
+    tipos = df_frotas.get('tipo_controle', pd.Series(None, index=df_frotas.index, dtype=object))
+    faltando = ~tipos.isin(TIPOS_CONTROLE)
+    tipos = tipos.where(~faltando).astype(object)
+    if faltando.any():
+        vazia = pd.Series('', index=df_frotas.index)
+        tipos[faltando] = classificar_tipo_controle(
+            df_frotas.get('DESCRICAO_EQUIPAMENTO', vazia)[faltando], df_frotas['Classe_Operacional'][faltando]
+        )
+    df_frotas['Tipo_Controle'] = tipos
+    return df_frotas.drop(columns='tipo_controle', errors='ignore')
+
+def _tem_linhas_novas(conn, tabela: str, marca) -> bool:
+    """True se `tabela` tem rowid acima da marca da última carga (ou se não der para saber)."""
+    try:
+        maximo = conn.execute(f'SELECT MAX(rowid) FROM "{tabela}"').fetchone()[0]
+    except sqlite3.Error:
+        return True
+    return maximo is not None and (marca is None or maximo > marca)
+
+def _carregar_incremental(db_path: str, estado: dict):
+    """Atualiza o estado com o que mudou desde a última carga e devolve os DataFrames processados.
+
+    Linhas novas são lidas pela marca de rowid de cada tabela; linhas editadas
+    ou excluídas chegam pelos marcadores de `_registro_alteracoes`. Apenas o
+    lote lido é limpo e mesclado; a mesclagem completa só é refeita quando
+    frotas ou motoristas mudam.
+    """
+    with estado['lock']:
+        with obter_conexao(db_path) as conn:
+            # Mudanças de esquema (ALTER TABLE etc.) não deixam marcadores: relê tudo
+            versao_esquema = conn.execute("PRAGMA schema_version").fetchone()[0]
+            if versao_esquema != estado['versao_esquema']:
+                _reiniciar_estado_carga(estado)
+                estado['versao_esquema'] = versao_esquema
+            # As versões são lidas antes dos dados: a versão guardada nunca fica à frente do que foi lido
+            versoes = _ler_versoes(conn)
+            pendentes, ultima = _ler_alteracoes_pendentes(conn, estado['ultima_alteracao'])
+
+            mudancas = {}
+            for tabela in TABELAS_CARGA:
+                linhas = None if pendentes is None else pendentes.get(tabela, set())
+                versao = versoes.get(tabela) if versoes is not None else None
+                if (versao is not None and not linhas and tabela in estado['tabelas'] and estado['versoes'].get(tabela) == versao
+                        and not _tem_linhas_novas(conn, tabela, estado['marcas'].get(tabela))):
+                    # Tabela sem escritas desde a última carga: só o maior rowid é consultado
+                    mudancas[tabela] = None
+                    continue
+                try:
+                    mudancas[tabela] = _atualizar_tabela(conn, estado, tabela, linhas)
+                    estado['versoes'][tabela] = versao
+                except Exception:
+                    # A tabela de motoristas é opcional; as demais são obrigatórias
+                    if tabela != 'motoristas':
+                        raise
+                    vazio = pd.DataFrame(columns=['rowid', 'codigo_pessoa', 'matricula', 'nome'])
+                    mudancas[tabela] = None if tabela in estado['tabelas'] else (vazio, None)
+                    estado['tabelas'][tabela] = vazio
+                    estado['marcas'].pop(tabela, None)
+
+            estado['ultima_alteracao'] = ultima
+        if ultima - estado['ultima_poda'] > LIMITE_REGISTRO_ALTERACOES:
+            with conexao_escrita(db_path) as conn:
+                conn.execute("DELETE FROM _registro_alteracoes WHERE id <= ?", (ultima,))
+            estado['ultima_poda'] = ultima
+
+        # Renomeia colunas para um padrão consistente
+        df_frotas = estado['tabelas']['frotas'].drop(columns='rowid').rename(columns={"COD_EQUIPAMENTO": "Cod_Equip", "Classe Operacional": "Classe_Operacional"}, errors='ignore')
+        df_motoristas = estado['tabelas']['motoristas']
+
+        mudanca_abast = mudancas['abastecimentos']
+        releitura_total = (
+            estado['df_merged'] is None
+            or mudancas['frotas'] is not None
+            or mudancas['motoristas'] is not None
+            or (mudanca_abast is not None and mudanca_abast[1] is None)
+        )
+        if releitura_total:
+            df_merged = _mesclar_abastecimentos(estado['tabelas']['abastecimentos'], df_frotas, df_motoristas)
+            estado['df_merged'] = compactar_abastecimentos(df_merged)
+        elif mudanca_abast is not None:
+            lote, linhas_removidas = mudanca_abast
+            lote_mesclado = _mesclar_abastecimentos(lote, df_frotas, df_motoristas)
+            estado['df_merged'] = compactar_abastecimentos(_combinar_lote(estado['df_merged'], lote_mesclado, linhas_removidas))
+
+        df_merged = estado['df_merged']
+        df_frotas = _preparar_frotas(df_frotas, df_merged)
+
+        def saida(tabela):
+            df_tabela = estado['tabelas'][tabela]
+            return df_tabela.copy() if TABELAS_CARGA[tabela] else df_tabela.drop(columns='rowid')
 
-        # Adiciona coluna de tipo de combustível se não existir
-        if 'tipo_combustivel' not in df_frotas.columns:
-            df_frotas['tipo_combustivel'] = 'Diesel S500'  # Valor padrão
-        else:
-            # Se a coluna existe, apenas preencher valores nulos com padrão
-            df_frotas['tipo_combustivel'] = df_frotas['tipo_combustivel'].fillna('Diesel S500')
-
-        # Determina o tipo de controle (Horas ou Quilômetros) para cada equipamento
-        def determinar_tipo_controle(row):
-            texto_para_verificar = (
-                str(row.get('DESCRICAO_EQUIPAMENTO', '')) + ' ' + 
-                str(row.get('Classe_Operacional', ''))
-            ).upper()
-            km_keywords = ['CAMINH', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']
-            if any(p in texto_para_verificar for p in km_keywords):
-                return 'QUILÔMETROS'
-            return 'HORAS'
-        df_frotas['Tipo_Controle'] = df_frotas.apply(determinar_tipo_controle, axis=1)
-
-        # Retorna todos os dataframes processados
         return (
-            df_merged, df_frotas, df_manutencoes,
-            df_comp_regras, df_comp_historico,
-            df_checklist_regras, df_checklist_itens, df_checklist_historico
+            df_merged.copy(), df_frotas, saida('manutencoes'),
+            saida('componentes_regras'), saida('componentes_historico'),
+            saida('checklist_regras'), saida('checklist_itens'), saida('checklist_historico')
         )
 
+@cache_por_tabelas(tabelas=(*TABELAS_CARGA, 'precos_combustivel_historico'), max_entradas=2, ttl=300, mensagem="Carregando e processando dados...")
+def load_data_from_db(db_path: str, ver_frotas: int=None, ver_abast: int=None, ver_manut: int=None, ver_comp: int=None, ver_chk: int=None, incremental: bool=True):
+    """Carrega e processa todas as tabelas usadas pelo painel.
+
+    Com `incremental=True` (padrão) os DataFrames processados da carga anterior
+    são mantidos em memória e apenas as linhas inseridas, editadas ou excluídas
+    desde então são lidas e processadas. Os abastecimentos já vêm com a
+    coluna custo, e o último item é o indice_equipamentos dessas mesmas linhas.
+    """
+    if not os.path.exists(db_path):
+        st.error(f"Arquivo de banco de dados '{db_path}' não encontrado.")
+        st.stop()
+
+    estado = _obter_estado_carga(db_path)
+    try:
+        if not incremental:
+            with estado['lock']:
+                _reiniciar_estado_carga(estado)
+        dados = _carregar_incremental(db_path, estado)
+        # Calculado aqui, sobre as mesmas linhas: um custo em cache separado podia ter outro comprimento
+        dados[0]['custo'] = custo_abastecimentos(dados[0], db_path)
+        # O índice guarda posições de linhas: só vale para o df desta carga
+        return (*dados, indice_equipamentos(dados[0]))
+
     except Exception as e:
+        # Um erro no meio da atualização pode deixar o estado inconsistente
+        with estado['lock']:
+            _reiniciar_estado_carga(estado)
         st.error(f"Erro ao ler e processar o banco de dados: {e}")
         st.stop()
         # Retorna dataframes vazios em caso de erro
         return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
-                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), None)
 
                 
     
 def inserir_abastecimento(db_path: str, dados: dict) -> bool:
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO abastecimentos (
-                "Cód. Equip.", Data, "Qtde Litros", Hod_Hor_Atual,
-                Safra, "Mês", "Classe Operacional", Matricula, Cod_Pessoa
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['data'],
-            dados['qtde_litros'],
-            dados['hod_hor_atual'],
-            dados['safra'],
-            dados['mes'],
-            dados['classe_operacional'],
-            dados.get('matricula'),
-            dados.get('cod_pessoa')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = """
+                INSERT INTO abastecimentos (
+                    "Cód. Equip.", Data, "Qtde Litros", Hod_Hor_Atual,
+                    Safra, "Mês", "Classe Operacional", Matricula, Cod_Pessoa
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            valores = (
+                dados['cod_equip'],
+                _normalizar_data(dados['data']),
+                _normalizar_numero(dados['qtde_litros']),
+                _normalizar_numero(dados['hod_hor_atual']),
+                dados['safra'],
+                dados['mes'],
+                dados['classe_operacional'],
+                dados.get('matricula'),
+                dados.get('cod_pessoa')
+            )
+            cursor.execute(sql, valores)
+            atualizar_derivados_abastecimentos(conn, [dados['cod_equip']])
         return True
     except sqlite3.Error as e:
         st.error(f"Erro ao inserir dados no banco de dados: {e}")
@@ -391,13 +1419,14 @@ def inserir_abastecimento(db_path: str, dados: dict) -> bool:
 def excluir_abastecimento(db_path: str, rowid: int) -> bool:
     """Exclui um registro de abastecimento do banco de dados usando seu rowid."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        # Usar rowid é a forma mais segura de deletar uma linha específica
-        sql = "DELETE FROM abastecimentos WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT "Cód. Equip." FROM abastecimentos WHERE rowid = ?', (rowid,))
+            cods_afetados = [linha[0] for linha in cursor.fetchall()]
+            # Usar rowid é a forma mais segura de deletar uma linha específica
+            sql = "DELETE FROM abastecimentos WHERE rowid = ?"
+            cursor.execute(sql, (rowid,))
+            atualizar_derivados_abastecimentos(conn, cods_afetados)
         return True
     except sqlite3.Error as e:
         st.error(f"Erro ao excluir dados do banco de dados: {e}")
@@ -406,112 +1435,94 @@ def excluir_abastecimento(db_path: str, rowid: int) -> bool:
 def excluir_manutencao_componente(db_path: str, cod_equip: int, nome_componente: str, data: str, hod_hor: float) -> bool:
     """Exclui um registro de manutenção de componente do banco de dados usando uma combinação única de campos."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
         # Converter tipos de dados para garantir compatibilidade
         cod_equip = int(cod_equip)
         nome_componente = str(nome_componente)
         data = str(data)
         hod_hor = float(hod_hor)
         
-        # Debug: verificar todos os registros na tabela
-        cursor.execute("SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico")
-        all_records = cursor.fetchall()
-        
-        # Debug: verificar se há registros com valores similares
-        cursor.execute(
-            "SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico WHERE Cod_Equip = ?", 
-            (cod_equip,)
-        )
-        similar_records = cursor.fetchall()
-        
-        # Primeiro, vamos verificar se o registro existe
-        cursor.execute(
-            "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
             
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Nome Componente: {nome_componente} (tipo: {type(nome_componente)})
-            - Data: {data} (tipo: {type(data)})
-            - Hod_Hor: {hod_hor} (tipo: {type(hod_hor)})
+            # Debug: verificar todos os registros na tabela
+            cursor.execute("SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico")
+            all_records = cursor.fetchall()
             
-            Registros similares encontrados (mesmo Cod_Equip):
-            {similar_records}
+            # Debug: verificar se há registros com valores similares
+            cursor.execute(
+                "SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico WHERE Cod_Equip = ?", 
+                (cod_equip,)
+            )
+            similar_records = cursor.fetchall()
             
-            Todos os registros na tabela:
-            {all_records}
-            """
-            st.error(debug_info)
-            return False
-        
-        # Agora vamos excluir
-        cursor.execute(
-            "DELETE FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
+            # Primeiro, vamos verificar se o registro existe
             cursor.execute(
                 "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
                 (cod_equip, nome_componente, data, hod_hor)
             )
-            count_after = cursor.fetchone()[0]
+            count = cursor.fetchone()[0]
             
-            if count_after == 0:
-                # Forçar sincronização do banco
-                cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                cursor.execute("PRAGMA synchronous=FULL")
-                conn.commit()
+            if count == 0:
+                # Debug: retornar informações sobre o que foi encontrado
+                debug_info = f"""
+                Registro não encontrado para exclusão.
                 
-                # Salvar backup automático para persistência no Streamlit Cloud
-                backup_success, backup_msg = save_backup_to_session_state()
-                if backup_success:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Backup salvo: {backup_msg}")
-                else:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Aviso: {backup_msg}")
+                Valores procurados (após conversão):
+                - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
+                - Nome Componente: {nome_componente} (tipo: {type(nome_componente)})
+                - Data: {data} (tipo: {type(data)})
+                - Hod_Hor: {hod_hor} (tipo: {type(hod_hor)})
                 
-                conn.close()
-                return True
-            else:
-                st.error("Erro: Registro ainda existe após exclusão")
-                conn.close()
+                Registros similares encontrados (mesmo Cod_Equip):
+                {similar_records}
+                
+                Todos os registros na tabela:
+                {all_records}
+                """
+                st.error(debug_info)
                 return False
-        else:
+            
+            # Agora vamos excluir
+            cursor.execute(
+                "DELETE FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
+                (cod_equip, nome_componente, data, hod_hor)
+            )
+            rows_deleted = cursor.rowcount
+            atualizar_componentes_status(conn, [cod_equip])
+            
+            # Verificar se foi realmente excluído
+            cursor.execute(
+                "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
+                (cod_equip, nome_componente, data, hod_hor)
+            )
+            count_after = cursor.fetchone()[0]
+        
+        if rows_deleted <= 0:
             st.error("Nenhum registro foi excluído")
-            conn.close()
             return False
-            
+        if count_after != 0:
+            st.error("Erro: Registro ainda existe após exclusão")
+            return False
+        
+        # Salvar backup automático para persistência no Streamlit Cloud
+        backup_success, backup_msg = save_backup_to_session_state()
+        if backup_success:
+            st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Backup salvo: {backup_msg}")
+        else:
+            st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Aviso: {backup_msg}")
+        return True
+    
     except Exception as e:
         st.error(f"Erro ao excluir manutenção de componente do banco de dados: {e}")
         return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 def excluir_manutencao(db_path: str, rowid: int) -> bool:
     """Exclui um registro de manutenção do banco de dados usando seu rowid."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = "DELETE FROM manutencoes WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = "DELETE FROM manutencoes WHERE rowid = ?"
+            cursor.execute(sql, (rowid,))
         return True
     except sqlite3.Error as e:
         st.error(f"Erro ao excluir manutenção do banco de dados: {e}")
@@ -519,13 +1530,11 @@ def excluir_manutencao(db_path: str, rowid: int) -> bool:
 
 def inserir_manutencao(db_path: str, dados: dict) -> bool:
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = 'INSERT INTO manutencoes (Cod_Equip, Data, Tipo_Servico, Hod_Hor_No_Servico) VALUES (?, ?, ?, ?)'
-        params = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'])
-        cursor.execute(sql, params)
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = 'INSERT INTO manutencoes (Cod_Equip, Data, Tipo_Servico, Hod_Hor_No_Servico) VALUES (?, ?, ?, ?)'
+            params = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'])
+            cursor.execute(sql, params)
         return True
     except sqlite3.Error as e:
         st.error(f"Erro no banco de dados: {e}")
@@ -534,25 +1543,26 @@ def inserir_manutencao(db_path: str, dados: dict) -> bool:
 def inserir_frota(db_path: str, dados: dict) -> bool:
     """Insere um novo registro de frota no banco de dados."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO frotas (
-                COD_EQUIPAMENTO, DESCRICAO_EQUIPAMENTO, PLACA, 
-                "Classe Operacional", ATIVO, tipo_combustivel
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['descricao'],
-            dados['placa'],
-            dados['classe_op'],
-            dados['ativo'],
-            dados.get('tipo_combustivel', 'Diesel S500')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = """
+                INSERT INTO frotas (
+                    COD_EQUIPAMENTO, DESCRICAO_EQUIPAMENTO, PLACA, 
+                    "Classe Operacional", ATIVO, tipo_combustivel, tipo_controle
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """
+            valores = (
+                dados['cod_equip'],
+                dados['descricao'],
+                dados['placa'],
+                dados['classe_op'],
+                dados['ativo'],
+                dados.get('tipo_combustivel', 'Diesel S500'),
+                _tipo_controle_de(dados['descricao'], dados['classe_op'])
+            )
+            cursor.execute(sql, valores)
+            # Abastecimentos importados antes do cadastro da frota já definem sua leitura atual
+            atualizar_derivados_abastecimentos(conn, [dados['cod_equip']])
         return True
     except sqlite3.Error as e:
         st.error(f"Erro no banco de dados: {e}")
@@ -562,20 +1572,22 @@ def inserir_frota(db_path: str, dados: dict) -> bool:
 def editar_abastecimento(db_path: str, rowid: int, dados: dict) -> bool:
     """Atualiza um registro de abastecimento existente."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE abastecimentos SET
-                "Cód. Equip." = ?, Data = ?, "Qtde Litros" = ?, Hod_Hor_Atual = ?, Safra = ?, Matricula = ?, Cod_Pessoa = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'], dados['data'], dados['qtde_litros'], dados['hod_hor_atual'], dados['safra'],
-            dados.get('matricula'), dados.get('cod_pessoa'), rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = """
+                UPDATE abastecimentos SET
+                    "Cód. Equip." = ?, Data = ?, "Qtde Litros" = ?, Hod_Hor_Atual = ?, Safra = ?, Matricula = ?, Cod_Pessoa = ?
+                WHERE rowid = ?
+            """
+            valores = (
+                dados['cod_equip'], _normalizar_data(dados['data']), _normalizar_numero(dados['qtde_litros']),
+                _normalizar_numero(dados['hod_hor_atual']), dados['safra'],
+                dados.get('matricula'), dados.get('cod_pessoa'), rowid
+            )
+            cursor.execute('SELECT "Cód. Equip." FROM abastecimentos WHERE rowid = ?', (rowid,))
+            cods_afetados = [linha[0] for linha in cursor.fetchall()] + [dados['cod_equip']]
+            cursor.execute(sql, valores)
+            atualizar_derivados_abastecimentos(conn, cods_afetados)
         return True
     except sqlite3.Error as e:
         st.error(f"Erro ao atualizar abastecimento: {e}")
@@ -584,17 +1596,15 @@ def editar_abastecimento(db_path: str, rowid: int, dados: dict) -> bool:
 def editar_manutencao(db_path: str, rowid: int, dados: dict) -> bool:
     """Atualiza um registro de manutenção existente."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE manutencoes SET
-                Cod_Equip = ?, Data = ?, Tipo_Servico = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'], rowid)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = """
+                UPDATE manutencoes SET
+                    Cod_Equip = ?, Data = ?, Tipo_Servico = ?, Hod_Hor_No_Servico = ?
+                WHERE rowid = ?
+            """
+            valores = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'], rowid)
+            cursor.execute(sql, valores)
         return True
     except sqlite3.Error as e:
         st.error(f"Erro ao atualizar manutenção: {e}")
@@ -603,11643 +1613,308 @@ def editar_manutencao(db_path: str, rowid: int, dados: dict) -> bool:
 def editar_manutencao_componente(db_path: str, rowid: int, dados: dict) -> bool:
     """Edita um registro de manutenção de componente existente."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE componentes_historico 
-            SET Cod_Equip = ?, nome_componente = ?, Observacoes = ?, Data = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['componente'],
-            dados['acao'],
-            dados['data'],
-            dados['hod_hor_servico'],
-            rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = """
+                UPDATE componentes_historico 
+                SET Cod_Equip = ?, nome_componente = ?, Observacoes = ?, Data = ?, Hod_Hor_No_Servico = ?
+                WHERE rowid = ?
+            """
+            valores = (
+                dados['cod_equip'],
+                dados['componente'],
+                dados['acao'],
+                dados['data'],
+                dados['hod_hor_servico'],
+                rowid
+            )
+            cursor.execute("SELECT Cod_Equip FROM componentes_historico WHERE rowid = ?", (rowid,))
+            cods_afetados = [linha[0] for linha in cursor.fetchall()] + [dados['cod_equip']]
+            cursor.execute(sql, valores)
+            atualizar_componentes_status(conn, cods_afetados)
         return True
     except Exception as e:
         st.error(f"Erro ao editar manutenção de componente no banco de dados: {e}")
         return False
 
-def importar_abastecimentos_de_planilha(db_path: str, arquivo_carregado) -> tuple[int, int, str]:
-    """Lê uma planilha, verifica por duplicados, e insere os novos dados. Aceita opcionalmente as colunas Matricula e Cod_Pessoa."""
-    try:
-        df_novo = pd.read_excel(arquivo_carregado)
-        
-        mapa_colunas = {
-            "Cód. Equip.": "Cód. Equip.",
-            "Data": "Data",
-            "Qtde Litros": "Qtde Litros",
-            "Hod. Hor. Atual": "Hod_Hor_Atual",
-            "Safra": "Safra",
-            "Mês": "Mês",
-            "Classe Operacional": "Classe Operacional",
-            "Matricula": "Matricula",
-            "Cod_Pessoa": "Cod_Pessoa",
-        }
-        df_novo = df_novo.rename(columns={k: v for k, v in mapa_colunas.items() if k in df_novo.columns})
-
-        colunas_necessarias = ["Cód. Equip.", "Data", "Qtde Litros", "Hod_Hor_Atual", "Safra", "Mês", "Classe Operacional"]
-        colunas_opcionais = ["Matricula", "Cod_Pessoa"]
-        colunas_faltando = [col for col in colunas_necessarias if col not in df_novo.columns]
-        if colunas_faltando:
-            return 0, 0, f"Erro: Colunas não encontradas: {', '.join(colunas_faltando)}"
-        conn = sqlite3.connect(db_path)
-        df_existente = pd.read_sql_query("SELECT * FROM abastecimentos", conn)
-        
-        df_novo['Data'] = pd.to_datetime(df_novo['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        df_existente['Data'] = pd.to_datetime(df_existente['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        df_novo['chave_unica'] = df_novo['Cód. Equip.'].astype(str) + '_' + df_novo['Data'] + '_' + df_novo['Qtde Litros'].astype(str)
-        df_existente['chave_unica'] = df_existente['Cód. Equip.'].astype(str) + '_' + df_existente['Data'] + '_' + df_existente['Qtde Litros'].astype(str)
-
-        df_para_inserir = df_novo[~df_novo['chave_unica'].isin(df_existente['chave_unica'])]
-        
-        num_duplicados = len(df_novo) - len(df_para_inserir)
-
-        if df_para_inserir.empty:
-            return 0, num_duplicados, "Nenhum registo novo para importar. Todos os registos da planilha já existem na base de dados."
-
-        colunas_insert = colunas_necessarias + [c for c in colunas_opcionais if c in df_para_inserir.columns]
-        df_para_inserir_final = df_para_inserir[colunas_insert]
-        registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-        
-        cursor = conn.cursor()
-        placeholders = ", ".join(["?"] * len(colunas_insert))
-        sql = f"INSERT INTO abastecimentos ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-        cursor.executemany(sql, registros)
-        
-        conn.commit()
-        num_inseridos = cursor.rowcount
-        conn.close()
-        
-        mensagem_sucesso = f"{num_inseridos} registos novos foram importados com sucesso."
-        if num_duplicados > 0:
-            mensagem_sucesso += f" {num_duplicados} registos duplicados foram ignorados."
-            
-        return num_inseridos, num_duplicados, mensagem_sucesso
-
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação: {e}"
-
-def editar_frota(db_path: str, cod_equip: int, dados: dict) -> bool:
-    """Atualiza um registro de frota existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE frotas SET
-                DESCRICAO_EQUIPAMENTO = ?, PLACA = ?, "Classe Operacional" = ?, ATIVO = ?, tipo_combustivel = ?
-            WHERE COD_EQUIPAMENTO = ?
-        """
-        valores = (dados['descricao'], dados['placa'], dados['classe_op'], dados['ativo'], dados.get('tipo_combustivel', 'Diesel S500'), cod_equip)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar frota: {e}")
-        return False
-
-# COLE ESTE BLOCO DE CÓDIGO NO LOCAL INDICADO
-
-def get_component_rules():
-    """Busca todas as regras de componentes da base de dados."""
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-
-def add_component_rule(classe, componente, intervalo):
-    """Adiciona uma nova regra de componente à base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao) VALUES (?, ?, ?)",
-                (classe, componente, intervalo)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
+# Chave natural usada para reconhecer registros já gravados na importação de planilhas:
+# condição entre a tabela de destino (t) e a tabela temporária da importação (s)
+CHAVES_IMPORTACAO = {
+    'abastecimentos': (
+        'CAST(t."Cód. Equip." AS INTEGER) = CAST(s."Cód. Equip." AS INTEGER) '
+        'AND t.Data = s.Data AND t."Qtde Litros" IS s."Qtde Litros"'
+    ),
+    'pneus_historico': (
+        't.Cod_Equip = s.Cod_Equip AND t.posicao = s.posicao AND t.numero_fogo = s.numero_fogo '
+        'AND t.data_instalacao = s.data_instalacao AND t.hodometro_instalacao IS s.hodometro_instalacao'
+    ),
+}
 
-def add_component_rule_advanced(classe, componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca", capacidade_litros=0.0):
-    """Adiciona uma nova regra de componente com informações de lubrificante e tipo de manutenção."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, tipo_manutencao, capacidade_litros) VALUES (?, ?, ?, ?, ?, ?)",
-                (classe, componente, intervalo, lubrificante_id, tipo_manutencao, capacidade_litros)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
+def inserir_sem_duplicatas(conn, tabela: str, colunas: list, registros: list) -> tuple[int, int]:
+    """Insere em `tabela` os registros cuja chave natural ainda não existe; retorna (inseridos, duplicados).
 
-def delete_component_rule(rule_id):
-    """Remove uma regra de componente da base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM componentes_regras WHERE id_regra = ?", (rule_id,))
-            conn.commit()
-        return True, "Componente removido com sucesso."
-    except Exception as e:
-        return False, f"Erro ao remover componente: {e}"
+    Os registros passam por uma tabela temporária e a comparação é feita pelo
+    SQLite com os índices da chave, de modo que o custo depende do tamanho do
+    lote e não do histórico já gravado.
+    """
+    temporaria = f"_importacao_{tabela}"
+    lista_colunas = ", ".join(f'"{c}"' for c in colunas)
+    conn.execute(f'DROP TABLE IF EXISTS temp."{temporaria}"')
+    # Copia a afinidade das colunas de destino, para que as comparações usem os mesmos tipos
+    conn.execute(f'CREATE TEMP TABLE "{temporaria}" AS SELECT {lista_colunas} FROM main."{tabela}" WHERE 0')
+    try:
+        conn.executemany(
+            f'INSERT INTO temp."{temporaria}" ({lista_colunas}) VALUES ({", ".join(["?"] * len(colunas))})', registros
+        )
+        cursor = conn.execute(f"""
+            INSERT INTO main."{tabela}" ({lista_colunas})
+            SELECT {", ".join(f's."{c}"' for c in colunas)} FROM temp."{temporaria}" s
+            WHERE NOT EXISTS (SELECT 1 FROM main."{tabela}" t WHERE {CHAVES_IMPORTACAO[tabela]})
+        """)
+        inseridos = cursor.rowcount
+    finally:
+        conn.execute(f'DROP TABLE IF EXISTS temp."{temporaria}"')
+    return inseridos, len(registros) - inseridos
 
-def add_component_service(cod_equip, componente, data, hod_hor, obs):
-    """Adiciona um novo registo de serviço de componente ao histórico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, Observacoes) VALUES (?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
+# Linhas lidas, normalizadas e gravadas de cada vez na importação de planilhas
+LINHAS_POR_LOTE_IMPORTACAO = 5000
 
-def add_component_service_advanced(cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado=None, obs=""):
-    """Adiciona um novo registo de serviço de componente com informações detalhadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
+def ler_planilha_em_lotes(arquivo, linhas_por_lote: int = LINHAS_POR_LOTE_IMPORTACAO, pular: int = 0):
+    """Percorre a primeira aba de um .xlsx em lotes de até `linhas_por_lote` linhas.
 
-def get_component_status(cod_equip, componente):
-    """Obtém o status atual de um componente específico de um equipamento."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            # Buscar a última manutenção do componente
-            query = """
-            SELECT Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            ORDER BY Data DESC, Hod_Hor_No_Servico DESC
-            LIMIT 1
-            """
-            df_ultima = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            
-            # Buscar a regra do componente para obter o intervalo
-            query_regra = """
-            SELECT intervalo_padrao, lubrificante_id, tipo_manutencao
-            FROM componentes_regras cr
-            JOIN frotas f ON cr.classe_operacional = f."Classe Operacional"
-            WHERE f.COD_EQUIPAMENTO = ? AND cr.nome_componente = ?
-            """
-            df_regra = pd.read_sql_query(query_regra, conn, params=(cod_equip, componente))
-            
-            # Buscar o hodômetro/horímetro atual do equipamento
-            query_hod = """
-            SELECT Hod_Hor_Atual FROM abastecimentos 
-            WHERE Cod_Equip = ? 
-            ORDER BY Data DESC, Hod_Hor_Atual DESC 
-            LIMIT 1
-            """
-            df_hod = pd.read_sql_query(query_hod, conn, params=(cod_equip,))
-            
-            return df_ultima, df_regra, df_hod
-            
-    except Exception as e:
-        st.error(f"Erro ao obter status do componente: {e}")
-        return None, None, None
+    Gera tuplas (lote, total_estimado): o lote é um DataFrame com os nomes do
+    cabeçalho e o total é o número de linhas de dados declarado na planilha
+    (None se ela não o informar). Linhas totalmente vazias são ignoradas e as
+    `pular` primeiras linhas de dados não são devolvidas.
+    """
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    pasta = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        aba = pasta.worksheets[0]
+        linhas = aba.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(cabecalho)]
+        total_estimado = aba.max_row - 1 if aba.max_row else None
+
+        lote = []
+        for linha in linhas:
+            if all(v is None for v in linha):
+                continue
+            if pular > 0:
+                pular -= 1
+                continue
+            lote.append(linha[:len(colunas)])
+            if len(lote) >= linhas_por_lote:
+                yield pd.DataFrame.from_records(lote, columns=colunas), total_estimado
+                lote = []
+        if lote:
+            yield pd.DataFrame.from_records(lote, columns=colunas), total_estimado
+    finally:
+        pasta.close()
 
-def get_component_maintenance_count(cod_equip, componente):
-    """Obtém o número total de manutenções realizadas em um componente."""
+def pre_visualizar_planilha(arquivo, linhas: int = 5) -> pd.DataFrame:
+    """Lê apenas as primeiras `linhas` da planilha, para a pré-visualização."""
+    leitor = ler_planilha_em_lotes(arquivo, linhas)
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT COUNT(*) as total_manutencoes,
-                   COUNT(CASE WHEN tipo_servico = 'Troca' THEN 1 END) as total_trocas,
-                   COUNT(CASE WHEN tipo_servico = 'Remonta' THEN 1 END) as total_remontas
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            """
-            df_count = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            return df_count.iloc[0] if not df_count.empty else {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
-            
-    except Exception as e:
-        st.error(f"Erro ao obter contagem de manutenções: {e}")
-        return {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
+        lote, _ = next(leitor, (pd.DataFrame(), None))
+    finally:
+        leitor.close()
+    return lote
+
+# Colunas da planilha de abastecimentos -> colunas da tabela
+MAPA_COLUNAS_PLANILHA_ABASTECIMENTOS = {
+    "Cód. Equip.": "Cód. Equip.",
+    "Data": "Data",
+    "Qtde Litros": "Qtde Litros",
+    "Hod. Hor. Atual": "Hod_Hor_Atual",
+    "Safra": "Safra",
+    "Mês": "Mês",
+    "Classe Operacional": "Classe Operacional",
+    "Matricula": "Matricula",
+    "Cod_Pessoa": "Cod_Pessoa",
+}
+COLUNAS_PLANILHA_ABASTECIMENTOS = ["Cód. Equip.", "Data", "Qtde Litros", "Hod_Hor_Atual", "Safra", "Mês", "Classe Operacional"]
+COLUNAS_OPCIONAIS_PLANILHA_ABASTECIMENTOS = ["Matricula", "Cod_Pessoa"]
+CHAVE_PLANILHA_ABASTECIMENTOS = ['Cód. Equip.', 'Data', 'Qtde Litros']
 
-def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
-    """Edita uma manutenção de componente com informações avançadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_historico 
-                SET Cod_Equip = ?, nome_componente = ?, Data = ?, Hod_Hor_No_Servico = ?, 
-                    Observacoes = ?, tipo_servico = ?, lubrificante_utilizado = ?
-                WHERE rowid = ?
-            """, (
-                dados_editados['cod_equip'],
-                dados_editados['componente'],
-                dados_editados['data'],
-                dados_editados['hod_hor_servico'],
-                dados_editados['acao'],
-                dados_editados['tipo_servico'],
-                dados_editados['lubrificante_utilizado'],
-                rowid
-            ))
-            conn.commit()
-        return True, "Manutenção de componente atualizada com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar manutenção de componente: {e}"
+def _preparar_planilha_abastecimentos(df_novo: pd.DataFrame):
+    """Renomeia e normaliza linhas lidas de uma planilha de abastecimentos.
 
-def update_component_rule(rule_id, nome_componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca"):
-    """Atualiza uma regra de componente existente."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_regras 
-                SET nome_componente = ?, intervalo_padrao = ?, lubrificante_id = ?, tipo_manutencao = ?
-                WHERE id_regra = ?
-            """, (nome_componente, intervalo, lubrificante_id, tipo_manutencao, rule_id))
-            conn.commit()
-        return True, f"Componente '{nome_componente}' atualizado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar componente: {e}"
-
-def get_frota_combustivel(cod_equip):
-    """Obtém o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT tipo_combustivel FROM frotas WHERE COD_EQUIPAMENTO = ?", (cod_equip,))
-            result = cursor.fetchone()
-            return result[0] if result else None
-    except Exception as e:
-        st.error(f"Erro ao obter tipo de combustível: {e}")
-        return None
-
-def update_frota_combustivel(cod_equip, tipo_combustivel):
-    """Atualiza o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE COD_EQUIPAMENTO = ?", (tipo_combustivel, cod_equip))
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível: {e}"
-
-def update_classe_combustivel(classe_operacional, tipo_combustivel):
-    """Atualiza o tipo de combustível de todas as frotas de uma classe."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE \"Classe Operacional\" = ?", (tipo_combustivel, classe_operacional))
-            rows_updated = cursor.rowcount
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel} em {rows_updated} frotas da classe {classe_operacional}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível da classe: {e}"
-
-def add_tipo_combustivel_column():
-    """Adiciona a coluna tipo_combustivel à tabela frotas se ela não existir."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            # Verificar se a coluna existe
-            cursor.execute("PRAGMA table_info(frotas)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'tipo_combustivel' not in columns:
-                cursor.execute("ALTER TABLE frotas ADD COLUMN tipo_combustivel TEXT DEFAULT 'Diesel S500'")
-                conn.commit()
-                return True, "Coluna tipo_combustivel adicionada com sucesso"
-            else:
-                return True, "Coluna tipo_combustivel já existe"
-    except Exception as e:
-        return False, f"Erro ao adicionar coluna tipo_combustivel: {e}"
-
-def ensure_motoristas_schema():
-    """Garante a existência da tabela de motoristas e das colunas de vínculo em abastecimentos."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS motoristas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    codigo_pessoa TEXT,
-                    matricula TEXT UNIQUE,
-                    nome TEXT,
-                    ativo TEXT DEFAULT 'ATIVO'
-                )
-                """
-            )
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_matricula ON motoristas(matricula)")
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_codigo_pessoa ON motoristas(codigo_pessoa)")
-
-            cursor.execute("PRAGMA table_info(abastecimentos)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'Matricula' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Matricula TEXT")
-            if 'Cod_Pessoa' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Cod_Pessoa TEXT")
-            conn.commit()
-        return True, "Esquema de motoristas verificado"
-    except Exception as e:
-        return False, f"Erro ao verificar esquema de motoristas: {e}"
-
-def get_all_motoristas() -> pd.DataFrame:
-    """Retorna o DataFrame de motoristas."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM motoristas", conn)
-    except Exception:
-        return pd.DataFrame(columns=['id', 'codigo_pessoa', 'matricula', 'nome', 'ativo'])
-
-def importar_motoristas_de_planilha(db_path: str, arquivo_carregado):
-    """Importa motoristas a partir de planilha Excel. Espera colunas: Matricula, Nome e opcional Cod_Pessoa/Código Pessoa."""
-    try:
-        df_mot = pd.read_excel(arquivo_carregado)
-        df_mot.columns = [c.strip() for c in df_mot.columns]
-        renomeios = {
-            'Matrícula': 'Matricula', 'matricula': 'Matricula', 'MATRICULA': 'Matricula',
-            'Nome': 'Nome', 'nome': 'Nome', 'NOME': 'Nome',
-            'Cod_Pessoa': 'Cod_Pessoa', 'Código Pessoa': 'Cod_Pessoa', 'codigo_pessoa': 'Cod_Pessoa', 'CODIGO_PESSOA': 'Cod_Pessoa'
-        }
-        df_mot.rename(columns={k: v for k, v in renomeios.items() if k in df_mot.columns}, inplace=True)
-        obrig = ['Matricula', 'Nome']
-        faltando = [c for c in obrig if c not in df_mot.columns]
-        if faltando:
-            return 0, 0, f"Erro: Colunas obrigatórias não encontradas: {', '.join(faltando)}"
-        if 'Cod_Pessoa' not in df_mot.columns:
-            df_mot['Cod_Pessoa'] = None
-        df_mot = df_mot.dropna(subset=['Matricula', 'Nome']).copy()
-        df_mot['Matricula'] = df_mot['Matricula'].astype(str).str.strip()
-        df_mot['Nome'] = df_mot['Nome'].astype(str).str.strip()
-        df_mot['Cod_Pessoa'] = df_mot['Cod_Pessoa'].astype(str).str.strip()
-        df_mot = df_mot.drop_duplicates(subset=['Matricula'])
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            existentes = pd.read_sql_query("SELECT matricula FROM motoristas", conn)
-            set_exist = set(existentes['matricula'].astype(str)) if not existentes.empty else set()
-            df_novos = df_mot[~df_mot['Matricula'].isin(set_exist)].copy()
-            if df_novos.empty:
-                return 0, len(df_mot), "Nenhum motorista novo para importar. Todos já existem."
-            registros = [
-                (row.get('Cod_Pessoa', None), row['Matricula'], row['Nome'], 'ATIVO')
-                for _, row in df_novos.iterrows()
-            ]
-            cur = conn.cursor()
-            cur.executemany(
-                "INSERT INTO motoristas (codigo_pessoa, matricula, nome, ativo) VALUES (?, ?, ?, ?)",
-                registros
-            )
-            conn.commit()
-            inseridos = cur.rowcount if cur.rowcount is not None else len(registros)
-            duplicados = len(df_mot) - len(df_novos)
-            return inseridos, duplicados, f"{inseridos} motoristas importados com sucesso. {duplicados} já existiam."
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação de motoristas: {e}"
-    
-def ensure_pneus_schema():
-    """Garante a existência da tabela de histórico de pneus."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pneus_historico (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    Cod_Equip INTEGER,
-                    posicao TEXT,
-                    marca TEXT,
-                    modelo TEXT,
-                    numero_fogo TEXT,
-                    data_instalacao TEXT,
-                    hodometro_instalacao REAL,
-                    
-                    observacoes TEXT,
-                    status TEXT DEFAULT 'Ativo',
-                    vida_atual INTEGER DEFAULT 1
-                )
-            """)
-            # Adiciona colunas se não existirem
-            cursor.execute("PRAGMA table_info(pneus_historico)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'status' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN status TEXT DEFAULT 'Ativo'")
-            if 'vida_atual' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN vida_atual INTEGER DEFAULT 1")
-            if 'numero_fogo' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN numero_fogo TEXT")
-            conn.commit()
-        return True, "Tabela de pneus verificada"
-    except Exception as e:
-        return False, f"Erro ao criar tabela de pneus: {e}"
-
-def importar_pneus_de_planilha(db_path: str, arquivo_carregado):
-    """Importa histórico de pneus de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_pneus = pd.read_excel(arquivo_carregado)
-        df_pneus.columns = [c.strip() for c in df_pneus.columns]
-        obrig = ['Cod_Equip', 'posicao', 'marca', 'modelo', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao']
-        faltando = [c for c in obrig if c not in df_pneus.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        if 'observacoes' not in df_pneus.columns:
-            df_pneus['observacoes'] = ""
-        
-        
-        # Limpar dados e remover linhas com valores nulos obrigatórios
-        df_pneus = df_pneus.dropna(subset=['Cod_Equip', 'posicao', 'numero_fogo'])
-        
-        # Normalizar tipos de dados
-        df_pneus['Cod_Equip'] = df_pneus['Cod_Equip'].astype(str)
-        df_pneus['posicao'] = df_pneus['posicao'].astype(str).str.strip()
-        df_pneus['numero_fogo'] = df_pneus['numero_fogo'].astype(str).str.strip()
-        df_pneus['data_instalacao'] = pd.to_datetime(df_pneus['data_instalacao']).dt.strftime('%Y-%m-%d')
-        
-        # Remover duplicatas na própria planilha baseada em chave única
-        df_pneus = df_pneus.drop_duplicates(subset=['Cod_Equip', 'posicao', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Buscar registros existentes para verificar duplicatas
-            df_existente = pd.read_sql_query("SELECT Cod_Equip, posicao, numero_fogo, data_instalacao, hodometro_instalacao FROM pneus_historico", conn)
-            
-            if not df_existente.empty:
-                # Normalizar dados existentes para comparação
-                df_existente['Cod_Equip'] = df_existente['Cod_Equip'].astype(str)
-                df_existente['posicao'] = df_existente['posicao'].astype(str).str.strip()
-                df_existente['numero_fogo'] = df_existente['numero_fogo'].astype(str).str.strip()
-                df_existente['data_instalacao'] = pd.to_datetime(df_existente['data_instalacao']).dt.strftime('%Y-%m-%d')
-                
-                # Criar chaves únicas para comparação
-                df_pneus['chave_unica'] = (df_pneus['Cod_Equip'] + '_' + 
-                                          df_pneus['posicao'] + '_' + 
-                                          df_pneus['numero_fogo'] + '_' + 
-                                          df_pneus['data_instalacao'] + '_' + 
-                                          df_pneus['hodometro_instalacao'].astype(str))
-                
-                df_existente['chave_unica'] = (df_existente['Cod_Equip'] + '_' + 
-                                              df_existente['posicao'] + '_' + 
-                                              df_existente['numero_fogo'] + '_' + 
-                                              df_existente['data_instalacao'] + '_' + 
-                                              df_existente['hodometro_instalacao'].astype(str))
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_pneus[~df_pneus['chave_unica'].isin(df_existente['chave_unica'])]
-            else:
-                df_para_inserir = df_pneus
-            
-            num_duplicados = len(df_pneus) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum pneu novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = obrig + ['observacoes']
-            # Garantir que a coluna observacoes exista no DataFrame
-            if 'observacoes' not in df_para_inserir.columns:
-                df_para_inserir['observacoes'] = ''
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.fillna('').to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO pneus_historico ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} pneus novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar pneus: {e}"
-
-def get_pneus_historico(cod_equip=None):
-    """Retorna o histórico de pneus, opcionalmente filtrando por frota."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            query = "SELECT * FROM pneus_historico"
-            params = ()
-            if cod_equip:
-                query += " WHERE Cod_Equip = ?"
-                params = (cod_equip,)
-            return pd.read_sql_query(query, conn, params=params)
-    except Exception:
-        return pd.DataFrame()
-
-def ensure_precos_combustivel_schema():
-    """Garante a existência da tabela de preços por tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS precos_combustivel (
-                    tipo_combustivel TEXT PRIMARY KEY,
-                    preco REAL
-                )
-                """
-            )
-            tipos = ['Diesel S500', 'Diesel S10', 'Gasolina', 'Etanol', 'Biodiesel']
-            for t in tipos:
-                cur.execute("INSERT OR IGNORE INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?)", (t, NULL))
-            conn.commit()
-        return True, "Tabela de preços verificada"
-    except Exception as e:
-        return False, f"Erro ao verificar tabela de preços: {e}"
-
-def get_precos_combustivel_map() -> dict:
-    """Retorna um dicionário {tipo_combustivel: preco}."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            dfp = pd.read_sql_query("SELECT tipo_combustivel, preco FROM precos_combustivel", conn)
-        return {row['tipo_combustivel']: row['preco'] for _, row in dfp.iterrows()}
-    except Exception:
-        return {}
-
-def upsert_preco_combustivel(tipo: str, preco: float) -> tuple[bool, str]:
-    """Cria/atualiza preço para um tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?) ON CONFLICT(tipo_combustivel) DO UPDATE SET preco=excluded.preco",
-                (tipo, preco)
-            )
-            conn.commit()
-        return True, f"Preço atualizado para {tipo}"
-    except Exception as e:
-        return False, f"Erro ao atualizar preço: {e}"
-    
-def ensure_lubrificantes_schema():
-    """Garante a existência da tabela de lubrificantes, movimentações e almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            
-            # Tabela de lubrificantes
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT,
-                    viscosidade TEXT,
-                    quantidade_estoque REAL,
-                    unidade TEXT,
-                    observacoes TEXT
-                )
-            """)
-            
-            # Verificar e adicionar coluna 'tipo' se não existir
-            cursor.execute("PRAGMA table_info(lubrificantes)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'tipo' not in cols:
-                cursor.execute("ALTER TABLE lubrificantes ADD COLUMN tipo TEXT DEFAULT 'óleo'")
-            
-            # Tabela de almoxarifados
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifados (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    tipo TEXT DEFAULT 'fixo', -- 'fixo' para oficina, 'movel' para caminhões
-                    localizacao TEXT,
-                    responsavel TEXT,
-                    observacoes TEXT,
-                    ativo BOOLEAN DEFAULT 1
-                )
-            """)
-            
-            # Tabela de estoque por almoxarifado
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifado_estoque (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_almoxarifado INTEGER,
-                    id_lubrificante INTEGER,
-                    quantidade_estoque REAL DEFAULT 0,
-                    unidade TEXT,
-                    data_atualizacao TEXT,
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id),
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    UNIQUE(id_almoxarifado, id_lubrificante)
-                )
-            """)
-            
-            # Tabela de movimentações (atualizada para incluir almoxarifado)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes_movimentacoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_lubrificante INTEGER,
-                    id_almoxarifado INTEGER,
-                    tipo TEXT, -- 'entrada' ou 'saida'
-                    quantidade REAL,
-                    data TEXT,
-                    cod_equip INTEGER,
-                    observacoes TEXT,
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id)
-                )
-            """)
-            
-            # Verificar se a coluna id_almoxarifado existe na tabela de movimentações
-            cursor.execute("PRAGMA table_info(lubrificantes_movimentacoes)")
-            cols_mov = [c[1] for c in cursor.fetchall()]
-            if 'id_almoxarifado' not in cols_mov:
-                cursor.execute("ALTER TABLE lubrificantes_movimentacoes ADD COLUMN id_almoxarifado INTEGER")
-            
-            conn.commit()
-        return True, "Tabelas de lubrificantes e almoxarifados verificadas"
-    except Exception as e:
-        return False, f"Erro ao criar tabelas de lubrificantes: {e}"
-    
-def add_almoxarifado(nome, tipo="fixo", localizacao="", responsavel="", observacoes=""):
-    """Adiciona um novo almoxarifado."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO almoxarifados (nome, tipo, localizacao, responsavel, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, tipo, localizacao, responsavel, observacoes)
-            )
-            conn.commit()
-        return True, "Almoxarifado cadastrado com sucesso!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def get_almoxarifados():
-    """Retorna todos os almoxarifados ativos."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            df = pd.read_sql("SELECT * FROM almoxarifados WHERE ativo = 1 ORDER BY nome", conn)
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def get_estoque_por_almoxarifado(id_lubrificante):
-    """Retorna o estoque de um lubrificante distribuído por almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT 
-                a.nome as almoxarifado,
-                a.tipo,
-                COALESCE(ae.quantidade_estoque, 0) as quantidade,
-                COALESCE(ae.unidade, l.unidade) as unidade,
-                a.localizacao,
-                a.responsavel
-            FROM almoxarifados a
-            CROSS JOIN lubrificantes l
-            LEFT JOIN almoxarifado_estoque ae ON a.id = ae.id_almoxarifado AND l.id = ae.id_lubrificante
-            WHERE l.id = ? AND a.ativo = 1
-            ORDER BY a.nome
-            """
-            df = pd.read_sql(query, conn, params=(id_lubrificante,))
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def atualizar_estoque_almoxarifado(id_almoxarifado, id_lubrificante, quantidade, unidade):
-    """Atualiza o estoque de um lubrificante em um almoxarifado específico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO almoxarifado_estoque 
-                (id_almoxarifado, id_lubrificante, quantidade_estoque, unidade, data_atualizacao) 
-                VALUES (?, ?, ?, ?, ?)
-            """, (id_almoxarifado, id_lubrificante, quantidade, unidade, date.today().strftime("%Y-%m-%d")))
-            conn.commit()
-        return True, "Estoque atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao atualizar estoque: {e}"
-
-def add_lubrificante(nome, viscosidade, quantidade, unidade, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes (nome, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, viscosidade, quantidade, unidade, observacoes)
-            )
-            conn.commit()
-        return True, "Lubrificante cadastrado!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
-    """Importa lubrificantes de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_lub = pd.read_excel(arquivo_carregado)
-        df_lub.columns = [c.strip() for c in df_lub.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome': 'nome',
-            'tipo': 'tipo',
-            'viscosidade': 'viscosidade',
-            'quantidade_estoque': 'quantidade_estoque',
-            'unidade': 'unidade',
-            'observacoes': 'observacoes'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_lub.columns:
-                df_lub = df_lub.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome']
-        faltando = [c for c in obrig if c not in df_lub.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'tipo' not in df_lub.columns:
-            df_lub['tipo'] = 'óleo'
-        if 'viscosidade' not in df_lub.columns:
-            df_lub['viscosidade'] = ''
-        if 'quantidade_estoque' not in df_lub.columns:
-            df_lub['quantidade_estoque'] = 0
-        if 'unidade' not in df_lub.columns:
-            df_lub['unidade'] = 'L'
-        if 'observacoes' not in df_lub.columns:
-            df_lub['observacoes'] = ''
-        
-        # Limpar e normalizar dados
-        df_lub = df_lub.dropna(subset=['nome'])
-        df_lub['nome'] = df_lub['nome'].astype(str).str.strip()
-        df_lub['tipo'] = df_lub['tipo'].astype(str).str.strip().fillna('óleo')
-        df_lub['viscosidade'] = df_lub['viscosidade'].astype(str).str.strip().fillna('')
-        df_lub['quantidade_estoque'] = pd.to_numeric(df_lub['quantidade_estoque'], errors='coerce').fillna(0)
-        df_lub['unidade'] = df_lub['unidade'].astype(str).str.strip().fillna('L')
-        df_lub['observacoes'] = df_lub['observacoes'].astype(str).str.strip().fillna('')
-        
-        # Remover duplicatas na própria planilha baseada no nome
-        df_lub = df_lub.drop_duplicates(subset=['nome'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que a tabela existe com a coluna tipo
-            ensure_lubrificantes_schema()
-            
-            # Buscar lubrificantes existentes
-            df_existente = pd.read_sql_query("SELECT nome FROM lubrificantes", conn)
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome'] = df_existente['nome'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_lub[~df_lub['nome'].isin(df_existente['nome'])]
-            else:
-                df_para_inserir = df_lub
-            
-            num_duplicados = len(df_lub) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum lubrificante novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = ['nome', 'tipo', 'viscosidade', 'quantidade_estoque', 'unidade', 'observacoes']
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO lubrificantes ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} lubrificantes novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar lubrificantes: {e}"
-
-def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_operacional: str):
-    """Importa componentes de uma planilha Excel, verificando duplicatas e criando lubrificantes se necessário."""
-    try:
-        df_comp = pd.read_excel(arquivo_carregado)
-        df_comp.columns = [c.strip() for c in df_comp.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome_componente': 'nome_componente',
-            'componente': 'nome_componente',
-            'intervalo_padrao': 'intervalo_padrao',
-            'intervalo': 'intervalo_padrao',
-            'lubrificante_nome': 'lubrificante_nome',
-            'lubrificante': 'lubrificante_nome',
-            'capacidade_litros': 'capacidade_litros',
-            'capacidade': 'capacidade_litros'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_comp.columns:
-                df_comp = df_comp.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome_componente', 'intervalo_padrao']
-        faltando = [c for c in obrig if c not in df_comp.columns]
-        if faltando:
-            return 0, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'lubrificante_nome' not in df_comp.columns:
-            df_comp['lubrificante_nome'] = None
-        if 'capacidade_litros' not in df_comp.columns:
-            df_comp['capacidade_litros'] = 0.0
-        
-        # Limpar e normalizar dados
-        df_comp = df_comp.dropna(subset=['nome_componente'])
-        df_comp['nome_componente'] = df_comp['nome_componente'].astype(str).str.strip()
-        df_comp['intervalo_padrao'] = pd.to_numeric(df_comp['intervalo_padrao'], errors='coerce')
-        df_comp = df_comp.dropna(subset=['intervalo_padrao'])
-        df_comp['lubrificante_nome'] = df_comp['lubrificante_nome'].astype(str).str.strip().replace('nan', None)
-        df_comp['capacidade_litros'] = pd.to_numeric(df_comp['capacidade_litros'], errors='coerce').fillna(0.0)
-        
-        # Remover duplicatas na própria planilha baseada no nome do componente
-        df_comp = df_comp.drop_duplicates(subset=['nome_componente'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que as tabelas existem
-            ensure_lubrificantes_schema()
-            
-            # Verificar se a tabela componentes_regras tem a coluna capacidade_litros
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'capacidade_litros' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN capacidade_litros REAL DEFAULT 0.0")
-            
-            # Buscar componentes existentes na classe
-            df_existente = pd.read_sql_query(
-                "SELECT nome_componente FROM componentes_regras WHERE classe_operacional = ?", 
-                conn, params=(classe_operacional,)
-            )
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome_componente'] = df_existente['nome_componente'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem na classe
-                df_para_inserir = df_comp[~df_comp['nome_componente'].isin(df_existente['nome_componente'])]
-            else:
-                df_para_inserir = df_comp
-            
-            num_duplicados = len(df_comp) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, 0, "Nenhum componente novo para importar. Todos os registros da planilha já existem na classe selecionada."
-            
-            # Processar lubrificantes
-            lubrificantes_criados = 0
-            for _, row in df_para_inserir.iterrows():
-                if pd.notna(row['lubrificante_nome']) and row['lubrificante_nome']:
-                    # Verificar se o lubrificante existe
-                    df_lub_existente = pd.read_sql_query(
-                        "SELECT id FROM lubrificantes WHERE nome = ?", 
-                        conn, params=(row['lubrificante_nome'],)
-                    )
-                    
-                    if df_lub_existente.empty:
-                        # Criar lubrificante automaticamente
-                        cur = conn.cursor()
-                        cur.execute(
-                            "INSERT INTO lubrificantes (nome, tipo, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                            (row['lubrificante_nome'], 'óleo', '', 0, 'L', f'Criado automaticamente durante importação de componentes')
-                        )
-                        lubrificantes_criados += 1
-                        
-                        # Buscar o ID do lubrificante criado
-                        lub_id = cur.lastrowid
-                    else:
-                        lub_id = df_lub_existente.iloc[0]['id']
-                else:
-                    lub_id = None
-                
-                # Inserir componente
-                cur = conn.cursor()
-                cur.execute(
-                    "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, capacidade_litros) VALUES (?, ?, ?, ?, ?)",
-                    (classe_operacional, row['nome_componente'], row['intervalo_padrao'], lub_id, row['capacidade_litros'])
-                )
-            
-            conn.commit()
-            num_inseridos = len(df_para_inserir)
-            
-            mensagem_sucesso = f"{num_inseridos} componentes foram importados com sucesso para a classe '{classe_operacional}'."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} componentes duplicados foram ignorados."
-            if lubrificantes_criados > 0:
-                mensagem_sucesso += f" {lubrificantes_criados} lubrificantes foram criados automaticamente."
-            
-            return num_inseridos, num_duplicados, lubrificantes_criados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, 0, f"Erro ao importar componentes: {e}"
-
-def movimentar_lubrificante(id_lubrificante, tipo, quantidade, data, cod_equip=None, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes_movimentacoes (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes)
-            )
-            # Atualiza estoque
-            sinal = 1 if tipo == "entrada" else -1
-            cur.execute(
-                "UPDATE lubrificantes SET quantidade_estoque = quantidade_estoque + ? WHERE id = ?",
-                (sinal * quantidade, id_lubrificante)
-            )
-            conn.commit()
-        return True, "Movimentação registrada!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-@st.cache_data(ttl=120)
-def filtrar_dados(df: pd.DataFrame, opts: dict) -> pd.DataFrame:
-    # Garante que a coluna de data é do tipo datetime
-    df['Data'] = pd.to_datetime(df['Data'])
-    
-    # Filtra por período de datas
-    df_filtrado = df[
-        (df['Data'].dt.date >= opts['data_inicio']) & 
-        (df['Data'].dt.date <= opts['data_fim'])
-    ]
-    
-    # Filtra pelas outras seleções, se existirem
-    if opts.get("classes_op"):
-        df_filtrado = df_filtrado[df_filtrado["Classe_Operacional"].isin(opts["classes_op"])]
-    
-    if opts.get("safras"):
-        df_filtrado = df_filtrado[df_filtrado["Safra"].isin(opts["safras"])]
-        
-    return df_filtrado.copy()
-
-@st.cache_data(show_spinner="Calculando plano de manutenção...", ttl=300)
-def build_component_maintenance_plan(_df_frotas: pd.DataFrame, _df_abastecimentos: pd.DataFrame, _df_componentes_regras: pd.DataFrame, _df_componentes_historico: pd.DataFrame) -> pd.DataFrame:
-    latest_readings = _df_abastecimentos.sort_values('Data').groupby('Cod_Equip')['Hod_Hor_Atual'].last()
-    plan_data = []
-
-    for _, frota_row in _df_frotas.iterrows():
-        cod_equip = frota_row['Cod_Equip']
-        classe_op = frota_row.get('Classe_Operacional')
-        hod_hor_atual = latest_readings.get(cod_equip)
-
-        if pd.isna(hod_hor_atual) or not classe_op:
-            continue
-        
-        regras_da_classe = _df_componentes_regras[_df_componentes_regras['classe_operacional'] == classe_op]
-        if regras_da_classe.empty:
-            continue
-
-        unidade = 'km' if frota_row['Tipo_Controle'] == 'QUILÔMETROS' else 'h'
-        alerta_default = ALERTAS_MANUTENCAO.get(frota_row['Tipo_Controle'], {}).get('default', 500)
-        
-        record = {
-            'Cod_Equip': cod_equip, 
-            'Equipamento': frota_row.get('DESCRICAO_EQUIPAMENTO'), 
-            'Leitura_Atual': hod_hor_atual, 
-            'Unidade': unidade, 
-            'Qualquer_Alerta': False, 
-            'Alertas': []
-        }
-
-        for _, regra in regras_da_classe.iterrows():
-            componente = regra['nome_componente']
-            intervalo = regra['intervalo_padrao']
-            
-            historico_componente = _df_componentes_historico[
-                (_df_componentes_historico['Cod_Equip'] == cod_equip) &
-                (_df_componentes_historico['nome_componente'] == componente)
-            ]
-            
-            ultimo_servico_hod_hor = 0
-            if not historico_componente.empty:
-                ultimo_servico_hod_hor = historico_componente['Hod_Hor_No_Servico'].max()
-
-            prox_servico = ((ultimo_servico_hod_hor // intervalo) * intervalo) + intervalo
-            while prox_servico < hod_hor_atual:
-                prox_servico += intervalo
-
-            restante = prox_servico - hod_hor_atual
-            
-            record[f'Restante_{componente}'] = restante
-            
-            if restante <= alerta_default:
-                record['Qualquer_Alerta'] = True
-                record['Alertas'].append(componente)
-
-        plan_data.append(record)
-
-    # 🔹 Garante que sempre retorna um DataFrame com as colunas básicas
-    if not plan_data:
-        return pd.DataFrame(columns=['Cod_Equip', 'Equipamento', 'Leitura_Atual', 'Unidade', 'Qualquer_Alerta', 'Alertas'])
-
-    return pd.DataFrame(plan_data)
-
-def prever_manutencoes(df_veiculos: pd.DataFrame, df_abastecimentos: pd.DataFrame, plan_df: pd.DataFrame) -> pd.DataFrame:
-    """Estima as datas das próximas manutenções com base no uso médio."""
-    if plan_df.empty or 'Leitura_Atual' not in plan_df.columns:
-        return pd.DataFrame()
-
-    # Calcula o uso diário médio de cada veículo
-    uso_diario = {}
-    for cod_equip in df_abastecimentos['Cod_Equip'].unique():
-        dados_equip = df_abastecimentos[df_abastecimentos['Cod_Equip'] == cod_equip].sort_values('Data')
-        if len(dados_equip) > 1:
-            total_dias = (dados_equip['Data'].max() - dados_equip['Data'].min()).days
-            total_uso = dados_equip['Hod_Hor_Atual'].max() - dados_equip['Hod_Hor_Atual'].min()
-            if total_dias > 0 and total_uso > 0: # Garante que houve uso e passagem de tempo
-                uso_diario[cod_equip] = total_uso / total_dias
-
-    previsoes = []
-    servicos_nomes = [col.replace('Restante_', '') for col in plan_df.columns if 'Restante_' in col]
-
-    for _, row in plan_df.iterrows():
-        cod_equip = row['Cod_Equip']
-        uso = uso_diario.get(cod_equip)
-        if uso:
-            for nome_servico in servicos_nomes:
-                col_restante = f'Restante_{nome_servico}'
-                if col_restante in row and pd.notna(row[col_restante]):
-                    dias_para_manut = row[col_restante] / uso
-                    data_prevista = datetime.now() + pd.Timedelta(days=dias_para_manut)
-                    previsoes.append({
-                        'Equipamento': row['Equipamento'],
-                        'Manutenção': nome_servico,
-                        'Data Prevista': data_prevista.strftime('%d/%m/%Y'),
-                        'Dias Restantes': int(dias_para_manut)
-                    })
-
-    if not previsoes:
-        return pd.DataFrame()
-
-    df_previsoes = pd.DataFrame(previsoes)
-    return df_previsoes.sort_values('Dias Restantes')
-
-# ---------------------------
-# Funções para Checklists
-# ---------------------------
-
-@st.cache_data(ttl=120)
-def get_checklist_rules():
-    """Busca todas as regras de checklist do banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-    except Exception as e:
-        st.error(f"Erro ao buscar regras de checklist: {e}")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=120)
-def get_checklist_items(id_regra):
-    """Busca os itens de checklist para uma determinada regra."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query(
-                "SELECT * FROM checklist_itens WHERE id_regra = ?",
-                conn,
-                params=(id_regra,)
-            )
-    except Exception as e:
-        st.error(f"Erro ao buscar itens de checklist: {e}")
-        return pd.DataFrame()
-
-# ---------------------------
-# CRUD para Checklists
-# ---------------------------
-
-def add_checklist_rule(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra de checklist ao banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-        return True, "Regra de checklist adicionada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar regra de checklist: {e}"
-
-def add_checklist_rule_and_get_id(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra e devolve o ID criado (ou None em erro).
-
-    Mantém a função "add_checklist_rule" para compatibilidade, mas quando for
-    necessário o ID imediatamente após a criação, utilize esta função.
-    """
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-            return cursor.lastrowid
-    except Exception as e:
-        st.error(f"Erro ao adicionar regra de checklist: {e}")
-        return None
-
-def edit_checklist_rule(id_regra, classe_operacional, titulo_checklist, turno, frequencia):
-    """Edita uma regra de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_regras
-                SET classe_operacional = ?, titulo_checklist = ?, frequencia = ?, turno = ?
-                WHERE id_regra = ?
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno, id_regra)
-            )
-            conn.commit()
-        return True, "Regra de checklist atualizada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar regra de checklist: {e}"
-
-def delete_checklist_rule(id_regra):
-    """Remove uma regra de checklist e seus itens associados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_regra = ?", (id_regra,))
-            cursor.execute("DELETE FROM checklist_regras WHERE id_regra = ?", (id_regra,))
-            conn.commit()
-        return True, "Regra de checklist removida com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover regra de checklist: {e}"
-
-def add_checklist_item(id_regra, nome_item):
-    """Adiciona um novo item de checklist a uma regra existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_itens (id_regra, nome_item)
-                VALUES (?, ?)
-                """ ,
-                (id_regra, nome_item)
-            )
-            conn.commit()
-        return True, "Item de checklist adicionado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar item de checklist: {e}"
-
-def edit_checklist_item(id_item, nome_item):
-    """Edita um item de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_itens
-                SET nome_item = ?
-                WHERE id_item = ?
-                """ ,
-                (nome_item, id_item)
-            )
-            conn.commit()
-        return True, "Item de checklist atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar item de checklist: {e}"
-
-def delete_checklist_item(id_item):
-    """Remove um item de checklist."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_item = ?", (id_item,))
-            conn.commit()
-        return True, "Item de checklist removido com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover item de checklist: {e}"
-
-def save_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno, status_geral):
-    """Salva um checklist preenchido no histórico."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_historico 
-                (Cod_Equip, titulo_checklist, data_preenchimento, turno, status_geral) 
-                VALUES (?, ?, ?, ?, ?)
-                """ ,
-                (cod_equip, titulo_checklist, data_preenchimento, turno, status_geral)
-            )
-            conn.commit()
-    except Exception as e:
-        st.error(f"Erro ao salvar histórico de checklist: {e}")
-
-def delete_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno):
-    """Remove um registro do histórico de checklists usando uma combinação única de campos."""
-    try:
-        # Primeira tentativa: usar conexão direta
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)  # Converter numpy.int64 para int
-        titulo_checklist = str(titulo_checklist)
-        data_preenchimento = str(data_preenchimento)
-        turno = str(turno)
-        
-        # Debug: verificar todos os registros na tabela ANTES da exclusão
-        cursor.execute("SELECT rowid, Cod_Equip, titulo_checklist, data_preenchimento, turno FROM checklist_historico")
-        all_records_before = cursor.fetchall()
-        
-        # Tentar encontrar o registro com diferentes abordagens
-        rowid = None
-        
-        # Primeira tentativa: busca exata
-        cursor.execute(
-            "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-            (cod_equip, titulo_checklist, data_preenchimento, turno)
-        )
-        result = cursor.fetchone()
-        
-        if result:
-            rowid = result[0]
-        else:
-            # Segunda tentativa: buscar apenas por Cod_Equip, título e turno (ignorar data)
-            cursor.execute(
-                "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, turno)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                rowid = result[0]
-            else:
-                # Terceira tentativa: buscar apenas por Cod_Equip e título
-                cursor.execute(
-                    "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ?", 
-                    (cod_equip, titulo_checklist)
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    rowid = result[0]
-        
-        if rowid is None:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Título: {titulo_checklist} (tipo: {type(titulo_checklist)})
-            - Data: {data_preenchimento} (tipo: {type(data_preenchimento)})
-            - Turno: {turno} (tipo: {type(turno)})
-            
-            Todos os registros na tabela ANTES da exclusão:
-            {all_records_before}
-            """
-            conn.close()
-            return False, debug_info
-        
-        # Agora vamos excluir usando rowid
-        cursor.execute("DELETE FROM checklist_historico WHERE rowid = ?", (rowid,))
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute("SELECT COUNT(*) FROM checklist_historico WHERE rowid = ?", (rowid,))
-            count_after = cursor.fetchone()[0]
-            
-            # Verificar também se o registro ainda existe pelos outros campos
-            cursor.execute(
-                "SELECT COUNT(*) FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, data_preenchimento, turno)
-            )
-            count_by_fields = cursor.fetchone()[0]
-            
-            if count_after == 0 and count_by_fields == 0:
-                 # Verificar o total de registros na tabela
-                 cursor.execute("SELECT COUNT(*) FROM checklist_historico")
-                 total_after = cursor.fetchone()[0]
-                 
-                 # Forçar sincronização do banco
-                 cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                 cursor.execute("PRAGMA synchronous=FULL")
-                 conn.commit()
-                 
-                 success_msg = f"Checklist excluído com sucesso! ({rows_deleted} registro(s) removido(s)). Total na tabela: {total_after}"
-                 
-                 # Salvar backup automático para persistência no Streamlit Cloud
-                 backup_success, backup_msg = save_backup_to_session_state()
-                 if backup_success:
-                     success_msg += f" | Backup salvo: {backup_msg}"
-                 else:
-                     success_msg += f" | Aviso: {backup_msg}"
-                 
-                 conn.close()
-                 return True, success_msg
-            else:
-                conn.close()
-                return False, f"Erro: Registro ainda existe após exclusão. Count by rowid: {count_after}, Count by fields: {count_by_fields}"
-        else:
-            conn.close()
-            return False, "Nenhum registro foi excluído"
-                
-    except Exception as e:
-        if 'conn' in locals():
-            conn.close()
-        return False, f"Erro ao excluir checklist: {e}"
-
-def force_cache_clear():
-    """Força a limpeza completa de todos os caches."""
-    try:
-        # Limpar cache de dados
-        st.cache_data.clear()
-        
-        # Limpar cache de recursos
-        st.cache_resource.clear()
-        
-        # Forçar rerun da aplicação
-        st.rerun()
-    except Exception as e:
-        st.error(f"Erro ao limpar cache: {e}")
-
-def force_database_sync():
-    """Força a sincronização do banco de dados com o disco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Forçar commit
-        conn.commit()
-        
-        # Executar PRAGMA para forçar sincronização
-        cursor.execute("PRAGMA wal_checkpoint(FULL)")
-        cursor.execute("PRAGMA synchronous=FULL")
-        cursor.execute("PRAGMA journal_mode=DELETE")
-        
-        # Forçar commit novamente
-        conn.commit()
-        
-        # Verificar se o banco está em modo WAL
-        cursor.execute("PRAGMA journal_mode")
-        journal_mode = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        return True, f"Banco sincronizado. Modo journal: {journal_mode}"
-    except Exception as e:
-        return False, f"Erro ao sincronizar banco: {e}"
-
-def export_database_backup():
-    """Exporta todos os dados do banco para um arquivo de backup."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        
-        # Obter todas as tabelas
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        backup_data = {}
-        
-        for table in tables:
-            table_name = table[0]
-            if table_name != 'sqlite_master':
-                # Exportar dados da tabela
-                df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-                backup_data[table_name] = df.to_dict('records')
-        
-        conn.close()
-        
-        # Converter para JSON
-        backup_json = json.dumps(backup_data, default=str, indent=2)
-        
-        # Criar arquivo de download
-        backup_bytes = backup_json.encode('utf-8')
-        backup_b64 = base64.b64encode(backup_bytes).decode()
-        
-        return backup_b64, backup_data
-        
-    except Exception as e:
-        return None, f"Erro ao exportar backup: {e}"
-
-def import_database_backup(backup_data):
-    """Importa dados de backup para o banco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        for table_name, records in backup_data.items():
-            if records:  # Se a tabela tem dados
-                # Limpar tabela existente
-                cursor.execute(f"DELETE FROM {table_name}")
-                
-                # Inserir novos dados
-                for record in records:
-                    columns = list(record.keys())
-                    placeholders = ', '.join(['?' for _ in columns])
-                    values = list(record.values())
-                    
-                    # Converter tipos de dados
-                    converted_values = []
-                    for value in values:
-                        if isinstance(value, str):
-                            # Tentar converter para datetime se for uma data
-                            try:
-                                if 'T' in value or '-' in value:
-                                    dt = pd.to_datetime(value)
-                                    converted_values.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
-                                else:
-                                    converted_values.append(value)
-                            except:
-                                converted_values.append(value)
-                        else:
-                            converted_values.append(value)
-                    
-                    cursor.execute(
-                        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
-                        converted_values
-                    )
-        
-        conn.commit()
-        conn.close()
-        
-        return True, "Backup restaurado com sucesso!"
-        
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def save_backup_to_session_state():
-    """Salva backup dos dados na sessão do Streamlit."""
-    try:
-        backup_b64, backup_data = export_database_backup()
-        if backup_b64:
-            st.session_state['database_backup'] = backup_b64
-            st.session_state['backup_timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            return True, "Backup salvo na sessão"
-        else:
-            return False, "Erro ao criar backup"
-    except Exception as e:
-        return False, f"Erro ao salvar backup: {e}"
-
-def restore_backup_from_session_state():
-    """Restaura backup dos dados da sessão do Streamlit."""
-    try:
-        if 'database_backup' in st.session_state:
-            backup_b64 = st.session_state['database_backup']
-            backup_bytes = base64.b64decode(backup_b64)
-            backup_json = backup_bytes.decode('utf-8')
-            backup_data = json.loads(backup_json)
-            
-            success, message = import_database_backup(backup_data)
-            if success:
-                # Limpar cache para forçar recarregamento
-                force_cache_clear()
-                return True, message
-            else:
-                return False, message
-        else:
-            return False, "Nenhum backup encontrado na sessão"
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def auto_restore_backup_on_startup():
-    """Tenta restaurar backup automaticamente na inicialização da aplicação."""
-    try:
-        if 'database_backup' in st.session_state:
-            # Verificar se o banco está vazio
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-            num_tables = cursor.fetchone()[0]
-            conn.close()
-            
-            if num_tables == 0:
-                # Banco vazio, tentar restaurar
-                success, message = restore_backup_from_session_state()
-                if success:
-                    st.info("🔄 Backup restaurado automaticamente na inicialização!")
-                    return True
-                else:
-                    st.warning(f"⚠️ Falha na restauração automática: {message}")
-                    return False
-        return False
-    except Exception as e:
-        st.warning(f"⚠️ Erro na restauração automática: {e}")
-        return False
-
-def main():
-    
-    # Garante tema dark coerente mesmo sem config.toml
-    st.markdown(
-        """
-        <style>
-        :root {
-            --primary: #10b981;
-            --bg: #0f172a;
-            --bg2: #111827;
-            --text: #e5e7eb;
-        }
-        body { background: var(--bg); color: var(--text); }
-        section.main > div { background: var(--bg); }
-        .stApp { background: var(--bg); }
-        .st-emotion-cache-1r4qj8v, .st-emotion-cache-13ln4jf { background: var(--bg2) !important; }
-        .stButton>button { background: var(--primary); color: #062e24; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    # CSS fino para polir a UI
-    st.markdown(
-        """
-        <style>
-        /* Cartões/containers */
-        .stExpander, .stDataFrame, .stTable { border-radius: 10px !important; }
-        .stButton>button { border-radius: 8px; padding: 0.5rem 1rem; }
-        .stSelectbox, .stTextInput, .stNumberInput, .stDateInput, .stTextArea { border-radius: 8px !important; }
-        /* Métricas com mais destaque */
-        div[data-testid="stMetric"] { background: rgba(255,255,255,0.04); padding: 10px 14px; border-radius: 12px; }
-        /* Títulos com leve gradiente */
-        h1, h2, h3 { background: linear-gradient(90deg, #10b981 0%, #06b6d4 100%); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
-        /* Linhas divisórias mais suaves */
-        hr { border: none; height: 1px; background: rgba(255,255,255,0.08); }
-        /* Subtítulo de marca (opcional) */
-        .brand-subtitle { display: none; }
-        /* Centralizar e limitar logo na sidebar */
-        section[data-testid="stSidebar"] img { display: block; margin: 0.5rem auto 0.75rem; max-width: 140px; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-        st.session_state.role = None
-        st.session_state.username = ""
-
-    if not st.session_state.authenticated:
-        _ , col_central, _ = st.columns([1, 1.5, 1])
-    
-        with col_central:
-            
-            if os.path.exists("logo.png"):
-                # Cria 3 sub-colunas dentro da coluna central
-                _, logo_col, _ = st.columns([1, 2, 1])
-                with logo_col:
-                    st.image("logo.png", width=140)
-            
-            st.title("Bem vindo ao Aplicativo de Controle do PCMA")
-
-            username = st.text_input("Usuário", key="login_user")
-            password = st.text_input("Senha", type="password", key="login_pass")
-
-            if st.button("Entrar", use_container_width=True):
-                role = check_login_db(username, password)
-                if role:
-                    st.session_state.authenticated = True
-                    st.session_state.role = role
-                    st.session_state.username = username
-                    st.rerun()
-                else:
-                    st.error("Usuário ou Senha incorretos.")
-    else:
-
-        # Cabeçalho com logo + título
-        if os.path.exists("logo.png"):
-            col_logo, col_title = st.columns([1, 8])
-            with col_logo:
-                st.image("logo.png", width=80)
-            with col_title:
-                st.title("📊 Dashboard de Frotas e Abastecimentos")
-        else:
-            st.title("📊 Dashboard de Frotas e Abastecimentos")
-
-        # Tentar restaurar backup automaticamente na inicialização
-        auto_restore_backup_on_startup()
-        
-        # Adicionar coluna de tipo de combustível se não existir
-        add_tipo_combustivel_column()
-        
-        # Setup de esquemas (motoristas, preços, combustível)
-        ensure_motoristas_schema()
-        ensure_precos_combustivel_schema()
-
-        # Passo um fingerprint simples das tabelas para invalidar cache quando necessário
-        ver_frotas = int(os.path.getmtime(DB_PATH)) if os.path.exists(DB_PATH) else 0
-        df, df_frotas, df_manutencoes, df_comp_regras, df_comp_historico, df_checklist_regras, df_checklist_itens, df_checklist_historico = load_data_from_db(DB_PATH, ver_frotas, ver_frotas, ver_frotas, ver_frotas, ver_frotas)
-        
-
-        if 'intervalos_por_classe' not in st.session_state:
-            st.session_state.intervalos_por_classe = {}
-        classes_operacionais = [c for c in df_frotas['Classe_Operacional'].unique() if pd.notna(c) and str(c).strip()]
-        for classe in classes_operacionais:
-            if classe not in st.session_state.intervalos_por_classe:
-                tipo_controle = df_frotas[df_frotas['Classe_Operacional'] == classe]['Tipo_Controle'].iloc[0]
-                if tipo_controle == 'HORAS':
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 5.0,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 250},
-                            'servico_2': {'nome': 'Revisao A', 'intervalo': 100},
-                            'servico_3': {'nome': 'Revisao B', 'intervalo': 300},
-                            'servico_4': {'nome': 'Revisao C', 'intervalo': 500}
-                        }
-                    }
-                else: # QUILÔMETROS
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 2.5,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 5000},
-                            'servico_2': {'nome': 'Revisao 5k', 'intervalo': 5000},
-                            'servico_3': {'nome': 'Revisao 10k', 'intervalo': 10000},
-                            'servico_4': {'nome': 'Revisao 20k', 'intervalo': 20000}
-                        }
-                    }
-                    
-        with st.sidebar:
-            if os.path.exists("logo.png"):
-                st.image("logo.png", width=200)
-            st.write(f"Bem-vindo, **{st.session_state.username}**!")
-            if st.button("Sair"):
-                st.session_state.authenticated = False
-                st.session_state.username = "" # Limpa o username ao sair
-                st.session_state.role = None
-                st.rerun()
-            st.markdown("---")
-
-        with st.sidebar:
-            st.header("📅 Filtros (válidos apenas na aba Análise Geral)")
-
-            # Persistência de período
-            if 'filtro_data_inicio' not in st.session_state:
-                st.session_state['filtro_data_inicio'] = df['Data'].min().date()
-            if 'filtro_data_fim' not in st.session_state:
-                st.session_state['filtro_data_fim'] = df['Data'].max().date()
-
-            st.subheader("Período de Análise")
-            data_inicio = st.date_input(
-                "Data de Início", 
-                st.session_state['filtro_data_inicio'],
-                key='data_inicio'
-            )
-            data_fim = st.date_input(
-                "Data de Fim", 
-                st.session_state['filtro_data_fim'],
-                key='data_fim'
-            )
-            st.session_state['filtro_data_inicio'] = data_inicio
-            st.session_state['filtro_data_fim'] = data_fim
-            # Toggle de tema
-            st.subheader("🎨 Configurações")
-            if st.checkbox("🌓 Alternar Tema", key="theme_toggle"):
-                if st.session_state.theme == "dark":
-                    st.session_state.theme = "light"
-                else:
-                    st.session_state.theme = "dark"
-                st.rerun()
-            
-            st.markdown("---")
-            st.caption("Desenvolvido por André Luis")
-
-            with st.expander("Filtrar por Classe Operacional"):
-                classe_opts = sorted(list(df["Classe_Operacional"].dropna().unique()))
-                sel_classes = st.multiselect(
-                    "Selecione as Classes", 
-                    classe_opts, 
-                    default=classe_opts,
-                    key="sel_classes"
-                )
-
-            with st.expander("Filtrar por Safra"):
-                safra_opts = sorted(list(df["Safra"].dropna().unique()))
-                sel_safras = st.multiselect(
-                    "Selecione as Safras", 
-                    safra_opts, 
-                    default=safra_opts,
-                    key="sel_safras"
-                )
-
-            # Só aplicaremos os filtros na aba "📈 Análise Geral" (guardaremos em sessão)
-            st.session_state['filtro_opts_analise'] = {
-                "data_inicio": data_inicio,
-                "data_fim": data_fim,
-                "classes_op": sel_classes,
-                "safras": sel_safras
-            }
-    
-import streamlit as st
-import pandas as pd
-import numpy as np
-import sqlite3
-from datetime import datetime, date, timedelta
-import os
-import plotly.express as px
-import hashlib
-import json
-import base64
-import io
-
-# Configuração de tema (após set_page_config)
-if 'theme' not in st.session_state:
-    st.session_state.theme = 'dark'
-
-# Configuração de tema
-
-
-# CSS personalizado para tema claro/escuro
-def get_theme_css():
-    if st.session_state.theme == 'dark':
-        return """
-        <style>
-        .stApp {
-            background-color: #0e1117;
-            color: #fafafa;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-    else:
-        return """
-        <style>
-        .stApp {
-            background-color: #ffffff;
-            color: #262730;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-
-# Aplicar CSS do tema
-st.markdown(get_theme_css(), unsafe_allow_html=True)
-
-# Função para alternar tema
-def toggle_theme():
-    st.session_state.theme = 'light' if st.session_state.theme == 'dark' else 'dark'
-    st.rerun()
-
-# Função para exportar dados
-def export_dataframe(df, filename, file_type='csv'):
-    """Exporta DataFrame em diferentes formatos"""
-    if file_type == 'csv':
-        csv = df.to_csv(index=False, sep=';', decimal=',', encoding='utf-8-sig')
-        st.download_button(
-            label=f"📥 Download {filename}.csv",
-            data=csv,
-            file_name=f"{filename}.csv",
-            mime="text/csv",
-            help=f"Baixar {filename} em formato CSV"
-        )
-    elif file_type == 'excel':
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Dados')
-        buffer.seek(0)
-        st.download_button(
-            label=f"📥 Download {filename}.xlsx",
-            data=buffer,
-            file_name=f"{filename}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help=f"Baixar {filename} em formato Excel"
-        )
-
-# Função para mostrar loading
-def show_loading(message="Carregando dados..."):
-    """Mostra indicador de carregamento"""
-    with st.spinner(message):
-        st.info(f"⏳ {message}")
-        return True
-
-# Função para tooltip informativo
-def info_tooltip(text, help_text):
-    """Cria um elemento com tooltip informativo"""
-    col1, col2 = st.columns([20, 1])
-    with col1:
-        st.write(text)
-    with col2:
-        st.info("ℹ️", help=help_text)
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(SCRIPT_DIR, "frotas_data.db")
-
-ALERTAS_MANUTENCAO = {
-    'HORAS': { 'default': 20 },
-    'QUILÔMETROS': { 'default': 500 }
-}
-
-def formatar_brasileiro(valor: float, prefixo='') -> str:
-    """Formata um número com casas decimais para o padrão brasileiro."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{prefixo}{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-@st.cache_data(ttl=300)
-def para_csv(df: pd.DataFrame):
-    """Converte um DataFrame para CSV para download."""
-    return df.to_csv(index=False, sep=';', decimal=',').encode('utf-8-sig')
-
-def formatar_brasileiro_int(valor: float) -> str:
-    """Formata um número inteiro para o padrão brasileiro (ex: 123.456)."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{int(valor):,}".replace(",", ".")
-
-def detect_equipment_type(df_completo: pd.DataFrame) -> pd.DataFrame:
-    df = df_completo.copy()
-    df['Tipo_Controle'] = df.get('Unid', pd.Series(index=df.index)).map({'HORAS': 'HORAS', 'QUILÔMETROS': 'QUILÔMETROS'})
-    def inferir_tipo_por_classe(row):
-        if pd.notna(row['Tipo_Controle']): return row['Tipo_Controle']
-        classe = str(row.get('Classe_Operacional', '')).upper()
-        if any(p in classe for p in ['TRATOR', 'COLHEITADEIRA', 'PULVERIZADOR', 'PLANTADEIRA', 'PÁ CARREGADEIRA', 'RETROESCAVADEIRA']): return 'HORAS'
-        if any(p in classe for p in ['CAMINHÃO', 'CAMINHAO', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']): return 'QUILÔMETROS'
-        return 'HORAS'
-    df['Tipo_Controle'] = df.apply(inferir_tipo_por_classe, axis=1)
-    return df
-
-def hash_password(password):
-    """Gera um hash seguro da palavra-passe."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def check_login_db(username, password):
-    """Verifica as credenciais contra a base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("SELECT password_hash, role FROM utilizadores WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        conn.close()
-        if result:
-            password_hash_db, role = result
-            if password_hash_db == hash_password(password):
-                return role
-        return None
-    except Exception as e:
-        st.error(f"Erro ao aceder à base de dados de utilizadores: {e}")
-        return None
-
-def get_all_users():
-    """Busca todos os utilizadores da base de dados."""
-    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-        return pd.read_sql_query("SELECT id, username, role FROM utilizadores", conn)
-
-def add_user(username, password, role):
-    """Adiciona um novo utilizador à base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO utilizadores (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, hash_password(password), role)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador adicionado com sucesso!"
-    except sqlite3.IntegrityError:
-        return False, f"Erro: O nome de utilizador '{username}' já existe."
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def update_user(user_id, new_username, new_role):
-    """Atualiza o nome e a função de um utilizador."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE utilizadores SET username = ?, role = ? WHERE id = ?",
-            (new_username, new_role, user_id)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def delete_user(user_id):
-    """Remove um utilizador da base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM utilizadores WHERE id = ?", (user_id,))
-        conn.commit()
-        conn.close()
-        return True, "Utilizador removido com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-    
-# APAGUE A SUA FUNÇÃO "load_data_from_db" INTEIRA E SUBSTITUA-A POR ESTE BLOCO FINAL
-
-@st.cache_data(show_spinner="Carregando e processando dados...", ttl=300)
-def load_data_from_db(db_path: str, ver_frotas: int=None, ver_abast: int=None, ver_manut: int=None, ver_comp: int=None, ver_chk: int=None):
-    if not os.path.exists(db_path):
-        st.error(f"Arquivo de banco de dados '{db_path}' não encontrado.")
-        st.stop()
-
-    try:
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            df_abast = pd.read_sql_query("SELECT rowid, * FROM abastecimentos", conn)
-            df_frotas = pd.read_sql_query("SELECT * FROM frotas", conn)
-            df_manutencoes = pd.read_sql_query("SELECT rowid, * FROM manutencoes", conn)
-            df_comp_regras = pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-            df_comp_historico = pd.read_sql_query("SELECT rowid, * FROM componentes_historico", conn)
-            df_checklist_regras = pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-            df_checklist_itens = pd.read_sql_query("SELECT * FROM checklist_itens", conn)
-            df_checklist_historico = pd.read_sql_query("SELECT rowid, * FROM checklist_historico", conn)
-
-        # --- Início do Processamento Integrado ---
-        
-        # Renomeia colunas para um padrão consistente
-        df_abast = df_abast.rename(columns={"Cód. Equip.": "Cod_Equip", "Qtde Litros": "Qtde Litros", "Mês": "Mes", "Média": "Media"}, errors='ignore')
-        df_frotas = df_frotas.rename(columns={"COD_EQUIPAMENTO": "Cod_Equip", "Classe Operacional": "Classe_Operacional"}, errors='ignore')
-
-        # Cria o dataframe principal mesclando abastecimentos e frotas
-        df_merged = pd.merge(df_abast, df_frotas, on="Cod_Equip", how="left")
-        
-        # Trata colunas de classe operacional que podem ter vindo da mesclagem
-        if 'Classe_Operacional_x' in df_merged.columns:
-            df_merged['Classe_Operacional'] = np.where(df_merged['Classe_Operacional_x'].notna(), df_merged['Classe_Operacional_x'], df_merged['Classe_Operacional_y'])
-            df_merged.drop(columns=['Classe_Operacional_x', 'Classe_Operacional_y'], inplace=True)
-        
-        # Converte a coluna de data e cria colunas de tempo
-        df_merged["Data"] = pd.to_datetime(df_merged["Data"], errors='coerce')
-        df_merged.dropna(subset=["Data"], inplace=True)
-        df_merged["Ano"] = df_merged["Data"].dt.year
-        df_merged["AnoMes"] = df_merged["Data"].dt.to_period("M").astype(str)
-        
-        # Limpa e converte colunas numéricas
-        for col in ["Qtde Litros", "Media", "Hod_Hor_Atual"]:
-            if col in df_merged.columns:
-                series = df_merged[col].astype(str)
-                series = series.str.replace(',', '.', regex=False).str.replace('-', '', regex=False).str.strip()
-                df_merged[col] = pd.to_numeric(series, errors='coerce')
-        
-        # Cria a coluna "label" no dataframe de frotas para uso em seletores
-        df_frotas["label"] = df_frotas["Cod_Equip"].astype(str) + " - " + df_frotas.get("DESCRICAO_EQUIPAMENTO", "").fillna("") + " (" + df_frotas.get("PLACA", "").fillna("Sem Placa") + ")"
-
-        # Vincula informações de motorista aos abastecimentos (merge durante o load)
-        try:
-            with sqlite3.connect(db_path, check_same_thread=False) as conn:
-                df_motoristas = pd.read_sql_query("SELECT codigo_pessoa, matricula, nome FROM motoristas", conn)
-            if not df_motoristas.empty:
-                df_merged = df_merged.merge(
-                    df_motoristas.rename(columns={"codigo_pessoa": "Cod_Pessoa", "matricula": "Matricula", "nome": "Nome_Motorista"}),
-                    on=["Cod_Pessoa", "Matricula"], how="left"
-                )
-        except Exception:
-            pass
-        
-        # Garante que a classe operacional em df_frotas está atualizada
-        classe_map = df_merged.dropna(subset=['Classe_Operacional']).groupby('Cod_Equip')['Classe_Operacional'].first()
-        df_frotas['Classe_Operacional'] = df_frotas['Cod_Equip'].map(classe_map).fillna(df_frotas.get('Classe_Operacional'))
-
-        # Adiciona coluna de tipo de combustível se não existir
-        if 'tipo_combustivel' not in df_frotas.columns:
-            df_frotas['tipo_combustivel'] = 'Diesel S500'  # Valor padrão
-        else:
-            # Se a coluna existe, apenas preencher valores nulos com padrão
-            df_frotas['tipo_combustivel'] = df_frotas['tipo_combustivel'].fillna('Diesel S500')
-
-        # Determina o tipo de controle (Horas ou Quilômetros) para cada equipamento
-        def determinar_tipo_controle(row):
-            texto_para_verificar = (
-                str(row.get('DESCRICAO_EQUIPAMENTO', '')) + ' ' + 
-                str(row.get('Classe_Operacional', ''))
-            ).upper()
-            km_keywords = ['CAMINH', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']
-            if any(p in texto_para_verificar for p in km_keywords):
-                return 'QUILÔMETROS'
-            return 'HORAS'
-        df_frotas['Tipo_Controle'] = df_frotas.apply(determinar_tipo_controle, axis=1)
-
-        # Retorna todos os dataframes processados
-        return (
-            df_merged, df_frotas, df_manutencoes,
-            df_comp_regras, df_comp_historico,
-            df_checklist_regras, df_checklist_itens, df_checklist_historico
-        )
-
-    except Exception as e:
-        st.error(f"Erro ao ler e processar o banco de dados: {e}")
-        st.stop()
-        # Retorna dataframes vazios em caso de erro
-        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
-                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
-
-                
-    
-def inserir_abastecimento(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO abastecimentos (
-                "Cód. Equip.", Data, "Qtde Litros", Hod_Hor_Atual,
-                Safra, "Mês", "Classe Operacional", Matricula, Cod_Pessoa
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['data'],
-            dados['qtde_litros'],
-            dados['hod_hor_atual'],
-            dados['safra'],
-            dados['mes'],
-            dados['classe_operacional'],
-            dados.get('matricula'),
-            dados.get('cod_pessoa')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao inserir dados no banco de dados: {e}")
-        return False
-
-def excluir_abastecimento(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de abastecimento do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        # Usar rowid é a forma mais segura de deletar uma linha específica
-        sql = "DELETE FROM abastecimentos WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir dados do banco de dados: {e}")
-        return False
-
-def excluir_manutencao_componente(db_path: str, cod_equip: int, nome_componente: str, data: str, hod_hor: float) -> bool:
-    """Exclui um registro de manutenção de componente do banco de dados usando uma combinação única de campos."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)
-        nome_componente = str(nome_componente)
-        data = str(data)
-        hod_hor = float(hod_hor)
-        
-        # Debug: verificar todos os registros na tabela
-        cursor.execute("SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico")
-        all_records = cursor.fetchall()
-        
-        # Debug: verificar se há registros com valores similares
-        cursor.execute(
-            "SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico WHERE Cod_Equip = ?", 
-            (cod_equip,)
-        )
-        similar_records = cursor.fetchall()
-        
-        # Primeiro, vamos verificar se o registro existe
-        cursor.execute(
-            "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Nome Componente: {nome_componente} (tipo: {type(nome_componente)})
-            - Data: {data} (tipo: {type(data)})
-            - Hod_Hor: {hod_hor} (tipo: {type(hod_hor)})
-            
-            Registros similares encontrados (mesmo Cod_Equip):
-            {similar_records}
-            
-            Todos os registros na tabela:
-            {all_records}
-            """
-            st.error(debug_info)
-            return False
-        
-        # Agora vamos excluir
-        cursor.execute(
-            "DELETE FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute(
-                "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-                (cod_equip, nome_componente, data, hod_hor)
-            )
-            count_after = cursor.fetchone()[0]
-            
-            if count_after == 0:
-                # Forçar sincronização do banco
-                cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                cursor.execute("PRAGMA synchronous=FULL")
-                conn.commit()
-                
-                # Salvar backup automático para persistência no Streamlit Cloud
-                backup_success, backup_msg = save_backup_to_session_state()
-                if backup_success:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Backup salvo: {backup_msg}")
-                else:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Aviso: {backup_msg}")
-                
-                conn.close()
-                return True
-            else:
-                st.error("Erro: Registro ainda existe após exclusão")
-                conn.close()
-                return False
-        else:
-            st.error("Nenhum registro foi excluído")
-            conn.close()
-            return False
-            
-    except Exception as e:
-        st.error(f"Erro ao excluir manutenção de componente do banco de dados: {e}")
-        return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
-
-def excluir_manutencao(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de manutenção do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = "DELETE FROM manutencoes WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir manutenção do banco de dados: {e}")
-        return False
-
-def inserir_manutencao(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = 'INSERT INTO manutencoes (Cod_Equip, Data, Tipo_Servico, Hod_Hor_No_Servico) VALUES (?, ?, ?, ?)'
-        params = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'])
-        cursor.execute(sql, params)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-
-def inserir_frota(db_path: str, dados: dict) -> bool:
-    """Insere um novo registro de frota no banco de dados."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO frotas (
-                COD_EQUIPAMENTO, DESCRICAO_EQUIPAMENTO, PLACA, 
-                "Classe Operacional", ATIVO, tipo_combustivel
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['descricao'],
-            dados['placa'],
-            dados['classe_op'],
-            dados['ativo'],
-            dados.get('tipo_combustivel', 'Diesel S500')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-    
-
-def editar_abastecimento(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de abastecimento existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE abastecimentos SET
-                "Cód. Equip." = ?, Data = ?, "Qtde Litros" = ?, Hod_Hor_Atual = ?, Safra = ?, Matricula = ?, Cod_Pessoa = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'], dados['data'], dados['qtde_litros'], dados['hod_hor_atual'], dados['safra'],
-            dados.get('matricula'), dados.get('cod_pessoa'), rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar abastecimento: {e}")
-        return False
-
-def editar_manutencao(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de manutenção existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE manutencoes SET
-                Cod_Equip = ?, Data = ?, Tipo_Servico = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'], rowid)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar manutenção: {e}")
-        return False
-
-def editar_manutencao_componente(db_path: str, rowid: int, dados: dict) -> bool:
-    """Edita um registro de manutenção de componente existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE componentes_historico 
-            SET Cod_Equip = ?, nome_componente = ?, Observacoes = ?, Data = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['componente'],
-            dados['acao'],
-            dados['data'],
-            dados['hod_hor_servico'],
-            rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        st.error(f"Erro ao editar manutenção de componente no banco de dados: {e}")
-        return False
-
-def importar_abastecimentos_de_planilha(db_path: str, arquivo_carregado) -> tuple[int, int, str]:
-    """Lê uma planilha, verifica por duplicados, e insere os novos dados. Aceita opcionalmente as colunas Matricula e Cod_Pessoa."""
-    try:
-        df_novo = pd.read_excel(arquivo_carregado)
-        
-        mapa_colunas = {
-            "Cód. Equip.": "Cód. Equip.",
-            "Data": "Data",
-            "Qtde Litros": "Qtde Litros",
-            "Hod. Hor. Atual": "Hod_Hor_Atual",
-            "Safra": "Safra",
-            "Mês": "Mês",
-            "Classe Operacional": "Classe Operacional",
-            "Matricula": "Matricula",
-            "Cod_Pessoa": "Cod_Pessoa",
-        }
-        df_novo = df_novo.rename(columns={k: v for k, v in mapa_colunas.items() if k in df_novo.columns})
-
-        colunas_necessarias = ["Cód. Equip.", "Data", "Qtde Litros", "Hod_Hor_Atual", "Safra", "Mês", "Classe Operacional"]
-        colunas_opcionais = ["Matricula", "Cod_Pessoa"]
-        colunas_faltando = [col for col in colunas_necessarias if col not in df_novo.columns]
-        if colunas_faltando:
-            return 0, 0, f"Erro: Colunas não encontradas: {', '.join(colunas_faltando)}"
-        conn = sqlite3.connect(db_path)
-        df_existente = pd.read_sql_query("SELECT * FROM abastecimentos", conn)
-        
-        df_novo['Data'] = pd.to_datetime(df_novo['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        df_existente['Data'] = pd.to_datetime(df_existente['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        df_novo['chave_unica'] = df_novo['Cód. Equip.'].astype(str) + '_' + df_novo['Data'] + '_' + df_novo['Qtde Litros'].astype(str)
-        df_existente['chave_unica'] = df_existente['Cód. Equip.'].astype(str) + '_' + df_existente['Data'] + '_' + df_existente['Qtde Litros'].astype(str)
-
-        df_para_inserir = df_novo[~df_novo['chave_unica'].isin(df_existente['chave_unica'])]
-        
-        num_duplicados = len(df_novo) - len(df_para_inserir)
-
-        if df_para_inserir.empty:
-            return 0, num_duplicados, "Nenhum registo novo para importar. Todos os registos da planilha já existem na base de dados."
-
-        colunas_insert = colunas_necessarias + [c for c in colunas_opcionais if c in df_para_inserir.columns]
-        df_para_inserir_final = df_para_inserir[colunas_insert]
-        registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-        
-        cursor = conn.cursor()
-        placeholders = ", ".join(["?"] * len(colunas_insert))
-        sql = f"INSERT INTO abastecimentos ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-        cursor.executemany(sql, registros)
-        
-        conn.commit()
-        num_inseridos = cursor.rowcount
-        conn.close()
-        
-        mensagem_sucesso = f"{num_inseridos} registos novos foram importados com sucesso."
-        if num_duplicados > 0:
-            mensagem_sucesso += f" {num_duplicados} registos duplicados foram ignorados."
-            
-        return num_inseridos, num_duplicados, mensagem_sucesso
-
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação: {e}"
-
-def editar_frota(db_path: str, cod_equip: int, dados: dict) -> bool:
-    """Atualiza um registro de frota existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE frotas SET
-                DESCRICAO_EQUIPAMENTO = ?, PLACA = ?, "Classe Operacional" = ?, ATIVO = ?, tipo_combustivel = ?
-            WHERE COD_EQUIPAMENTO = ?
-        """
-        valores = (dados['descricao'], dados['placa'], dados['classe_op'], dados['ativo'], dados.get('tipo_combustivel', 'Diesel S500'), cod_equip)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar frota: {e}")
-        return False
-
-# COLE ESTE BLOCO DE CÓDIGO NO LOCAL INDICADO
-
-def get_component_rules():
-    """Busca todas as regras de componentes da base de dados."""
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-
-def add_component_rule(classe, componente, intervalo):
-    """Adiciona uma nova regra de componente à base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao) VALUES (?, ?, ?)",
-                (classe, componente, intervalo)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
-
-def add_component_rule_advanced(classe, componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca", capacidade_litros=0.0):
-    """Adiciona uma nova regra de componente com informações de lubrificante e tipo de manutenção."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, tipo_manutencao, capacidade_litros) VALUES (?, ?, ?, ?, ?, ?)",
-                (classe, componente, intervalo, lubrificante_id, tipo_manutencao, capacidade_litros)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
-
-def delete_component_rule(rule_id):
-    """Remove uma regra de componente da base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM componentes_regras WHERE id_regra = ?", (rule_id,))
-            conn.commit()
-        return True, "Componente removido com sucesso."
-    except Exception as e:
-        return False, f"Erro ao remover componente: {e}"
-
-def add_component_service(cod_equip, componente, data, hod_hor, obs):
-    """Adiciona um novo registo de serviço de componente ao histórico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, Observacoes) VALUES (?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
-
-def add_component_service_advanced(cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado=None, obs=""):
-    """Adiciona um novo registo de serviço de componente com informações detalhadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
-
-def get_component_status(cod_equip, componente):
-    """Obtém o status atual de um componente específico de um equipamento."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            # Buscar a última manutenção do componente
-            query = """
-            SELECT Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            ORDER BY Data DESC, Hod_Hor_No_Servico DESC
-            LIMIT 1
-            """
-            df_ultima = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            
-            # Buscar a regra do componente para obter o intervalo
-            query_regra = """
-            SELECT intervalo_padrao, lubrificante_id, tipo_manutencao
-            FROM componentes_regras cr
-            JOIN frotas f ON cr.classe_operacional = f."Classe Operacional"
-            WHERE f.COD_EQUIPAMENTO = ? AND cr.nome_componente = ?
-            """
-            df_regra = pd.read_sql_query(query_regra, conn, params=(cod_equip, componente))
-            
-            # Buscar o hodômetro/horímetro atual do equipamento
-            query_hod = """
-            SELECT Hod_Hor_Atual FROM abastecimentos 
-            WHERE Cod_Equip = ? 
-            ORDER BY Data DESC, Hod_Hor_Atual DESC 
-            LIMIT 1
-            """
-            df_hod = pd.read_sql_query(query_hod, conn, params=(cod_equip,))
-            
-            return df_ultima, df_regra, df_hod
-            
-    except Exception as e:
-        st.error(f"Erro ao obter status do componente: {e}")
-        return None, None, None
-
-def get_component_maintenance_count(cod_equip, componente):
-    """Obtém o número total de manutenções realizadas em um componente."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT COUNT(*) as total_manutencoes,
-                   COUNT(CASE WHEN tipo_servico = 'Troca' THEN 1 END) as total_trocas,
-                   COUNT(CASE WHEN tipo_servico = 'Remonta' THEN 1 END) as total_remontas
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            """
-            df_count = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            return df_count.iloc[0] if not df_count.empty else {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
-            
-    except Exception as e:
-        st.error(f"Erro ao obter contagem de manutenções: {e}")
-        return {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
-
-def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
-    """Edita uma manutenção de componente com informações avançadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_historico 
-                SET Cod_Equip = ?, nome_componente = ?, Data = ?, Hod_Hor_No_Servico = ?, 
-                    Observacoes = ?, tipo_servico = ?, lubrificante_utilizado = ?
-                WHERE rowid = ?
-            """, (
-                dados_editados['cod_equip'],
-                dados_editados['componente'],
-                dados_editados['data'],
-                dados_editados['hod_hor_servico'],
-                dados_editados['acao'],
-                dados_editados['tipo_servico'],
-                dados_editados['lubrificante_utilizado'],
-                rowid
-            ))
-            conn.commit()
-        return True, "Manutenção de componente atualizada com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar manutenção de componente: {e}"
-
-def update_component_rule(rule_id, nome_componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca"):
-    """Atualiza uma regra de componente existente."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_regras 
-                SET nome_componente = ?, intervalo_padrao = ?, lubrificante_id = ?, tipo_manutencao = ?
-                WHERE id_regra = ?
-            """, (nome_componente, intervalo, lubrificante_id, tipo_manutencao, rule_id))
-            conn.commit()
-        return True, f"Componente '{nome_componente}' atualizado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar componente: {e}"
-
-def get_frota_combustivel(cod_equip):
-    """Obtém o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT tipo_combustivel FROM frotas WHERE COD_EQUIPAMENTO = ?", (cod_equip,))
-            result = cursor.fetchone()
-            return result[0] if result else None
-    except Exception as e:
-        st.error(f"Erro ao obter tipo de combustível: {e}")
-        return None
-
-def update_frota_combustivel(cod_equip, tipo_combustivel):
-    """Atualiza o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE COD_EQUIPAMENTO = ?", (tipo_combustivel, cod_equip))
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível: {e}"
-
-def update_classe_combustivel(classe_operacional, tipo_combustivel):
-    """Atualiza o tipo de combustível de todas as frotas de uma classe."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE \"Classe Operacional\" = ?", (tipo_combustivel, classe_operacional))
-            rows_updated = cursor.rowcount
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel} em {rows_updated} frotas da classe {classe_operacional}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível da classe: {e}"
-
-def add_tipo_combustivel_column():
-    """Adiciona a coluna tipo_combustivel à tabela frotas se ela não existir."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            # Verificar se a coluna existe
-            cursor.execute("PRAGMA table_info(frotas)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'tipo_combustivel' not in columns:
-                cursor.execute("ALTER TABLE frotas ADD COLUMN tipo_combustivel TEXT DEFAULT 'Diesel S500'")
-                conn.commit()
-                return True, "Coluna tipo_combustivel adicionada com sucesso"
-            else:
-                return True, "Coluna tipo_combustivel já existe"
-    except Exception as e:
-        return False, f"Erro ao adicionar coluna tipo_combustivel: {e}"
-
-def ensure_motoristas_schema():
-    """Garante a existência da tabela de motoristas e das colunas de vínculo em abastecimentos."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS motoristas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    codigo_pessoa TEXT,
-                    matricula TEXT UNIQUE,
-                    nome TEXT,
-                    ativo TEXT DEFAULT 'ATIVO'
-                )
-                """
-            )
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_matricula ON motoristas(matricula)")
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_codigo_pessoa ON motoristas(codigo_pessoa)")
-
-            cursor.execute("PRAGMA table_info(abastecimentos)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'Matricula' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Matricula TEXT")
-            if 'Cod_Pessoa' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Cod_Pessoa TEXT")
-            conn.commit()
-        return True, "Esquema de motoristas verificado"
-    except Exception as e:
-        return False, f"Erro ao verificar esquema de motoristas: {e}"
-
-def get_all_motoristas() -> pd.DataFrame:
-    """Retorna o DataFrame de motoristas."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM motoristas", conn)
-    except Exception:
-        return pd.DataFrame(columns=['id', 'codigo_pessoa', 'matricula', 'nome', 'ativo'])
-
-def importar_motoristas_de_planilha(db_path: str, arquivo_carregado):
-    """Importa motoristas a partir de planilha Excel. Espera colunas: Matricula, Nome e opcional Cod_Pessoa/Código Pessoa."""
-    try:
-        df_mot = pd.read_excel(arquivo_carregado)
-        df_mot.columns = [c.strip() for c in df_mot.columns]
-        renomeios = {
-            'Matrícula': 'Matricula', 'matricula': 'Matricula', 'MATRICULA': 'Matricula',
-            'Nome': 'Nome', 'nome': 'Nome', 'NOME': 'Nome',
-            'Cod_Pessoa': 'Cod_Pessoa', 'Código Pessoa': 'Cod_Pessoa', 'codigo_pessoa': 'Cod_Pessoa', 'CODIGO_PESSOA': 'Cod_Pessoa'
-        }
-        df_mot.rename(columns={k: v for k, v in renomeios.items() if k in df_mot.columns}, inplace=True)
-        obrig = ['Matricula', 'Nome']
-        faltando = [c for c in obrig if c not in df_mot.columns]
-        if faltando:
-            return 0, 0, f"Erro: Colunas obrigatórias não encontradas: {', '.join(faltando)}"
-        if 'Cod_Pessoa' not in df_mot.columns:
-            df_mot['Cod_Pessoa'] = None
-        df_mot = df_mot.dropna(subset=['Matricula', 'Nome']).copy()
-        df_mot['Matricula'] = df_mot['Matricula'].astype(str).str.strip()
-        df_mot['Nome'] = df_mot['Nome'].astype(str).str.strip()
-        df_mot['Cod_Pessoa'] = df_mot['Cod_Pessoa'].astype(str).str.strip()
-        df_mot = df_mot.drop_duplicates(subset=['Matricula'])
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            existentes = pd.read_sql_query("SELECT matricula FROM motoristas", conn)
-            set_exist = set(existentes['matricula'].astype(str)) if not existentes.empty else set()
-            df_novos = df_mot[~df_mot['Matricula'].isin(set_exist)].copy()
-            if df_novos.empty:
-                return 0, len(df_mot), "Nenhum motorista novo para importar. Todos já existem."
-            registros = [
-                (row.get('Cod_Pessoa', None), row['Matricula'], row['Nome'], 'ATIVO')
-                for _, row in df_novos.iterrows()
-            ]
-            cur = conn.cursor()
-            cur.executemany(
-                "INSERT INTO motoristas (codigo_pessoa, matricula, nome, ativo) VALUES (?, ?, ?, ?)",
-                registros
-            )
-            conn.commit()
-            inseridos = cur.rowcount if cur.rowcount is not None else len(registros)
-            duplicados = len(df_mot) - len(df_novos)
-            return inseridos, duplicados, f"{inseridos} motoristas importados com sucesso. {duplicados} já existiam."
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação de motoristas: {e}"
-    
-def ensure_pneus_schema():
-    """Garante a existência da tabela de histórico de pneus."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pneus_historico (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    Cod_Equip INTEGER,
-                    posicao TEXT,
-                    marca TEXT,
-                    modelo TEXT,
-                    data_instalacao TEXT,
-                    hodometro_instalacao REAL,
-                    
-                    observacoes TEXT,
-                    status TEXT DEFAULT 'Ativo',
-                    vida_atual INTEGER DEFAULT 1,
-                    numero_fogo TEXT,
-                    causa_sucateamento TEXT,
-                    data_sucateamento TEXT
-                )
-            """)
-            # Adiciona colunas se não existirem
-            cursor.execute("PRAGMA table_info(pneus_historico)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'status' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN status TEXT DEFAULT 'Ativo'")
-            if 'vida_atual' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN vida_atual INTEGER DEFAULT 1")
-            if 'numero_fogo' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN numero_fogo TEXT")
-            if 'causa_sucateamento' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN causa_sucateamento TEXT")
-            if 'data_sucateamento' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN data_sucateamento TEXT")
-            conn.commit()
-        return True, "Tabela de pneus verificada"
-    except Exception as e:
-        return False, f"Erro ao criar tabela de pneus: {e}"
-
-def importar_pneus_de_planilha(db_path: str, arquivo_carregado):
-    """Importa histórico de pneus de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_pneus = pd.read_excel(arquivo_carregado)
-        df_pneus.columns = [c.strip() for c in df_pneus.columns]
-        obrig = ['Cod_Equip', 'posicao', 'marca', 'modelo', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao']
-        faltando = [c for c in obrig if c not in df_pneus.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        if 'observacoes' not in df_pneus.columns:
-            df_pneus['observacoes'] = ""
-        
-        
-        # Limpar dados e remover linhas com valores nulos obrigatórios
-        df_pneus = df_pneus.dropna(subset=['Cod_Equip', 'posicao', 'numero_fogo'])
-        
-        # Normalizar tipos de dados
-        df_pneus['Cod_Equip'] = df_pneus['Cod_Equip'].astype(str)
-        df_pneus['posicao'] = df_pneus['posicao'].astype(str).str.strip()
-        df_pneus['numero_fogo'] = df_pneus['numero_fogo'].astype(str).str.strip()
-        df_pneus['data_instalacao'] = pd.to_datetime(df_pneus['data_instalacao']).dt.strftime('%Y-%m-%d')
-        
-        # Remover duplicatas na própria planilha baseada em chave única
-        df_pneus = df_pneus.drop_duplicates(subset=['Cod_Equip', 'posicao', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Buscar registros existentes para verificar duplicatas
-            df_existente = pd.read_sql_query("SELECT Cod_Equip, posicao, numero_fogo, data_instalacao, hodometro_instalacao FROM pneus_historico", conn)
-            
-            if not df_existente.empty:
-                # Normalizar dados existentes para comparação
-                df_existente['Cod_Equip'] = df_existente['Cod_Equip'].astype(str)
-                df_existente['posicao'] = df_existente['posicao'].astype(str).str.strip()
-                df_existente['numero_fogo'] = df_existente['numero_fogo'].astype(str).str.strip()
-                df_existente['data_instalacao'] = pd.to_datetime(df_existente['data_instalacao']).dt.strftime('%Y-%m-%d')
-                
-                # Criar chaves únicas para comparação
-                df_pneus['chave_unica'] = (df_pneus['Cod_Equip'] + '_' + 
-                                          df_pneus['posicao'] + '_' + 
-                                          df_pneus['numero_fogo'] + '_' + 
-                                          df_pneus['data_instalacao'] + '_' + 
-                                          df_pneus['hodometro_instalacao'].astype(str))
-                
-                df_existente['chave_unica'] = (df_existente['Cod_Equip'] + '_' + 
-                                              df_existente['posicao'] + '_' + 
-                                              df_existente['numero_fogo'] + '_' + 
-                                              df_existente['data_instalacao'] + '_' + 
-                                              df_existente['hodometro_instalacao'].astype(str))
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_pneus[~df_pneus['chave_unica'].isin(df_existente['chave_unica'])]
-            else:
-                df_para_inserir = df_pneus
-            
-            num_duplicados = len(df_pneus) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum pneu novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = obrig + ['observacoes']
-            # Garantir que a coluna observacoes exista no DataFrame
-            if 'observacoes' not in df_para_inserir.columns:
-                df_para_inserir['observacoes'] = ''
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.fillna('').to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO pneus_historico ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} pneus novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar pneus: {e}"
-
-def get_pneus_historico(cod_equip=None):
-    """Retorna o histórico de pneus, opcionalmente filtrando por frota."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            query = "SELECT * FROM pneus_historico"
-            params = ()
-            if cod_equip:
-                query += " WHERE Cod_Equip = ?"
-                params = (cod_equip,)
-            return pd.read_sql_query(query, conn, params=params)
-    except Exception:
-        return pd.DataFrame()
-
-def ensure_precos_combustivel_schema():
-    """Garante a existência da tabela de preços por tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS precos_combustivel (
-                    tipo_combustivel TEXT PRIMARY KEY,
-                    preco REAL
-                )
-                """
-            )
-            tipos = ['Diesel S500', 'Diesel S10', 'Gasolina', 'Etanol', 'Biodiesel']
-            for t in tipos:
-                cur.execute("INSERT OR IGNORE INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?)", (t, NULL))
-            conn.commit()
-        return True, "Tabela de preços verificada"
-    except Exception as e:
-        return False, f"Erro ao verificar tabela de preços: {e}"
-
-def get_precos_combustivel_map() -> dict:
-    """Retorna um dicionário {tipo_combustivel: preco}."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            dfp = pd.read_sql_query("SELECT tipo_combustivel, preco FROM precos_combustivel", conn)
-        return {row['tipo_combustivel']: row['preco'] for _, row in dfp.iterrows()}
-    except Exception:
-        return {}
-
-def upsert_preco_combustivel(tipo: str, preco: float) -> tuple[bool, str]:
-    """Cria/atualiza preço para um tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?) ON CONFLICT(tipo_combustivel) DO UPDATE SET preco=excluded.preco",
-                (tipo, preco)
-            )
-            conn.commit()
-        return True, f"Preço atualizado para {tipo}"
-    except Exception as e:
-        return False, f"Erro ao atualizar preço: {e}"
-    
-def ensure_lubrificantes_schema():
-    """Garante a existência da tabela de lubrificantes, movimentações e almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            
-            # Tabela de lubrificantes
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT,
-                    viscosidade TEXT,
-                    quantidade_estoque REAL,
-                    unidade TEXT,
-                    observacoes TEXT
-                )
-            """)
-            
-            # Verificar e adicionar coluna 'tipo' se não existir
-            cursor.execute("PRAGMA table_info(lubrificantes)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'tipo' not in cols:
-                cursor.execute("ALTER TABLE lubrificantes ADD COLUMN tipo TEXT DEFAULT 'óleo'")
-            
-            # Tabela de almoxarifados
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifados (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    tipo TEXT DEFAULT 'fixo', -- 'fixo' para oficina, 'movel' para caminhões
-                    localizacao TEXT,
-                    responsavel TEXT,
-                    observacoes TEXT,
-                    ativo BOOLEAN DEFAULT 1
-                )
-            """)
-            
-            # Tabela de estoque por almoxarifado
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifado_estoque (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_almoxarifado INTEGER,
-                    id_lubrificante INTEGER,
-                    quantidade_estoque REAL DEFAULT 0,
-                    unidade TEXT,
-                    data_atualizacao TEXT,
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id),
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    UNIQUE(id_almoxarifado, id_lubrificante)
-                )
-            """)
-            
-            # Tabela de movimentações (atualizada para incluir almoxarifado)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes_movimentacoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_lubrificante INTEGER,
-                    id_almoxarifado INTEGER,
-                    tipo TEXT, -- 'entrada' ou 'saida'
-                    quantidade REAL,
-                    data TEXT,
-                    cod_equip INTEGER,
-                    observacoes TEXT,
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id)
-                )
-            """)
-            
-            # Verificar se a coluna id_almoxarifado existe na tabela de movimentações
-            cursor.execute("PRAGMA table_info(lubrificantes_movimentacoes)")
-            cols_mov = [c[1] for c in cursor.fetchall()]
-            if 'id_almoxarifado' not in cols_mov:
-                cursor.execute("ALTER TABLE lubrificantes_movimentacoes ADD COLUMN id_almoxarifado INTEGER")
-            
-            conn.commit()
-        return True, "Tabelas de lubrificantes e almoxarifados verificadas"
-    except Exception as e:
-        return False, f"Erro ao criar tabelas de lubrificantes: {e}"
-    
-def add_almoxarifado(nome, tipo="fixo", localizacao="", responsavel="", observacoes=""):
-    """Adiciona um novo almoxarifado."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO almoxarifados (nome, tipo, localizacao, responsavel, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, tipo, localizacao, responsavel, observacoes)
-            )
-            conn.commit()
-        return True, "Almoxarifado cadastrado com sucesso!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def get_almoxarifados():
-    """Retorna todos os almoxarifados ativos."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            df = pd.read_sql("SELECT * FROM almoxarifados WHERE ativo = 1 ORDER BY nome", conn)
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def get_estoque_por_almoxarifado(id_lubrificante):
-    """Retorna o estoque de um lubrificante distribuído por almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT 
-                a.nome as almoxarifado,
-                a.tipo,
-                COALESCE(ae.quantidade_estoque, 0) as quantidade,
-                COALESCE(ae.unidade, l.unidade) as unidade,
-                a.localizacao,
-                a.responsavel
-            FROM almoxarifados a
-            CROSS JOIN lubrificantes l
-            LEFT JOIN almoxarifado_estoque ae ON a.id = ae.id_almoxarifado AND l.id = ae.id_lubrificante
-            WHERE l.id = ? AND a.ativo = 1
-            ORDER BY a.nome
-            """
-            df = pd.read_sql(query, conn, params=(id_lubrificante,))
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def atualizar_estoque_almoxarifado(id_almoxarifado, id_lubrificante, quantidade, unidade):
-    """Atualiza o estoque de um lubrificante em um almoxarifado específico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO almoxarifado_estoque 
-                (id_almoxarifado, id_lubrificante, quantidade_estoque, unidade, data_atualizacao) 
-                VALUES (?, ?, ?, ?, ?)
-            """, (id_almoxarifado, id_lubrificante, quantidade, unidade, date.today().strftime("%Y-%m-%d")))
-            conn.commit()
-        return True, "Estoque atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao atualizar estoque: {e}"
-
-def add_lubrificante(nome, viscosidade, quantidade, unidade, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes (nome, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, viscosidade, quantidade, unidade, observacoes)
-            )
-            conn.commit()
-        return True, "Lubrificante cadastrado!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
-    """Importa lubrificantes de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_lub = pd.read_excel(arquivo_carregado)
-        df_lub.columns = [c.strip() for c in df_lub.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome': 'nome',
-            'tipo': 'tipo',
-            'viscosidade': 'viscosidade',
-            'quantidade_estoque': 'quantidade_estoque',
-            'unidade': 'unidade',
-            'observacoes': 'observacoes'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_lub.columns:
-                df_lub = df_lub.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome']
-        faltando = [c for c in obrig if c not in df_lub.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'tipo' not in df_lub.columns:
-            df_lub['tipo'] = 'óleo'
-        if 'viscosidade' not in df_lub.columns:
-            df_lub['viscosidade'] = ''
-        if 'quantidade_estoque' not in df_lub.columns:
-            df_lub['quantidade_estoque'] = 0
-        if 'unidade' not in df_lub.columns:
-            df_lub['unidade'] = 'L'
-        if 'observacoes' not in df_lub.columns:
-            df_lub['observacoes'] = ''
-        
-        # Limpar e normalizar dados
-        df_lub = df_lub.dropna(subset=['nome'])
-        df_lub['nome'] = df_lub['nome'].astype(str).str.strip()
-        df_lub['tipo'] = df_lub['tipo'].astype(str).str.strip().fillna('óleo')
-        df_lub['viscosidade'] = df_lub['viscosidade'].astype(str).str.strip().fillna('')
-        df_lub['quantidade_estoque'] = pd.to_numeric(df_lub['quantidade_estoque'], errors='coerce').fillna(0)
-        df_lub['unidade'] = df_lub['unidade'].astype(str).str.strip().fillna('L')
-        df_lub['observacoes'] = df_lub['observacoes'].astype(str).str.strip().fillna('')
-        
-        # Remover duplicatas na própria planilha baseada no nome
-        df_lub = df_lub.drop_duplicates(subset=['nome'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que a tabela existe com a coluna tipo
-            ensure_lubrificantes_schema()
-            
-            # Buscar lubrificantes existentes
-            df_existente = pd.read_sql_query("SELECT nome FROM lubrificantes", conn)
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome'] = df_existente['nome'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_lub[~df_lub['nome'].isin(df_existente['nome'])]
-            else:
-                df_para_inserir = df_lub
-            
-            num_duplicados = len(df_lub) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum lubrificante novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = ['nome', 'tipo', 'viscosidade', 'quantidade_estoque', 'unidade', 'observacoes']
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO lubrificantes ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} lubrificantes novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar lubrificantes: {e}"
-
-def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_operacional: str):
-    """Importa componentes de uma planilha Excel, verificando duplicatas e criando lubrificantes se necessário."""
-    try:
-        df_comp = pd.read_excel(arquivo_carregado)
-        df_comp.columns = [c.strip() for c in df_comp.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome_componente': 'nome_componente',
-            'componente': 'nome_componente',
-            'intervalo_padrao': 'intervalo_padrao',
-            'intervalo': 'intervalo_padrao',
-            'lubrificante_nome': 'lubrificante_nome',
-            'lubrificante': 'lubrificante_nome',
-            'capacidade_litros': 'capacidade_litros',
-            'capacidade': 'capacidade_litros'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_comp.columns:
-                df_comp = df_comp.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome_componente', 'intervalo_padrao']
-        faltando = [c for c in obrig if c not in df_comp.columns]
-        if faltando:
-            return 0, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'lubrificante_nome' not in df_comp.columns:
-            df_comp['lubrificante_nome'] = None
-        if 'capacidade_litros' not in df_comp.columns:
-            df_comp['capacidade_litros'] = 0.0
-        
-        # Limpar e normalizar dados
-        df_comp = df_comp.dropna(subset=['nome_componente'])
-        df_comp['nome_componente'] = df_comp['nome_componente'].astype(str).str.strip()
-        df_comp['intervalo_padrao'] = pd.to_numeric(df_comp['intervalo_padrao'], errors='coerce')
-        df_comp = df_comp.dropna(subset=['intervalo_padrao'])
-        df_comp['lubrificante_nome'] = df_comp['lubrificante_nome'].astype(str).str.strip().replace('nan', None)
-        df_comp['capacidade_litros'] = pd.to_numeric(df_comp['capacidade_litros'], errors='coerce').fillna(0.0)
-        
-        # Remover duplicatas na própria planilha baseada no nome do componente
-        df_comp = df_comp.drop_duplicates(subset=['nome_componente'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que as tabelas existem
-            ensure_lubrificantes_schema()
-            
-            # Verificar se a tabela componentes_regras tem a coluna capacidade_litros
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'capacidade_litros' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN capacidade_litros REAL DEFAULT 0.0")
-            
-            # Buscar componentes existentes na classe
-            df_existente = pd.read_sql_query(
-                "SELECT nome_componente FROM componentes_regras WHERE classe_operacional = ?", 
-                conn, params=(classe_operacional,)
-            )
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome_componente'] = df_existente['nome_componente'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem na classe
-                df_para_inserir = df_comp[~df_comp['nome_componente'].isin(df_existente['nome_componente'])]
-            else:
-                df_para_inserir = df_comp
-            
-            num_duplicados = len(df_comp) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, 0, "Nenhum componente novo para importar. Todos os registros da planilha já existem na classe selecionada."
-            
-            # Processar lubrificantes
-            lubrificantes_criados = 0
-            for _, row in df_para_inserir.iterrows():
-                if pd.notna(row['lubrificante_nome']) and row['lubrificante_nome']:
-                    # Verificar se o lubrificante existe
-                    df_lub_existente = pd.read_sql_query(
-                        "SELECT id FROM lubrificantes WHERE nome = ?", 
-                        conn, params=(row['lubrificante_nome'],)
-                    )
-                    
-                    if df_lub_existente.empty:
-                        # Criar lubrificante automaticamente
-                        cur = conn.cursor()
-                        cur.execute(
-                            "INSERT INTO lubrificantes (nome, tipo, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                            (row['lubrificante_nome'], 'óleo', '', 0, 'L', f'Criado automaticamente durante importação de componentes')
-                        )
-                        lubrificantes_criados += 1
-                        
-                        # Buscar o ID do lubrificante criado
-                        lub_id = cur.lastrowid
-                    else:
-                        lub_id = df_lub_existente.iloc[0]['id']
-                else:
-                    lub_id = None
-                
-                # Inserir componente
-                cur = conn.cursor()
-                cur.execute(
-                    "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, capacidade_litros) VALUES (?, ?, ?, ?, ?)",
-                    (classe_operacional, row['nome_componente'], row['intervalo_padrao'], lub_id, row['capacidade_litros'])
-                )
-            
-            conn.commit()
-            num_inseridos = len(df_para_inserir)
-            
-            mensagem_sucesso = f"{num_inseridos} componentes foram importados com sucesso para a classe '{classe_operacional}'."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} componentes duplicados foram ignorados."
-            if lubrificantes_criados > 0:
-                mensagem_sucesso += f" {lubrificantes_criados} lubrificantes foram criados automaticamente."
-            
-            return num_inseridos, num_duplicados, lubrificantes_criados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, 0, f"Erro ao importar componentes: {e}"
-
-def movimentar_lubrificante(id_lubrificante, tipo, quantidade, data, cod_equip=None, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes_movimentacoes (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes)
-            )
-            # Atualiza estoque
-            sinal = 1 if tipo == "entrada" else -1
-            cur.execute(
-                "UPDATE lubrificantes SET quantidade_estoque = quantidade_estoque + ? WHERE id = ?",
-                (sinal * quantidade, id_lubrificante)
-            )
-            conn.commit()
-        return True, "Movimentação registrada!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-@st.cache_data(ttl=120)
-def filtrar_dados(df: pd.DataFrame, opts: dict) -> pd.DataFrame:
-    # Garante que a coluna de data é do tipo datetime
-    df['Data'] = pd.to_datetime(df['Data'])
-    
-    # Filtra por período de datas
-    df_filtrado = df[
-        (df['Data'].dt.date >= opts['data_inicio']) & 
-        (df['Data'].dt.date <= opts['data_fim'])
-    ]
-    
-    # Filtra pelas outras seleções, se existirem
-    if opts.get("classes_op"):
-        df_filtrado = df_filtrado[df_filtrado["Classe_Operacional"].isin(opts["classes_op"])]
-    
-    if opts.get("safras"):
-        df_filtrado = df_filtrado[df_filtrado["Safra"].isin(opts["safras"])]
-        
-    return df_filtrado.copy()
-
-@st.cache_data(show_spinner="Calculando plano de manutenção...", ttl=300)
-def build_component_maintenance_plan(_df_frotas: pd.DataFrame, _df_abastecimentos: pd.DataFrame, _df_componentes_regras: pd.DataFrame, _df_componentes_historico: pd.DataFrame) -> pd.DataFrame:
-    latest_readings = _df_abastecimentos.sort_values('Data').groupby('Cod_Equip')['Hod_Hor_Atual'].last()
-    plan_data = []
-
-    for _, frota_row in _df_frotas.iterrows():
-        cod_equip = frota_row['Cod_Equip']
-        classe_op = frota_row.get('Classe_Operacional')
-        hod_hor_atual = latest_readings.get(cod_equip)
-
-        if pd.isna(hod_hor_atual) or not classe_op:
-            continue
-        
-        regras_da_classe = _df_componentes_regras[_df_componentes_regras['classe_operacional'] == classe_op]
-        if regras_da_classe.empty:
-            continue
-
-        unidade = 'km' if frota_row['Tipo_Controle'] == 'QUILÔMETROS' else 'h'
-        alerta_default = ALERTAS_MANUTENCAO.get(frota_row['Tipo_Controle'], {}).get('default', 500)
-        
-        record = {
-            'Cod_Equip': cod_equip, 
-            'Equipamento': frota_row.get('DESCRICAO_EQUIPAMENTO'), 
-            'Leitura_Atual': hod_hor_atual, 
-            'Unidade': unidade, 
-            'Qualquer_Alerta': False, 
-            'Alertas': []
-        }
-
-        for _, regra in regras_da_classe.iterrows():
-            componente = regra['nome_componente']
-            intervalo = regra['intervalo_padrao']
-            
-            historico_componente = _df_componentes_historico[
-                (_df_componentes_historico['Cod_Equip'] == cod_equip) &
-                (_df_componentes_historico['nome_componente'] == componente)
-            ]
-            
-            ultimo_servico_hod_hor = 0
-            if not historico_componente.empty:
-                ultimo_servico_hod_hor = historico_componente['Hod_Hor_No_Servico'].max()
-
-            prox_servico = ((ultimo_servico_hod_hor // intervalo) * intervalo) + intervalo
-            while prox_servico < hod_hor_atual:
-                prox_servico += intervalo
-
-            restante = prox_servico - hod_hor_atual
-            
-            record[f'Restante_{componente}'] = restante
-            
-            if restante <= alerta_default:
-                record['Qualquer_Alerta'] = True
-                record['Alertas'].append(componente)
-
-        plan_data.append(record)
-
-    # 🔹 Garante que sempre retorna um DataFrame com as colunas básicas
-    if not plan_data:
-        return pd.DataFrame(columns=['Cod_Equip', 'Equipamento', 'Leitura_Atual', 'Unidade', 'Qualquer_Alerta', 'Alertas'])
-
-    return pd.DataFrame(plan_data)
-
-def prever_manutencoes(df_veiculos: pd.DataFrame, df_abastecimentos: pd.DataFrame, plan_df: pd.DataFrame) -> pd.DataFrame:
-    """Estima as datas das próximas manutenções com base no uso médio."""
-    if plan_df.empty or 'Leitura_Atual' not in plan_df.columns:
-        return pd.DataFrame()
-
-    # Calcula o uso diário médio de cada veículo
-    uso_diario = {}
-    for cod_equip in df_abastecimentos['Cod_Equip'].unique():
-        dados_equip = df_abastecimentos[df_abastecimentos['Cod_Equip'] == cod_equip].sort_values('Data')
-        if len(dados_equip) > 1:
-            total_dias = (dados_equip['Data'].max() - dados_equip['Data'].min()).days
-            total_uso = dados_equip['Hod_Hor_Atual'].max() - dados_equip['Hod_Hor_Atual'].min()
-            if total_dias > 0 and total_uso > 0: # Garante que houve uso e passagem de tempo
-                uso_diario[cod_equip] = total_uso / total_dias
-
-    previsoes = []
-    servicos_nomes = [col.replace('Restante_', '') for col in plan_df.columns if 'Restante_' in col]
-
-    for _, row in plan_df.iterrows():
-        cod_equip = row['Cod_Equip']
-        uso = uso_diario.get(cod_equip)
-        if uso:
-            for nome_servico in servicos_nomes:
-                col_restante = f'Restante_{nome_servico}'
-                if col_restante in row and pd.notna(row[col_restante]):
-                    dias_para_manut = row[col_restante] / uso
-                    data_prevista = datetime.now() + pd.Timedelta(days=dias_para_manut)
-                    previsoes.append({
-                        'Equipamento': row['Equipamento'],
-                        'Manutenção': nome_servico,
-                        'Data Prevista': data_prevista.strftime('%d/%m/%Y'),
-                        'Dias Restantes': int(dias_para_manut)
-                    })
-
-    if not previsoes:
-        return pd.DataFrame()
-
-    df_previsoes = pd.DataFrame(previsoes)
-    return df_previsoes.sort_values('Dias Restantes')
-
-# ---------------------------
-# Funções para Checklists
-# ---------------------------
-
-@st.cache_data(ttl=120)
-def get_checklist_rules():
-    """Busca todas as regras de checklist do banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-    except Exception as e:
-        st.error(f"Erro ao buscar regras de checklist: {e}")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=120)
-def get_checklist_items(id_regra):
-    """Busca os itens de checklist para uma determinada regra."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query(
-                "SELECT * FROM checklist_itens WHERE id_regra = ?",
-                conn,
-                params=(id_regra,)
-            )
-    except Exception as e:
-        st.error(f"Erro ao buscar itens de checklist: {e}")
-        return pd.DataFrame()
-
-# ---------------------------
-# CRUD para Checklists
-# ---------------------------
-
-def add_checklist_rule(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra de checklist ao banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-        return True, "Regra de checklist adicionada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar regra de checklist: {e}"
-
-def add_checklist_rule_and_get_id(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra e devolve o ID criado (ou None em erro).
-
-    Mantém a função "add_checklist_rule" para compatibilidade, mas quando for
-    necessário o ID imediatamente após a criação, utilize esta função.
-    """
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-            return cursor.lastrowid
-    except Exception as e:
-        st.error(f"Erro ao adicionar regra de checklist: {e}")
-        return None
-
-def edit_checklist_rule(id_regra, classe_operacional, titulo_checklist, turno, frequencia):
-    """Edita uma regra de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_regras
-                SET classe_operacional = ?, titulo_checklist = ?, frequencia = ?, turno = ?
-                WHERE id_regra = ?
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno, id_regra)
-            )
-            conn.commit()
-        return True, "Regra de checklist atualizada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar regra de checklist: {e}"
-
-def delete_checklist_rule(id_regra):
-    """Remove uma regra de checklist e seus itens associados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_regra = ?", (id_regra,))
-            cursor.execute("DELETE FROM checklist_regras WHERE id_regra = ?", (id_regra,))
-            conn.commit()
-        return True, "Regra de checklist removida com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover regra de checklist: {e}"
-
-def add_checklist_item(id_regra, nome_item):
-    """Adiciona um novo item de checklist a uma regra existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_itens (id_regra, nome_item)
-                VALUES (?, ?)
-                """ ,
-                (id_regra, nome_item)
-            )
-            conn.commit()
-        return True, "Item de checklist adicionado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar item de checklist: {e}"
-
-def edit_checklist_item(id_item, nome_item):
-    """Edita um item de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_itens
-                SET nome_item = ?
-                WHERE id_item = ?
-                """ ,
-                (nome_item, id_item)
-            )
-            conn.commit()
-        return True, "Item de checklist atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar item de checklist: {e}"
-
-def delete_checklist_item(id_item):
-    """Remove um item de checklist."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_item = ?", (id_item,))
-            conn.commit()
-        return True, "Item de checklist removido com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover item de checklist: {e}"
-
-def save_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno, status_geral):
-    """Salva um checklist preenchido no histórico."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_historico 
-                (Cod_Equip, titulo_checklist, data_preenchimento, turno, status_geral) 
-                VALUES (?, ?, ?, ?, ?)
-                """ ,
-                (cod_equip, titulo_checklist, data_preenchimento, turno, status_geral)
-            )
-            conn.commit()
-    except Exception as e:
-        st.error(f"Erro ao salvar histórico de checklist: {e}")
-
-def delete_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno):
-    """Remove um registro do histórico de checklists usando uma combinação única de campos."""
-    try:
-        # Primeira tentativa: usar conexão direta
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)  # Converter numpy.int64 para int
-        titulo_checklist = str(titulo_checklist)
-        data_preenchimento = str(data_preenchimento)
-        turno = str(turno)
-        
-        # Debug: verificar todos os registros na tabela ANTES da exclusão
-        cursor.execute("SELECT rowid, Cod_Equip, titulo_checklist, data_preenchimento, turno FROM checklist_historico")
-        all_records_before = cursor.fetchall()
-        
-        # Tentar encontrar o registro com diferentes abordagens
-        rowid = None
-        
-        # Primeira tentativa: busca exata
-        cursor.execute(
-            "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-            (cod_equip, titulo_checklist, data_preenchimento, turno)
-        )
-        result = cursor.fetchone()
-        
-        if result:
-            rowid = result[0]
-        else:
-            # Segunda tentativa: buscar apenas por Cod_Equip, título e turno (ignorar data)
-            cursor.execute(
-                "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, turno)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                rowid = result[0]
-            else:
-                # Terceira tentativa: buscar apenas por Cod_Equip e título
-                cursor.execute(
-                    "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ?", 
-                    (cod_equip, titulo_checklist)
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    rowid = result[0]
-        
-        if rowid is None:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Título: {titulo_checklist} (tipo: {type(titulo_checklist)})
-            - Data: {data_preenchimento} (tipo: {type(data_preenchimento)})
-            - Turno: {turno} (tipo: {type(turno)})
-            
-            Todos os registros na tabela ANTES da exclusão:
-            {all_records_before}
-            """
-            conn.close()
-            return False, debug_info
-        
-        # Agora vamos excluir usando rowid
-        cursor.execute("DELETE FROM checklist_historico WHERE rowid = ?", (rowid,))
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute("SELECT COUNT(*) FROM checklist_historico WHERE rowid = ?", (rowid,))
-            count_after = cursor.fetchone()[0]
-            
-            # Verificar também se o registro ainda existe pelos outros campos
-            cursor.execute(
-                "SELECT COUNT(*) FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, data_preenchimento, turno)
-            )
-            count_by_fields = cursor.fetchone()[0]
-            
-            if count_after == 0 and count_by_fields == 0:
-                 # Verificar o total de registros na tabela
-                 cursor.execute("SELECT COUNT(*) FROM checklist_historico")
-                 total_after = cursor.fetchone()[0]
-                 
-                 # Forçar sincronização do banco
-                 cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                 cursor.execute("PRAGMA synchronous=FULL")
-                 conn.commit()
-                 
-                 success_msg = f"Checklist excluído com sucesso! ({rows_deleted} registro(s) removido(s)). Total na tabela: {total_after}"
-                 
-                 # Salvar backup automático para persistência no Streamlit Cloud
-                 backup_success, backup_msg = save_backup_to_session_state()
-                 if backup_success:
-                     success_msg += f" | Backup salvo: {backup_msg}"
-                 else:
-                     success_msg += f" | Aviso: {backup_msg}"
-                 
-                 conn.close()
-                 return True, success_msg
-            else:
-                conn.close()
-                return False, f"Erro: Registro ainda existe após exclusão. Count by rowid: {count_after}, Count by fields: {count_by_fields}"
-        else:
-            conn.close()
-            return False, "Nenhum registro foi excluído"
-                
-    except Exception as e:
-        if 'conn' in locals():
-            conn.close()
-        return False, f"Erro ao excluir checklist: {e}"
-
-def force_cache_clear():
-    """Força a limpeza completa de todos os caches."""
-    try:
-        # Limpar cache de dados
-        st.cache_data.clear()
-        
-        # Limpar cache de recursos
-        st.cache_resource.clear()
-        
-        # Forçar rerun da aplicação
-        st.rerun()
-    except Exception as e:
-        st.error(f"Erro ao limpar cache: {e}")
-
-def force_database_sync():
-    """Força a sincronização do banco de dados com o disco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Forçar commit
-        conn.commit()
-        
-        # Executar PRAGMA para forçar sincronização
-        cursor.execute("PRAGMA wal_checkpoint(FULL)")
-        cursor.execute("PRAGMA synchronous=FULL")
-        cursor.execute("PRAGMA journal_mode=DELETE")
-        
-        # Forçar commit novamente
-        conn.commit()
-        
-        # Verificar se o banco está em modo WAL
-        cursor.execute("PRAGMA journal_mode")
-        journal_mode = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        return True, f"Banco sincronizado. Modo journal: {journal_mode}"
-    except Exception as e:
-        return False, f"Erro ao sincronizar banco: {e}"
-
-def export_database_backup():
-    """Exporta todos os dados do banco para um arquivo de backup."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        
-        # Obter todas as tabelas
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        backup_data = {}
-        
-        for table in tables:
-            table_name = table[0]
-            if table_name != 'sqlite_master':
-                # Exportar dados da tabela
-                df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-                backup_data[table_name] = df.to_dict('records')
-        
-        conn.close()
-        
-        # Converter para JSON
-        backup_json = json.dumps(backup_data, default=str, indent=2)
-        
-        # Criar arquivo de download
-        backup_bytes = backup_json.encode('utf-8')
-        backup_b64 = base64.b64encode(backup_bytes).decode()
-        
-        return backup_b64, backup_data
-        
-    except Exception as e:
-        return None, f"Erro ao exportar backup: {e}"
-
-def import_database_backup(backup_data):
-    """Importa dados de backup para o banco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        for table_name, records in backup_data.items():
-            if records:  # Se a tabela tem dados
-                # Limpar tabela existente
-                cursor.execute(f"DELETE FROM {table_name}")
-                
-                # Inserir novos dados
-                for record in records:
-                    columns = list(record.keys())
-                    placeholders = ', '.join(['?' for _ in columns])
-                    values = list(record.values())
-                    
-                    # Converter tipos de dados
-                    converted_values = []
-                    for value in values:
-                        if isinstance(value, str):
-                            # Tentar converter para datetime se for uma data
-                            try:
-                                if 'T' in value or '-' in value:
-                                    dt = pd.to_datetime(value)
-                                    converted_values.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
-                                else:
-                                    converted_values.append(value)
-                            except:
-                                converted_values.append(value)
-                        else:
-                            converted_values.append(value)
-                    
-                    cursor.execute(
-                        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
-                        converted_values
-                    )
-        
-        conn.commit()
-        conn.close()
-        
-        return True, "Backup restaurado com sucesso!"
-        
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def save_backup_to_session_state():
-    """Salva backup dos dados na sessão do Streamlit."""
-    try:
-        backup_b64, backup_data = export_database_backup()
-        if backup_b64:
-            st.session_state['database_backup'] = backup_b64
-            st.session_state['backup_timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            return True, "Backup salvo na sessão"
-        else:
-            return False, "Erro ao criar backup"
-    except Exception as e:
-        return False, f"Erro ao salvar backup: {e}"
-
-def restore_backup_from_session_state():
-    """Restaura backup dos dados da sessão do Streamlit."""
-    try:
-        if 'database_backup' in st.session_state:
-            backup_b64 = st.session_state['database_backup']
-            backup_bytes = base64.b64decode(backup_b64)
-            backup_json = backup_bytes.decode('utf-8')
-            backup_data = json.loads(backup_json)
-            
-            success, message = import_database_backup(backup_data)
-            if success:
-                # Limpar cache para forçar recarregamento
-                force_cache_clear()
-                return True, message
-            else:
-                return False, message
-        else:
-            return False, "Nenhum backup encontrado na sessão"
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def auto_restore_backup_on_startup():
-    """Tenta restaurar backup automaticamente na inicialização da aplicação."""
-    try:
-        if 'database_backup' in st.session_state:
-            # Verificar se o banco está vazio
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-            num_tables = cursor.fetchone()[0]
-            conn.close()
-            
-            if num_tables == 0:
-                # Banco vazio, tentar restaurar
-                success, message = restore_backup_from_session_state()
-                if success:
-                    st.info("🔄 Backup restaurado automaticamente na inicialização!")
-                    return True
-                else:
-                    st.warning(f"⚠️ Falha na restauração automática: {message}")
-                    return False
-        return False
-    except Exception as e:
-        st.warning(f"⚠️ Erro na restauração automática: {e}")
-        return False
-
-def main():
-    
-    # Garante tema dark coerente mesmo sem config.toml
-    st.markdown(
-        """
-        <style>
-        :root {
-            --primary: #10b981;
-            --bg: #0f172a;
-            --bg2: #111827;
-            --text: #e5e7eb;
-        }
-        body { background: var(--bg); color: var(--text); }
-        section.main > div { background: var(--bg); }
-        .stApp { background: var(--bg); }
-        .st-emotion-cache-1r4qj8v, .st-emotion-cache-13ln4jf { background: var(--bg2) !important; }
-        .stButton>button { background: var(--primary); color: #062e24; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    # CSS fino para polir a UI
-    st.markdown(
-        """
-        <style>
-        /* Cartões/containers */
-        .stExpander, .stDataFrame, .stTable { border-radius: 10px !important; }
-        .stButton>button { border-radius: 8px; padding: 0.5rem 1rem; }
-        .stSelectbox, .stTextInput, .stNumberInput, .stDateInput, .stTextArea { border-radius: 8px !important; }
-        /* Métricas com mais destaque */
-        div[data-testid="stMetric"] { background: rgba(255,255,255,0.04); padding: 10px 14px; border-radius: 12px; }
-        /* Títulos com leve gradiente */
-        h1, h2, h3 { background: linear-gradient(90deg, #10b981 0%, #06b6d4 100%); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
-        /* Linhas divisórias mais suaves */
-        hr { border: none; height: 1px; background: rgba(255,255,255,0.08); }
-        /* Subtítulo de marca (opcional) */
-        .brand-subtitle { display: none; }
-        /* Centralizar e limitar logo na sidebar */
-        section[data-testid="stSidebar"] img { display: block; margin: 0.5rem auto 0.75rem; max-width: 140px; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-        st.session_state.role = None
-        st.session_state.username = ""
-
-    if not st.session_state.authenticated:
-        _ , col_central, _ = st.columns([1, 1.5, 1])
-    
-        with col_central:
-            
-            if os.path.exists("logo.png"):
-                # Cria 3 sub-colunas dentro da coluna central
-                _, logo_col, _ = st.columns([1, 2, 1])
-                with logo_col:
-                    st.image("logo.png", width=140)
-            
-            st.title("Bem vindo ao Aplicativo de Controle do PCMA")
-
-            username = st.text_input("Usuário", key="login_user")
-            password = st.text_input("Senha", type="password", key="login_pass")
-
-            if st.button("Entrar", use_container_width=True):
-                role = check_login_db(username, password)
-                if role:
-                    st.session_state.authenticated = True
-                    st.session_state.role = role
-                    st.session_state.username = username
-                    st.rerun()
-                else:
-                    st.error("Usuário ou Senha incorretos.")
-    else:
-
-        # Cabeçalho com logo + título
-        if os.path.exists("logo.png"):
-            col_logo, col_title = st.columns([1, 8])
-            with col_logo:
-                st.image("logo.png", width=80)
-            with col_title:
-                st.title("📊 Dashboard de Frotas e Abastecimentos")
-        else:
-            st.title("📊 Dashboard de Frotas e Abastecimentos")
-
-        # Tentar restaurar backup automaticamente na inicialização
-        auto_restore_backup_on_startup()
-        
-        # Adicionar coluna de tipo de combustível se não existir
-        add_tipo_combustivel_column()
-        
-        # Setup de esquemas (motoristas, preços, combustível)
-        ensure_motoristas_schema()
-        ensure_precos_combustivel_schema()
-
-        # Passo um fingerprint simples das tabelas para invalidar cache quando necessário
-        ver_frotas = int(os.path.getmtime(DB_PATH)) if os.path.exists(DB_PATH) else 0
-        df, df_frotas, df_manutencoes, df_comp_regras, df_comp_historico, df_checklist_regras, df_checklist_itens, df_checklist_historico = load_data_from_db(DB_PATH, ver_frotas, ver_frotas, ver_frotas, ver_frotas, ver_frotas)
-        
-
-        if 'intervalos_por_classe' not in st.session_state:
-            st.session_state.intervalos_por_classe = {}
-        classes_operacionais = [c for c in df_frotas['Classe_Operacional'].unique() if pd.notna(c) and str(c).strip()]
-        for classe in classes_operacionais:
-            if classe not in st.session_state.intervalos_por_classe:
-                tipo_controle = df_frotas[df_frotas['Classe_Operacional'] == classe]['Tipo_Controle'].iloc[0]
-                if tipo_controle == 'HORAS':
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 5.0,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 250},
-                            'servico_2': {'nome': 'Revisao A', 'intervalo': 100},
-                            'servico_3': {'nome': 'Revisao B', 'intervalo': 300},
-                            'servico_4': {'nome': 'Revisao C', 'intervalo': 500}
-                        }
-                    }
-                else: # QUILÔMETROS
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 2.5,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 5000},
-                            'servico_2': {'nome': 'Revisao 5k', 'intervalo': 5000},
-                            'servico_3': {'nome': 'Revisao 10k', 'intervalo': 10000},
-                            'servico_4': {'nome': 'Revisao 20k', 'intervalo': 20000}
-                        }
-                    }
-                    
-        with st.sidebar:
-            if os.path.exists("logo.png"):
-                st.image("logo.png", width=200)
-            st.write(f"Bem-vindo, **{st.session_state.username}**!")
-            if st.button("Sair"):
-                st.session_state.authenticated = False
-                st.session_state.username = "" # Limpa o username ao sair
-                st.session_state.role = None
-                st.rerun()
-            st.markdown("---")
-
-        with st.sidebar:
-            st.header("📅 Filtros (válidos apenas na aba Análise Geral)")
-
-            # Persistência de período
-            if 'filtro_data_inicio' not in st.session_state:
-                st.session_state['filtro_data_inicio'] = df['Data'].min().date()
-            if 'filtro_data_fim' not in st.session_state:
-                st.session_state['filtro_data_fim'] = df['Data'].max().date()
-
-            st.subheader("Período de Análise")
-            data_inicio = st.date_input(
-                "Data de Início", 
-                st.session_state['filtro_data_inicio'],
-                key='data_inicio'
-            )
-            data_fim = st.date_input(
-                "Data de Fim", 
-                st.session_state['filtro_data_fim'],
-                key='data_fim'
-            )
-            st.session_state['filtro_data_inicio'] = data_inicio
-            st.session_state['filtro_data_fim'] = data_fim
-
-            st.markdown("---")
-            st.caption("Desenvolvido por André Luis")
-
-            with st.expander("Filtrar por Classe Operacional"):
-                classe_opts = sorted(list(df["Classe_Operacional"].dropna().unique()))
-                sel_classes = st.multiselect(
-                    "Selecione as Classes", 
-                    classe_opts, 
-                    default=classe_opts,
-                    key="sel_classes"
-                )
-
-            with st.expander("Filtrar por Safra"):
-                safra_opts = sorted(list(df["Safra"].dropna().unique()))
-                sel_safras = st.multiselect(
-                    "Selecione as Safras", 
-                    safra_opts, 
-                    default=safra_opts,
-                    key="sel_safras"
-                )
-
-            # Só aplicaremos os filtros na aba "📈 Análise Geral" (guardaremos em sessão)
-            st.session_state['filtro_opts_analise'] = {
-                "data_inicio": data_inicio,
-                "data_fim": data_fim,
-                "classes_op": sel_classes,
-                "safras": sel_safras
-            }
-    
-        if tab_analise is not None:
-            with tab_analise:
-                st.header("📈 Análise Geral e Painel de Controle")
-                
-                # ===== SEÇÃO: VISÃO GERAL DA FROTA =====
-                st.subheader("🏠 Visão Geral da Frota")
-                
-                # Calcular gasto total com combustível
-                precos_map = get_precos_combustivel_map()
-                gasto_total_combustivel = 0
-                if precos_map:
-                    df_gastos_total = df.copy()
-                    # Verificar se a coluna tipo_combustivel existe em df_frotas
-                    if 'tipo_combustivel' in df_frotas.columns:
-                        df_gastos_total = df_gastos_total.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                        # Verificar se a coluna foi criada após o merge
-                        if 'tipo_combustivel' in df_gastos_total.columns:
-                            df_gastos_total['tipo_combustivel'] = df_gastos_total['tipo_combustivel'].fillna('Diesel S500')
-                        else:
-                            df_gastos_total['tipo_combustivel'] = 'Diesel S500'
-                    else:
-                        # Se não existir, criar a coluna com valor padrão
-                        df_gastos_total['tipo_combustivel'] = 'Diesel S500'
-                    
-                    df_gastos_total['preco_unit'] = df_gastos_total['tipo_combustivel'].map(precos_map).fillna(0.0)
-                    df_gastos_total['custo'] = df_gastos_total['Qtde Litros'].fillna(0.0) * df_gastos_total['preco_unit']
-                    gasto_total_combustivel = df_gastos_total['custo'].sum()
-                
-                # KPIs principais
-                kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
-                
-                # KPI 1: Frotas Ativas
-                total_frotas_ativas = df_frotas[df_frotas['ATIVO'] == 'ATIVO']['Cod_Equip'].nunique()
-                kpi1.metric("🚗 Frotas Ativas", total_frotas_ativas)
-                
-                # KPI 2: Frotas com Alerta
-                frotas_com_alerta = plan_df[plan_df['Qualquer_Alerta'] == True]['Cod_Equip'].nunique() if not plan_df.empty else 0
-                kpi2.metric("⚠️ Frotas com Alerta", frotas_com_alerta)
-                
-                # KPI 3: Gasto Total com Combustível
-                kpi3.metric("💰 Gasto com Combustível", formatar_brasileiro(gasto_total_combustivel, 'R$ '))
-                
-                # KPIs 4 e 5: Frotas Mais e Menos Eficientes
-                df_sem_filtro = df.copy()
-                df_media_geral = df_sem_filtro[(df_sem_filtro['Media'].notna()) & (df_sem_filtro['Media'] > 0)]
-                if not df_media_geral.empty:
-                    # Agrupa por Código e Descrição para ter acesso a ambos
-                    media_por_equip = df_media_geral.groupby(['Cod_Equip', 'DESCRICAO_EQUIPAMENTO'])['Media'].mean().sort_values()
-                    
-                    if not media_por_equip.empty:
-                        # Pega o CÓDIGO do mais eficiente (primeiro da lista ordenada)
-                        cod_mais_eficiente = media_por_equip.index[0][0]
-                        media_mais_eficiente = media_por_equip.iloc[0]
-                        # Exibe o CÓDIGO no KPI
-                        kpi4.metric("🏆 Mais Eficiente", f"{cod_mais_eficiente}", f"{formatar_brasileiro(media_mais_eficiente)}")
-                
-                        # Pega o CÓDIGO do menos eficiente (último da lista ordenada)
-                        cod_menos_eficiente = media_por_equip.index[-1][0]
-                        media_menos_eficiente = media_por_equip.iloc[-1]
-                        # Exibe o CÓDIGO no KPI
-                        kpi5.metric("📉 Menos Eficiente", f"{cod_menos_eficiente}", f"{formatar_brasileiro(media_menos_eficiente)}")
-                else:
-                    # Se não há dados de eficiência, mostrar mensagem
-                    kpi4.metric("🏆 Mais Eficiente", "N/A")
-                    kpi5.metric("📉 Menos Eficiente", "N/A")
-
-                st.markdown("---")
-                st.subheader("📈 Análise Gráfica de Consumo")
-
-                # Aplica filtros apenas nesta aba
-                opts = st.session_state.get('filtro_opts_analise', None)
-                df_f = filtrar_dados(df, opts) if opts else df.copy()
-
-                if not df_f.empty:
-                    # KPIs melhorados com análise por tipo de combustível
-                    st.subheader("📊 Indicadores de Consumo por Combustível")
-                    
-                    # Obter tipos de combustível das frotas
-                    if 'tipo_combustivel' in df_frotas.columns:
-                        # Filtrar apenas registros que realmente têm consumo (Qtde Litros > 0)
-                        df_f_com_consumo = df_f[df_f['Qtde Litros'] > 0].copy()
-                        
-                        if not df_f_com_consumo.empty:
-                            # Pegar apenas os equipamentos que têm histórico de abastecimento
-                            equipamentos_com_consumo = df_f_com_consumo['Cod_Equip'].unique()
-                            
-                            # Filtrar df_frotas para incluir apenas equipamentos com consumo
-                            frotas_com_consumo = df_frotas[df_frotas['Cod_Equip'].isin(equipamentos_com_consumo)].copy()
-                            
-                            # Verificar se há valores duplicados em Cod_Equip e tratar adequadamente
-                            if frotas_com_consumo['Cod_Equip'].duplicated().any():
-                                # Se há duplicatas, pegar o primeiro valor de cada equipamento
-                                frotas_com_consumo = frotas_com_consumo.drop_duplicates(subset=['Cod_Equip'], keep='first')
-                            
-                            # Criar mapeamento de tipo de combustível apenas para equipamentos com consumo
-                            combustivel_map = frotas_com_consumo.set_index('Cod_Equip')['tipo_combustivel'].fillna('Diesel S500')
-                            
-                            # Aplicar o mapeamento apenas aos registros com consumo
-                            df_f_com_consumo['tipo_combustivel'] = df_f_com_consumo['Cod_Equip'].map(combustivel_map).fillna('Diesel S500')
-                            
-                            # Calcular consumo por tipo de combustível
-                            consumo_por_combustivel = df_f_com_consumo.groupby('tipo_combustivel')['Qtde Litros'].sum().sort_values(ascending=False)
-                        else:
-                            # Se não há registros com consumo, criar um DataFrame vazio
-                            consumo_por_combustivel = pd.Series(dtype='float64')
-                        
-                        # Criar colunas dinâmicas baseadas no número de tipos de combustível
-                        num_tipos = len(consumo_por_combustivel)
-                        if num_tipos <= 2:
-                            cols = st.columns(2)
-                        elif num_tipos <= 3:
-                            cols = st.columns(3)
-                        elif num_tipos <= 4:
-                            cols = st.columns(4)
-                        else:
-                            cols = st.columns(5)
-                        
-                        # Exibir KPIs por tipo de combustível
-                        for i, (tipo, litros) in enumerate(consumo_por_combustivel.items()):
-                            if i < len(cols):
-                                with cols[i]:
-                                    # Calcular percentual do total
-                                    percentual = (litros / df_f["Qtde Litros"].sum()) * 100
-                                    
-                                    # Definir cor baseada no tipo de combustível
-                                    if 'Diesel S500' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🚛"
-                                    elif 'Diesel S10' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🚛"
-                                    elif 'Gasolina' in tipo:
-                                        delta_color = "normal"
-                                        icon = "⛽"
-                                    elif 'Etanol' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🌱"
-                                    elif 'Biodiesel' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🌿"
-                                    else:
-                                        delta_color = "normal"
-                                        icon = "⛽"
-                                    
-                                    cols[i].metric(
-                                        f"{icon} {tipo}",
-                                        f"{formatar_brasileiro_int(litros)} L",
-                                        f"{percentual:.1f}% do total",
-                                        delta_color=delta_color
-                                    )
-                        
-                        # Adicionar linha separadora
-                        st.markdown("---")
-                        
-                        # KPI adicional: Total geral e média por equipamento
-                        k1, k2, k3 = st.columns(3)
-                        
-                        with k1:
-                            total_litros = df_f["Qtde Litros"].sum()
-                            k1.metric(
-                                "🛢️ Total Geral",
-                                f"{formatar_brasileiro_int(total_litros)} L",
-                                f"{len(consumo_por_combustivel)} tipos de combustível"
-                            )
-                        
-                        with k2:
-                            if 'Media' in df_f.columns:
-                                media_geral = df_f['Media'].mean()
-                                k2.metric(
-                                    "📈 Média Geral",
-                                    f"{formatar_brasileiro(media_geral)}",
-                                    "Média de consumo por equipamento"
-                                )
-                            else:
-                                # Calcular média manual se não existir coluna Media
-                                equipamentos_unicos = df_f['Cod_Equip'].nunique()
-                                if equipamentos_unicos > 0:
-                                    media_manual = total_litros / equipamentos_unicos
-                                    k2.metric(
-                                        "📈 Média por Equipamento",
-                                        f"{formatar_brasileiro(media_manual)} L",
-                                        f"{equipamentos_unicos} equipamentos"
-                                    )
-                                else:
-                                    k2.metric("📈 Média por Equipamento", "N/A")
-                        
-                        with k3:
-                            # Calcular eficiência (litros por dia se houver dados de data)
-                            if 'Data' in df_f.columns:
-                                try:
-                                    df_f['Data'] = pd.to_datetime(df_f['Data'])
-                                    dias_periodo = (df_f['Data'].max() - df_f['Data'].min()).days + 1
-                                    if dias_periodo > 0:
-                                        litros_por_dia = total_litros / dias_periodo
-                                        k3.metric(
-                                            "📅 Consumo Diário",
-                                            f"{formatar_brasileiro(litros_por_dia)} L/dia",
-                                            f"{dias_periodo} dias analisados"
-                                        )
-                                    else:
-                                        k3.metric("📅 Consumo Diário", "N/A")
-                                except:
-                                    k3.metric("📅 Consumo Diário", "N/A")
-                            else:
-                                k3.metric("📅 Consumo Diário", "N/A")
-                    else:
-                        # Fallback se não houver coluna tipo_combustivel
-                        k1, k2 = st.columns(2)
-                        k1.metric("Litros Consumidos (período)", formatar_brasileiro_int(df_f["Qtde Litros"].sum()))
-                        if 'Media' in df_f.columns:
-                            k2.metric("Média Consumo (período)", f"{formatar_brasileiro(df_f['Media'].mean())}")
-                        else:
-                            equipamentos_unicos = df_f['Cod_Equip'].nunique()
-                            if equipamentos_unicos > 0:
-                                media_manual = df_f["Qtde Litros"].sum() / equipamentos_unicos
-                                k2.metric("Média por Equipamento", f"{formatar_brasileiro(media_manual)} L")
-                    st.markdown("---")
-                    st.subheader("📊 Análise de Consumo por Classe e Equipamentos")
-                    c1, c2 = st.columns(2)
-
-                    with c1:
-                        st.subheader("Consumo por Classe Operacional")
-                        classes_a_excluir = ['VEICULOS LEVES', 'MOTOCICLETA', 'MINI CARREGADEIRA', 'USINA']
-                        # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                        if 'Classe_Operacional' in df_f.columns:
-                            df_consumo_classe = df_f[~df_f['Classe_Operacional'].str.upper().isin(classes_a_excluir)]
-                        else:
-                            df_consumo_classe = df_f
-                        consumo_por_classe = df_consumo_classe.groupby("Classe_Operacional")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
-
-                        if not consumo_por_classe.empty:
-                            consumo_por_classe['texto_formatado'] = consumo_por_classe['Qtde Litros'].apply(formatar_brasileiro_int)
-                            fig_classe = px.bar(consumo_por_classe, x='Qtde Litros', y='Classe_Operacional', orientation='h', text='texto_formatado', labels={"x": "Litros Consumidos", "y": "Classe Operacional"})
-                            fig_classe.update_traces(
-                                texttemplate='%{text} L', 
-                                textposition='outside',
-                                textfont=dict(size=11, color='black'),
-                                cliponaxis=False
-                            )
-                            fig_classe.update_layout(
-                                yaxis={'categoryorder':'total ascending'}, 
-                                xaxis_title="Total Consumido (Litros)", 
-                                yaxis_title="Classe Operacional",
-                                height=500,
-                                margin=dict(l=20, r=20, t=40, b=20),
-                                font=dict(size=12)
-                            )
-                            st.plotly_chart(fig_classe, use_container_width=True)
-
-                    with c2:
-                        st.subheader("Top 10 Equipamentos com Maior Consumo")
-                        # Melhorar o gráfico com informações mais claras
-                        consumo_por_equip = df_f.groupby("Cod_Equip").agg({'Qtde Litros': 'sum'}).dropna()
-                        consumo_por_equip = consumo_por_equip[consumo_por_equip.index != 550]
-                        consumo_por_equip = consumo_por_equip.sort_values(by="Qtde Litros", ascending=False).head(10)
-
-                        if not consumo_por_equip.empty:
-                            # Adicionar informações da frota para melhor identificação
-                            consumo_por_equip = consumo_por_equip.reset_index()
-                            consumo_por_equip = consumo_por_equip.merge(
-                                df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA']], 
-                                on='Cod_Equip', 
-                                how='left'
-                            )
-                            
-                            # Criar label mais informativo: Código - Descrição (Placa)
-                            consumo_por_equip['label_grafico'] = consumo_por_equip.apply(
-                                lambda row: f"{row['Cod_Equip']} - {row['DESCRICAO_EQUIPAMENTO'][:30]}{'...' if len(str(row['DESCRICAO_EQUIPAMENTO'])) > 30 else ''} ({row['PLACA']})", 
-                                axis=1
-                            )
-                            
-                            consumo_por_equip['texto_formatado'] = consumo_por_equip['Qtde Litros'].apply(formatar_brasileiro_int)
-                            
-                            fig_top10 = px.bar(
-                                consumo_por_equip, 
-                                x='Qtde Litros', 
-                                y='label_grafico', 
-                                orientation='h', 
-                                text='texto_formatado', 
-                                labels={"Qtde Litros": "Total Consumido (Litros)", "label_grafico": "Equipamento"},
-                                title="Top 10 Equipamentos com Maior Consumo"
-                            )
-                            fig_top10.update_traces(
-                                texttemplate='%{text} L', 
-                                textposition='outside',
-                                marker_color='#ff7f0e',
-                                textfont=dict(size=11, color='black'),
-                                cliponaxis=False
-                            )
-                            fig_top10.update_layout(
-                                yaxis={'categoryorder':'total ascending'}, 
-                                xaxis_title="Total Consumido (Litros)", 
-                                yaxis_title="Equipamento",
-                                height=600,
-                                margin=dict(l=20, r=20, t=40, b=20),
-                                font=dict(size=11)
-                            )
-                            st.plotly_chart(fig_top10, use_container_width=True)
-
-                    st.markdown("---")
-                    
-                    # NOVA SEÇÃO: Top 10 de Gastos por Frota e por Classe
-                    st.subheader("💰 Top 10 de Gastos por Frota e Classe")
-                    
-                    # Calcular gastos por frota
-                    precos_map = get_precos_combustivel_map()
-                    if precos_map:
-                        df_gastos = df_f.copy()
-                        
-                        # Verificar se a coluna tipo_combustivel existe em df_frotas
-                        if 'tipo_combustivel' in df_frotas.columns:
-                            df_gastos = df_gastos.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                            # Verificar se a coluna foi criada após o merge
-                            if 'tipo_combustivel' in df_gastos.columns:
-                                df_gastos['tipo_combustivel'] = df_gastos['tipo_combustivel'].fillna('Diesel S500')
-                            else:
-                                df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        else:
-                            # Se não existir, criar a coluna com valor padrão
-                            df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        
-                        # Garantir que a coluna tipo_combustivel existe antes de mapear preços
-                        if 'tipo_combustivel' not in df_gastos.columns:
-                            df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        
-                        df_gastos['preco_unit'] = df_gastos['tipo_combustivel'].map(precos_map).fillna(0.0)
-                        df_gastos['custo'] = df_gastos['Qtde Litros'].fillna(0.0) * df_gastos['preco_unit']
-                        
-                        # Adicionar informações da frota para filtro
-                        df_gastos_com_info = df_gastos.merge(
-                            df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA', 'Classe_Operacional']], 
-                            on='Cod_Equip', 
-                            how='left'
-                        )
-                        
-                        # Garantir que a coluna Classe_Operacional existe
-                        if 'Classe_Operacional' not in df_gastos_com_info.columns:
-                            df_gastos_com_info['Classe_Operacional'] = 'N/A'
-                        
-                        # Filtro para excluir a frota 550 (usina) por padrão
-                        mostrar_usinas = st.checkbox("🏭 Incluir Frota 550 (Usina) no Top 10 de Gastos por Frota", value=False)
-                        
-                        if not mostrar_usinas:
-                            # Excluir a frota 550 (usina) do DataFrame
-                            df_gastos_filtrado = df_gastos_com_info[df_gastos_com_info['Cod_Equip'] != 550]
-                        else:
-                            df_gastos_filtrado = df_gastos_com_info
-                        
-                        # Top 10 gastos por frota individual (após filtro)
-                        gastos_por_frota = df_gastos_filtrado.groupby('Cod_Equip').agg({
-                            'custo': 'sum',
-                            'Qtde Litros': 'sum'
-                        }).sort_values('custo', ascending=False).head(10).reset_index()
-                        
-                        # Adicionar informações da frota
-                        gastos_por_frota = gastos_por_frota.merge(
-                            df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA']], 
-                            on='Cod_Equip', 
-                            how='left'
-                        )
-                        gastos_por_frota['label_frota'] = gastos_por_frota['Cod_Equip'].astype(str)
-                        gastos_por_frota['custo_formatado'] = gastos_por_frota['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                        
-                        # Top 10 gastos por classe operacional
-                        gastos_por_classe = df_gastos.groupby('Classe_Operacional').agg({
-                            'custo': 'sum',
-                            'Qtde Litros': 'sum'
-                        }).sort_values('custo', ascending=False).head(10).reset_index()
-                        gastos_por_classe['custo_formatado'] = gastos_por_classe['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                        
-                        # Criar layout em 2 colunas para os gráficos
-                        col_gastos1, col_gastos2 = st.columns(2)
-                        
-                        with col_gastos1:
-                            st.subheader("🏭 Top 10 Gastos por Frota")
-                            
-                            # Mostrar informação sobre filtro da frota 550
-                            # Comentário removido para manter proporção dos gráficos
-                            
-                            if not gastos_por_frota.empty:
-                                # Garantir que os dados estão corretos
-                                gastos_por_frota['custo'] = gastos_por_frota['custo'].fillna(0)
-                                gastos_por_frota = gastos_por_frota[gastos_por_frota['custo'] > 0]
-                                
-                                if not gastos_por_frota.empty:
-                                    # Dados já validados e prontos para o gráfico
-                                    
-                                    # Garantir que label_frota é string e único
-                                    gastos_por_frota['label_frota'] = gastos_por_frota['label_frota'].astype(str)
-                                    
-                                    # Criar gráfico de barras horizontais com dados limpos
-                                    fig_gastos_frota = px.bar(
-                                        gastos_por_frota,
-                                        x='custo',
-                                        y='label_frota',
-                                        orientation='h',
-                                        text='custo_formatado',
-                                        title="Gastos por Frota Individual",
-                                        labels={'custo': 'Custo (R$)', 'label_frota': 'Frota'},
-                                        color='custo',
-                                        color_continuous_scale='Reds'
-                                    )
-                                    fig_gastos_frota.update_traces(
-                                        textposition='outside',
-                                        texttemplate='%{text}',
-                                        textfont=dict(size=11, color='white'),
-                                        cliponaxis=False,
-                                        marker=dict(line=dict(width=1, color='black'))
-                                    )
-                                    fig_gastos_frota.update_layout(
-                                        yaxis={'categoryorder':'total ascending'},
-                                        xaxis_title="Custo Total (R$)",
-                                        yaxis_title="Frota",
-                                        height=600,
-                                        showlegend=False,
-                                        margin=dict(l=20, r=20, t=40, b=20),
-                                        font=dict(size=12),
-                                        bargap=0.3,
-                                        bargroupgap=0.1
-                                    )
-                                    # Configurar eixo Y para mostrar todas as categorias
-                                    fig_gastos_frota.update_yaxes(
-                                        type='category',
-                                        categoryorder='total ascending'
-                                    )
-                                    st.plotly_chart(fig_gastos_frota, use_container_width=True)
-                                    
-                                    # Gráfico criado com sucesso
-                                else:
-                                    st.warning("Não há frotas com gastos maiores que zero.")
-                            else:
-                                st.info("Não há dados de gastos por frota.")
-                        
-                        with col_gastos2:
-                            st.subheader("🏗️ Top 10 Gastos por Classe")
-                            if not gastos_por_classe.empty:
-                                fig_gastos_classe = px.bar(
-                                    gastos_por_classe,
-                                    x='custo',
-                                    y='Classe_Operacional',
-                                    orientation='h',
-                                    text='custo_formatado',
-                                    title="Gastos por Classe Operacional",
-                                    labels={'custo': 'Custo (R$)', 'Classe_Operacional': 'Classe'},
-                                    color='custo',
-                                    color_continuous_scale='Blues'
-                                )
-                                fig_gastos_classe.update_traces(
-                                    textposition='outside',
-                                    texttemplate='%{text}',
-                                    textfont=dict(size=11, color='white'),
-                                    cliponaxis=False,
-                                    marker=dict(line=dict(width=1, color='black'))
-                                )
-                                fig_gastos_classe.update_layout(
-                                    yaxis={'categoryorder':'total ascending'},
-                                    xaxis_title="Custo Total (R$)",
-                                    yaxis_title="Classe Operacional",
-                                    height=600,
-                                    showlegend=False,
-                                    margin=dict(l=20, r=20, t=40, b=20),
-                                    font=dict(size=12),
-                                    bargap=0.3,
-                                    bargroupgap=0.1
-                                )
-                                # Configurar eixo Y para mostrar todas as categorias
-                                fig_gastos_classe.update_yaxes(
-                                    type='category',
-                                    categoryorder='total ascending'
-                                )
-                                st.plotly_chart(fig_gastos_classe, use_container_width=True)
-                            else:
-                                st.info("Não há dados de gastos por classe.")
-                        
-                        # Resumo dos totais
-                        st.markdown("---")
-                        col_resumo1, col_resumo2, col_resumo3 = st.columns(3)
-                        with col_resumo1:
-                            st.metric(
-                                "Total Gastos (Período)", 
-                                formatar_brasileiro(df_gastos['custo'].sum(), 'R$ ')
-                            )
-                        with col_resumo2:
-                            if not gastos_por_frota.empty:
-                                frota_maior_gasto = gastos_por_frota.iloc[0]
-                                st.metric(
-                                    "Frota com Maior Gasto", 
-                                    f"{frota_maior_gasto['Cod_Equip']}",
-                                    f"{frota_maior_gasto['custo_formatado']}"
-                                )
-                            else:
-                                st.metric("Frota com Maior Gasto", "N/A")
-                        with col_resumo3:
-                            st.metric(
-                                "Classe com Maior Gasto", 
-                                f"{gastos_por_classe.iloc[0]['Classe_Operacional'] if not gastos_por_classe.empty else 'N/A'}"
-                            )
-                    else:
-                        st.warning("Cadastre os preços de combustível na aba Importar > Preços para visualizar os gastos.")
-
-                    st.markdown("---")
-                    st.subheader("📈 Média de Consumo por Classe Operacional")
-                    df_media = df_f[(df_f['Media'].notna()) & (df_f['Media'] > 0)].copy()
-
-                    classes_para_excluir = ['MOTOCICLETA', 'VEICULOS LEVES', 'USINA', 'MINI CARREGADEIRA']
-
-                    # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                    if 'Classe_Operacional' in df_media.columns:
-                        df_media_filtrado = df_media[~df_media['Classe_Operacional'].str.upper().isin(classes_para_excluir)]
-                    else:
-                        df_media_filtrado = df_media
-
-                    if not df_media_filtrado.empty: # Usa o novo DataFrame filtrado
-                        media_por_classe = df_media_filtrado.groupby('Classe_Operacional')['Media'].mean().sort_values(ascending=True)
-                        
-                        df_media_grafico = media_por_classe.reset_index()
-                        df_media_grafico['texto_formatado'] = df_media_grafico['Media'].apply(
-                            lambda x: formatar_brasileiro(x)
-                        )
-                        
-                        # Cria o gráfico de barras
-                        fig_media_classe = px.bar(
-                            df_media_grafico,
-                            x='Media',
-                            y='Classe_Operacional',
-                            orientation='h',
-                            title="Média de Consumo (L/h ou Km/L) por Classe",
-                            text='texto_formatado'
-                        )
-                        fig_media_classe.update_traces(
-                            textposition='outside',
-                            marker_color='#1f77b4'
-                        )
-                        fig_media_classe.update_layout(
-                            yaxis_title="Classe Operacional",
-                            xaxis_title="Média de Consumo"
-                        )
-                        st.plotly_chart(fig_media_classe, use_container_width=True)
-                    else:
-                        st.info("Não há dados de consumo médio para exibir com os filtros e exclusões aplicadas.")
-
-                    st.markdown("---")
-                    st.subheader("💰 Total de Gasto por Motorista")
-                    precos_map = get_precos_combustivel_map()
-                    if precos_map:
-                        # Vincula combustível por frota e multiplica litros por preço
-                        df_tmp = df_f.copy()
-                        
-                        # Verificar se a coluna tipo_combustivel existe em df_frotas
-                        if 'tipo_combustivel' in df_frotas.columns:
-                            df_tmp = df_tmp.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                            # Verificar se a coluna foi criada após o merge
-                            if 'tipo_combustivel' in df_tmp.columns:
-                                df_tmp['tipo_combustivel'] = df_tmp['tipo_combustivel'].fillna('Diesel S500')
-                            else:
-                                df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        else:
-                            # Se não existir, criar a coluna com valor padrão
-                            df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        # Garantir que a coluna tipo_combustivel existe antes de mapear preços
-                        if 'tipo_combustivel' not in df_tmp.columns:
-                            df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        
-                        df_tmp['preco_unit'] = df_tmp['tipo_combustivel'].map(precos_map).fillna(0.0)
-                        df_tmp['custo'] = df_tmp['Qtde Litros'].fillna(0.0) * df_tmp['preco_unit']
-                        # Agrupar por matrícula
-                        if 'Matricula' in df_tmp.columns:
-                            gasto_motorista = df_tmp.groupby('Matricula').agg({'custo':'sum', 'Qtde Litros':'sum'}).sort_values('custo', ascending=False)
-                            gasto_motorista = gasto_motorista[gasto_motorista['custo']>0]
-                            if not gasto_motorista.empty:
-                                gasto_motorista = gasto_motorista.reset_index()
-                                gasto_motorista['Custo (R$)'] = gasto_motorista['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                                gasto_motorista['Litros'] = gasto_motorista['Qtde Litros'].apply(formatar_brasileiro_int)
-                                st.dataframe(gasto_motorista[['Matricula','Litros','Custo (R$)']])
-                                try:
-                                    fig_gasto = px.bar(gasto_motorista.head(10), x='custo', y='Matricula', orientation='h', text='Custo (R$)', labels={'custo':'Custo (R$)','Matricula':'Matrícula'})
-                                    st.plotly_chart(fig_gasto, use_container_width=True)
-                                except Exception:
-                                    pass
-                            else:
-                                st.info("Sem dados suficientes de custo (verifique preços cadastrados).")
-                        else:
-                            st.info("Não há coluna de matrícula nos abastecimentos para calcular o gasto por motorista.")
-                    else:
-                        st.info("Cadastre os preços de combustível na aba Importar > Preços.")
-
-                    st.markdown("---")
-                    st.subheader("🔄 Análise de Proporções por Classe e Combustível")
-                
-                with col_grafico2:
-                    st.subheader("⛽ Consumo por Tipo de Combustível")
-                    if not df_consumo_combustivel.empty:
-                        try:
-                            # Filtrar apenas registros que realmente têm consumo (Qtde Litros > 0)
-                            df_consumo_real = df_consumo_combustivel[df_consumo_combustivel['Qtde Litros'] > 0].copy()
-                            
-                            if not df_consumo_real.empty:
-                                # Obter tipos de combustível apenas das frotas que realmente abasteceram
-                                if 'tipo_combustivel' in df_frotas.columns:
-                                    # Pegar apenas os equipamentos que têm histórico de abastecimento
-                                    equipamentos_com_consumo = df_consumo_real['Cod_Equip'].unique()
-                                    
-                                    # Filtrar df_frotas para incluir apenas equipamentos com consumo
-                                    frotas_com_consumo = df_frotas[df_frotas['Cod_Equip'].isin(equipamentos_com_consumo)].copy()
-                                    
-                                    # Verificar se há valores duplicados em Cod_Equip e tratar adequadamente
-                                    if frotas_com_consumo['Cod_Equip'].duplicated().any():
-                                        # Se há duplicatas, pegar o primeiro valor de cada equipamento
-                                        frotas_com_consumo = frotas_com_consumo.drop_duplicates(subset=['Cod_Equip'], keep='first')
-                                    
-                                    # Criar mapeamento de tipo de combustível apenas para equipamentos com consumo
-                                    combustivel_map = frotas_com_consumo.set_index('Cod_Equip')['tipo_combustivel'].fillna('Diesel S500')
-                                    
-                                    # Aplicar o mapeamento apenas aos registros com consumo
-                                    df_consumo_real['tipo_combustivel'] = df_consumo_real['Cod_Equip'].map(combustivel_map).fillna('Diesel S500')
-                                else:
-                                    df_consumo_real['tipo_combustivel'] = 'Diesel S500'
-                                
-                                # Agrupar por tipo de combustível
-                                consumo_por_combustivel = df_consumo_real.groupby("tipo_combustivel")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
-                                
-                                if not consumo_por_combustivel.empty:
-                                    # Criar gráfico de pizza
-                                    fig_pizza_combustivel = px.pie(
-                                        consumo_por_combustivel, 
-                                        values='Qtde Litros', 
-                                        names='tipo_combustivel',
-                                        title="Proporção de Consumo por Combustível (Apenas Frotas com Histórico)",
-                                        hole=0.3
-                                    )
-                                    fig_pizza_combustivel.update_traces(textposition='inside', textinfo='percent+label')
-                                    fig_pizza_combustivel.update_layout(height=400)
-                                    st.plotly_chart(fig_pizza_combustivel, use_container_width=True)
-                                    
-                                    # Mostrar totais
-                                    st.info(f"**Total de tipos de combustível:** {len(consumo_por_combustivel)}")
-                                    st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_combustivel['Qtde Litros'].sum())} L")
-                                    st.info(f"**Frotas com histórico de abastecimento:** {len(equipamentos_com_consumo)}")
-                                else:
-                                    st.warning("Não há dados de consumo para análise por combustível.")
-                            else:
-                                st.warning("Não há registros com consumo de combustível.")
-                        except Exception as e:
-                            st.error(f"Erro ao criar gráfico de combustível: {e}")
-                            st.info("Verificando dados disponíveis...")
-                            if 'tipo_combustivel' in df_consumo_combustivel.columns:
-                                consumo_por_combustivel = df_consumo_combustivel.groupby("tipo_combustivel")["Qtde Litros"].sum().reset_index()
-                                st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_combustivel['Qtde Litros'].sum())} L")
-                            else:
-                                st.error("Coluna tipo_combustivel não encontrada")
-                    else:
-                        st.warning("Não há dados suficientes para análise por combustível.")
-                
-                # Fechar as colunas anteriores e criar nova seção com largura total
-                st.markdown("---")
-                st.subheader("📊 Demonstrativos Detalhados dos Pneus")
-
-                df_pneus_all = get_pneus_historico()
-                if not df_pneus_all.empty:
-                    # Adicione colunas de status e vida se não existirem
-                    if 'status' not in df_pneus_all.columns:
-                        df_pneus_all['status'] = 'Ativo'
-                    if 'vida_atual' not in df_pneus_all.columns:
-                        df_pneus_all['vida_atual'] = 1
-
-                    total_pneus = len(df_pneus_all)
-                    ativos = df_pneus_all[df_pneus_all['status'].str.lower() == 'ativo'].shape[0]
-                    sucateados = df_pneus_all[df_pneus_all['status'].str.lower() == 'sucateado'].shape[0]
-                    reformados = df_pneus_all[df_pneus_all['status'].str.lower() == 'reformado'].shape[0]
-                    vidas = df_pneus_all['vida_atual'].value_counts().sort_index()
-                    marcas = df_pneus_all['marca'].value_counts()
-                    modelos = df_pneus_all['modelo'].value_counts()
-                    posicoes = df_pneus_all['posicao'].value_counts()
-
-                    col1, col2, col3, col4 = st.columns(4)
-                    col1.metric("Total de Pneus", total_pneus)
-                    col2.metric("Ativos", ativos)
-                    col3.metric("Sucateados", sucateados)
-                    col4.metric("Reformados", reformados)
-
-                    # Gráficos melhorados com rótulos de dados
-                    st.markdown("#### 📊 Gráficos de Distribuição")
-                    
-                    # Criar DataFrame de status para o gráfico
-                    status_df = df_pneus_all['status'].value_counts().reset_index()
-                    status_df.columns = ["Status", "Quantidade"]
-                    
-                    # Gráfico de Status (Pizza)
-                    fig_status = px.pie(status_df, names='Status', values='Quantidade', title='Status dos Pneus')
-                    fig_status.update_traces(
-                        textposition='inside',
-                        textinfo='percent+label',
-                        textfont=dict(size=12, color='white')
-                    )
-                    fig_status.update_layout(
-                        height=400,
-                        showlegend=True,
-                        font=dict(size=12)
-                    )
-                    st.plotly_chart(fig_status, use_container_width=True)
-
-                    # Gráfico de Marcas (Barras)
-                    fig_marcas = px.bar(
-                        marcas.reset_index(), 
-                        x='marca', 
-                        y='count', 
-                        title='Quantidade por Marca',
-                        text='count'
-                    )
-                    fig_marcas.update_traces(
-                        textposition='outside',
-                        texttemplate='%{text}',
-                        textfont=dict(size=11, color='white'),
-                        marker=dict(line=dict(width=1, color='black'))
-                    )
-                    fig_marcas.update_layout(
-                        xaxis_title="Marca",
-                        yaxis_title="Quantidade",
-                        height=400,
-                        bargap=0.3,
-                        bargroupgap=0.1
-                    )
-                    st.plotly_chart(fig_marcas, use_container_width=True)
-
-                    # Gráfico de Modelos (Barras)
-                    fig_modelos = px.bar(
-                        modelos.reset_index(), 
-                        x='modelo', 
-                        y='count', 
-                        title='Quantidade por Medida',
-                        text='count'
-                    )
-                    fig_modelos.update_traces(
-                        textposition='outside',
-                        texttemplate='%{text}',
-                        textfont=dict(size=11, color='white'),
-                        marker=dict(line=dict(width=1, color='black'))
-                    )
-                    fig_modelos.update_layout(
-                        xaxis_title="Modelo",
-                        yaxis_title="Quantidade",
-                        height=400,
-                        bargap=0.3,
-                        bargroupgap=0.1
-                    )
-                    st.plotly_chart(fig_modelos, use_container_width=True)
-
-
-
-                    # Botões de exportação
-                    st.markdown("#### 📊 Exportar Dados")
-                    col_export1, col_export2, col_export3 = st.columns(3)
-                    
-                    with col_export1:
-                        export_dataframe(status_df, "status_pneus", "csv")
-                    
-                    with col_export2:
-                        export_dataframe(marcas.reset_index(), "marcas_pneus", "csv")
-                    
-                    with col_export3:
-                        export_dataframe(modelos.reset_index(), "modelos_pneus", "csv")
-                    
-                    # Informações adicionais
-                    st.markdown("---")
-                    st.markdown("""
-                    <div class="info-box">
-                        <strong>💡 Dicas:</strong><br>
-                        • Use os filtros para analisar períodos específicos<br>
-                        • Exporte os dados para análises externas<br>
-                        • Os gráficos são interativos - clique para mais detalhes
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.info("Nenhum pneu cadastrado para demonstrativo.")
-
-                st.markdown("---")
-                st.subheader("🛢️ Demonstrativos de Lubrificantes")
-
-                ensure_lubrificantes_schema()
-                conn = sqlite3.connect(DB_PATH)
-                df_lub = pd.read_sql("SELECT * FROM lubrificantes", conn)
-                df_mov = pd.read_sql("SELECT * FROM lubrificantes_movimentacoes", conn)
-
-                st.write("**Estoque Atual de Lubrificantes:**")
-                if not df_lub.empty:
-                    # Separar por tipo
-                    df_oleos = df_lub[df_lub['tipo'].str.lower() == 'óleo']
-                    df_graxas = df_lub[df_lub['tipo'].str.lower() == 'graxa']
-
-                    col_o, col_g = st.columns(2)
-                    with col_o:
-                        st.markdown("#### Estoque de Óleos")
-                        if not df_oleos.empty:
-                            fig_oleos = px.bar(
-                                df_oleos,
-                                x='nome',
-                                y='quantidade_estoque',
-                                color='viscosidade',
-                                text='quantidade_estoque',
-                                title="Óleos - Estoque Atual",
-                                labels={'quantidade_estoque': 'Qtd. Estoque', 'nome': 'Óleo'}
-                            )
-                            st.plotly_chart(fig_oleos, use_container_width=True)
-                        else:
-                            st.info("Nenhum óleo cadastrado.")
-
-                    with col_g:
-                        st.markdown("#### Estoque de Graxas")
-                        if not df_graxas.empty:
-                            fig_graxas = px.bar(
-                                df_graxas,
-                                x='nome',
-                                y='quantidade_estoque',
-                                color='viscosidade',
-                                text='quantidade_estoque',
-                                title="Graxas - Estoque Atual",
-                                labels={'quantidade_estoque': 'Qtd. Estoque', 'nome': 'Graxa'}
-                            )
-                            st.plotly_chart(fig_graxas, use_container_width=True)
-                        else:
-                            st.info("Nenhuma graxa cadastrada.")
-
-                    # Pizza geral
-                    df_lub['tipo'] = df_lub['tipo'].fillna('óleo')
-                    fig_pizza = px.pie(
-                        df_lub,
-                        names='tipo',
-                        values='quantidade_estoque',
-                        title="Proporção de Estoque: Óleos vs Graxas"
-                    )
-                    st.plotly_chart(fig_pizza, use_container_width=True)
-
-                    st.write("**Movimentações Recentes:**")
-                    df_mov['data'] = pd.to_datetime(df_mov['data'], errors='coerce')
-                    df_mov = df_mov.sort_values('data', ascending=False)
-                    st.dataframe(df_mov.head(20))
-                else:
-                    st.info("Nenhum lubrificante cadastrado.")
-
-                conn.close()
-
-import streamlit as st
-import pandas as pd
-import numpy as np
-import sqlite3
-from datetime import datetime, date, timedelta
-import os
-import plotly.express as px
-import hashlib
-import json
-import base64
-import io
-
-# Configuração de tema (após set_page_config)
-if 'theme' not in st.session_state:
-    st.session_state.theme = 'dark'
-
-# Configuração de tema
-
-
-# CSS personalizado para tema claro/escuro
-def get_theme_css():
-    if st.session_state.theme == 'dark':
-        return """
-        <style>
-        .stApp {
-            background-color: #0e1117;
-            color: #fafafa;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-    else:
-        return """
-        <style>
-        .stApp {
-            background-color: #ffffff;
-            color: #262730;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-
-# Aplicar CSS do tema
-st.markdown(get_theme_css(), unsafe_allow_html=True)
-
-# Função para alternar tema
-def toggle_theme():
-    st.session_state.theme = 'light' if st.session_state.theme == 'dark' else 'dark'
-    st.rerun()
-
-# Função para exportar dados
-def export_dataframe(df, filename, file_type='csv'):
-    """Exporta DataFrame em diferentes formatos"""
-    if file_type == 'csv':
-        csv = df.to_csv(index=False, sep=';', decimal=',', encoding='utf-8-sig')
-        st.download_button(
-            label=f"📥 Download {filename}.csv",
-            data=csv,
-            file_name=f"{filename}.csv",
-            mime="text/csv",
-            help=f"Baixar {filename} em formato CSV"
-        )
-    elif file_type == 'excel':
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Dados')
-        buffer.seek(0)
-        st.download_button(
-            label=f"📥 Download {filename}.xlsx",
-            data=buffer,
-            file_name=f"{filename}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help=f"Baixar {filename} em formato Excel"
-        )
-
-# Função para mostrar loading
-def show_loading(message="Carregando dados..."):
-    """Mostra indicador de carregamento"""
-    with st.spinner(message):
-        st.info(f"⏳ {message}")
-        return True
-
-# Função para tooltip informativo
-def info_tooltip(text, help_text):
-    """Cria um elemento com tooltip informativo"""
-    col1, col2 = st.columns([20, 1])
-    with col1:
-        st.write(text)
-    with col2:
-        st.info("ℹ️", help=help_text)
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(SCRIPT_DIR, "frotas_data.db")
-
-ALERTAS_MANUTENCAO = {
-    'HORAS': { 'default': 20 },
-    'QUILÔMETROS': { 'default': 500 }
-}
-
-def formatar_brasileiro(valor: float, prefixo='') -> str:
-    """Formata um número com casas decimais para o padrão brasileiro."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{prefixo}{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-@st.cache_data(ttl=300)
-def para_csv(df: pd.DataFrame):
-    """Converte um DataFrame para CSV para download."""
-    return df.to_csv(index=False, sep=';', decimal=',').encode('utf-8-sig')
-
-def formatar_brasileiro_int(valor: float) -> str:
-    """Formata um número inteiro para o padrão brasileiro (ex: 123.456)."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{int(valor):,}".replace(",", ".")
-
-def detect_equipment_type(df_completo: pd.DataFrame) -> pd.DataFrame:
-    df = df_completo.copy()
-    df['Tipo_Controle'] = df.get('Unid', pd.Series(index=df.index)).map({'HORAS': 'HORAS', 'QUILÔMETROS': 'QUILÔMETROS'})
-    def inferir_tipo_por_classe(row):
-        if pd.notna(row['Tipo_Controle']): return row['Tipo_Controle']
-        classe = str(row.get('Classe_Operacional', '')).upper()
-        if any(p in classe for p in ['TRATOR', 'COLHEITADEIRA', 'PULVERIZADOR', 'PLANTADEIRA', 'PÁ CARREGADEIRA', 'RETROESCAVADEIRA']): return 'HORAS'
-        if any(p in classe for p in ['CAMINHÃO', 'CAMINHAO', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']): return 'QUILÔMETROS'
-        return 'HORAS'
-    df['Tipo_Controle'] = df.apply(inferir_tipo_por_classe, axis=1)
-    return df
-
-def hash_password(password):
-    """Gera um hash seguro da palavra-passe."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def check_login_db(username, password):
-    """Verifica as credenciais contra a base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("SELECT password_hash, role FROM utilizadores WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        conn.close()
-        if result:
-            password_hash_db, role = result
-            if password_hash_db == hash_password(password):
-                return role
-        return None
-    except Exception as e:
-        st.error(f"Erro ao aceder à base de dados de utilizadores: {e}")
-        return None
-
-def get_all_users():
-    """Busca todos os utilizadores da base de dados."""
-    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-        return pd.read_sql_query("SELECT id, username, role FROM utilizadores", conn)
-
-def add_user(username, password, role):
-    """Adiciona um novo utilizador à base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO utilizadores (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, hash_password(password), role)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador adicionado com sucesso!"
-    except sqlite3.IntegrityError:
-        return False, f"Erro: O nome de utilizador '{username}' já existe."
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def update_user(user_id, new_username, new_role):
-    """Atualiza o nome e a função de um utilizador."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE utilizadores SET username = ?, role = ? WHERE id = ?",
-            (new_username, new_role, user_id)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def delete_user(user_id):
-    """Remove um utilizador da base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM utilizadores WHERE id = ?", (user_id,))
-        conn.commit()
-        conn.close()
-        return True, "Utilizador removido com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-    
-# APAGUE A SUA FUNÇÃO "load_data_from_db" INTEIRA E SUBSTITUA-A POR ESTE BLOCO FINAL
-
-@st.cache_data(show_spinner="Carregando e processando dados...", ttl=300)
-def load_data_from_db(db_path: str, ver_frotas: int=None, ver_abast: int=None, ver_manut: int=None, ver_comp: int=None, ver_chk: int=None):
-    if not os.path.exists(db_path):
-        st.error(f"Arquivo de banco de dados '{db_path}' não encontrado.")
-        st.stop()
-
-    try:
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            df_abast = pd.read_sql_query("SELECT rowid, * FROM abastecimentos", conn)
-            df_frotas = pd.read_sql_query("SELECT * FROM frotas", conn)
-            df_manutencoes = pd.read_sql_query("SELECT rowid, * FROM manutencoes", conn)
-            df_comp_regras = pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-            df_comp_historico = pd.read_sql_query("SELECT rowid, * FROM componentes_historico", conn)
-            df_checklist_regras = pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-            df_checklist_itens = pd.read_sql_query("SELECT * FROM checklist_itens", conn)
-            df_checklist_historico = pd.read_sql_query("SELECT rowid, * FROM checklist_historico", conn)
-
-        # --- Início do Processamento Integrado ---
-        
-        # Renomeia colunas para um padrão consistente
-        df_abast = df_abast.rename(columns={"Cód. Equip.": "Cod_Equip", "Qtde Litros": "Qtde Litros", "Mês": "Mes", "Média": "Media"}, errors='ignore')
-        df_frotas = df_frotas.rename(columns={"COD_EQUIPAMENTO": "Cod_Equip", "Classe Operacional": "Classe_Operacional"}, errors='ignore')
-
-        # Cria o dataframe principal mesclando abastecimentos e frotas
-        df_merged = pd.merge(df_abast, df_frotas, on="Cod_Equip", how="left")
-        
-        # Trata colunas de classe operacional que podem ter vindo da mesclagem
-        if 'Classe_Operacional_x' in df_merged.columns:
-            df_merged['Classe_Operacional'] = np.where(df_merged['Classe_Operacional_x'].notna(), df_merged['Classe_Operacional_x'], df_merged['Classe_Operacional_y'])
-            df_merged.drop(columns=['Classe_Operacional_x', 'Classe_Operacional_y'], inplace=True)
-        
-        # Converte a coluna de data e cria colunas de tempo
-        df_merged["Data"] = pd.to_datetime(df_merged["Data"], errors='coerce')
-        df_merged.dropna(subset=["Data"], inplace=True)
-        df_merged["Ano"] = df_merged["Data"].dt.year
-        df_merged["AnoMes"] = df_merged["Data"].dt.to_period("M").astype(str)
-        
-        # Limpa e converte colunas numéricas
-        for col in ["Qtde Litros", "Media", "Hod_Hor_Atual"]:
-            if col in df_merged.columns:
-                series = df_merged[col].astype(str)
-                series = series.str.replace(',', '.', regex=False).str.replace('-', '', regex=False).str.strip()
-                df_merged[col] = pd.to_numeric(series, errors='coerce')
-        
-        # Cria a coluna "label" no dataframe de frotas para uso em seletores
-        df_frotas["label"] = df_frotas["Cod_Equip"].astype(str) + " - " + df_frotas.get("DESCRICAO_EQUIPAMENTO", "").fillna("") + " (" + df_frotas.get("PLACA", "").fillna("Sem Placa") + ")"
-
-        # Vincula informações de motorista aos abastecimentos (merge durante o load)
-        try:
-            with sqlite3.connect(db_path, check_same_thread=False) as conn:
-                df_motoristas = pd.read_sql_query("SELECT codigo_pessoa, matricula, nome FROM motoristas", conn)
-            if not df_motoristas.empty:
-                df_merged = df_merged.merge(
-                    df_motoristas.rename(columns={"codigo_pessoa": "Cod_Pessoa", "matricula": "Matricula", "nome": "Nome_Motorista"}),
-                    on=["Cod_Pessoa", "Matricula"], how="left"
-                )
-        except Exception:
-            pass
-        
-        # Garante que a classe operacional em df_frotas está atualizada
-        classe_map = df_merged.dropna(subset=['Classe_Operacional']).groupby('Cod_Equip')['Classe_Operacional'].first()
-        df_frotas['Classe_Operacional'] = df_frotas['Cod_Equip'].map(classe_map).fillna(df_frotas.get('Classe_Operacional'))
-
-        # Adiciona coluna de tipo de combustível se não existir
-        if 'tipo_combustivel' not in df_frotas.columns:
-            df_frotas['tipo_combustivel'] = 'Diesel S500'  # Valor padrão
-        else:
-            # Se a coluna existe, apenas preencher valores nulos com padrão
-            df_frotas['tipo_combustivel'] = df_frotas['tipo_combustivel'].fillna('Diesel S500')
-
-        # Determina o tipo de controle (Horas ou Quilômetros) para cada equipamento
-        def determinar_tipo_controle(row):
-            texto_para_verificar = (
-                str(row.get('DESCRICAO_EQUIPAMENTO', '')) + ' ' + 
-                str(row.get('Classe_Operacional', ''))
-            ).upper()
-            km_keywords = ['CAMINH', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']
-            if any(p in texto_para_verificar for p in km_keywords):
-                return 'QUILÔMETROS'
-            return 'HORAS'
-        df_frotas['Tipo_Controle'] = df_frotas.apply(determinar_tipo_controle, axis=1)
-
-        # Retorna todos os dataframes processados
-        return (
-            df_merged, df_frotas, df_manutencoes,
-            df_comp_regras, df_comp_historico,
-            df_checklist_regras, df_checklist_itens, df_checklist_historico
-        )
-
-    except Exception as e:
-        st.error(f"Erro ao ler e processar o banco de dados: {e}")
-        st.stop()
-        # Retorna dataframes vazios em caso de erro
-        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
-                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
-
-                
-    
-def inserir_abastecimento(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO abastecimentos (
-                "Cód. Equip.", Data, "Qtde Litros", Hod_Hor_Atual,
-                Safra, "Mês", "Classe Operacional", Matricula, Cod_Pessoa
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['data'],
-            dados['qtde_litros'],
-            dados['hod_hor_atual'],
-            dados['safra'],
-            dados['mes'],
-            dados['classe_operacional'],
-            dados.get('matricula'),
-            dados.get('cod_pessoa')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao inserir dados no banco de dados: {e}")
-        return False
-
-def excluir_abastecimento(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de abastecimento do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        # Usar rowid é a forma mais segura de deletar uma linha específica
-        sql = "DELETE FROM abastecimentos WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir dados do banco de dados: {e}")
-        return False
-
-def excluir_manutencao_componente(db_path: str, cod_equip: int, nome_componente: str, data: str, hod_hor: float) -> bool:
-    """Exclui um registro de manutenção de componente do banco de dados usando uma combinação única de campos."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)
-        nome_componente = str(nome_componente)
-        data = str(data)
-        hod_hor = float(hod_hor)
-        
-        # Debug: verificar todos os registros na tabela
-        cursor.execute("SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico")
-        all_records = cursor.fetchall()
-        
-        # Debug: verificar se há registros com valores similares
-        cursor.execute(
-            "SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico WHERE Cod_Equip = ?", 
-            (cod_equip,)
-        )
-        similar_records = cursor.fetchall()
-        
-        # Primeiro, vamos verificar se o registro existe
-        cursor.execute(
-            "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Nome Componente: {nome_componente} (tipo: {type(nome_componente)})
-            - Data: {data} (tipo: {type(data)})
-            - Hod_Hor: {hod_hor} (tipo: {type(hod_hor)})
-            
-            Registros similares encontrados (mesmo Cod_Equip):
-            {similar_records}
-            
-            Todos os registros na tabela:
-            {all_records}
-            """
-            st.error(debug_info)
-            return False
-        
-        # Agora vamos excluir
-        cursor.execute(
-            "DELETE FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute(
-                "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-                (cod_equip, nome_componente, data, hod_hor)
-            )
-            count_after = cursor.fetchone()[0]
-            
-            if count_after == 0:
-                # Forçar sincronização do banco
-                cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                cursor.execute("PRAGMA synchronous=FULL")
-                conn.commit()
-                
-                # Salvar backup automático para persistência no Streamlit Cloud
-                backup_success, backup_msg = save_backup_to_session_state()
-                if backup_success:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Backup salvo: {backup_msg}")
-                else:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Aviso: {backup_msg}")
-                
-                conn.close()
-                return True
-            else:
-                st.error("Erro: Registro ainda existe após exclusão")
-                conn.close()
-                return False
-        else:
-            st.error("Nenhum registro foi excluído")
-            conn.close()
-            return False
-            
-    except Exception as e:
-        st.error(f"Erro ao excluir manutenção de componente do banco de dados: {e}")
-        return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
-
-def excluir_manutencao(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de manutenção do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = "DELETE FROM manutencoes WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir manutenção do banco de dados: {e}")
-        return False
-
-def inserir_manutencao(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = 'INSERT INTO manutencoes (Cod_Equip, Data, Tipo_Servico, Hod_Hor_No_Servico) VALUES (?, ?, ?, ?)'
-        params = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'])
-        cursor.execute(sql, params)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-
-def inserir_frota(db_path: str, dados: dict) -> bool:
-    """Insere um novo registro de frota no banco de dados."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO frotas (
-                COD_EQUIPAMENTO, DESCRICAO_EQUIPAMENTO, PLACA, 
-                "Classe Operacional", ATIVO, tipo_combustivel
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['descricao'],
-            dados['placa'],
-            dados['classe_op'],
-            dados['ativo'],
-            dados.get('tipo_combustivel', 'Diesel S500')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-    
-
-def editar_abastecimento(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de abastecimento existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE abastecimentos SET
-                "Cód. Equip." = ?, Data = ?, "Qtde Litros" = ?, Hod_Hor_Atual = ?, Safra = ?, Matricula = ?, Cod_Pessoa = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'], dados['data'], dados['qtde_litros'], dados['hod_hor_atual'], dados['safra'],
-            dados.get('matricula'), dados.get('cod_pessoa'), rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar abastecimento: {e}")
-        return False
-
-def editar_manutencao(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de manutenção existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE manutencoes SET
-                Cod_Equip = ?, Data = ?, Tipo_Servico = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'], rowid)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar manutenção: {e}")
-        return False
-
-def editar_manutencao_componente(db_path: str, rowid: int, dados: dict) -> bool:
-    """Edita um registro de manutenção de componente existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE componentes_historico 
-            SET Cod_Equip = ?, nome_componente = ?, Observacoes = ?, Data = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['componente'],
-            dados['acao'],
-            dados['data'],
-            dados['hod_hor_servico'],
-            rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        st.error(f"Erro ao editar manutenção de componente no banco de dados: {e}")
-        return False
-
-def importar_abastecimentos_de_planilha(db_path: str, arquivo_carregado) -> tuple[int, int, str]:
-    """Lê uma planilha, verifica por duplicados, e insere os novos dados. Aceita opcionalmente as colunas Matricula e Cod_Pessoa."""
-    try:
-        df_novo = pd.read_excel(arquivo_carregado)
-        
-        mapa_colunas = {
-            "Cód. Equip.": "Cód. Equip.",
-            "Data": "Data",
-            "Qtde Litros": "Qtde Litros",
-            "Hod. Hor. Atual": "Hod_Hor_Atual",
-            "Safra": "Safra",
-            "Mês": "Mês",
-            "Classe Operacional": "Classe Operacional",
-            "Matricula": "Matricula",
-            "Cod_Pessoa": "Cod_Pessoa",
-        }
-        df_novo = df_novo.rename(columns={k: v for k, v in mapa_colunas.items() if k in df_novo.columns})
-
-        colunas_necessarias = ["Cód. Equip.", "Data", "Qtde Litros", "Hod_Hor_Atual", "Safra", "Mês", "Classe Operacional"]
-        colunas_opcionais = ["Matricula", "Cod_Pessoa"]
-        colunas_faltando = [col for col in colunas_necessarias if col not in df_novo.columns]
-        if colunas_faltando:
-            return 0, 0, f"Erro: Colunas não encontradas: {', '.join(colunas_faltando)}"
-        conn = sqlite3.connect(db_path)
-        df_existente = pd.read_sql_query("SELECT * FROM abastecimentos", conn)
-        
-        df_novo['Data'] = pd.to_datetime(df_novo['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        df_existente['Data'] = pd.to_datetime(df_existente['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        df_novo['chave_unica'] = df_novo['Cód. Equip.'].astype(str) + '_' + df_novo['Data'] + '_' + df_novo['Qtde Litros'].astype(str)
-        df_existente['chave_unica'] = df_existente['Cód. Equip.'].astype(str) + '_' + df_existente['Data'] + '_' + df_existente['Qtde Litros'].astype(str)
-
-        df_para_inserir = df_novo[~df_novo['chave_unica'].isin(df_existente['chave_unica'])]
-        
-        num_duplicados = len(df_novo) - len(df_para_inserir)
-
-        if df_para_inserir.empty:
-            return 0, num_duplicados, "Nenhum registo novo para importar. Todos os registos da planilha já existem na base de dados."
-
-        colunas_insert = colunas_necessarias + [c for c in colunas_opcionais if c in df_para_inserir.columns]
-        df_para_inserir_final = df_para_inserir[colunas_insert]
-        registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-        
-        cursor = conn.cursor()
-        placeholders = ", ".join(["?"] * len(colunas_insert))
-        sql = f"INSERT INTO abastecimentos ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-        cursor.executemany(sql, registros)
-        
-        conn.commit()
-        num_inseridos = cursor.rowcount
-        conn.close()
-        
-        mensagem_sucesso = f"{num_inseridos} registos novos foram importados com sucesso."
-        if num_duplicados > 0:
-            mensagem_sucesso += f" {num_duplicados} registos duplicados foram ignorados."
-            
-        return num_inseridos, num_duplicados, mensagem_sucesso
-
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação: {e}"
-
-def editar_frota(db_path: str, cod_equip: int, dados: dict) -> bool:
-    """Atualiza um registro de frota existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE frotas SET
-                DESCRICAO_EQUIPAMENTO = ?, PLACA = ?, "Classe Operacional" = ?, ATIVO = ?, tipo_combustivel = ?
-            WHERE COD_EQUIPAMENTO = ?
-        """
-        valores = (dados['descricao'], dados['placa'], dados['classe_op'], dados['ativo'], dados.get('tipo_combustivel', 'Diesel S500'), cod_equip)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar frota: {e}")
-        return False
-
-# COLE ESTE BLOCO DE CÓDIGO NO LOCAL INDICADO
-
-def get_component_rules():
-    """Busca todas as regras de componentes da base de dados."""
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-
-def add_component_rule(classe, componente, intervalo):
-    """Adiciona uma nova regra de componente à base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao) VALUES (?, ?, ?)",
-                (classe, componente, intervalo)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
-
-def add_component_rule_advanced(classe, componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca", capacidade_litros=0.0):
-    """Adiciona uma nova regra de componente com informações de lubrificante e tipo de manutenção."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, tipo_manutencao, capacidade_litros) VALUES (?, ?, ?, ?, ?, ?)",
-                (classe, componente, intervalo, lubrificante_id, tipo_manutencao, capacidade_litros)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
-
-def delete_component_rule(rule_id):
-    """Remove uma regra de componente da base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM componentes_regras WHERE id_regra = ?", (rule_id,))
-            conn.commit()
-        return True, "Componente removido com sucesso."
-    except Exception as e:
-        return False, f"Erro ao remover componente: {e}"
-
-def add_component_service(cod_equip, componente, data, hod_hor, obs):
-    """Adiciona um novo registo de serviço de componente ao histórico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, Observacoes) VALUES (?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
-
-def add_component_service_advanced(cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado=None, obs=""):
-    """Adiciona um novo registo de serviço de componente com informações detalhadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
-
-def get_component_status(cod_equip, componente):
-    """Obtém o status atual de um componente específico de um equipamento."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            # Buscar a última manutenção do componente
-            query = """
-            SELECT Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            ORDER BY Data DESC, Hod_Hor_No_Servico DESC
-            LIMIT 1
-            """
-            df_ultima = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            
-            # Buscar a regra do componente para obter o intervalo
-            query_regra = """
-            SELECT intervalo_padrao, lubrificante_id, tipo_manutencao
-            FROM componentes_regras cr
-            JOIN frotas f ON cr.classe_operacional = f."Classe Operacional"
-            WHERE f.COD_EQUIPAMENTO = ? AND cr.nome_componente = ?
-            """
-            df_regra = pd.read_sql_query(query_regra, conn, params=(cod_equip, componente))
-            
-            # Buscar o hodômetro/horímetro atual do equipamento
-            query_hod = """
-            SELECT Hod_Hor_Atual FROM abastecimentos 
-            WHERE Cod_Equip = ? 
-            ORDER BY Data DESC, Hod_Hor_Atual DESC 
-            LIMIT 1
-            """
-            df_hod = pd.read_sql_query(query_hod, conn, params=(cod_equip,))
-            
-            return df_ultima, df_regra, df_hod
-            
-    except Exception as e:
-        st.error(f"Erro ao obter status do componente: {e}")
-        return None, None, None
-
-def get_component_maintenance_count(cod_equip, componente):
-    """Obtém o número total de manutenções realizadas em um componente."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT COUNT(*) as total_manutencoes,
-                   COUNT(CASE WHEN tipo_servico = 'Troca' THEN 1 END) as total_trocas,
-                   COUNT(CASE WHEN tipo_servico = 'Remonta' THEN 1 END) as total_remontas
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            """
-            df_count = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            return df_count.iloc[0] if not df_count.empty else {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
-            
-    except Exception as e:
-        st.error(f"Erro ao obter contagem de manutenções: {e}")
-        return {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
-
-def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
-    """Edita uma manutenção de componente com informações avançadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_historico 
-                SET Cod_Equip = ?, nome_componente = ?, Data = ?, Hod_Hor_No_Servico = ?, 
-                    Observacoes = ?, tipo_servico = ?, lubrificante_utilizado = ?
-                WHERE rowid = ?
-            """, (
-                dados_editados['cod_equip'],
-                dados_editados['componente'],
-                dados_editados['data'],
-                dados_editados['hod_hor_servico'],
-                dados_editados['acao'],
-                dados_editados['tipo_servico'],
-                dados_editados['lubrificante_utilizado'],
-                rowid
-            ))
-            conn.commit()
-        return True, "Manutenção de componente atualizada com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar manutenção de componente: {e}"
-
-def update_component_rule(rule_id, nome_componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca"):
-    """Atualiza uma regra de componente existente."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_regras 
-                SET nome_componente = ?, intervalo_padrao = ?, lubrificante_id = ?, tipo_manutencao = ?
-                WHERE id_regra = ?
-            """, (nome_componente, intervalo, lubrificante_id, tipo_manutencao, rule_id))
-            conn.commit()
-        return True, f"Componente '{nome_componente}' atualizado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar componente: {e}"
-
-def get_frota_combustivel(cod_equip):
-    """Obtém o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT tipo_combustivel FROM frotas WHERE COD_EQUIPAMENTO = ?", (cod_equip,))
-            result = cursor.fetchone()
-            return result[0] if result else None
-    except Exception as e:
-        st.error(f"Erro ao obter tipo de combustível: {e}")
-        return None
-
-def update_frota_combustivel(cod_equip, tipo_combustivel):
-    """Atualiza o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE COD_EQUIPAMENTO = ?", (tipo_combustivel, cod_equip))
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível: {e}"
-
-def update_classe_combustivel(classe_operacional, tipo_combustivel):
-    """Atualiza o tipo de combustível de todas as frotas de uma classe."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE \"Classe Operacional\" = ?", (tipo_combustivel, classe_operacional))
-            rows_updated = cursor.rowcount
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel} em {rows_updated} frotas da classe {classe_operacional}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível da classe: {e}"
-
-def add_tipo_combustivel_column():
-    """Adiciona a coluna tipo_combustivel à tabela frotas se ela não existir."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            # Verificar se a coluna existe
-            cursor.execute("PRAGMA table_info(frotas)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'tipo_combustivel' not in columns:
-                cursor.execute("ALTER TABLE frotas ADD COLUMN tipo_combustivel TEXT DEFAULT 'Diesel S500'")
-                conn.commit()
-                return True, "Coluna tipo_combustivel adicionada com sucesso"
-            else:
-                return True, "Coluna tipo_combustivel já existe"
-    except Exception as e:
-        return False, f"Erro ao adicionar coluna tipo_combustivel: {e}"
-
-def ensure_motoristas_schema():
-    """Garante a existência da tabela de motoristas e das colunas de vínculo em abastecimentos."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS motoristas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    codigo_pessoa TEXT,
-                    matricula TEXT UNIQUE,
-                    nome TEXT,
-                    ativo TEXT DEFAULT 'ATIVO'
-                )
-                """
-            )
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_matricula ON motoristas(matricula)")
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_codigo_pessoa ON motoristas(codigo_pessoa)")
-
-            cursor.execute("PRAGMA table_info(abastecimentos)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'Matricula' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Matricula TEXT")
-            if 'Cod_Pessoa' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Cod_Pessoa TEXT")
-            conn.commit()
-        return True, "Esquema de motoristas verificado"
-    except Exception as e:
-        return False, f"Erro ao verificar esquema de motoristas: {e}"
-
-def get_all_motoristas() -> pd.DataFrame:
-    """Retorna o DataFrame de motoristas."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM motoristas", conn)
-    except Exception:
-        return pd.DataFrame(columns=['id', 'codigo_pessoa', 'matricula', 'nome', 'ativo'])
-
-def importar_motoristas_de_planilha(db_path: str, arquivo_carregado):
-    """Importa motoristas a partir de planilha Excel. Espera colunas: Matricula, Nome e opcional Cod_Pessoa/Código Pessoa."""
-    try:
-        df_mot = pd.read_excel(arquivo_carregado)
-        df_mot.columns = [c.strip() for c in df_mot.columns]
-        renomeios = {
-            'Matrícula': 'Matricula', 'matricula': 'Matricula', 'MATRICULA': 'Matricula',
-            'Nome': 'Nome', 'nome': 'Nome', 'NOME': 'Nome',
-            'Cod_Pessoa': 'Cod_Pessoa', 'Código Pessoa': 'Cod_Pessoa', 'codigo_pessoa': 'Cod_Pessoa', 'CODIGO_PESSOA': 'Cod_Pessoa'
-        }
-        df_mot.rename(columns={k: v for k, v in renomeios.items() if k in df_mot.columns}, inplace=True)
-        obrig = ['Matricula', 'Nome']
-        faltando = [c for c in obrig if c not in df_mot.columns]
-        if faltando:
-            return 0, 0, f"Erro: Colunas obrigatórias não encontradas: {', '.join(faltando)}"
-        if 'Cod_Pessoa' not in df_mot.columns:
-            df_mot['Cod_Pessoa'] = None
-        df_mot = df_mot.dropna(subset=['Matricula', 'Nome']).copy()
-        df_mot['Matricula'] = df_mot['Matricula'].astype(str).str.strip()
-        df_mot['Nome'] = df_mot['Nome'].astype(str).str.strip()
-        df_mot['Cod_Pessoa'] = df_mot['Cod_Pessoa'].astype(str).str.strip()
-        df_mot = df_mot.drop_duplicates(subset=['Matricula'])
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            existentes = pd.read_sql_query("SELECT matricula FROM motoristas", conn)
-            set_exist = set(existentes['matricula'].astype(str)) if not existentes.empty else set()
-            df_novos = df_mot[~df_mot['Matricula'].isin(set_exist)].copy()
-            if df_novos.empty:
-                return 0, len(df_mot), "Nenhum motorista novo para importar. Todos já existem."
-            registros = [
-                (row.get('Cod_Pessoa', None), row['Matricula'], row['Nome'], 'ATIVO')
-                for _, row in df_novos.iterrows()
-            ]
-            cur = conn.cursor()
-            cur.executemany(
-                "INSERT INTO motoristas (codigo_pessoa, matricula, nome, ativo) VALUES (?, ?, ?, ?)",
-                registros
-            )
-            conn.commit()
-            inseridos = cur.rowcount if cur.rowcount is not None else len(registros)
-            duplicados = len(df_mot) - len(df_novos)
-            return inseridos, duplicados, f"{inseridos} motoristas importados com sucesso. {duplicados} já existiam."
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação de motoristas: {e}"
-    
-def ensure_pneus_schema():
-    """Garante a existência da tabela de histórico de pneus."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pneus_historico (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    Cod_Equip INTEGER,
-                    posicao TEXT,
-                    marca TEXT,
-                    modelo TEXT,
-                    numero_fogo TEXT,
-                    data_instalacao TEXT,
-                    hodometro_instalacao REAL,
-                    
-                    observacoes TEXT,
-                    status TEXT DEFAULT 'Ativo',
-                    vida_atual INTEGER DEFAULT 1
-                )
-            """)
-            # Adiciona colunas se não existirem
-            cursor.execute("PRAGMA table_info(pneus_historico)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'status' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN status TEXT DEFAULT 'Ativo'")
-            if 'vida_atual' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN vida_atual INTEGER DEFAULT 1")
-            if 'numero_fogo' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN numero_fogo TEXT")
-            conn.commit()
-        return True, "Tabela de pneus verificada"
-    except Exception as e:
-        return False, f"Erro ao criar tabela de pneus: {e}"
-
-def importar_pneus_de_planilha(db_path: str, arquivo_carregado):
-    """Importa histórico de pneus de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_pneus = pd.read_excel(arquivo_carregado)
-        df_pneus.columns = [c.strip() for c in df_pneus.columns]
-        obrig = ['Cod_Equip', 'posicao', 'marca', 'modelo', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao']
-        faltando = [c for c in obrig if c not in df_pneus.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-            if 'observacoes' not in df_pneus.columns:
-                df_pneus['observacoes'] = ""
-            
-        
-        # Limpar dados e remover linhas com valores nulos obrigatórios
-        df_pneus = df_pneus.dropna(subset=['Cod_Equip', 'posicao', 'numero_fogo'])
-        
-        # Normalizar tipos de dados
-        df_pneus['Cod_Equip'] = df_pneus['Cod_Equip'].astype(str)
-        df_pneus['posicao'] = df_pneus['posicao'].astype(str).str.strip()
-        df_pneus['numero_fogo'] = df_pneus['numero_fogo'].astype(str).str.strip()
-        df_pneus['data_instalacao'] = pd.to_datetime(df_pneus['data_instalacao']).dt.strftime('%Y-%m-%d')
-        
-        # Remover duplicatas na própria planilha baseada em chave única
-        df_pneus = df_pneus.drop_duplicates(subset=['Cod_Equip', 'posicao', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Buscar registros existentes para verificar duplicatas
-            df_existente = pd.read_sql_query("SELECT Cod_Equip, posicao, numero_fogo, data_instalacao, hodometro_instalacao FROM pneus_historico", conn)
-            
-            if not df_existente.empty:
-                # Normalizar dados existentes para comparação
-                df_existente['Cod_Equip'] = df_existente['Cod_Equip'].astype(str)
-                df_existente['posicao'] = df_existente['posicao'].astype(str).str.strip()
-                df_existente['numero_fogo'] = df_existente['numero_fogo'].astype(str).str.strip()
-                df_existente['data_instalacao'] = pd.to_datetime(df_existente['data_instalacao']).dt.strftime('%Y-%m-%d')
-                
-                # Criar chaves únicas para comparação
-                df_pneus['chave_unica'] = (df_pneus['Cod_Equip'] + '_' + 
-                                          df_pneus['posicao'] + '_' + 
-                                          df_pneus['numero_fogo'] + '_' + 
-                                          df_pneus['data_instalacao'] + '_' + 
-                                          df_pneus['hodometro_instalacao'].astype(str))
-                
-                df_existente['chave_unica'] = (df_existente['Cod_Equip'] + '_' + 
-                                              df_existente['posicao'] + '_' + 
-                                              df_existente['numero_fogo'] + '_' + 
-                                              df_existente['data_instalacao'] + '_' + 
-                                              df_existente['hodometro_instalacao'].astype(str))
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_pneus[~df_pneus['chave_unica'].isin(df_existente['chave_unica'])]
-            else:
-                df_para_inserir = df_pneus
-            
-            num_duplicados = len(df_pneus) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum pneu novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = obrig + ['observacoes']
-            # Garantir que a coluna observacoes exista no DataFrame
-            if 'observacoes' not in df_para_inserir.columns:
-                df_para_inserir['observacoes'] = ''
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.fillna('').to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO pneus_historico ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} pneus novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar pneus: {e}"
-
-def get_pneus_historico(cod_equip=None):
-    """Retorna o histórico de pneus, opcionalmente filtrando por frota."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            query = "SELECT * FROM pneus_historico"
-            params = ()
-            if cod_equip:
-                query += " WHERE Cod_Equip = ?"
-                params = (cod_equip,)
-            return pd.read_sql_query(query, conn, params=params)
-    except Exception:
-        return pd.DataFrame()
-
-def ensure_precos_combustivel_schema():
-    """Garante a existência da tabela de preços por tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS precos_combustivel (
-                    tipo_combustivel TEXT PRIMARY KEY,
-                    preco REAL
-                )
-                """
-            )
-            tipos = ['Diesel S500', 'Diesel S10', 'Gasolina', 'Etanol', 'Biodiesel']
-            for t in tipos:
-                cur.execute("INSERT OR IGNORE INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?)", (t, NULL))
-            conn.commit()
-        return True, "Tabela de preços verificada"
-    except Exception as e:
-        return False, f"Erro ao verificar tabela de preços: {e}"
-
-def get_precos_combustivel_map() -> dict:
-    """Retorna um dicionário {tipo_combustivel: preco}."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            dfp = pd.read_sql_query("SELECT tipo_combustivel, preco FROM precos_combustivel", conn)
-        return {row['tipo_combustivel']: row['preco'] for _, row in dfp.iterrows()}
-    except Exception:
-        return {}
-
-def upsert_preco_combustivel(tipo: str, preco: float) -> tuple[bool, str]:
-    """Cria/atualiza preço para um tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?) ON CONFLICT(tipo_combustivel) DO UPDATE SET preco=excluded.preco",
-                (tipo, preco)
-            )
-            conn.commit()
-        return True, f"Preço atualizado para {tipo}"
-    except Exception as e:
-        return False, f"Erro ao atualizar preço: {e}"
-    
-def ensure_lubrificantes_schema():
-    """Garante a existência da tabela de lubrificantes, movimentações e almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            
-            # Tabela de lubrificantes
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT,
-                    viscosidade TEXT,
-                    quantidade_estoque REAL,
-                    unidade TEXT,
-                    observacoes TEXT
-                )
-            """)
-            
-            # Verificar e adicionar coluna 'tipo' se não existir
-            cursor.execute("PRAGMA table_info(lubrificantes)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'tipo' not in cols:
-                cursor.execute("ALTER TABLE lubrificantes ADD COLUMN tipo TEXT DEFAULT 'óleo'")
-            
-            # Tabela de almoxarifados
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifados (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    tipo TEXT DEFAULT 'fixo', -- 'fixo' para oficina, 'movel' para caminhões
-                    localizacao TEXT,
-                    responsavel TEXT,
-                    observacoes TEXT,
-                    ativo BOOLEAN DEFAULT 1
-                )
-            """)
-            
-            # Tabela de estoque por almoxarifado
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifado_estoque (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_almoxarifado INTEGER,
-                    id_lubrificante INTEGER,
-                    quantidade_estoque REAL DEFAULT 0,
-                    unidade TEXT,
-                    data_atualizacao TEXT,
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id),
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    UNIQUE(id_almoxarifado, id_lubrificante)
-                )
-            """)
-            
-            # Tabela de movimentações (atualizada para incluir almoxarifado)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes_movimentacoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_lubrificante INTEGER,
-                    id_almoxarifado INTEGER,
-                    tipo TEXT, -- 'entrada' ou 'saida'
-                    quantidade REAL,
-                    data TEXT,
-                    cod_equip INTEGER,
-                    observacoes TEXT,
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id)
-                )
-            """)
-            
-            # Verificar se a coluna id_almoxarifado existe na tabela de movimentações
-            cursor.execute("PRAGMA table_info(lubrificantes_movimentacoes)")
-            cols_mov = [c[1] for c in cursor.fetchall()]
-            if 'id_almoxarifado' not in cols_mov:
-                cursor.execute("ALTER TABLE lubrificantes_movimentacoes ADD COLUMN id_almoxarifado INTEGER")
-            
-            conn.commit()
-        return True, "Tabelas de lubrificantes e almoxarifados verificadas"
-    except Exception as e:
-        return False, f"Erro ao criar tabelas de lubrificantes: {e}"
-    
-def add_almoxarifado(nome, tipo="fixo", localizacao="", responsavel="", observacoes=""):
-    """Adiciona um novo almoxarifado."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO almoxarifados (nome, tipo, localizacao, responsavel, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, tipo, localizacao, responsavel, observacoes)
-            )
-            conn.commit()
-        return True, "Almoxarifado cadastrado com sucesso!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def get_almoxarifados():
-    """Retorna todos os almoxarifados ativos."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            df = pd.read_sql("SELECT * FROM almoxarifados WHERE ativo = 1 ORDER BY nome", conn)
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def get_estoque_por_almoxarifado(id_lubrificante):
-    """Retorna o estoque de um lubrificante distribuído por almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT 
-                a.nome as almoxarifado,
-                a.tipo,
-                COALESCE(ae.quantidade_estoque, 0) as quantidade,
-                COALESCE(ae.unidade, l.unidade) as unidade,
-                a.localizacao,
-                a.responsavel
-            FROM almoxarifados a
-            CROSS JOIN lubrificantes l
-            LEFT JOIN almoxarifado_estoque ae ON a.id = ae.id_almoxarifado AND l.id = ae.id_lubrificante
-            WHERE l.id = ? AND a.ativo = 1
-            ORDER BY a.nome
-            """
-            df = pd.read_sql(query, conn, params=(id_lubrificante,))
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def atualizar_estoque_almoxarifado(id_almoxarifado, id_lubrificante, quantidade, unidade):
-    """Atualiza o estoque de um lubrificante em um almoxarifado específico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO almoxarifado_estoque 
-                (id_almoxarifado, id_lubrificante, quantidade_estoque, unidade, data_atualizacao) 
-                VALUES (?, ?, ?, ?, ?)
-            """, (id_almoxarifado, id_lubrificante, quantidade, unidade, date.today().strftime("%Y-%m-%d")))
-            conn.commit()
-        return True, "Estoque atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao atualizar estoque: {e}"
-
-def add_lubrificante(nome, viscosidade, quantidade, unidade, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes (nome, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, viscosidade, quantidade, unidade, observacoes)
-            )
-            conn.commit()
-        return True, "Lubrificante cadastrado!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
-    """Importa lubrificantes de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_lub = pd.read_excel(arquivo_carregado)
-        df_lub.columns = [c.strip() for c in df_lub.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome': 'nome',
-            'tipo': 'tipo',
-            'viscosidade': 'viscosidade',
-            'quantidade_estoque': 'quantidade_estoque',
-            'unidade': 'unidade',
-            'observacoes': 'observacoes'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_lub.columns:
-                df_lub = df_lub.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome']
-        faltando = [c for c in obrig if c not in df_lub.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'tipo' not in df_lub.columns:
-            df_lub['tipo'] = 'óleo'
-        if 'viscosidade' not in df_lub.columns:
-            df_lub['viscosidade'] = ''
-        if 'quantidade_estoque' not in df_lub.columns:
-            df_lub['quantidade_estoque'] = 0
-        if 'unidade' not in df_lub.columns:
-            df_lub['unidade'] = 'L'
-        if 'observacoes' not in df_lub.columns:
-            df_lub['observacoes'] = ''
-        
-        # Limpar e normalizar dados
-        df_lub = df_lub.dropna(subset=['nome'])
-        df_lub['nome'] = df_lub['nome'].astype(str).str.strip()
-        df_lub['tipo'] = df_lub['tipo'].astype(str).str.strip().fillna('óleo')
-        df_lub['viscosidade'] = df_lub['viscosidade'].astype(str).str.strip().fillna('')
-        df_lub['quantidade_estoque'] = pd.to_numeric(df_lub['quantidade_estoque'], errors='coerce').fillna(0)
-        df_lub['unidade'] = df_lub['unidade'].astype(str).str.strip().fillna('L')
-        df_lub['observacoes'] = df_lub['observacoes'].astype(str).str.strip().fillna('')
-        
-        # Remover duplicatas na própria planilha baseada no nome
-        df_lub = df_lub.drop_duplicates(subset=['nome'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que a tabela existe com a coluna tipo
-            ensure_lubrificantes_schema()
-            
-            # Buscar lubrificantes existentes
-            df_existente = pd.read_sql_query("SELECT nome FROM lubrificantes", conn)
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome'] = df_existente['nome'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_lub[~df_lub['nome'].isin(df_existente['nome'])]
-            else:
-                df_para_inserir = df_lub
-            
-            num_duplicados = len(df_lub) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum lubrificante novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = ['nome', 'tipo', 'viscosidade', 'quantidade_estoque', 'unidade', 'observacoes']
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO lubrificantes ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} lubrificantes novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar lubrificantes: {e}"
-
-def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_operacional: str):
-    """Importa componentes de uma planilha Excel, verificando duplicatas e criando lubrificantes se necessário."""
-    try:
-        df_comp = pd.read_excel(arquivo_carregado)
-        df_comp.columns = [c.strip() for c in df_comp.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome_componente': 'nome_componente',
-            'componente': 'nome_componente',
-            'intervalo_padrao': 'intervalo_padrao',
-            'intervalo': 'intervalo_padrao',
-            'lubrificante_nome': 'lubrificante_nome',
-            'lubrificante': 'lubrificante_nome',
-            'capacidade_litros': 'capacidade_litros',
-            'capacidade': 'capacidade_litros'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_comp.columns:
-                df_comp = df_comp.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome_componente', 'intervalo_padrao']
-        faltando = [c for c in obrig if c not in df_comp.columns]
-        if faltando:
-            return 0, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'lubrificante_nome' not in df_comp.columns:
-            df_comp['lubrificante_nome'] = None
-        if 'capacidade_litros' not in df_comp.columns:
-            df_comp['capacidade_litros'] = 0.0
-        
-        # Limpar e normalizar dados
-        df_comp = df_comp.dropna(subset=['nome_componente'])
-        df_comp['nome_componente'] = df_comp['nome_componente'].astype(str).str.strip()
-        df_comp['intervalo_padrao'] = pd.to_numeric(df_comp['intervalo_padrao'], errors='coerce')
-        df_comp = df_comp.dropna(subset=['intervalo_padrao'])
-        df_comp['lubrificante_nome'] = df_comp['lubrificante_nome'].astype(str).str.strip().replace('nan', None)
-        df_comp['capacidade_litros'] = pd.to_numeric(df_comp['capacidade_litros'], errors='coerce').fillna(0.0)
-        
-        # Remover duplicatas na própria planilha baseada no nome do componente
-        df_comp = df_comp.drop_duplicates(subset=['nome_componente'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que as tabelas existem
-            ensure_lubrificantes_schema()
-            
-            # Verificar se a tabela componentes_regras tem a coluna capacidade_litros
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'capacidade_litros' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN capacidade_litros REAL DEFAULT 0.0")
-            
-            # Buscar componentes existentes na classe
-            df_existente = pd.read_sql_query(
-                "SELECT nome_componente FROM componentes_regras WHERE classe_operacional = ?", 
-                conn, params=(classe_operacional,)
-            )
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome_componente'] = df_existente['nome_componente'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem na classe
-                df_para_inserir = df_comp[~df_comp['nome_componente'].isin(df_existente['nome_componente'])]
-            else:
-                df_para_inserir = df_comp
-            
-            num_duplicados = len(df_comp) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, 0, "Nenhum componente novo para importar. Todos os registros da planilha já existem na classe selecionada."
-            
-            # Processar lubrificantes
-            lubrificantes_criados = 0
-            for _, row in df_para_inserir.iterrows():
-                if pd.notna(row['lubrificante_nome']) and row['lubrificante_nome']:
-                    # Verificar se o lubrificante existe
-                    df_lub_existente = pd.read_sql_query(
-                        "SELECT id FROM lubrificantes WHERE nome = ?", 
-                        conn, params=(row['lubrificante_nome'],)
-                    )
-                    
-                    if df_lub_existente.empty:
-                        # Criar lubrificante automaticamente
-                        cur = conn.cursor()
-                        cur.execute(
-                            "INSERT INTO lubrificantes (nome, tipo, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                            (row['lubrificante_nome'], 'óleo', '', 0, 'L', f'Criado automaticamente durante importação de componentes')
-                        )
-                        lubrificantes_criados += 1
-                        
-                        # Buscar o ID do lubrificante criado
-                        lub_id = cur.lastrowid
-                    else:
-                        lub_id = df_lub_existente.iloc[0]['id']
-                else:
-                    lub_id = None
-                
-                # Inserir componente
-                cur = conn.cursor()
-                cur.execute(
-                    "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, capacidade_litros) VALUES (?, ?, ?, ?, ?)",
-                    (classe_operacional, row['nome_componente'], row['intervalo_padrao'], lub_id, row['capacidade_litros'])
-                )
-            
-            conn.commit()
-            num_inseridos = len(df_para_inserir)
-            
-            mensagem_sucesso = f"{num_inseridos} componentes foram importados com sucesso para a classe '{classe_operacional}'."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} componentes duplicados foram ignorados."
-            if lubrificantes_criados > 0:
-                mensagem_sucesso += f" {lubrificantes_criados} lubrificantes foram criados automaticamente."
-            
-            return num_inseridos, num_duplicados, lubrificantes_criados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, 0, f"Erro ao importar componentes: {e}"
-
-def movimentar_lubrificante(id_lubrificante, tipo, quantidade, data, cod_equip=None, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes_movimentacoes (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes)
-            )
-            # Atualiza estoque
-            sinal = 1 if tipo == "entrada" else -1
-            cur.execute(
-                "UPDATE lubrificantes SET quantidade_estoque = quantidade_estoque + ? WHERE id = ?",
-                (sinal * quantidade, id_lubrificante)
-            )
-            conn.commit()
-        return True, "Movimentação registrada!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-@st.cache_data(ttl=120)
-def filtrar_dados(df: pd.DataFrame, opts: dict) -> pd.DataFrame:
-    # Garante que a coluna de data é do tipo datetime
-    df['Data'] = pd.to_datetime(df['Data'])
-    
-    # Filtra por período de datas
-    df_filtrado = df[
-        (df['Data'].dt.date >= opts['data_inicio']) & 
-        (df['Data'].dt.date <= opts['data_fim'])
-    ]
-    
-    # Filtra pelas outras seleções, se existirem
-    if opts.get("classes_op"):
-        df_filtrado = df_filtrado[df_filtrado["Classe_Operacional"].isin(opts["classes_op"])]
-    
-    if opts.get("safras"):
-        df_filtrado = df_filtrado[df_filtrado["Safra"].isin(opts["safras"])]
-        
-    return df_filtrado.copy()
-
-@st.cache_data(show_spinner="Calculando plano de manutenção...", ttl=300)
-def build_component_maintenance_plan(_df_frotas: pd.DataFrame, _df_abastecimentos: pd.DataFrame, _df_componentes_regras: pd.DataFrame, _df_componentes_historico: pd.DataFrame) -> pd.DataFrame:
-    latest_readings = _df_abastecimentos.sort_values('Data').groupby('Cod_Equip')['Hod_Hor_Atual'].last()
-    plan_data = []
-
-    for _, frota_row in _df_frotas.iterrows():
-        cod_equip = frota_row['Cod_Equip']
-        classe_op = frota_row.get('Classe_Operacional')
-        hod_hor_atual = latest_readings.get(cod_equip)
-
-        if pd.isna(hod_hor_atual) or not classe_op:
-            continue
-        
-        regras_da_classe = _df_componentes_regras[_df_componentes_regras['classe_operacional'] == classe_op]
-        if regras_da_classe.empty:
-            continue
-
-        unidade = 'km' if frota_row['Tipo_Controle'] == 'QUILÔMETROS' else 'h'
-        alerta_default = ALERTAS_MANUTENCAO.get(frota_row['Tipo_Controle'], {}).get('default', 500)
-        
-        record = {
-            'Cod_Equip': cod_equip, 
-            'Equipamento': frota_row.get('DESCRICAO_EQUIPAMENTO'), 
-            'Leitura_Atual': hod_hor_atual, 
-            'Unidade': unidade, 
-            'Qualquer_Alerta': False, 
-            'Alertas': []
-        }
-
-        for _, regra in regras_da_classe.iterrows():
-            componente = regra['nome_componente']
-            intervalo = regra['intervalo_padrao']
-            
-            historico_componente = _df_componentes_historico[
-                (_df_componentes_historico['Cod_Equip'] == cod_equip) &
-                (_df_componentes_historico['nome_componente'] == componente)
-            ]
-            
-            ultimo_servico_hod_hor = 0
-            if not historico_componente.empty:
-                ultimo_servico_hod_hor = historico_componente['Hod_Hor_No_Servico'].max()
-
-            prox_servico = ((ultimo_servico_hod_hor // intervalo) * intervalo) + intervalo
-            while prox_servico < hod_hor_atual:
-                prox_servico += intervalo
-
-            restante = prox_servico - hod_hor_atual
-            
-            record[f'Restante_{componente}'] = restante
-            
-            if restante <= alerta_default:
-                record['Qualquer_Alerta'] = True
-                record['Alertas'].append(componente)
-
-        plan_data.append(record)
-
-    # 🔹 Garante que sempre retorna um DataFrame com as colunas básicas
-    if not plan_data:
-        return pd.DataFrame(columns=['Cod_Equip', 'Equipamento', 'Leitura_Atual', 'Unidade', 'Qualquer_Alerta', 'Alertas'])
-
-    return pd.DataFrame(plan_data)
-
-def prever_manutencoes(df_veiculos: pd.DataFrame, df_abastecimentos: pd.DataFrame, plan_df: pd.DataFrame) -> pd.DataFrame:
-    """Estima as datas das próximas manutenções com base no uso médio."""
-    if plan_df.empty or 'Leitura_Atual' not in plan_df.columns:
-        return pd.DataFrame()
-
-    # Calcula o uso diário médio de cada veículo
-    uso_diario = {}
-    for cod_equip in df_abastecimentos['Cod_Equip'].unique():
-        dados_equip = df_abastecimentos[df_abastecimentos['Cod_Equip'] == cod_equip].sort_values('Data')
-        if len(dados_equip) > 1:
-            total_dias = (dados_equip['Data'].max() - dados_equip['Data'].min()).days
-            total_uso = dados_equip['Hod_Hor_Atual'].max() - dados_equip['Hod_Hor_Atual'].min()
-            if total_dias > 0 and total_uso > 0: # Garante que houve uso e passagem de tempo
-                uso_diario[cod_equip] = total_uso / total_dias
-
-    previsoes = []
-    servicos_nomes = [col.replace('Restante_', '') for col in plan_df.columns if 'Restante_' in col]
-
-    for _, row in plan_df.iterrows():
-        cod_equip = row['Cod_Equip']
-        uso = uso_diario.get(cod_equip)
-        if uso:
-            for nome_servico in servicos_nomes:
-                col_restante = f'Restante_{nome_servico}'
-                if col_restante in row and pd.notna(row[col_restante]):
-                    dias_para_manut = row[col_restante] / uso
-                    data_prevista = datetime.now() + pd.Timedelta(days=dias_para_manut)
-                    previsoes.append({
-                        'Equipamento': row['Equipamento'],
-                        'Manutenção': nome_servico,
-                        'Data Prevista': data_prevista.strftime('%d/%m/%Y'),
-                        'Dias Restantes': int(dias_para_manut)
-                    })
-
-    if not previsoes:
-        return pd.DataFrame()
-
-    df_previsoes = pd.DataFrame(previsoes)
-    return df_previsoes.sort_values('Dias Restantes')
-
-# ---------------------------
-# Funções para Checklists
-# ---------------------------
-
-@st.cache_data(ttl=120)
-def get_checklist_rules():
-    """Busca todas as regras de checklist do banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-    except Exception as e:
-        st.error(f"Erro ao buscar regras de checklist: {e}")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=120)
-def get_checklist_items(id_regra):
-    """Busca os itens de checklist para uma determinada regra."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query(
-                "SELECT * FROM checklist_itens WHERE id_regra = ?",
-                conn,
-                params=(id_regra,)
-            )
-    except Exception as e:
-        st.error(f"Erro ao buscar itens de checklist: {e}")
-        return pd.DataFrame()
-
-# ---------------------------
-# CRUD para Checklists
-# ---------------------------
-
-def add_checklist_rule(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra de checklist ao banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-        return True, "Regra de checklist adicionada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar regra de checklist: {e}"
-
-def add_checklist_rule_and_get_id(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra e devolve o ID criado (ou None em erro).
-
-    Mantém a função "add_checklist_rule" para compatibilidade, mas quando for
-    necessário o ID imediatamente após a criação, utilize esta função.
-    """
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-            return cursor.lastrowid
-    except Exception as e:
-        st.error(f"Erro ao adicionar regra de checklist: {e}")
-        return None
-
-def edit_checklist_rule(id_regra, classe_operacional, titulo_checklist, turno, frequencia):
-    """Edita uma regra de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_regras
-                SET classe_operacional = ?, titulo_checklist = ?, frequencia = ?, turno = ?
-                WHERE id_regra = ?
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno, id_regra)
-            )
-            conn.commit()
-        return True, "Regra de checklist atualizada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar regra de checklist: {e}"
-
-def delete_checklist_rule(id_regra):
-    """Remove uma regra de checklist e seus itens associados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_regra = ?", (id_regra,))
-            cursor.execute("DELETE FROM checklist_regras WHERE id_regra = ?", (id_regra,))
-            conn.commit()
-        return True, "Regra de checklist removida com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover regra de checklist: {e}"
-
-def add_checklist_item(id_regra, nome_item):
-    """Adiciona um novo item de checklist a uma regra existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_itens (id_regra, nome_item)
-                VALUES (?, ?)
-                """ ,
-                (id_regra, nome_item)
-            )
-            conn.commit()
-        return True, "Item de checklist adicionado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar item de checklist: {e}"
-
-def edit_checklist_item(id_item, nome_item):
-    """Edita um item de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_itens
-                SET nome_item = ?
-                WHERE id_item = ?
-                """ ,
-                (nome_item, id_item)
-            )
-            conn.commit()
-        return True, "Item de checklist atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar item de checklist: {e}"
-
-def delete_checklist_item(id_item):
-    """Remove um item de checklist."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_item = ?", (id_item,))
-            conn.commit()
-        return True, "Item de checklist removido com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover item de checklist: {e}"
-
-def save_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno, status_geral):
-    """Salva um checklist preenchido no histórico."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_historico 
-                (Cod_Equip, titulo_checklist, data_preenchimento, turno, status_geral) 
-                VALUES (?, ?, ?, ?, ?)
-                """ ,
-                (cod_equip, titulo_checklist, data_preenchimento, turno, status_geral)
-            )
-            conn.commit()
-    except Exception as e:
-        st.error(f"Erro ao salvar histórico de checklist: {e}")
-
-def delete_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno):
-    """Remove um registro do histórico de checklists usando uma combinação única de campos."""
-    try:
-        # Primeira tentativa: usar conexão direta
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)  # Converter numpy.int64 para int
-        titulo_checklist = str(titulo_checklist)
-        data_preenchimento = str(data_preenchimento)
-        turno = str(turno)
-        
-        # Debug: verificar todos os registros na tabela ANTES da exclusão
-        cursor.execute("SELECT rowid, Cod_Equip, titulo_checklist, data_preenchimento, turno FROM checklist_historico")
-        all_records_before = cursor.fetchall()
-        
-        # Tentar encontrar o registro com diferentes abordagens
-        rowid = None
-        
-        # Primeira tentativa: busca exata
-        cursor.execute(
-            "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-            (cod_equip, titulo_checklist, data_preenchimento, turno)
-        )
-        result = cursor.fetchone()
-        
-        if result:
-            rowid = result[0]
-        else:
-            # Segunda tentativa: buscar apenas por Cod_Equip, título e turno (ignorar data)
-            cursor.execute(
-                "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, turno)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                rowid = result[0]
-            else:
-                # Terceira tentativa: buscar apenas por Cod_Equip e título
-                cursor.execute(
-                    "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ?", 
-                    (cod_equip, titulo_checklist)
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    rowid = result[0]
-        
-        if rowid is None:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Título: {titulo_checklist} (tipo: {type(titulo_checklist)})
-            - Data: {data_preenchimento} (tipo: {type(data_preenchimento)})
-            - Turno: {turno} (tipo: {type(turno)})
-            
-            Todos os registros na tabela ANTES da exclusão:
-            {all_records_before}
-            """
-            conn.close()
-            return False, debug_info
-        
-        # Agora vamos excluir usando rowid
-        cursor.execute("DELETE FROM checklist_historico WHERE rowid = ?", (rowid,))
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute("SELECT COUNT(*) FROM checklist_historico WHERE rowid = ?", (rowid,))
-            count_after = cursor.fetchone()[0]
-            
-            # Verificar também se o registro ainda existe pelos outros campos
-            cursor.execute(
-                "SELECT COUNT(*) FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, data_preenchimento, turno)
-            )
-            count_by_fields = cursor.fetchone()[0]
-            
-            if count_after == 0 and count_by_fields == 0:
-                 # Verificar o total de registros na tabela
-                 cursor.execute("SELECT COUNT(*) FROM checklist_historico")
-                 total_after = cursor.fetchone()[0]
-                 
-                 # Forçar sincronização do banco
-                 cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                 cursor.execute("PRAGMA synchronous=FULL")
-                 conn.commit()
-                 
-                 success_msg = f"Checklist excluído com sucesso! ({rows_deleted} registro(s) removido(s)). Total na tabela: {total_after}"
-                 
-                 # Salvar backup automático para persistência no Streamlit Cloud
-                 backup_success, backup_msg = save_backup_to_session_state()
-                 if backup_success:
-                     success_msg += f" | Backup salvo: {backup_msg}"
-                 else:
-                     success_msg += f" | Aviso: {backup_msg}"
-                 
-                 conn.close()
-                 return True, success_msg
-            else:
-                conn.close()
-                return False, f"Erro: Registro ainda existe após exclusão. Count by rowid: {count_after}, Count by fields: {count_by_fields}"
-        else:
-            conn.close()
-            return False, "Nenhum registro foi excluído"
-                
-    except Exception as e:
-        if 'conn' in locals():
-            conn.close()
-        return False, f"Erro ao excluir checklist: {e}"
-
-def force_cache_clear():
-    """Força a limpeza completa de todos os caches."""
-    try:
-        # Limpar cache de dados
-        st.cache_data.clear()
-        
-        # Limpar cache de recursos
-        st.cache_resource.clear()
-        
-        # Forçar rerun da aplicação
-        st.rerun()
-    except Exception as e:
-        st.error(f"Erro ao limpar cache: {e}")
-
-def force_database_sync():
-    """Força a sincronização do banco de dados com o disco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Forçar commit
-        conn.commit()
-        
-        # Executar PRAGMA para forçar sincronização
-        cursor.execute("PRAGMA wal_checkpoint(FULL)")
-        cursor.execute("PRAGMA synchronous=FULL")
-        cursor.execute("PRAGMA journal_mode=DELETE")
-        
-        # Forçar commit novamente
-        conn.commit()
-        
-        # Verificar se o banco está em modo WAL
-        cursor.execute("PRAGMA journal_mode")
-        journal_mode = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        return True, f"Banco sincronizado. Modo journal: {journal_mode}"
-    except Exception as e:
-        return False, f"Erro ao sincronizar banco: {e}"
-
-def export_database_backup():
-    """Exporta todos os dados do banco para um arquivo de backup."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        
-        # Obter todas as tabelas
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        backup_data = {}
-        
-        for table in tables:
-            table_name = table[0]
-            if table_name != 'sqlite_master':
-                # Exportar dados da tabela
-                df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-                backup_data[table_name] = df.to_dict('records')
-        
-        conn.close()
-        
-        # Converter para JSON
-        backup_json = json.dumps(backup_data, default=str, indent=2)
-        
-        # Criar arquivo de download
-        backup_bytes = backup_json.encode('utf-8')
-        backup_b64 = base64.b64encode(backup_bytes).decode()
-        
-        return backup_b64, backup_data
-        
-    except Exception as e:
-        return None, f"Erro ao exportar backup: {e}"
-
-def import_database_backup(backup_data):
-    """Importa dados de backup para o banco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        for table_name, records in backup_data.items():
-            if records:  # Se a tabela tem dados
-                # Limpar tabela existente
-                cursor.execute(f"DELETE FROM {table_name}")
-                
-                # Inserir novos dados
-                for record in records:
-                    columns = list(record.keys())
-                    placeholders = ', '.join(['?' for _ in columns])
-                    values = list(record.values())
-                    
-                    # Converter tipos de dados
-                    converted_values = []
-                    for value in values:
-                        if isinstance(value, str):
-                            # Tentar converter para datetime se for uma data
-                            try:
-                                if 'T' in value or '-' in value:
-                                    dt = pd.to_datetime(value)
-                                    converted_values.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
-                                else:
-                                    converted_values.append(value)
-                            except:
-                                converted_values.append(value)
-                        else:
-                            converted_values.append(value)
-                    
-                    cursor.execute(
-                        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
-                        converted_values
-                    )
-        
-        conn.commit()
-        conn.close()
-        
-        return True, "Backup restaurado com sucesso!"
-        
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def save_backup_to_session_state():
-    """Salva backup dos dados na sessão do Streamlit."""
-    try:
-        backup_b64, backup_data = export_database_backup()
-        if backup_b64:
-            st.session_state['database_backup'] = backup_b64
-            st.session_state['backup_timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            return True, "Backup salvo na sessão"
-        else:
-            return False, "Erro ao criar backup"
-    except Exception as e:
-        return False, f"Erro ao salvar backup: {e}"
-
-def restore_backup_from_session_state():
-    """Restaura backup dos dados da sessão do Streamlit."""
-    try:
-        if 'database_backup' in st.session_state:
-            backup_b64 = st.session_state['database_backup']
-            backup_bytes = base64.b64decode(backup_b64)
-            backup_json = backup_bytes.decode('utf-8')
-            backup_data = json.loads(backup_json)
-            
-            success, message = import_database_backup(backup_data)
-            if success:
-                # Limpar cache para forçar recarregamento
-                force_cache_clear()
-                return True, message
-            else:
-                return False, message
-        else:
-            return False, "Nenhum backup encontrado na sessão"
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def auto_restore_backup_on_startup():
-    """Tenta restaurar backup automaticamente na inicialização da aplicação."""
-    try:
-        if 'database_backup' in st.session_state:
-            # Verificar se o banco está vazio
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-            num_tables = cursor.fetchone()[0]
-            conn.close()
-            
-            if num_tables == 0:
-                # Banco vazio, tentar restaurar
-                success, message = restore_backup_from_session_state()
-                if success:
-                    st.info("🔄 Backup restaurado automaticamente na inicialização!")
-                    return True
-                else:
-                    st.warning(f"⚠️ Falha na restauração automática: {message}")
-                    return False
-        return False
-    except Exception as e:
-        st.warning(f"⚠️ Erro na restauração automática: {e}")
-        return False
-
-def main():
-    
-    # Garante tema dark coerente mesmo sem config.toml
-    st.markdown(
-        """
-        <style>
-        :root {
-            --primary: #10b981;
-            --bg: #0f172a;
-            --bg2: #111827;
-            --text: #e5e7eb;
-        }
-        body { background: var(--bg); color: var(--text); }
-        section.main > div { background: var(--bg); }
-        .stApp { background: var(--bg); }
-        .st-emotion-cache-1r4qj8v, .st-emotion-cache-13ln4jf { background: var(--bg2) !important; }
-        .stButton>button { background: var(--primary); color: #062e24; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    # CSS fino para polir a UI
-    st.markdown(
-        """
-        <style>
-        /* Cartões/containers */
-        .stExpander, .stDataFrame, .stTable { border-radius: 10px !important; }
-        .stButton>button { border-radius: 8px; padding: 0.5rem 1rem; }
-        .stSelectbox, .stTextInput, .stNumberInput, .stDateInput, .stTextArea { border-radius: 8px !important; }
-        /* Métricas com mais destaque */
-        div[data-testid="stMetric"] { background: rgba(255,255,255,0.04); padding: 10px 14px; border-radius: 12px; }
-        /* Títulos com leve gradiente */
-        h1, h2, h3 { background: linear-gradient(90deg, #10b981 0%, #06b6d4 100%); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
-        /* Linhas divisórias mais suaves */
-        hr { border: none; height: 1px; background: rgba(255,255,255,0.08); }
-        /* Subtítulo de marca (opcional) */
-        .brand-subtitle { display: none; }
-        /* Centralizar e limitar logo na sidebar */
-        section[data-testid="stSidebar"] img { display: block; margin: 0.5rem auto 0.75rem; max-width: 140px; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-        st.session_state.role = None
-        st.session_state.username = ""
-
-    if not st.session_state.authenticated:
-        _ , col_central, _ = st.columns([1, 1.5, 1])
-    
-        with col_central:
-            
-            if os.path.exists("logo.png"):
-                # Cria 3 sub-colunas dentro da coluna central
-                _, logo_col, _ = st.columns([1, 2, 1])
-                with logo_col:
-                    st.image("logo.png", width=140)
-            
-            st.title("Bem vindo ao Aplicativo de Controle do PCMA")
-
-            username = st.text_input("Usuário", key="login_user")
-            password = st.text_input("Senha", type="password", key="login_pass")
-
-            if st.button("Entrar", use_container_width=True):
-                role = check_login_db(username, password)
-                if role:
-                    st.session_state.authenticated = True
-                    st.session_state.role = role
-                    st.session_state.username = username
-                    st.rerun()
-                else:
-                    st.error("Usuário ou Senha incorretos.")
-    else:
-
-        # Cabeçalho com logo + título
-        if os.path.exists("logo.png"):
-            col_logo, col_title = st.columns([1, 8])
-            with col_logo:
-                st.image("logo.png", width=80)
-            with col_title:
-                st.title("📊 Dashboard de Frotas e Abastecimentos")
-        else:
-            st.title("📊 Dashboard de Frotas e Abastecimentos")
-
-        # Tentar restaurar backup automaticamente na inicialização
-        auto_restore_backup_on_startup()
-        
-        # Adicionar coluna de tipo de combustível se não existir
-        add_tipo_combustivel_column()
-        
-        # Setup de esquemas (motoristas, preços, combustível)
-        ensure_motoristas_schema()
-        ensure_precos_combustivel_schema()
-
-        # Passo um fingerprint simples das tabelas para invalidar cache quando necessário
-        ver_frotas = int(os.path.getmtime(DB_PATH)) if os.path.exists(DB_PATH) else 0
-        df, df_frotas, df_manutencoes, df_comp_regras, df_comp_historico, df_checklist_regras, df_checklist_itens, df_checklist_historico = load_data_from_db(DB_PATH, ver_frotas, ver_frotas, ver_frotas, ver_frotas, ver_frotas)
-        
-
-        if 'intervalos_por_classe' not in st.session_state:
-            st.session_state.intervalos_por_classe = {}
-        classes_operacionais = [c for c in df_frotas['Classe_Operacional'].unique() if pd.notna(c) and str(c).strip()]
-        for classe in classes_operacionais:
-            if classe not in st.session_state.intervalos_por_classe:
-                tipo_controle = df_frotas[df_frotas['Classe_Operacional'] == classe]['Tipo_Controle'].iloc[0]
-                if tipo_controle == 'HORAS':
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 5.0,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 250},
-                            'servico_2': {'nome': 'Revisao A', 'intervalo': 100},
-                            'servico_3': {'nome': 'Revisao B', 'intervalo': 300},
-                            'servico_4': {'nome': 'Revisao C', 'intervalo': 500}
-                        }
-                    }
-                else: # QUILÔMETROS
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 2.5,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 5000},
-                            'servico_2': {'nome': 'Revisao 5k', 'intervalo': 5000},
-                            'servico_3': {'nome': 'Revisao 10k', 'intervalo': 10000},
-                            'servico_4': {'nome': 'Revisao 20k', 'intervalo': 20000}
-                        }
-                    }
-                    
-        with st.sidebar:
-            if os.path.exists("logo.png"):
-                st.image("logo.png", width=200)
-            st.write(f"Bem-vindo, **{st.session_state.username}**!")
-            if st.button("Sair"):
-                st.session_state.authenticated = False
-                st.session_state.username = "" # Limpa o username ao sair
-                st.session_state.role = None
-                st.rerun()
-            st.markdown("---")
-
-        with st.sidebar:
-            st.header("📅 Filtros (válidos apenas na aba Análise Geral)")
-
-            # Persistência de período
-            if 'filtro_data_inicio' not in st.session_state:
-                st.session_state['filtro_data_inicio'] = df['Data'].min().date()
-            if 'filtro_data_fim' not in st.session_state:
-                st.session_state['filtro_data_fim'] = df['Data'].max().date()
-
-            st.subheader("Período de Análise")
-            data_inicio = st.date_input(
-                "Data de Início", 
-                st.session_state['filtro_data_inicio'],
-                key='data_inicio'
-            )
-            data_fim = st.date_input(
-                "Data de Fim", 
-                st.session_state['filtro_data_fim'],
-                key='data_fim'
-            )
-            st.session_state['filtro_data_inicio'] = data_inicio
-            st.session_state['filtro_data_fim'] = data_fim
-
-            st.markdown("---")
-            st.caption("Desenvolvido por André Luis")
-
-            with st.expander("Filtrar por Classe Operacional"):
-                classe_opts = sorted(list(df["Classe_Operacional"].dropna().unique()))
-                sel_classes = st.multiselect(
-                    "Selecione as Classes", 
-                    classe_opts, 
-                    default=classe_opts,
-                    key="sel_classes"
-                )
-
-            with st.expander("Filtrar por Safra"):
-                safra_opts = sorted(list(df["Safra"].dropna().unique()))
-                sel_safras = st.multiselect(
-                    "Selecione as Safras", 
-                    safra_opts, 
-                    default=safra_opts,
-                    key="sel_safras"
-                )
-
-            # Só aplicaremos os filtros na aba "📈 Análise Geral" (guardaremos em sessão)
-            st.session_state['filtro_opts_analise'] = {
-                "data_inicio": data_inicio,
-                "data_fim": data_fim,
-                "classes_op": sel_classes,
-                "safras": sel_safras
-            }
-    
-import streamlit as st
-import pandas as pd
-import numpy as np
-import sqlite3
-from datetime import datetime, date, timedelta
-import os
-import plotly.express as px
-import hashlib
-import json
-import base64
-import io
-
-# Configuração de tema (após set_page_config)
-if 'theme' not in st.session_state:
-    st.session_state.theme = 'dark'
-
-# Configuração de tema
-
-
-# CSS personalizado para tema claro/escuro
-def get_theme_css():
-    if st.session_state.theme == 'dark':
-        return """
-        <style>
-        .stApp {
-            background-color: #0e1117;
-            color: #fafafa;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-    else:
-        return """
-        <style>
-        .stApp {
-            background-color: #ffffff;
-            color: #262730;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-
-# Aplicar CSS do tema
-st.markdown(get_theme_css(), unsafe_allow_html=True)
-
-# Função para alternar tema
-def toggle_theme():
-    st.session_state.theme = 'light' if st.session_state.theme == 'dark' else 'dark'
-    st.rerun()
-
-# Função para exportar dados
-def export_dataframe(df, filename, file_type='csv'):
-    """Exporta DataFrame em diferentes formatos"""
-    if file_type == 'csv':
-        csv = df.to_csv(index=False, sep=';', decimal=',', encoding='utf-8-sig')
-        st.download_button(
-            label=f"📥 Download {filename}.csv",
-            data=csv,
-            file_name=f"{filename}.csv",
-            mime="text/csv",
-            help=f"Baixar {filename} em formato CSV"
-        )
-    elif file_type == 'excel':
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Dados')
-        buffer.seek(0)
-        st.download_button(
-            label=f"📥 Download {filename}.xlsx",
-            data=buffer,
-            file_name=f"{filename}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help=f"Baixar {filename} em formato Excel"
-        )
-
-# Função para mostrar loading
-def show_loading(message="Carregando dados..."):
-    """Mostra indicador de carregamento"""
-    with st.spinner(message):
-        st.info(f"⏳ {message}")
-        return True
-
-# Função para tooltip informativo
-def info_tooltip(text, help_text):
-    """Cria um elemento com tooltip informativo"""
-    col1, col2 = st.columns([20, 1])
-    with col1:
-        st.write(text)
-    with col2:
-        st.info("ℹ️", help=help_text)
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(SCRIPT_DIR, "frotas_data.db")
-
-ALERTAS_MANUTENCAO = {
-    'HORAS': { 'default': 20 },
-    'QUILÔMETROS': { 'default': 500 }
-}
-
-def formatar_brasileiro(valor: float, prefixo='') -> str:
-    """Formata um número com casas decimais para o padrão brasileiro."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{prefixo}{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-@st.cache_data(ttl=300)
-def para_csv(df: pd.DataFrame):
-    """Converte um DataFrame para CSV para download."""
-    return df.to_csv(index=False, sep=';', decimal=',').encode('utf-8-sig')
-
-def formatar_brasileiro_int(valor: float) -> str:
-    """Formata um número inteiro para o padrão brasileiro (ex: 123.456)."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{int(valor):,}".replace(",", ".")
-
-def detect_equipment_type(df_completo: pd.DataFrame) -> pd.DataFrame:
-    df = df_completo.copy()
-    df['Tipo_Controle'] = df.get('Unid', pd.Series(index=df.index)).map({'HORAS': 'HORAS', 'QUILÔMETROS': 'QUILÔMETROS'})
-    def inferir_tipo_por_classe(row):
-        if pd.notna(row['Tipo_Controle']): return row['Tipo_Controle']
-        classe = str(row.get('Classe_Operacional', '')).upper()
-        if any(p in classe for p in ['TRATOR', 'COLHEITADEIRA', 'PULVERIZADOR', 'PLANTADEIRA', 'PÁ CARREGADEIRA', 'RETROESCAVADEIRA']): return 'HORAS'
-        if any(p in classe for p in ['CAMINHÃO', 'CAMINHAO', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']): return 'QUILÔMETROS'
-        return 'HORAS'
-    df['Tipo_Controle'] = df.apply(inferir_tipo_por_classe, axis=1)
-    return df
-
-def hash_password(password):
-    """Gera um hash seguro da palavra-passe."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def check_login_db(username, password):
-    """Verifica as credenciais contra a base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("SELECT password_hash, role FROM utilizadores WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        conn.close()
-        if result:
-            password_hash_db, role = result
-            if password_hash_db == hash_password(password):
-                return role
-        return None
-    except Exception as e:
-        st.error(f"Erro ao aceder à base de dados de utilizadores: {e}")
-        return None
-
-def get_all_users():
-    """Busca todos os utilizadores da base de dados."""
-    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-        return pd.read_sql_query("SELECT id, username, role FROM utilizadores", conn)
-
-def add_user(username, password, role):
-    """Adiciona um novo utilizador à base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO utilizadores (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, hash_password(password), role)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador adicionado com sucesso!"
-    except sqlite3.IntegrityError:
-        return False, f"Erro: O nome de utilizador '{username}' já existe."
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def update_user(user_id, new_username, new_role):
-    """Atualiza o nome e a função de um utilizador."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE utilizadores SET username = ?, role = ? WHERE id = ?",
-            (new_username, new_role, user_id)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def delete_user(user_id):
-    """Remove um utilizador da base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM utilizadores WHERE id = ?", (user_id,))
-        conn.commit()
-        conn.close()
-        return True, "Utilizador removido com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-    
-# APAGUE A SUA FUNÇÃO "load_data_from_db" INTEIRA E SUBSTITUA-A POR ESTE BLOCO FINAL
-
-@st.cache_data(show_spinner="Carregando e processando dados...", ttl=300)
-def load_data_from_db(db_path: str, ver_frotas: int=None, ver_abast: int=None, ver_manut: int=None, ver_comp: int=None, ver_chk: int=None):
-    if not os.path.exists(db_path):
-        st.error(f"Arquivo de banco de dados '{db_path}' não encontrado.")
-        st.stop()
-
-    try:
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            df_abast = pd.read_sql_query("SELECT rowid, * FROM abastecimentos", conn)
-            df_frotas = pd.read_sql_query("SELECT * FROM frotas", conn)
-            df_manutencoes = pd.read_sql_query("SELECT rowid, * FROM manutencoes", conn)
-            df_comp_regras = pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-            df_comp_historico = pd.read_sql_query("SELECT rowid, * FROM componentes_historico", conn)
-            df_checklist_regras = pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-            df_checklist_itens = pd.read_sql_query("SELECT * FROM checklist_itens", conn)
-            df_checklist_historico = pd.read_sql_query("SELECT rowid, * FROM checklist_historico", conn)
-
-        # --- Início do Processamento Integrado ---
-        
-        # Renomeia colunas para um padrão consistente
-        df_abast = df_abast.rename(columns={"Cód. Equip.": "Cod_Equip", "Qtde Litros": "Qtde Litros", "Mês": "Mes", "Média": "Media"}, errors='ignore')
-        df_frotas = df_frotas.rename(columns={"COD_EQUIPAMENTO": "Cod_Equip", "Classe Operacional": "Classe_Operacional"}, errors='ignore')
-
-        # Cria o dataframe principal mesclando abastecimentos e frotas
-        df_merged = pd.merge(df_abast, df_frotas, on="Cod_Equip", how="left")
-        
-        # Trata colunas de classe operacional que podem ter vindo da mesclagem
-        if 'Classe_Operacional_x' in df_merged.columns:
-            df_merged['Classe_Operacional'] = np.where(df_merged['Classe_Operacional_x'].notna(), df_merged['Classe_Operacional_x'], df_merged['Classe_Operacional_y'])
-            df_merged.drop(columns=['Classe_Operacional_x', 'Classe_Operacional_y'], inplace=True)
-        
-        # Converte a coluna de data e cria colunas de tempo
-        df_merged["Data"] = pd.to_datetime(df_merged["Data"], errors='coerce')
-        df_merged.dropna(subset=["Data"], inplace=True)
-        df_merged["Ano"] = df_merged["Data"].dt.year
-        df_merged["AnoMes"] = df_merged["Data"].dt.to_period("M").astype(str)
-        
-        # Limpa e converte colunas numéricas
-        for col in ["Qtde Litros", "Media", "Hod_Hor_Atual"]:
-            if col in df_merged.columns:
-                series = df_merged[col].astype(str)
-                series = series.str.replace(',', '.', regex=False).str.replace('-', '', regex=False).str.strip()
-                df_merged[col] = pd.to_numeric(series, errors='coerce')
-        
-        # Cria a coluna "label" no dataframe de frotas para uso em seletores
-        df_frotas["label"] = df_frotas["Cod_Equip"].astype(str) + " - " + df_frotas.get("DESCRICAO_EQUIPAMENTO", "").fillna("") + " (" + df_frotas.get("PLACA", "").fillna("Sem Placa") + ")"
-
-        # Vincula informações de motorista aos abastecimentos (merge durante o load)
-        try:
-            with sqlite3.connect(db_path, check_same_thread=False) as conn:
-                df_motoristas = pd.read_sql_query("SELECT codigo_pessoa, matricula, nome FROM motoristas", conn)
-            if not df_motoristas.empty:
-                df_merged = df_merged.merge(
-                    df_motoristas.rename(columns={"codigo_pessoa": "Cod_Pessoa", "matricula": "Matricula", "nome": "Nome_Motorista"}),
-                    on=["Cod_Pessoa", "Matricula"], how="left"
-                )
-        except Exception:
-            pass
-        
-        # Garante que a classe operacional em df_frotas está atualizada
-        classe_map = df_merged.dropna(subset=['Classe_Operacional']).groupby('Cod_Equip')['Classe_Operacional'].first()
-        df_frotas['Classe_Operacional'] = df_frotas['Cod_Equip'].map(classe_map).fillna(df_frotas.get('Classe_Operacional'))
-
-        # Adiciona coluna de tipo de combustível se não existir
-        if 'tipo_combustivel' not in df_frotas.columns:
-            df_frotas['tipo_combustivel'] = 'Diesel S500'  # Valor padrão
-        else:
-            # Se a coluna existe, apenas preencher valores nulos com padrão
-            df_frotas['tipo_combustivel'] = df_frotas['tipo_combustivel'].fillna('Diesel S500')
-
-        # Determina o tipo de controle (Horas ou Quilômetros) para cada equipamento
-        def determinar_tipo_controle(row):
-            texto_para_verificar = (
-                str(row.get('DESCRICAO_EQUIPAMENTO', '')) + ' ' + 
-                str(row.get('Classe_Operacional', ''))
-            ).upper()
-            km_keywords = ['CAMINH', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']
-            if any(p in texto_para_verificar for p in km_keywords):
-                return 'QUILÔMETROS'
-            return 'HORAS'
-        df_frotas['Tipo_Controle'] = df_frotas.apply(determinar_tipo_controle, axis=1)
-
-        # Retorna todos os dataframes processados
-        return (
-            df_merged, df_frotas, df_manutencoes,
-            df_comp_regras, df_comp_historico,
-            df_checklist_regras, df_checklist_itens, df_checklist_historico
-        )
-
-    except Exception as e:
-        st.error(f"Erro ao ler e processar o banco de dados: {e}")
-        st.stop()
-        # Retorna dataframes vazios em caso de erro
-        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
-                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
-
-                
-    
-def inserir_abastecimento(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO abastecimentos (
-                "Cód. Equip.", Data, "Qtde Litros", Hod_Hor_Atual,
-                Safra, "Mês", "Classe Operacional", Matricula, Cod_Pessoa
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['data'],
-            dados['qtde_litros'],
-            dados['hod_hor_atual'],
-            dados['safra'],
-            dados['mes'],
-            dados['classe_operacional'],
-            dados.get('matricula'),
-            dados.get('cod_pessoa')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao inserir dados no banco de dados: {e}")
-        return False
-
-def excluir_abastecimento(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de abastecimento do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        # Usar rowid é a forma mais segura de deletar uma linha específica
-        sql = "DELETE FROM abastecimentos WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir dados do banco de dados: {e}")
-        return False
-
-def excluir_manutencao_componente(db_path: str, cod_equip: int, nome_componente: str, data: str, hod_hor: float) -> bool:
-    """Exclui um registro de manutenção de componente do banco de dados usando uma combinação única de campos."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)
-        nome_componente = str(nome_componente)
-        data = str(data)
-        hod_hor = float(hod_hor)
-        
-        # Debug: verificar todos os registros na tabela
-        cursor.execute("SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico")
-        all_records = cursor.fetchall()
-        
-        # Debug: verificar se há registros com valores similares
-        cursor.execute(
-            "SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico WHERE Cod_Equip = ?", 
-            (cod_equip,)
-        )
-        similar_records = cursor.fetchall()
-        
-        # Primeiro, vamos verificar se o registro existe
-        cursor.execute(
-            "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Nome Componente: {nome_componente} (tipo: {type(nome_componente)})
-            - Data: {data} (tipo: {type(data)})
-            - Hod_Hor: {hod_hor} (tipo: {type(hod_hor)})
-            
-            Registros similares encontrados (mesmo Cod_Equip):
-            {similar_records}
-            
-            Todos os registros na tabela:
-            {all_records}
-            """
-            st.error(debug_info)
-            return False
-        
-        # Agora vamos excluir
-        cursor.execute(
-            "DELETE FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute(
-                "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-                (cod_equip, nome_componente, data, hod_hor)
-            )
-            count_after = cursor.fetchone()[0]
-            
-            if count_after == 0:
-                # Forçar sincronização do banco
-                cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                cursor.execute("PRAGMA synchronous=FULL")
-                conn.commit()
-                
-                # Salvar backup automático para persistência no Streamlit Cloud
-                backup_success, backup_msg = save_backup_to_session_state()
-                if backup_success:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Backup salvo: {backup_msg}")
-                else:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Aviso: {backup_msg}")
-                
-                conn.close()
-                return True
-            else:
-                st.error("Erro: Registro ainda existe após exclusão")
-                conn.close()
-                return False
-        else:
-            st.error("Nenhum registro foi excluído")
-            conn.close()
-            return False
-            
-    except Exception as e:
-        st.error(f"Erro ao excluir manutenção de componente do banco de dados: {e}")
-        return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
-
-def excluir_manutencao(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de manutenção do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = "DELETE FROM manutencoes WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir manutenção do banco de dados: {e}")
-        return False
-
-def inserir_manutencao(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = 'INSERT INTO manutencoes (Cod_Equip, Data, Tipo_Servico, Hod_Hor_No_Servico) VALUES (?, ?, ?, ?)'
-        params = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'])
-        cursor.execute(sql, params)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-
-def inserir_frota(db_path: str, dados: dict) -> bool:
-    """Insere um novo registro de frota no banco de dados."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO frotas (
-                COD_EQUIPAMENTO, DESCRICAO_EQUIPAMENTO, PLACA, 
-                "Classe Operacional", ATIVO, tipo_combustivel
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['descricao'],
-            dados['placa'],
-            dados['classe_op'],
-            dados['ativo'],
-            dados.get('tipo_combustivel', 'Diesel S500')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-    
-
-def editar_abastecimento(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de abastecimento existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE abastecimentos SET
-                "Cód. Equip." = ?, Data = ?, "Qtde Litros" = ?, Hod_Hor_Atual = ?, Safra = ?, Matricula = ?, Cod_Pessoa = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'], dados['data'], dados['qtde_litros'], dados['hod_hor_atual'], dados['safra'],
-            dados.get('matricula'), dados.get('cod_pessoa'), rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar abastecimento: {e}")
-        return False
-
-def editar_manutencao(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de manutenção existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE manutencoes SET
-                Cod_Equip = ?, Data = ?, Tipo_Servico = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'], rowid)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar manutenção: {e}")
-        return False
-
-def editar_manutencao_componente(db_path: str, rowid: int, dados: dict) -> bool:
-    """Edita um registro de manutenção de componente existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE componentes_historico 
-            SET Cod_Equip = ?, nome_componente = ?, Observacoes = ?, Data = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['componente'],
-            dados['acao'],
-            dados['data'],
-            dados['hod_hor_servico'],
-            rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        st.error(f"Erro ao editar manutenção de componente no banco de dados: {e}")
-        return False
-
-def importar_abastecimentos_de_planilha(db_path: str, arquivo_carregado) -> tuple[int, int, str]:
-    """Lê uma planilha, verifica por duplicados, e insere os novos dados. Aceita opcionalmente as colunas Matricula e Cod_Pessoa."""
-    try:
-        df_novo = pd.read_excel(arquivo_carregado)
-        
-        mapa_colunas = {
-            "Cód. Equip.": "Cód. Equip.",
-            "Data": "Data",
-            "Qtde Litros": "Qtde Litros",
-            "Hod. Hor. Atual": "Hod_Hor_Atual",
-            "Safra": "Safra",
-            "Mês": "Mês",
-            "Classe Operacional": "Classe Operacional",
-            "Matricula": "Matricula",
-            "Cod_Pessoa": "Cod_Pessoa",
-        }
-        df_novo = df_novo.rename(columns={k: v for k, v in mapa_colunas.items() if k in df_novo.columns})
-
-        colunas_necessarias = ["Cód. Equip.", "Data", "Qtde Litros", "Hod_Hor_Atual", "Safra", "Mês", "Classe Operacional"]
-        colunas_opcionais = ["Matricula", "Cod_Pessoa"]
-        colunas_faltando = [col for col in colunas_necessarias if col not in df_novo.columns]
-        if colunas_faltando:
-            return 0, 0, f"Erro: Colunas não encontradas: {', '.join(colunas_faltando)}"
-        conn = sqlite3.connect(db_path)
-        df_existente = pd.read_sql_query("SELECT * FROM abastecimentos", conn)
-        
-        df_novo['Data'] = pd.to_datetime(df_novo['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        df_existente['Data'] = pd.to_datetime(df_existente['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        df_novo['chave_unica'] = df_novo['Cód. Equip.'].astype(str) + '_' + df_novo['Data'] + '_' + df_novo['Qtde Litros'].astype(str)
-        df_existente['chave_unica'] = df_existente['Cód. Equip.'].astype(str) + '_' + df_existente['Data'] + '_' + df_existente['Qtde Litros'].astype(str)
-
-        df_para_inserir = df_novo[~df_novo['chave_unica'].isin(df_existente['chave_unica'])]
-        
-        num_duplicados = len(df_novo) - len(df_para_inserir)
-
-        if df_para_inserir.empty:
-            return 0, num_duplicados, "Nenhum registo novo para importar. Todos os registos da planilha já existem na base de dados."
-
-        colunas_insert = colunas_necessarias + [c for c in colunas_opcionais if c in df_para_inserir.columns]
-        df_para_inserir_final = df_para_inserir[colunas_insert]
-        registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-        
-        cursor = conn.cursor()
-        placeholders = ", ".join(["?"] * len(colunas_insert))
-        sql = f"INSERT INTO abastecimentos ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-        cursor.executemany(sql, registros)
-        
-        conn.commit()
-        num_inseridos = cursor.rowcount
-        conn.close()
-        
-        mensagem_sucesso = f"{num_inseridos} registos novos foram importados com sucesso."
-        if num_duplicados > 0:
-            mensagem_sucesso += f" {num_duplicados} registos duplicados foram ignorados."
-            
-        return num_inseridos, num_duplicados, mensagem_sucesso
-
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação: {e}"
-
-def editar_frota(db_path: str, cod_equip: int, dados: dict) -> bool:
-    """Atualiza um registro de frota existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE frotas SET
-                DESCRICAO_EQUIPAMENTO = ?, PLACA = ?, "Classe Operacional" = ?, ATIVO = ?, tipo_combustivel = ?
-            WHERE COD_EQUIPAMENTO = ?
-        """
-        valores = (dados['descricao'], dados['placa'], dados['classe_op'], dados['ativo'], dados.get('tipo_combustivel', 'Diesel S500'), cod_equip)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar frota: {e}")
-        return False
-
-# COLE ESTE BLOCO DE CÓDIGO NO LOCAL INDICADO
-
-def get_component_rules():
-    """Busca todas as regras de componentes da base de dados."""
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-
-def add_component_rule(classe, componente, intervalo):
-    """Adiciona uma nova regra de componente à base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao) VALUES (?, ?, ?)",
-                (classe, componente, intervalo)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
-
-def add_component_rule_advanced(classe, componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca", capacidade_litros=0.0):
-    """Adiciona uma nova regra de componente com informações de lubrificante e tipo de manutenção."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            cursor.execute(
-                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, tipo_manutencao, capacidade_litros) VALUES (?, ?, ?, ?, ?, ?)",
-                (classe, componente, intervalo, lubrificante_id, tipo_manutencao, capacidade_litros)
-            )
-            conn.commit()
-        return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
-    except Exception as e:
-        return False, f"Erro ao adicionar componente: {e}"
-
-def delete_component_rule(rule_id):
-    """Remove uma regra de componente da base de dados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM componentes_regras WHERE id_regra = ?", (rule_id,))
-            conn.commit()
-        return True, "Componente removido com sucesso."
-    except Exception as e:
-        return False, f"Erro ao remover componente: {e}"
-
-def add_component_service(cod_equip, componente, data, hod_hor, obs):
-    """Adiciona um novo registo de serviço de componente ao histórico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, Observacoes) VALUES (?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
-
-def add_component_service_advanced(cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado=None, obs=""):
-    """Adiciona um novo registo de serviço de componente com informações detalhadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            cursor.execute(
-                "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado, obs)
-            )
-            conn.commit()
-        return True, "Serviço de componente registado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao registar serviço: {e}"
-
-def get_component_status(cod_equip, componente):
-    """Obtém o status atual de um componente específico de um equipamento."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            # Buscar a última manutenção do componente
-            query = """
-            SELECT Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            ORDER BY Data DESC, Hod_Hor_No_Servico DESC
-            LIMIT 1
-            """
-            df_ultima = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            
-            # Buscar a regra do componente para obter o intervalo
-            query_regra = """
-            SELECT intervalo_padrao, lubrificante_id, tipo_manutencao
-            FROM componentes_regras cr
-            JOIN frotas f ON cr.classe_operacional = f."Classe Operacional"
-            WHERE f.COD_EQUIPAMENTO = ? AND cr.nome_componente = ?
-            """
-            df_regra = pd.read_sql_query(query_regra, conn, params=(cod_equip, componente))
-            
-            # Buscar o hodômetro/horímetro atual do equipamento
-            query_hod = """
-            SELECT Hod_Hor_Atual FROM abastecimentos 
-            WHERE Cod_Equip = ? 
-            ORDER BY Data DESC, Hod_Hor_Atual DESC 
-            LIMIT 1
-            """
-            df_hod = pd.read_sql_query(query_hod, conn, params=(cod_equip,))
-            
-            return df_ultima, df_regra, df_hod
-            
-    except Exception as e:
-        st.error(f"Erro ao obter status do componente: {e}")
-        return None, None, None
-
-def get_component_maintenance_count(cod_equip, componente):
-    """Obtém o número total de manutenções realizadas em um componente."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT COUNT(*) as total_manutencoes,
-                   COUNT(CASE WHEN tipo_servico = 'Troca' THEN 1 END) as total_trocas,
-                   COUNT(CASE WHEN tipo_servico = 'Remonta' THEN 1 END) as total_remontas
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            """
-            df_count = pd.read_sql_query(query, conn, params=(cod_equip, componente))
-            return df_count.iloc[0] if not df_count.empty else {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
-            
-    except Exception as e:
-        st.error(f"Erro ao obter contagem de manutenções: {e}")
-        return {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
-
-def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
-    """Edita uma manutenção de componente com informações avançadas."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_historico)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'tipo_servico' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN tipo_servico TEXT DEFAULT 'Troca'")
-            if 'lubrificante_utilizado' not in columns:
-                cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_historico 
-                SET Cod_Equip = ?, nome_componente = ?, Data = ?, Hod_Hor_No_Servico = ?, 
-                    Observacoes = ?, tipo_servico = ?, lubrificante_utilizado = ?
-                WHERE rowid = ?
-            """, (
-                dados_editados['cod_equip'],
-                dados_editados['componente'],
-                dados_editados['data'],
-                dados_editados['hod_hor_servico'],
-                dados_editados['acao'],
-                dados_editados['tipo_servico'],
-                dados_editados['lubrificante_utilizado'],
-                rowid
-            ))
-            conn.commit()
-        return True, "Manutenção de componente atualizada com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar manutenção de componente: {e}"
-
-def update_component_rule(rule_id, nome_componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca"):
-    """Atualiza uma regra de componente existente."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela tem as colunas necessárias
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Adicionar colunas se não existirem
-            if 'lubrificante_id' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN lubrificante_id INTEGER")
-            if 'tipo_manutencao' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN tipo_manutencao TEXT DEFAULT 'Troca'")
-            
-            # Atualizar os dados
-            cursor.execute("""
-                UPDATE componentes_regras 
-                SET nome_componente = ?, intervalo_padrao = ?, lubrificante_id = ?, tipo_manutencao = ?
-                WHERE id_regra = ?
-            """, (nome_componente, intervalo, lubrificante_id, tipo_manutencao, rule_id))
-            conn.commit()
-        return True, f"Componente '{nome_componente}' atualizado com sucesso."
-    except Exception as e:
-        return False, f"Erro ao atualizar componente: {e}"
-
-def get_frota_combustivel(cod_equip):
-    """Obtém o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT tipo_combustivel FROM frotas WHERE COD_EQUIPAMENTO = ?", (cod_equip,))
-            result = cursor.fetchone()
-            return result[0] if result else None
-    except Exception as e:
-        st.error(f"Erro ao obter tipo de combustível: {e}")
-        return None
-
-def update_frota_combustivel(cod_equip, tipo_combustivel):
-    """Atualiza o tipo de combustível de uma frota específica."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE COD_EQUIPAMENTO = ?", (tipo_combustivel, cod_equip))
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível: {e}"
-
-def update_classe_combustivel(classe_operacional, tipo_combustivel):
-    """Atualiza o tipo de combustível de todas as frotas de uma classe."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE \"Classe Operacional\" = ?", (tipo_combustivel, classe_operacional))
-            rows_updated = cursor.rowcount
-            conn.commit()
-        return True, f"Tipo de combustível atualizado para {tipo_combustivel} em {rows_updated} frotas da classe {classe_operacional}"
-    except Exception as e:
-        return False, f"Erro ao atualizar tipo de combustível da classe: {e}"
-
-def add_tipo_combustivel_column():
-    """Adiciona a coluna tipo_combustivel à tabela frotas se ela não existir."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            # Verificar se a coluna existe
-            cursor.execute("PRAGMA table_info(frotas)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'tipo_combustivel' not in columns:
-                cursor.execute("ALTER TABLE frotas ADD COLUMN tipo_combustivel TEXT DEFAULT 'Diesel S500'")
-                conn.commit()
-                return True, "Coluna tipo_combustivel adicionada com sucesso"
-            else:
-                return True, "Coluna tipo_combustivel já existe"
-    except Exception as e:
-        return False, f"Erro ao adicionar coluna tipo_combustivel: {e}"
-
-def ensure_motoristas_schema():
-    """Garante a existência da tabela de motoristas e das colunas de vínculo em abastecimentos."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS motoristas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    codigo_pessoa TEXT,
-                    matricula TEXT UNIQUE,
-                    nome TEXT,
-                    ativo TEXT DEFAULT 'ATIVO'
-                )
-                """
-            )
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_matricula ON motoristas(matricula)")
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_motoristas_codigo_pessoa ON motoristas(codigo_pessoa)")
-
-            cursor.execute("PRAGMA table_info(abastecimentos)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'Matricula' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Matricula TEXT")
-            if 'Cod_Pessoa' not in cols:
-                cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Cod_Pessoa TEXT")
-            conn.commit()
-        return True, "Esquema de motoristas verificado"
-    except Exception as e:
-        return False, f"Erro ao verificar esquema de motoristas: {e}"
-
-def get_all_motoristas() -> pd.DataFrame:
-    """Retorna o DataFrame de motoristas."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM motoristas", conn)
-    except Exception:
-        return pd.DataFrame(columns=['id', 'codigo_pessoa', 'matricula', 'nome', 'ativo'])
-
-def importar_motoristas_de_planilha(db_path: str, arquivo_carregado):
-    """Importa motoristas a partir de planilha Excel. Espera colunas: Matricula, Nome e opcional Cod_Pessoa/Código Pessoa."""
-    try:
-        df_mot = pd.read_excel(arquivo_carregado)
-        df_mot.columns = [c.strip() for c in df_mot.columns]
-        renomeios = {
-            'Matrícula': 'Matricula', 'matricula': 'Matricula', 'MATRICULA': 'Matricula',
-            'Nome': 'Nome', 'nome': 'Nome', 'NOME': 'Nome',
-            'Cod_Pessoa': 'Cod_Pessoa', 'Código Pessoa': 'Cod_Pessoa', 'codigo_pessoa': 'Cod_Pessoa', 'CODIGO_PESSOA': 'Cod_Pessoa'
-        }
-        df_mot.rename(columns={k: v for k, v in renomeios.items() if k in df_mot.columns}, inplace=True)
-        obrig = ['Matricula', 'Nome']
-        faltando = [c for c in obrig if c not in df_mot.columns]
-        if faltando:
-            return 0, 0, f"Erro: Colunas obrigatórias não encontradas: {', '.join(faltando)}"
-        if 'Cod_Pessoa' not in df_mot.columns:
-            df_mot['Cod_Pessoa'] = None
-        df_mot = df_mot.dropna(subset=['Matricula', 'Nome']).copy()
-        df_mot['Matricula'] = df_mot['Matricula'].astype(str).str.strip()
-        df_mot['Nome'] = df_mot['Nome'].astype(str).str.strip()
-        df_mot['Cod_Pessoa'] = df_mot['Cod_Pessoa'].astype(str).str.strip()
-        df_mot = df_mot.drop_duplicates(subset=['Matricula'])
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            existentes = pd.read_sql_query("SELECT matricula FROM motoristas", conn)
-            set_exist = set(existentes['matricula'].astype(str)) if not existentes.empty else set()
-            df_novos = df_mot[~df_mot['Matricula'].isin(set_exist)].copy()
-            if df_novos.empty:
-                return 0, len(df_mot), "Nenhum motorista novo para importar. Todos já existem."
-            registros = [
-                (row.get('Cod_Pessoa', None), row['Matricula'], row['Nome'], 'ATIVO')
-                for _, row in df_novos.iterrows()
-            ]
-            cur = conn.cursor()
-            cur.executemany(
-                "INSERT INTO motoristas (codigo_pessoa, matricula, nome, ativo) VALUES (?, ?, ?, ?)",
-                registros
-            )
-            conn.commit()
-            inseridos = cur.rowcount if cur.rowcount is not None else len(registros)
-            duplicados = len(df_mot) - len(df_novos)
-            return inseridos, duplicados, f"{inseridos} motoristas importados com sucesso. {duplicados} já existiam."
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação de motoristas: {e}"
-    
-def ensure_pneus_schema():
-    """Garante a existência da tabela de histórico de pneus."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pneus_historico (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    Cod_Equip INTEGER,
-                    posicao TEXT,
-                    marca TEXT,
-                    modelo TEXT,
-                    data_instalacao TEXT,
-                    hodometro_instalacao REAL,
-                    
-                    observacoes TEXT,
-                    status TEXT DEFAULT 'Ativo',
-                    vida_atual INTEGER DEFAULT 1
-                )
-            """)
-            # Adiciona colunas se não existirem
-            cursor.execute("PRAGMA table_info(pneus_historico)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'status' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN status TEXT DEFAULT 'Ativo'")
-            if 'vida_atual' not in cols:
-                cursor.execute("ALTER TABLE pneus_historico ADD COLUMN vida_atual INTEGER DEFAULT 1")
-            conn.commit()
-        return True, "Tabela de pneus verificada"
-    except Exception as e:
-        return False, f"Erro ao criar tabela de pneus: {e}"
-
-def importar_pneus_de_planilha(db_path: str, arquivo_carregado):
-    """Importa histórico de pneus de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_pneus = pd.read_excel(arquivo_carregado)
-        df_pneus.columns = [c.strip() for c in df_pneus.columns]
-        obrig = ['Cod_Equip', 'posicao', 'marca', 'modelo', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao']
-        faltando = [c for c in obrig if c not in df_pneus.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        if 'observacoes' not in df_pneus.columns:
-            df_pneus['observacoes'] = ""
-        
-        
-        # Limpar dados e remover linhas com valores nulos obrigatórios
-        df_pneus = df_pneus.dropna(subset=['Cod_Equip', 'posicao', 'numero_fogo'])
-        
-        # Normalizar tipos de dados
-        df_pneus['Cod_Equip'] = df_pneus['Cod_Equip'].astype(str)
-        df_pneus['posicao'] = df_pneus['posicao'].astype(str).str.strip()
-        df_pneus['numero_fogo'] = df_pneus['numero_fogo'].astype(str).str.strip()
-        df_pneus['data_instalacao'] = pd.to_datetime(df_pneus['data_instalacao']).dt.strftime('%Y-%m-%d')
-        
-        # Remover duplicatas na própria planilha baseada em chave única
-        df_pneus = df_pneus.drop_duplicates(subset=['Cod_Equip', 'posicao', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Buscar registros existentes para verificar duplicatas
-            df_existente = pd.read_sql_query("SELECT Cod_Equip, posicao, numero_fogo, data_instalacao, hodometro_instalacao FROM pneus_historico", conn)
-            
-            if not df_existente.empty:
-                # Normalizar dados existentes para comparação
-                df_existente['Cod_Equip'] = df_existente['Cod_Equip'].astype(str)
-                df_existente['posicao'] = df_existente['posicao'].astype(str).str.strip()
-                df_existente['numero_fogo'] = df_existente['numero_fogo'].astype(str).str.strip()
-                df_existente['data_instalacao'] = pd.to_datetime(df_existente['data_instalacao']).dt.strftime('%Y-%m-%d')
-                
-                # Criar chaves únicas para comparação
-                df_pneus['chave_unica'] = (df_pneus['Cod_Equip'] + '_' + 
-                                          df_pneus['posicao'] + '_' + 
-                                          df_pneus['numero_fogo'] + '_' + 
-                                          df_pneus['data_instalacao'] + '_' + 
-                                          df_pneus['hodometro_instalacao'].astype(str))
-                
-                df_existente['chave_unica'] = (df_existente['Cod_Equip'] + '_' + 
-                                              df_existente['posicao'] + '_' + 
-                                              df_existente['numero_fogo'] + '_' + 
-                                              df_existente['data_instalacao'] + '_' + 
-                                              df_existente['hodometro_instalacao'].astype(str))
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_pneus[~df_pneus['chave_unica'].isin(df_existente['chave_unica'])]
-            else:
-                df_para_inserir = df_pneus
-            
-            num_duplicados = len(df_pneus) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum pneu novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = obrig + ['observacoes']
-            # Garantir que a coluna observacoes exista no DataFrame
-            if 'observacoes' not in df_para_inserir.columns:
-                df_para_inserir['observacoes'] = ''
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.fillna('').to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO pneus_historico ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} pneus novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar pneus: {e}"
-
-def get_pneus_historico(cod_equip=None):
-    """Retorna o histórico de pneus, opcionalmente filtrando por frota."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            query = "SELECT * FROM pneus_historico"
-            params = ()
-            if cod_equip:
-                query += " WHERE Cod_Equip = ?"
-                params = (cod_equip,)
-            return pd.read_sql_query(query, conn, params=params)
-    except Exception:
-        return pd.DataFrame()
-
-def ensure_precos_combustivel_schema():
-    """Garante a existência da tabela de preços por tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS precos_combustivel (
-                    tipo_combustivel TEXT PRIMARY KEY,
-                    preco REAL
-                )
-                """
-            )
-            tipos = ['Diesel S500', 'Diesel S10', 'Gasolina', 'Etanol', 'Biodiesel']
-            for t in tipos:
-                cur.execute("INSERT OR IGNORE INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?)", (t, NULL))
-            conn.commit()
-        return True, "Tabela de preços verificada"
-    except Exception as e:
-        return False, f"Erro ao verificar tabela de preços: {e}"
-
-def get_precos_combustivel_map() -> dict:
-    """Retorna um dicionário {tipo_combustivel: preco}."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            dfp = pd.read_sql_query("SELECT tipo_combustivel, preco FROM precos_combustivel", conn)
-        return {row['tipo_combustivel']: row['preco'] for _, row in dfp.iterrows()}
-    except Exception:
-        return {}
-
-def upsert_preco_combustivel(tipo: str, preco: float) -> tuple[bool, str]:
-    """Cria/atualiza preço para um tipo de combustível."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?) ON CONFLICT(tipo_combustivel) DO UPDATE SET preco=excluded.preco",
-                (tipo, preco)
-            )
-            conn.commit()
-        return True, f"Preço atualizado para {tipo}"
-    except Exception as e:
-        return False, f"Erro ao atualizar preço: {e}"
-    
-def ensure_lubrificantes_schema():
-    """Garante a existência da tabela de lubrificantes, movimentações e almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            
-            # Tabela de lubrificantes
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT,
-                    viscosidade TEXT,
-                    quantidade_estoque REAL,
-                    unidade TEXT,
-                    observacoes TEXT
-                )
-            """)
-            
-            # Verificar e adicionar coluna 'tipo' se não existir
-            cursor.execute("PRAGMA table_info(lubrificantes)")
-            cols = [c[1] for c in cursor.fetchall()]
-            if 'tipo' not in cols:
-                cursor.execute("ALTER TABLE lubrificantes ADD COLUMN tipo TEXT DEFAULT 'óleo'")
-            
-            # Tabela de almoxarifados
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifados (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    tipo TEXT DEFAULT 'fixo', -- 'fixo' para oficina, 'movel' para caminhões
-                    localizacao TEXT,
-                    responsavel TEXT,
-                    observacoes TEXT,
-                    ativo BOOLEAN DEFAULT 1
-                )
-            """)
-            
-            # Tabela de estoque por almoxarifado
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS almoxarifado_estoque (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_almoxarifado INTEGER,
-                    id_lubrificante INTEGER,
-                    quantidade_estoque REAL DEFAULT 0,
-                    unidade TEXT,
-                    data_atualizacao TEXT,
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id),
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    UNIQUE(id_almoxarifado, id_lubrificante)
-                )
-            """)
-            
-            # Tabela de movimentações (atualizada para incluir almoxarifado)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lubrificantes_movimentacoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_lubrificante INTEGER,
-                    id_almoxarifado INTEGER,
-                    tipo TEXT, -- 'entrada' ou 'saida'
-                    quantidade REAL,
-                    data TEXT,
-                    cod_equip INTEGER,
-                    observacoes TEXT,
-                    FOREIGN KEY(id_lubrificante) REFERENCES lubrificantes(id),
-                    FOREIGN KEY(id_almoxarifado) REFERENCES almoxarifados(id)
-                )
-            """)
-            
-            # Verificar se a coluna id_almoxarifado existe na tabela de movimentações
-            cursor.execute("PRAGMA table_info(lubrificantes_movimentacoes)")
-            cols_mov = [c[1] for c in cursor.fetchall()]
-            if 'id_almoxarifado' not in cols_mov:
-                cursor.execute("ALTER TABLE lubrificantes_movimentacoes ADD COLUMN id_almoxarifado INTEGER")
-            
-            conn.commit()
-        return True, "Tabelas de lubrificantes e almoxarifados verificadas"
-    except Exception as e:
-        return False, f"Erro ao criar tabelas de lubrificantes: {e}"
-    
-def add_almoxarifado(nome, tipo="fixo", localizacao="", responsavel="", observacoes=""):
-    """Adiciona um novo almoxarifado."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO almoxarifados (nome, tipo, localizacao, responsavel, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, tipo, localizacao, responsavel, observacoes)
-            )
-            conn.commit()
-        return True, "Almoxarifado cadastrado com sucesso!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def get_almoxarifados():
-    """Retorna todos os almoxarifados ativos."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            df = pd.read_sql("SELECT * FROM almoxarifados WHERE ativo = 1 ORDER BY nome", conn)
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def get_estoque_por_almoxarifado(id_lubrificante):
-    """Retorna o estoque de um lubrificante distribuído por almoxarifados."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT 
-                a.nome as almoxarifado,
-                a.tipo,
-                COALESCE(ae.quantidade_estoque, 0) as quantidade,
-                COALESCE(ae.unidade, l.unidade) as unidade,
-                a.localizacao,
-                a.responsavel
-            FROM almoxarifados a
-            CROSS JOIN lubrificantes l
-            LEFT JOIN almoxarifado_estoque ae ON a.id = ae.id_almoxarifado AND l.id = ae.id_lubrificante
-            WHERE l.id = ? AND a.ativo = 1
-            ORDER BY a.nome
-            """
-            df = pd.read_sql(query, conn, params=(id_lubrificante,))
-        return df
-    except Exception as e:
-        return pd.DataFrame()
-
-def atualizar_estoque_almoxarifado(id_almoxarifado, id_lubrificante, quantidade, unidade):
-    """Atualiza o estoque de um lubrificante em um almoxarifado específico."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO almoxarifado_estoque 
-                (id_almoxarifado, id_lubrificante, quantidade_estoque, unidade, data_atualizacao) 
-                VALUES (?, ?, ?, ?, ?)
-            """, (id_almoxarifado, id_lubrificante, quantidade, unidade, date.today().strftime("%Y-%m-%d")))
-            conn.commit()
-        return True, "Estoque atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao atualizar estoque: {e}"
-
-def add_lubrificante(nome, viscosidade, quantidade, unidade, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes (nome, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?)",
-                (nome, viscosidade, quantidade, unidade, observacoes)
-            )
-            conn.commit()
-        return True, "Lubrificante cadastrado!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
-    """Importa lubrificantes de uma planilha Excel, verificando duplicatas."""
-    try:
-        df_lub = pd.read_excel(arquivo_carregado)
-        df_lub.columns = [c.strip() for c in df_lub.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome': 'nome',
-            'tipo': 'tipo',
-            'viscosidade': 'viscosidade',
-            'quantidade_estoque': 'quantidade_estoque',
-            'unidade': 'unidade',
-            'observacoes': 'observacoes'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_lub.columns:
-                df_lub = df_lub.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome']
-        faltando = [c for c in obrig if c not in df_lub.columns]
-        if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'tipo' not in df_lub.columns:
-            df_lub['tipo'] = 'óleo'
-        if 'viscosidade' not in df_lub.columns:
-            df_lub['viscosidade'] = ''
-        if 'quantidade_estoque' not in df_lub.columns:
-            df_lub['quantidade_estoque'] = 0
-        if 'unidade' not in df_lub.columns:
-            df_lub['unidade'] = 'L'
-        if 'observacoes' not in df_lub.columns:
-            df_lub['observacoes'] = ''
-        
-        # Limpar e normalizar dados
-        df_lub = df_lub.dropna(subset=['nome'])
-        df_lub['nome'] = df_lub['nome'].astype(str).str.strip()
-        df_lub['tipo'] = df_lub['tipo'].astype(str).str.strip().fillna('óleo')
-        df_lub['viscosidade'] = df_lub['viscosidade'].astype(str).str.strip().fillna('')
-        df_lub['quantidade_estoque'] = pd.to_numeric(df_lub['quantidade_estoque'], errors='coerce').fillna(0)
-        df_lub['unidade'] = df_lub['unidade'].astype(str).str.strip().fillna('L')
-        df_lub['observacoes'] = df_lub['observacoes'].astype(str).str.strip().fillna('')
-        
-        # Remover duplicatas na própria planilha baseada no nome
-        df_lub = df_lub.drop_duplicates(subset=['nome'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que a tabela existe com a coluna tipo
-            ensure_lubrificantes_schema()
-            
-            # Buscar lubrificantes existentes
-            df_existente = pd.read_sql_query("SELECT nome FROM lubrificantes", conn)
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome'] = df_existente['nome'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_lub[~df_lub['nome'].isin(df_existente['nome'])]
-            else:
-                df_para_inserir = df_lub
-            
-            num_duplicados = len(df_lub) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum lubrificante novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = ['nome', 'tipo', 'viscosidade', 'quantidade_estoque', 'unidade', 'observacoes']
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO lubrificantes ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} lubrificantes novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, f"Erro ao importar lubrificantes: {e}"
-
-def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_operacional: str):
-    """Importa componentes de uma planilha Excel, verificando duplicatas e criando lubrificantes se necessário."""
-    try:
-        df_comp = pd.read_excel(arquivo_carregado)
-        df_comp.columns = [c.strip() for c in df_comp.columns]
-        
-        # Mapeamento de colunas
-        mapa_colunas = {
-            'nome_componente': 'nome_componente',
-            'componente': 'nome_componente',
-            'intervalo_padrao': 'intervalo_padrao',
-            'intervalo': 'intervalo_padrao',
-            'lubrificante_nome': 'lubrificante_nome',
-            'lubrificante': 'lubrificante_nome',
-            'capacidade_litros': 'capacidade_litros',
-            'capacidade': 'capacidade_litros'
-        }
-        
-        # Normalizar nomes de colunas
-        for col_orig, col_norm in mapa_colunas.items():
-            if col_orig in df_comp.columns:
-                df_comp = df_comp.rename(columns={col_orig: col_norm})
-        
-        # Verificar colunas obrigatórias
-        obrig = ['nome_componente', 'intervalo_padrao']
-        faltando = [c for c in obrig if c not in df_comp.columns]
-        if faltando:
-            return 0, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
-        
-        # Adicionar colunas opcionais se não existirem
-        if 'lubrificante_nome' not in df_comp.columns:
-            df_comp['lubrificante_nome'] = None
-        if 'capacidade_litros' not in df_comp.columns:
-            df_comp['capacidade_litros'] = 0.0
-        
-        # Limpar e normalizar dados
-        df_comp = df_comp.dropna(subset=['nome_componente'])
-        df_comp['nome_componente'] = df_comp['nome_componente'].astype(str).str.strip()
-        df_comp['intervalo_padrao'] = pd.to_numeric(df_comp['intervalo_padrao'], errors='coerce')
-        df_comp = df_comp.dropna(subset=['intervalo_padrao'])
-        df_comp['lubrificante_nome'] = df_comp['lubrificante_nome'].astype(str).str.strip().replace('nan', None)
-        df_comp['capacidade_litros'] = pd.to_numeric(df_comp['capacidade_litros'], errors='coerce').fillna(0.0)
-        
-        # Remover duplicatas na própria planilha baseada no nome do componente
-        df_comp = df_comp.drop_duplicates(subset=['nome_componente'])
-        
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que as tabelas existem
-            ensure_lubrificantes_schema()
-            
-            # Verificar se a tabela componentes_regras tem a coluna capacidade_litros
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(componentes_regras)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'capacidade_litros' not in columns:
-                cursor.execute("ALTER TABLE componentes_regras ADD COLUMN capacidade_litros REAL DEFAULT 0.0")
-            
-            # Buscar componentes existentes na classe
-            df_existente = pd.read_sql_query(
-                "SELECT nome_componente FROM componentes_regras WHERE classe_operacional = ?", 
-                conn, params=(classe_operacional,)
-            )
-            
-            if not df_existente.empty:
-                # Normalizar nomes existentes para comparação
-                df_existente['nome_componente'] = df_existente['nome_componente'].astype(str).str.strip()
-                
-                # Filtrar apenas registros que não existem na classe
-                df_para_inserir = df_comp[~df_comp['nome_componente'].isin(df_existente['nome_componente'])]
-            else:
-                df_para_inserir = df_comp
-            
-            num_duplicados = len(df_comp) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, 0, "Nenhum componente novo para importar. Todos os registros da planilha já existem na classe selecionada."
-            
-            # Processar lubrificantes
-            lubrificantes_criados = 0
-            for _, row in df_para_inserir.iterrows():
-                if pd.notna(row['lubrificante_nome']) and row['lubrificante_nome']:
-                    # Verificar se o lubrificante existe
-                    df_lub_existente = pd.read_sql_query(
-                        "SELECT id FROM lubrificantes WHERE nome = ?", 
-                        conn, params=(row['lubrificante_nome'],)
-                    )
-                    
-                    if df_lub_existente.empty:
-                        # Criar lubrificante automaticamente
-                        cur = conn.cursor()
-                        cur.execute(
-                            "INSERT INTO lubrificantes (nome, tipo, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                            (row['lubrificante_nome'], 'óleo', '', 0, 'L', f'Criado automaticamente durante importação de componentes')
-                        )
-                        lubrificantes_criados += 1
-                        
-                        # Buscar o ID do lubrificante criado
-                        lub_id = cur.lastrowid
-                    else:
-                        lub_id = df_lub_existente.iloc[0]['id']
-                else:
-                    lub_id = None
-                
-                # Inserir componente
-                cur = conn.cursor()
-                cur.execute(
-                    "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, capacidade_litros) VALUES (?, ?, ?, ?, ?)",
-                    (classe_operacional, row['nome_componente'], row['intervalo_padrao'], lub_id, row['capacidade_litros'])
-                )
-            
-            conn.commit()
-            num_inseridos = len(df_para_inserir)
-            
-            mensagem_sucesso = f"{num_inseridos} componentes foram importados com sucesso para a classe '{classe_operacional}'."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} componentes duplicados foram ignorados."
-            if lubrificantes_criados > 0:
-                mensagem_sucesso += f" {lubrificantes_criados} lubrificantes foram criados automaticamente."
-            
-            return num_inseridos, num_duplicados, lubrificantes_criados, mensagem_sucesso
-            
-    except Exception as e:
-        return 0, 0, 0, f"Erro ao importar componentes: {e}"
-
-def movimentar_lubrificante(id_lubrificante, tipo, quantidade, data, cod_equip=None, observacoes=""):
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO lubrificantes_movimentacoes (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes)
-            )
-            # Atualiza estoque
-            sinal = 1 if tipo == "entrada" else -1
-            cur.execute(
-                "UPDATE lubrificantes SET quantidade_estoque = quantidade_estoque + ? WHERE id = ?",
-                (sinal * quantidade, id_lubrificante)
-            )
-            conn.commit()
-        return True, "Movimentação registrada!"
-    except Exception as e:
-        return False, f"Erro: {e}"
-
-@st.cache_data(ttl=120)
-def filtrar_dados(df: pd.DataFrame, opts: dict) -> pd.DataFrame:
-    # Garante que a coluna de data é do tipo datetime
-    df['Data'] = pd.to_datetime(df['Data'])
-    
-    # Filtra por período de datas
-    df_filtrado = df[
-        (df['Data'].dt.date >= opts['data_inicio']) & 
-        (df['Data'].dt.date <= opts['data_fim'])
-    ]
-    
-    # Filtra pelas outras seleções, se existirem
-    if opts.get("classes_op"):
-        df_filtrado = df_filtrado[df_filtrado["Classe_Operacional"].isin(opts["classes_op"])]
-    
-    if opts.get("safras"):
-        df_filtrado = df_filtrado[df_filtrado["Safra"].isin(opts["safras"])]
-        
-    return df_filtrado.copy()
-
-@st.cache_data(show_spinner="Calculando plano de manutenção...", ttl=300)
-def build_component_maintenance_plan(_df_frotas: pd.DataFrame, _df_abastecimentos: pd.DataFrame, _df_componentes_regras: pd.DataFrame, _df_componentes_historico: pd.DataFrame) -> pd.DataFrame:
-    latest_readings = _df_abastecimentos.sort_values('Data').groupby('Cod_Equip')['Hod_Hor_Atual'].last()
-    plan_data = []
-
-    for _, frota_row in _df_frotas.iterrows():
-        cod_equip = frota_row['Cod_Equip']
-        classe_op = frota_row.get('Classe_Operacional')
-        hod_hor_atual = latest_readings.get(cod_equip)
-
-        if pd.isna(hod_hor_atual) or not classe_op:
-            continue
-        
-        regras_da_classe = _df_componentes_regras[_df_componentes_regras['classe_operacional'] == classe_op]
-        if regras_da_classe.empty:
-            continue
-
-        unidade = 'km' if frota_row['Tipo_Controle'] == 'QUILÔMETROS' else 'h'
-        alerta_default = ALERTAS_MANUTENCAO.get(frota_row['Tipo_Controle'], {}).get('default', 500)
-        
-        record = {
-            'Cod_Equip': cod_equip, 
-            'Equipamento': frota_row.get('DESCRICAO_EQUIPAMENTO'), 
-            'Leitura_Atual': hod_hor_atual, 
-            'Unidade': unidade, 
-            'Qualquer_Alerta': False, 
-            'Alertas': []
-        }
-
-        for _, regra in regras_da_classe.iterrows():
-            componente = regra['nome_componente']
-            intervalo = regra['intervalo_padrao']
-            
-            historico_componente = _df_componentes_historico[
-                (_df_componentes_historico['Cod_Equip'] == cod_equip) &
-                (_df_componentes_historico['nome_componente'] == componente)
-            ]
-            
-            ultimo_servico_hod_hor = 0
-            if not historico_componente.empty:
-                ultimo_servico_hod_hor = historico_componente['Hod_Hor_No_Servico'].max()
-
-            prox_servico = ((ultimo_servico_hod_hor // intervalo) * intervalo) + intervalo
-            while prox_servico < hod_hor_atual:
-                prox_servico += intervalo
-
-            restante = prox_servico - hod_hor_atual
-            
-            record[f'Restante_{componente}'] = restante
-            
-            if restante <= alerta_default:
-                record['Qualquer_Alerta'] = True
-                record['Alertas'].append(componente)
-
-        plan_data.append(record)
-
-    # 🔹 Garante que sempre retorna um DataFrame com as colunas básicas
-    if not plan_data:
-        return pd.DataFrame(columns=['Cod_Equip', 'Equipamento', 'Leitura_Atual', 'Unidade', 'Qualquer_Alerta', 'Alertas'])
-
-    return pd.DataFrame(plan_data)
-
-def prever_manutencoes(df_veiculos: pd.DataFrame, df_abastecimentos: pd.DataFrame, plan_df: pd.DataFrame) -> pd.DataFrame:
-    """Estima as datas das próximas manutenções com base no uso médio."""
-    if plan_df.empty or 'Leitura_Atual' not in plan_df.columns:
-        return pd.DataFrame()
-
-    # Calcula o uso diário médio de cada veículo
-    uso_diario = {}
-    for cod_equip in df_abastecimentos['Cod_Equip'].unique():
-        dados_equip = df_abastecimentos[df_abastecimentos['Cod_Equip'] == cod_equip].sort_values('Data')
-        if len(dados_equip) > 1:
-            total_dias = (dados_equip['Data'].max() - dados_equip['Data'].min()).days
-            total_uso = dados_equip['Hod_Hor_Atual'].max() - dados_equip['Hod_Hor_Atual'].min()
-            if total_dias > 0 and total_uso > 0: # Garante que houve uso e passagem de tempo
-                uso_diario[cod_equip] = total_uso / total_dias
-
-    previsoes = []
-    servicos_nomes = [col.replace('Restante_', '') for col in plan_df.columns if 'Restante_' in col]
-
-    for _, row in plan_df.iterrows():
-        cod_equip = row['Cod_Equip']
-        uso = uso_diario.get(cod_equip)
-        if uso:
-            for nome_servico in servicos_nomes:
-                col_restante = f'Restante_{nome_servico}'
-                if col_restante in row and pd.notna(row[col_restante]):
-                    dias_para_manut = row[col_restante] / uso
-                    data_prevista = datetime.now() + pd.Timedelta(days=dias_para_manut)
-                    previsoes.append({
-                        'Equipamento': row['Equipamento'],
-                        'Manutenção': nome_servico,
-                        'Data Prevista': data_prevista.strftime('%d/%m/%Y'),
-                        'Dias Restantes': int(dias_para_manut)
-                    })
-
-    if not previsoes:
-        return pd.DataFrame()
-
-    df_previsoes = pd.DataFrame(previsoes)
-    return df_previsoes.sort_values('Dias Restantes')
-
-# ---------------------------
-# Funções para Checklists
-# ---------------------------
-
-@st.cache_data(ttl=120)
-def get_checklist_rules():
-    """Busca todas as regras de checklist do banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-    except Exception as e:
-        st.error(f"Erro ao buscar regras de checklist: {e}")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=120)
-def get_checklist_items(id_regra):
-    """Busca os itens de checklist para uma determinada regra."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            return pd.read_sql_query(
-                "SELECT * FROM checklist_itens WHERE id_regra = ?",
-                conn,
-                params=(id_regra,)
-            )
-    except Exception as e:
-        st.error(f"Erro ao buscar itens de checklist: {e}")
-        return pd.DataFrame()
-
-# ---------------------------
-# CRUD para Checklists
-# ---------------------------
-
-def add_checklist_rule(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra de checklist ao banco de dados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-        return True, "Regra de checklist adicionada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar regra de checklist: {e}"
-
-def add_checklist_rule_and_get_id(classe_operacional, titulo_checklist, turno, frequencia):
-    """Adiciona uma nova regra e devolve o ID criado (ou None em erro).
-
-    Mantém a função "add_checklist_rule" para compatibilidade, mas quando for
-    necessário o ID imediatamente após a criação, utilize esta função.
-    """
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_regras (classe_operacional, titulo_checklist, frequencia, turno)
-                VALUES (?, ?, ?, ?)
-                """,
-                (classe_operacional, titulo_checklist, frequencia, turno)
-            )
-            conn.commit()
-            return cursor.lastrowid
-    except Exception as e:
-        st.error(f"Erro ao adicionar regra de checklist: {e}")
-        return None
-
-def edit_checklist_rule(id_regra, classe_operacional, titulo_checklist, turno, frequencia):
-    """Edita uma regra de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_regras
-                SET classe_operacional = ?, titulo_checklist = ?, frequencia = ?, turno = ?
-                WHERE id_regra = ?
-                """ ,
-                (classe_operacional, titulo_checklist, frequencia, turno, id_regra)
-            )
-            conn.commit()
-        return True, "Regra de checklist atualizada com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar regra de checklist: {e}"
-
-def delete_checklist_rule(id_regra):
-    """Remove uma regra de checklist e seus itens associados."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_regra = ?", (id_regra,))
-            cursor.execute("DELETE FROM checklist_regras WHERE id_regra = ?", (id_regra,))
-            conn.commit()
-        return True, "Regra de checklist removida com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover regra de checklist: {e}"
-
-def add_checklist_item(id_regra, nome_item):
-    """Adiciona um novo item de checklist a uma regra existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_itens (id_regra, nome_item)
-                VALUES (?, ?)
-                """ ,
-                (id_regra, nome_item)
-            )
-            conn.commit()
-        return True, "Item de checklist adicionado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao adicionar item de checklist: {e}"
-
-def edit_checklist_item(id_item, nome_item):
-    """Edita um item de checklist existente."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE checklist_itens
-                SET nome_item = ?
-                WHERE id_item = ?
-                """ ,
-                (nome_item, id_item)
-            )
-            conn.commit()
-        return True, "Item de checklist atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao editar item de checklist: {e}"
-
-def delete_checklist_item(id_item):
-    """Remove um item de checklist."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM checklist_itens WHERE id_item = ?", (id_item,))
-            conn.commit()
-        return True, "Item de checklist removido com sucesso!"
-    except Exception as e:
-        return False, f"Erro ao remover item de checklist: {e}"
-
-def save_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno, status_geral):
-    """Salva um checklist preenchido no histórico."""
-    try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO checklist_historico 
-                (Cod_Equip, titulo_checklist, data_preenchimento, turno, status_geral) 
-                VALUES (?, ?, ?, ?, ?)
-                """ ,
-                (cod_equip, titulo_checklist, data_preenchimento, turno, status_geral)
-            )
-            conn.commit()
-    except Exception as e:
-        st.error(f"Erro ao salvar histórico de checklist: {e}")
-
-def delete_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno):
-    """Remove um registro do histórico de checklists usando uma combinação única de campos."""
-    try:
-        # Primeira tentativa: usar conexão direta
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)  # Converter numpy.int64 para int
-        titulo_checklist = str(titulo_checklist)
-        data_preenchimento = str(data_preenchimento)
-        turno = str(turno)
-        
-        # Debug: verificar todos os registros na tabela ANTES da exclusão
-        cursor.execute("SELECT rowid, Cod_Equip, titulo_checklist, data_preenchimento, turno FROM checklist_historico")
-        all_records_before = cursor.fetchall()
-        
-        # Tentar encontrar o registro com diferentes abordagens
-        rowid = None
-        
-        # Primeira tentativa: busca exata
-        cursor.execute(
-            "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-            (cod_equip, titulo_checklist, data_preenchimento, turno)
-        )
-        result = cursor.fetchone()
-        
-        if result:
-            rowid = result[0]
-        else:
-            # Segunda tentativa: buscar apenas por Cod_Equip, título e turno (ignorar data)
-            cursor.execute(
-                "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, turno)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                rowid = result[0]
-            else:
-                # Terceira tentativa: buscar apenas por Cod_Equip e título
-                cursor.execute(
-                    "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ?", 
-                    (cod_equip, titulo_checklist)
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    rowid = result[0]
-        
-        if rowid is None:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Título: {titulo_checklist} (tipo: {type(titulo_checklist)})
-            - Data: {data_preenchimento} (tipo: {type(data_preenchimento)})
-            - Turno: {turno} (tipo: {type(turno)})
-            
-            Todos os registros na tabela ANTES da exclusão:
-            {all_records_before}
-            """
-            conn.close()
-            return False, debug_info
-        
-        # Agora vamos excluir usando rowid
-        cursor.execute("DELETE FROM checklist_historico WHERE rowid = ?", (rowid,))
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute("SELECT COUNT(*) FROM checklist_historico WHERE rowid = ?", (rowid,))
-            count_after = cursor.fetchone()[0]
-            
-            # Verificar também se o registro ainda existe pelos outros campos
-            cursor.execute(
-                "SELECT COUNT(*) FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, data_preenchimento, turno)
-            )
-            count_by_fields = cursor.fetchone()[0]
-            
-            if count_after == 0 and count_by_fields == 0:
-                 # Verificar o total de registros na tabela
-                 cursor.execute("SELECT COUNT(*) FROM checklist_historico")
-                 total_after = cursor.fetchone()[0]
-                 
-                 # Forçar sincronização do banco
-                 cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                 cursor.execute("PRAGMA synchronous=FULL")
-                 conn.commit()
-                 
-                 success_msg = f"Checklist excluído com sucesso! ({rows_deleted} registro(s) removido(s)). Total na tabela: {total_after}"
-                 
-                 # Salvar backup automático para persistência no Streamlit Cloud
-                 backup_success, backup_msg = save_backup_to_session_state()
-                 if backup_success:
-                     success_msg += f" | Backup salvo: {backup_msg}"
-                 else:
-                     success_msg += f" | Aviso: {backup_msg}"
-                 
-                 conn.close()
-                 return True, success_msg
-            else:
-                conn.close()
-                return False, f"Erro: Registro ainda existe após exclusão. Count by rowid: {count_after}, Count by fields: {count_by_fields}"
-        else:
-            conn.close()
-            return False, "Nenhum registro foi excluído"
-                
-    except Exception as e:
-        if 'conn' in locals():
-            conn.close()
-        return False, f"Erro ao excluir checklist: {e}"
-
-def force_cache_clear():
-    """Força a limpeza completa de todos os caches."""
-    try:
-        # Limpar cache de dados
-        st.cache_data.clear()
-        
-        # Limpar cache de recursos
-        st.cache_resource.clear()
-        
-        # Forçar rerun da aplicação
-        st.rerun()
-    except Exception as e:
-        st.error(f"Erro ao limpar cache: {e}")
-
-def force_database_sync():
-    """Força a sincronização do banco de dados com o disco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Forçar commit
-        conn.commit()
-        
-        # Executar PRAGMA para forçar sincronização
-        cursor.execute("PRAGMA wal_checkpoint(FULL)")
-        cursor.execute("PRAGMA synchronous=FULL")
-        cursor.execute("PRAGMA journal_mode=DELETE")
-        
-        # Forçar commit novamente
-        conn.commit()
-        
-        # Verificar se o banco está em modo WAL
-        cursor.execute("PRAGMA journal_mode")
-        journal_mode = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        return True, f"Banco sincronizado. Modo journal: {journal_mode}"
-    except Exception as e:
-        return False, f"Erro ao sincronizar banco: {e}"
-
-def export_database_backup():
-    """Exporta todos os dados do banco para um arquivo de backup."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        
-        # Obter todas as tabelas
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        backup_data = {}
-        
-        for table in tables:
-            table_name = table[0]
-            if table_name != 'sqlite_master':
-                # Exportar dados da tabela
-                df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-                backup_data[table_name] = df.to_dict('records')
-        
-        conn.close()
-        
-        # Converter para JSON
-        backup_json = json.dumps(backup_data, default=str, indent=2)
-        
-        # Criar arquivo de download
-        backup_bytes = backup_json.encode('utf-8')
-        backup_b64 = base64.b64encode(backup_bytes).decode()
-        
-        return backup_b64, backup_data
-        
-    except Exception as e:
-        return None, f"Erro ao exportar backup: {e}"
-
-def import_database_backup(backup_data):
-    """Importa dados de backup para o banco."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        for table_name, records in backup_data.items():
-            if records:  # Se a tabela tem dados
-                # Limpar tabela existente
-                cursor.execute(f"DELETE FROM {table_name}")
-                
-                # Inserir novos dados
-                for record in records:
-                    columns = list(record.keys())
-                    placeholders = ', '.join(['?' for _ in columns])
-                    values = list(record.values())
-                    
-                    # Converter tipos de dados
-                    converted_values = []
-                    for value in values:
-                        if isinstance(value, str):
-                            # Tentar converter para datetime se for uma data
-                            try:
-                                if 'T' in value or '-' in value:
-                                    dt = pd.to_datetime(value)
-                                    converted_values.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
-                                else:
-                                    converted_values.append(value)
-                            except:
-                                converted_values.append(value)
-                        else:
-                            converted_values.append(value)
-                    
-                    cursor.execute(
-                        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
-                        converted_values
-                    )
-        
-        conn.commit()
-        conn.close()
-        
-        return True, "Backup restaurado com sucesso!"
-        
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def save_backup_to_session_state():
-    """Salva backup dos dados na sessão do Streamlit."""
-    try:
-        backup_b64, backup_data = export_database_backup()
-        if backup_b64:
-            st.session_state['database_backup'] = backup_b64
-            st.session_state['backup_timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            return True, "Backup salvo na sessão"
-        else:
-            return False, "Erro ao criar backup"
-    except Exception as e:
-        return False, f"Erro ao salvar backup: {e}"
-
-def restore_backup_from_session_state():
-    """Restaura backup dos dados da sessão do Streamlit."""
-    try:
-        if 'database_backup' in st.session_state:
-            backup_b64 = st.session_state['database_backup']
-            backup_bytes = base64.b64decode(backup_b64)
-            backup_json = backup_bytes.decode('utf-8')
-            backup_data = json.loads(backup_json)
-            
-            success, message = import_database_backup(backup_data)
-            if success:
-                # Limpar cache para forçar recarregamento
-                force_cache_clear()
-                return True, message
-            else:
-                return False, message
-        else:
-            return False, "Nenhum backup encontrado na sessão"
-    except Exception as e:
-        return False, f"Erro ao restaurar backup: {e}"
-
-def auto_restore_backup_on_startup():
-    """Tenta restaurar backup automaticamente na inicialização da aplicação."""
-    try:
-        if 'database_backup' in st.session_state:
-            # Verificar se o banco está vazio
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-            num_tables = cursor.fetchone()[0]
-            conn.close()
-            
-            if num_tables == 0:
-                # Banco vazio, tentar restaurar
-                success, message = restore_backup_from_session_state()
-                if success:
-                    st.info("🔄 Backup restaurado automaticamente na inicialização!")
-                    return True
-                else:
-                    st.warning(f"⚠️ Falha na restauração automática: {message}")
-                    return False
-        return False
-    except Exception as e:
-        st.warning(f"⚠️ Erro na restauração automática: {e}")
-        return False
-
-def main():
-    
-    # Garante tema dark coerente mesmo sem config.toml
-    st.markdown(
-        """
-        <style>
-        :root {
-            --primary: #10b981;
-            --bg: #0f172a;
-            --bg2: #111827;
-            --text: #e5e7eb;
-        }
-        body { background: var(--bg); color: var(--text); }
-        section.main > div { background: var(--bg); }
-        .stApp { background: var(--bg); }
-        .st-emotion-cache-1r4qj8v, .st-emotion-cache-13ln4jf { background: var(--bg2) !important; }
-        .stButton>button { background: var(--primary); color: #062e24; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    # CSS fino para polir a UI
-    st.markdown(
-        """
-        <style>
-        /* Cartões/containers */
-        .stExpander, .stDataFrame, .stTable { border-radius: 10px !important; }
-        .stButton>button { border-radius: 8px; padding: 0.5rem 1rem; }
-        .stSelectbox, .stTextInput, .stNumberInput, .stDateInput, .stTextArea { border-radius: 8px !important; }
-        /* Métricas com mais destaque */
-        div[data-testid="stMetric"] { background: rgba(255,255,255,0.04); padding: 10px 14px; border-radius: 12px; }
-        /* Títulos com leve gradiente */
-        h1, h2, h3 { background: linear-gradient(90deg, #10b981 0%, #06b6d4 100%); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
-        /* Linhas divisórias mais suaves */
-        hr { border: none; height: 1px; background: rgba(255,255,255,0.08); }
-        /* Subtítulo de marca (opcional) */
-        .brand-subtitle { display: none; }
-        /* Centralizar e limitar logo na sidebar */
-        section[data-testid="stSidebar"] img { display: block; margin: 0.5rem auto 0.75rem; max-width: 140px; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-        st.session_state.role = None
-        st.session_state.username = ""
-
-    if not st.session_state.authenticated:
-        _ , col_central, _ = st.columns([1, 1.5, 1])
-    
-        with col_central:
-            
-            if os.path.exists("logo.png"):
-                # Cria 3 sub-colunas dentro da coluna central
-                _, logo_col, _ = st.columns([1, 2, 1])
-                with logo_col:
-                    st.image("logo.png", width=140)
-            
-            st.title("Bem vindo ao Aplicativo de Controle do PCMA")
-
-            username = st.text_input("Usuário", key="login_user")
-            password = st.text_input("Senha", type="password", key="login_pass")
-
-            if st.button("Entrar", use_container_width=True):
-                role = check_login_db(username, password)
-                if role:
-                    st.session_state.authenticated = True
-                    st.session_state.role = role
-                    st.session_state.username = username
-                    st.rerun()
-                else:
-                    st.error("Usuário ou Senha incorretos.")
-    else:
-
-        # Cabeçalho com logo + título
-        if os.path.exists("logo.png"):
-            col_logo, col_title = st.columns([1, 8])
-            with col_logo:
-                st.image("logo.png", width=80)
-            with col_title:
-                st.title("📊 Dashboard de Frotas e Abastecimentos")
-        else:
-            st.title("📊 Dashboard de Frotas e Abastecimentos")
-
-        # Tentar restaurar backup automaticamente na inicialização
-        auto_restore_backup_on_startup()
-        
-        # Adicionar coluna de tipo de combustível se não existir
-        add_tipo_combustivel_column()
-        
-        # Setup de esquemas (motoristas, preços, combustível)
-        ensure_motoristas_schema()
-        ensure_precos_combustivel_schema()
-
-        # Passo um fingerprint simples das tabelas para invalidar cache quando necessário
-        ver_frotas = int(os.path.getmtime(DB_PATH)) if os.path.exists(DB_PATH) else 0
-        df, df_frotas, df_manutencoes, df_comp_regras, df_comp_historico, df_checklist_regras, df_checklist_itens, df_checklist_historico = load_data_from_db(DB_PATH, ver_frotas, ver_frotas, ver_frotas, ver_frotas, ver_frotas)
-        
-
-        if 'intervalos_por_classe' not in st.session_state:
-            st.session_state.intervalos_por_classe = {}
-        classes_operacionais = [c for c in df_frotas['Classe_Operacional'].unique() if pd.notna(c) and str(c).strip()]
-        for classe in classes_operacionais:
-            if classe not in st.session_state.intervalos_por_classe:
-                tipo_controle = df_frotas[df_frotas['Classe_Operacional'] == classe]['Tipo_Controle'].iloc[0]
-                if tipo_controle == 'HORAS':
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 5.0,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 250},
-                            'servico_2': {'nome': 'Revisao A', 'intervalo': 100},
-                            'servico_3': {'nome': 'Revisao B', 'intervalo': 300},
-                            'servico_4': {'nome': 'Revisao C', 'intervalo': 500}
-                        }
-                    }
-                else: # QUILÔMETROS
-                    st.session_state.intervalos_por_classe[classe] = {
-                        'meta_consumo': 2.5,
-                        'servicos': {
-                            'servico_1': {'nome': 'Lubrificacao', 'intervalo': 5000},
-                            'servico_2': {'nome': 'Revisao 5k', 'intervalo': 5000},
-                            'servico_3': {'nome': 'Revisao 10k', 'intervalo': 10000},
-                            'servico_4': {'nome': 'Revisao 20k', 'intervalo': 20000}
-                        }
-                    }
-                    
-        with st.sidebar:
-            if os.path.exists("logo.png"):
-                st.image("logo.png", width=200)
-            st.write(f"Bem-vindo, **{st.session_state.username}**!")
-            if st.button("Sair"):
-                st.session_state.authenticated = False
-                st.session_state.username = "" # Limpa o username ao sair
-                st.session_state.role = None
-                st.rerun()
-            st.markdown("---")
-
-        with st.sidebar:
-            st.header("📅 Filtros (válidos apenas na aba Análise Geral)")
-
-            # Persistência de período
-            if 'filtro_data_inicio' not in st.session_state:
-                st.session_state['filtro_data_inicio'] = df['Data'].min().date()
-            if 'filtro_data_fim' not in st.session_state:
-                st.session_state['filtro_data_fim'] = df['Data'].max().date()
-
-            st.subheader("Período de Análise")
-            data_inicio = st.date_input(
-                "Data de Início", 
-                st.session_state['filtro_data_inicio'],
-                key='data_inicio'
-            )
-            data_fim = st.date_input(
-                "Data de Fim", 
-                st.session_state['filtro_data_fim'],
-                key='data_fim'
-            )
-            st.session_state['filtro_data_inicio'] = data_inicio
-            st.session_state['filtro_data_fim'] = data_fim
-
-            st.markdown("---")
-            st.caption("Desenvolvido por André Luis")
-
-            with st.expander("Filtrar por Classe Operacional"):
-                classe_opts = sorted(list(df["Classe_Operacional"].dropna().unique()))
-                sel_classes = st.multiselect(
-                    "Selecione as Classes", 
-                    classe_opts, 
-                    default=classe_opts,
-                    key="sel_classes"
-                )
-
-            with st.expander("Filtrar por Safra"):
-                safra_opts = sorted(list(df["Safra"].dropna().unique()))
-                sel_safras = st.multiselect(
-                    "Selecione as Safras", 
-                    safra_opts, 
-                    default=safra_opts,
-                    key="sel_safras"
-                )
-
-            # Só aplicaremos os filtros na aba "📈 Análise Geral" (guardaremos em sessão)
-            st.session_state['filtro_opts_analise'] = {
-                "data_inicio": data_inicio,
-                "data_fim": data_fim,
-                "classes_op": sel_classes,
-                "safras": sel_safras
-            }
-    #----------------------------------------------------- aba principal --------------------------------------
-        # df_f será calculado apenas para a aba Análise Geral
-        df_f = None
-        plan_df = build_component_maintenance_plan(df_frotas, df, df_comp_regras, df_comp_historico)
-
-        # CSS para barra de rolagem horizontal nas abas com design moderno
-        st.markdown("""
-        <style>
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 8px;
-            overflow-x: auto;
-            scrollbar-width: thin;
-            scrollbar-color: #00D4AA #E8F5F2;
-            padding: 8px 0;
-        }
-        
-        .stTabs [data-baseweb="tab-list"]::-webkit-scrollbar {
-            height: 12px;
-        }
-        
-        .stTabs [data-baseweb="tab-list"]::-webkit-scrollbar-track {
-            background: linear-gradient(90deg, #F0F2F6 0%, #E8F5F2 100%);
-            border-radius: 8px;
-            border: 1px solid #E0E6ED;
-            box-shadow: inset 0 1px 3px rgba(0,0,0,0.1);
-        }
-        
-        .stTabs [data-baseweb="tab-list"]::-webkit-scrollbar-thumb {
-            background: linear-gradient(90deg, #00D4AA 0%, #00B8A9 100%);
-            border-radius: 8px;
-            border: 1px solid #00A896;
-            box-shadow: 0 2px 4px rgba(0,212,170,0.3);
-            transition: all 0.3s ease;
-        }
-        
-        .stTabs [data-baseweb="tab-list"]::-webkit-scrollbar-thumb:hover {
-            background: linear-gradient(90deg, #00B8A9 0%, #00A896 100%);
-            box-shadow: 0 3px 6px rgba(0,212,170,0.4);
-            transform: translateY(-1px);
-        }
-        
-        .stTabs [data-baseweb="tab-list"]::-webkit-scrollbar-thumb:active {
-            background: linear-gradient(90deg, #00A896 0%, #009688 100%);
-            box-shadow: 0 1px 3px rgba(0,212,170,0.5);
-        }
-        
-        .stTabs [data-baseweb="tab-list"] > div {
-            flex-shrink: 0;
-            transition: all 0.2s ease;
-        }
-        
-        /* Melhorar aparência das abas */
-        .stTabs [data-baseweb="tab"] {
-            border-radius: 8px;
-            transition: all 0.2s ease;
-        }
-        
-        .stTabs [data-baseweb="tab"]:hover {
-            transform: translateY(-1px);
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        }
-        
-        /* Estilo para abas ativas */
-        .stTabs [data-baseweb="tab"][aria-selected="true"] {
-            background: linear-gradient(135deg, #00D4AA 0%, #00B8A9 100%);
-            color: white;
-            font-weight: 600;
-            box-shadow: 0 4px 12px rgba(0,212,170,0.3);
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        # Definição dos grupos de abas
-        abas_pagina_inicial = ["📈 Análise Geral", "🛠️ Controle de Manutenção", "🔎 Consulta Individual", "✅ Checklists Diários"]
-        abas_gerir = ["⚙️ Gerir Lançamentos", "🛢️ Gestão de Lubrificantes", "⚙️ Gerir Frotas", "✅ Gerir Checklists"]
-        abas_dados = ["📤 Importar Dados", "⚕️ Saúde dos Dados", "💾 Backup", "👤 Gerir Utilizadores", "⚙️ Configurações"]
-
-        # Sistema de navegação por grupos
-        st.markdown("### 🎯 Navegação por Grupos")
-        
-        # Mostrar informações sobre os grupos disponíveis
-        if st.session_state.role == 'admin':
-            st.info("""
-            **🏠 Página Inicial:** Visualizações, análises e consultas principais | 
-            **⚙️ Gerir:** Gestão de lançamentos, frotas e checklists | 
-            **📊 Dados:** Importações, backup e saúde dos dados
-            """)
-        else:
-            st.info("**🏠 Página Inicial:** Visualizações, análises e consultas principais")
-        
-        # CSS para os botões de grupo
-        st.markdown("""
-        <style>
-        .group-nav-button {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 12px;
-            padding: 12px 20px;
-            font-weight: 600;
-            font-size: 14px;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 12px rgba(102,126,234,0.3);
-            margin: 4px;
-            cursor: pointer;
-        }
-        
-        .group-nav-button:hover {
-            background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-            transform: translateY(-2px);
-            box-shadow: 0 6px 16px rgba(102,126,234,0.4);
-        }
-        
-        .group-nav-button.active {
-            background: linear-gradient(135deg, #00D4AA 0%, #00B8A9 100%);
-            box-shadow: 0 4px 12px rgba(0,212,170,0.3);
-        }
-        
-        .group-section {
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            border-radius: 12px;
-            padding: 16px;
-            margin: 8px 0;
-            border: 1px solid #dee2e6;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-
-        # Botões de navegação por grupos
-        col1, col2, col3 = st.columns(3)
-        
-        # Determinar grupo ativo
-        active_group = st.session_state.get('active_group', 'pagina_inicial').strip().lower()
-
-        with col1:
-            if st.button("🏠 Página Inicial", key="nav_pagina_inicial", help="Visualizações e análises principais"):
-                st.session_state['active_group'] = 'pagina_inicial'
-                st.session_state['active_tab_index'] = 0
-                st.rerun()
-        
-        if st.session_state.role == 'admin':
-            with col2:
-                if st.button("⚙️ Gerir", key="nav_gerir", help="Gestão de lançamentos, frotas e checklists"):
-                    st.session_state['active_group'] = 'gerir'
-                    st.session_state['active_tab_index'] = 0
-                    st.rerun()
-            
-            with col3:
-                if st.button("📊 Dados", key="nav_dados", help="Importações, backup e saúde dos dados"):
-                    st.session_state['active_group'] = 'dados'
-                    st.session_state['active_tab_index'] = 0
-                    st.rerun()
-
-        # Determinar quais abas mostrar baseado no grupo ativo
-        if st.session_state.role == 'admin':
-            if active_group == 'pagina_inicial':
-                tabs_para_mostrar = abas_pagina_inicial
-            elif active_group == 'gerir':
-                tabs_para_mostrar = abas_gerir
-            elif active_group == 'dados':
-                tabs_para_mostrar = abas_dados
-            else:
-                tabs_para_mostrar = abas_pagina_inicial
-        else:
-            # Para usuários comuns, mostrar apenas página inicial
-            tabs_para_mostrar = abas_pagina_inicial
-
-        # Determinar índice ativo
-        active_idx = st.session_state.get('active_tab_index', 0)
-        active_idx = max(0, min(active_idx, len(tabs_para_mostrar) - 1))
-        
-        # Criar as abas
-        try:
-            abas = st.tabs(tabs_para_mostrar, default_index=active_idx)
-        except TypeError:
-            abas = st.tabs(tabs_para_mostrar)
-
-        # Atribuir as abas baseado no grupo ativo
-        if st.session_state.role == 'admin':
-            if active_group == 'pagina_inicial':
-                tab_analise, tab_manut, tab_consulta, tab_checklists = abas
-                # Criar variáveis vazias para as outras abas
-                tab_gerir_lanc = tab_gerir_lub = tab_gerir_frotas = tab_gerir_checklists = None
-                tab_importar = tab_saude = tab_backup = tab_gerir_users = tab_config = None
-            elif active_group == 'gerir':
-                tab_gerir_lanc, tab_gerir_lub, tab_gerir_frotas, tab_gerir_checklists = abas
-                # Criar variáveis vazias para as outras abas
-                tab_analise = tab_manut = tab_consulta = tab_checklists = None
-                tab_importar = tab_saude = tab_backup = tab_gerir_users = tab_config = None
-            elif active_group == 'dados':
-                tab_importar, tab_saude, tab_backup, tab_gerir_users, tab_config = abas
-                # Criar variáveis vazias para as outras abas
-                tab_analise = tab_manut = tab_consulta = tab_checklists = None
-                tab_gerir_lanc = tab_gerir_lub = tab_gerir_frotas = tab_gerir_checklists = None
-                
-
-        else:
-            tab_analise, tab_manut, tab_consulta, tab_checklists = abas
-            # Criar variáveis vazias para as outras abas
-            tab_gerir_lanc = tab_gerir_lub = tab_gerir_frotas = tab_gerir_checklists = None
-            tab_importar = tab_saude = tab_backup = tab_gerir_users = tab_config = None
-
-        def rerun_keep_tab(tab_title: str, clear_cache: bool = True):
-            if clear_cache:
-                st.cache_data.clear()
-            try:
-                st.session_state['active_tab_index'] = tabs_para_mostrar.index(tab_title)
-            except Exception:
-                pass
-            st.rerun()
-    
-        if tab_analise is not None:
-            with tab_analise:
-                st.header("📈 Análise Geral e Painel de Controle")
-                
-                # ===== SEÇÃO: VISÃO GERAL DA FROTA =====
-                st.subheader("🏠 Visão Geral da Frota")
-                
-                # Calcular gasto total com combustível
-                precos_map = get_precos_combustivel_map()
-                gasto_total_combustivel = 0
-                if precos_map:
-                    df_gastos_total = df.copy()
-                    # Verificar se a coluna tipo_combustivel existe em df_frotas
-                    if 'tipo_combustivel' in df_frotas.columns:
-                        df_gastos_total = df_gastos_total.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                        # Verificar se a coluna foi criada após o merge
-                        if 'tipo_combustivel' in df_gastos_total.columns:
-                            df_gastos_total['tipo_combustivel'] = df_gastos_total['tipo_combustivel'].fillna('Diesel S500')
-                        else:
-                            df_gastos_total['tipo_combustivel'] = 'Diesel S500'
-                    else:
-                        # Se não existir, criar a coluna com valor padrão
-                        df_gastos_total['tipo_combustivel'] = 'Diesel S500'
-                    
-                    df_gastos_total['preco_unit'] = df_gastos_total['tipo_combustivel'].map(precos_map).fillna(0.0)
-                    df_gastos_total['custo'] = df_gastos_total['Qtde Litros'].fillna(0.0) * df_gastos_total['preco_unit']
-                    gasto_total_combustivel = df_gastos_total['custo'].sum()
-                
-                # KPIs principais
-                kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
-                
-                # KPI 1: Frotas Ativas
-                total_frotas_ativas = df_frotas[df_frotas['ATIVO'] == 'ATIVO']['Cod_Equip'].nunique()
-                kpi1.metric("🚗 Frotas Ativas", total_frotas_ativas)
-                
-                # KPI 2: Frotas com Alerta
-                frotas_com_alerta = plan_df[plan_df['Qualquer_Alerta'] == True]['Cod_Equip'].nunique() if not plan_df.empty else 0
-                kpi2.metric("⚠️ Frotas com Alerta", frotas_com_alerta)
-                
-                # KPI 3: Gasto Total com Combustível
-                kpi3.metric("💰 Gasto com Combustível", formatar_brasileiro(gasto_total_combustivel, 'R$ '))
-                
-                # KPIs 4 e 5: Frotas Mais e Menos Eficientes
-                df_sem_filtro = df.copy()
-                df_media_geral = df_sem_filtro[(df_sem_filtro['Media'].notna()) & (df_sem_filtro['Media'] > 0)]
-                if not df_media_geral.empty:
-                    # Agrupa por Código e Descrição para ter acesso a ambos
-                    media_por_equip = df_media_geral.groupby(['Cod_Equip', 'DESCRICAO_EQUIPAMENTO'])['Media'].mean().sort_values()
-                    
-                    if not media_por_equip.empty:
-                        # Pega o CÓDIGO do mais eficiente (primeiro da lista ordenada)
-                        cod_mais_eficiente = media_por_equip.index[0][0]
-                        media_mais_eficiente = media_por_equip.iloc[0]
-                        # Exibe o CÓDIGO no KPI
-                        kpi4.metric("🏆 Mais Eficiente", f"{cod_mais_eficiente}", f"{formatar_brasileiro(media_mais_eficiente)}")
-                
-                        # Pega o CÓDIGO do menos eficiente (último da lista ordenada)
-                        cod_menos_eficiente = media_por_equip.index[-1][0]
-                        media_menos_eficiente = media_por_equip.iloc[-1]
-                        # Exibe o CÓDIGO no KPI
-                        kpi5.metric("📉 Menos Eficiente", f"{cod_menos_eficiente}", f"{formatar_brasileiro(media_menos_eficiente)}")
-                else:
-                    # Se não há dados de eficiência, mostrar mensagem
-                    kpi4.metric("🏆 Mais Eficiente", "N/A")
-                    kpi5.metric("📉 Menos Eficiente", "N/A")
-
-                st.markdown("---")
-                st.subheader("📈 Análise Gráfica de Consumo")
-
-                # Aplica filtros apenas nesta aba
-                opts = st.session_state.get('filtro_opts_analise', None)
-                df_f = filtrar_dados(df, opts) if opts else df.copy()
-
-                if not df_f.empty:
-                    # KPIs melhorados com análise por tipo de combustível
-                    st.subheader("📊 Indicadores de Consumo por Combustível")
-                    
-                    # Obter tipos de combustível das frotas
-                    if 'tipo_combustivel' in df_frotas.columns:
-                        # Filtrar apenas registros que realmente têm consumo (Qtde Litros > 0)
-                        df_f_com_consumo = df_f[df_f['Qtde Litros'] > 0].copy()
-                        
-                        if not df_f_com_consumo.empty:
-                            # Pegar apenas os equipamentos que têm histórico de abastecimento
-                            equipamentos_com_consumo = df_f_com_consumo['Cod_Equip'].unique()
-                            
-                            # Filtrar df_frotas para incluir apenas equipamentos com consumo
-                            frotas_com_consumo = df_frotas[df_frotas['Cod_Equip'].isin(equipamentos_com_consumo)].copy()
-                            
-                            # Verificar se há valores duplicados em Cod_Equip e tratar adequadamente
-                            if frotas_com_consumo['Cod_Equip'].duplicated().any():
-                                # Se há duplicatas, pegar o primeiro valor de cada equipamento
-                                frotas_com_consumo = frotas_com_consumo.drop_duplicates(subset=['Cod_Equip'], keep='first')
-                            
-                            # Criar mapeamento de tipo de combustível apenas para equipamentos com consumo
-                            combustivel_map = frotas_com_consumo.set_index('Cod_Equip')['tipo_combustivel'].fillna('Diesel S500')
-                            
-                            # Aplicar o mapeamento apenas aos registros com consumo
-                            df_f_com_consumo['tipo_combustivel'] = df_f_com_consumo['Cod_Equip'].map(combustivel_map).fillna('Diesel S500')
-                            
-                            # Calcular consumo por tipo de combustível
-                            consumo_por_combustivel = df_f_com_consumo.groupby('tipo_combustivel')['Qtde Litros'].sum().sort_values(ascending=False)
-                        else:
-                            # Se não há registros com consumo, criar um DataFrame vazio
-                            consumo_por_combustivel = pd.Series(dtype='float64')
-                        
-                        # Criar colunas dinâmicas baseadas no número de tipos de combustível
-                        num_tipos = len(consumo_por_combustivel)
-                        if num_tipos <= 2:
-                            cols = st.columns(2)
-                        elif num_tipos <= 3:
-                            cols = st.columns(3)
-                        elif num_tipos <= 4:
-                            cols = st.columns(4)
-                        else:
-                            cols = st.columns(5)
-                        
-                        # Exibir KPIs por tipo de combustível
-                        for i, (tipo, litros) in enumerate(consumo_por_combustivel.items()):
-                            if i < len(cols):
-                                with cols[i]:
-                                    # Calcular percentual do total
-                                    percentual = (litros / df_f["Qtde Litros"].sum()) * 100
-                                    
-                                    # Definir cor baseada no tipo de combustível
-                                    if 'Diesel S500' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🚛"
-                                    elif 'Diesel S10' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🚛"
-                                    elif 'Gasolina' in tipo:
-                                        delta_color = "normal"
-                                        icon = "⛽"
-                                    elif 'Etanol' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🌱"
-                                    elif 'Biodiesel' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🌿"
-                                    else:
-                                        delta_color = "normal"
-                                        icon = "⛽"
-                                    
-                                    cols[i].metric(
-                                        f"{icon} {tipo}",
-                                        f"{formatar_brasileiro_int(litros)} L",
-                                        f"{percentual:.1f}% do total",
-                                        delta_color=delta_color
-                                    )
-                        
-                        # Adicionar linha separadora
-                        st.markdown("---")
-                        
-                        # KPI adicional: Total geral e média por equipamento
-                        k1, k2, k3 = st.columns(3)
-                        
-                        with k1:
-                            total_litros = df_f["Qtde Litros"].sum()
-                            k1.metric(
-                                "🛢️ Total Geral",
-                                f"{formatar_brasileiro_int(total_litros)} L",
-                                f"{len(consumo_por_combustivel)} tipos de combustível"
-                            )
-                        
-                        with k2:
-                            if 'Media' in df_f.columns:
-                                media_geral = df_f['Media'].mean()
-                                k2.metric(
-                                    "📈 Média Geral",
-                                    f"{formatar_brasileiro(media_geral)}",
-                                    "Média de consumo por equipamento"
-                                )
-                            else:
-                                # Calcular média manual se não existir coluna Media
-                                equipamentos_unicos = df_f['Cod_Equip'].nunique()
-                                if equipamentos_unicos > 0:
-                                    media_manual = total_litros / equipamentos_unicos
-                                    k2.metric(
-                                        "📈 Média por Equipamento",
-                                        f"{formatar_brasileiro(media_manual)} L",
-                                        f"{equipamentos_unicos} equipamentos"
-                                    )
-                                else:
-                                    k2.metric("📈 Média por Equipamento", "N/A")
-                        
-                        with k3:
-                            # Calcular eficiência (litros por dia se houver dados de data)
-                            if 'Data' in df_f.columns:
-                                try:
-                                    df_f['Data'] = pd.to_datetime(df_f['Data'])
-                                    dias_periodo = (df_f['Data'].max() - df_f['Data'].min()).days + 1
-                                    if dias_periodo > 0:
-                                        litros_por_dia = total_litros / dias_periodo
-                                        k3.metric(
-                                            "📅 Consumo Diário",
-                                            f"{formatar_brasileiro(litros_por_dia)} L/dia",
-                                            f"{dias_periodo} dias analisados"
-                                        )
-                                    else:
-                                        k3.metric("📅 Consumo Diário", "N/A")
-                                except:
-                                    k3.metric("📅 Consumo Diário", "N/A")
-                            else:
-                                k3.metric("📅 Consumo Diário", "N/A")
-                    else:
-                        # Fallback se não houver coluna tipo_combustivel
-                        k1, k2 = st.columns(2)
-                        k1.metric("Litros Consumidos (período)", formatar_brasileiro_int(df_f["Qtde Litros"].sum()))
-                        if 'Media' in df_f.columns:
-                            k2.metric("Média Consumo (período)", f"{formatar_brasileiro(df_f['Media'].mean())}")
-                        else:
-                            equipamentos_unicos = df_f['Cod_Equip'].nunique()
-                            if equipamentos_unicos > 0:
-                                media_manual = df_f["Qtde Litros"].sum() / equipamentos_unicos
-                                k2.metric("Média por Equipamento", f"{formatar_brasileiro(media_manual)} L")
-                    st.markdown("---")
-                    st.subheader("📊 Análise de Consumo por Classe e Equipamentos")
-                    c1, c2 = st.columns(2)
-
-                    with c1:
-                        st.subheader("Consumo por Classe Operacional")
-                        classes_a_excluir = ['VEICULOS LEVES', 'MOTOCICLETA', 'MINI CARREGADEIRA', 'USINA']
-                        # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                        if 'Classe_Operacional' in df_f.columns:
-                            df_consumo_classe = df_f[~df_f['Classe_Operacional'].str.upper().isin(classes_a_excluir)]
-                        else:
-                            df_consumo_classe = df_f
-                        consumo_por_classe = df_consumo_classe.groupby("Classe_Operacional")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
-
-                        if not consumo_por_classe.empty:
-                            consumo_por_classe['texto_formatado'] = consumo_por_classe['Qtde Litros'].apply(formatar_brasileiro_int)
-                            fig_classe = px.bar(consumo_por_classe, x='Qtde Litros', y='Classe_Operacional', orientation='h', text='texto_formatado', labels={"x": "Litros Consumidos", "y": "Classe Operacional"})
-                            fig_classe.update_traces(
-                                texttemplate='%{text} L', 
-                                textposition='outside',
-                                textfont=dict(size=11, color='black'),
-                                cliponaxis=False
-                            )
-                            fig_classe.update_layout(
-                                yaxis={'categoryorder':'total ascending'}, 
-                                xaxis_title="Total Consumido (Litros)", 
-                                yaxis_title="Classe Operacional",
-                                height=500,
-                                margin=dict(l=20, r=20, t=40, b=20),
-                                font=dict(size=12)
-                            )
-                            st.plotly_chart(fig_classe, use_container_width=True)
-
-                    with c2:
-                        st.subheader("Top 10 Equipamentos com Maior Consumo")
-                        # Melhorar o gráfico com informações mais claras
-                        consumo_por_equip = df_f.groupby("Cod_Equip").agg({'Qtde Litros': 'sum'}).dropna()
-                        consumo_por_equip = consumo_por_equip[consumo_por_equip.index != 550]
-                        consumo_por_equip = consumo_por_equip.sort_values(by="Qtde Litros", ascending=False).head(10)
-
-                        if not consumo_por_equip.empty:
-                            # Adicionar informações da frota para melhor identificação
-                            consumo_por_equip = consumo_por_equip.reset_index()
-                            consumo_por_equip = consumo_por_equip.merge(
-                                df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA']], 
-                                on='Cod_Equip', 
-                                how='left'
-                            )
-                            
-                            # Criar label mais informativo: Código - Descrição (Placa)
-                            consumo_por_equip['label_grafico'] = consumo_por_equip.apply(
-                                lambda row: f"{row['Cod_Equip']} - {row['DESCRICAO_EQUIPAMENTO'][:30]}{'...' if len(str(row['DESCRICAO_EQUIPAMENTO'])) > 30 else ''} ({row['PLACA']})", 
-                                axis=1
-                            )
-                            
-                            consumo_por_equip['texto_formatado'] = consumo_por_equip['Qtde Litros'].apply(formatar_brasileiro_int)
-                            
-                            fig_top10 = px.bar(
-                                consumo_por_equip, 
-                                x='Qtde Litros', 
-                                y='label_grafico', 
-                                orientation='h', 
-                                text='texto_formatado', 
-                                labels={"Qtde Litros": "Total Consumido (Litros)", "label_grafico": "Equipamento"},
-                                title="Top 10 Equipamentos com Maior Consumo"
-                            )
-                            fig_top10.update_traces(
-                                texttemplate='%{text} L', 
-                                textposition='outside',
-                                marker_color='#ff7f0e',
-                                textfont=dict(size=11, color='black'),
-                                cliponaxis=False
-                            )
-                            fig_top10.update_layout(
-                                yaxis={'categoryorder':'total ascending'}, 
-                                xaxis_title="Total Consumido (Litros)", 
-                                yaxis_title="Equipamento",
-                                height=600,
-                                margin=dict(l=20, r=20, t=40, b=20),
-                                font=dict(size=11)
-                            )
-                            st.plotly_chart(fig_top10, use_container_width=True)
-
-                    st.markdown("---")
-                    
-                    # NOVA SEÇÃO: Top 10 de Gastos por Frota e por Classe
-                    st.subheader("💰 Top 10 de Gastos por Frota e Classe")
-                    
-                    # Calcular gastos por frota
-                    precos_map = get_precos_combustivel_map()
-                    if precos_map:
-                        df_gastos = df_f.copy()
-                        
-                        # Verificar se a coluna tipo_combustivel existe em df_frotas
-                        if 'tipo_combustivel' in df_frotas.columns:
-                            df_gastos = df_gastos.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                            # Verificar se a coluna foi criada após o merge
-                            if 'tipo_combustivel' in df_gastos.columns:
-                                df_gastos['tipo_combustivel'] = df_gastos['tipo_combustivel'].fillna('Diesel S500')
-                            else:
-                                df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        else:
-                            # Se não existir, criar a coluna com valor padrão
-                            df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        
-                        # Garantir que a coluna tipo_combustivel existe antes de mapear preços
-                        if 'tipo_combustivel' not in df_gastos.columns:
-                            df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        
-                        df_gastos['preco_unit'] = df_gastos['tipo_combustivel'].map(precos_map).fillna(0.0)
-                        df_gastos['custo'] = df_gastos['Qtde Litros'].fillna(0.0) * df_gastos['preco_unit']
-                        
-                        # Adicionar informações da frota para filtro
-                        df_gastos_com_info = df_gastos.merge(
-                            df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA', 'Classe_Operacional']], 
-                            on='Cod_Equip', 
-                            how='left'
-                        )
-                        
-                        # Garantir que a coluna Classe_Operacional existe
-                        if 'Classe_Operacional' not in df_gastos_com_info.columns:
-                            df_gastos_com_info['Classe_Operacional'] = 'N/A'
-                        
-                        # Filtro para excluir a frota 550 (usina) por padrão
-                        mostrar_usinas = st.checkbox("🏭 Incluir Frota 550 (Usina) no Top 10 de Gastos por Frota", value=False)
-                        
-                        if not mostrar_usinas:
-                            # Excluir a frota 550 (usina) do DataFrame
-                            df_gastos_filtrado = df_gastos_com_info[df_gastos_com_info['Cod_Equip'] != 550]
-                        else:
-                            df_gastos_filtrado = df_gastos_com_info
-                        
-                        # Top 10 gastos por frota individual (após filtro)
-                        gastos_por_frota = df_gastos_filtrado.groupby('Cod_Equip').agg({
-                            'custo': 'sum',
-                            'Qtde Litros': 'sum'
-                        }).sort_values('custo', ascending=False).head(10).reset_index()
-                        
-                        # Adicionar informações da frota
-                        gastos_por_frota = gastos_por_frota.merge(
-                            df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA']], 
-                            on='Cod_Equip', 
-                            how='left'
-                        )
-                        gastos_por_frota['label_frota'] = gastos_por_frota['Cod_Equip'].astype(str)
-                        gastos_por_frota['custo_formatado'] = gastos_por_frota['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                        
-                        # Top 10 gastos por classe operacional
-                        gastos_por_classe = df_gastos.groupby('Classe_Operacional').agg({
-                            'custo': 'sum',
-                            'Qtde Litros': 'sum'
-                        }).sort_values('custo', ascending=False).head(10).reset_index()
-                        gastos_por_classe['custo_formatado'] = gastos_por_classe['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                        
-                        # Criar layout em 2 colunas para os gráficos
-                        col_gastos1, col_gastos2 = st.columns(2)
-                        
-                        with col_gastos1:
-                            st.subheader("🏭 Top 10 Gastos por Frota")
-                            
-                            # Mostrar informação sobre filtro da frota 550
-                            # Comentário removido para manter proporção dos gráficos
-                            
-                            if not gastos_por_frota.empty:
-                                # Garantir que os dados estão corretos
-                                gastos_por_frota['custo'] = gastos_por_frota['custo'].fillna(0)
-                                gastos_por_frota = gastos_por_frota[gastos_por_frota['custo'] > 0]
-                                
-                                if not gastos_por_frota.empty:
-                                    # Dados já validados e prontos para o gráfico
-                                    
-                                    # Garantir que label_frota é string e único
-                                    gastos_por_frota['label_frota'] = gastos_por_frota['label_frota'].astype(str)
-                                    
-                                    # Criar gráfico de barras horizontais com dados limpos
-                                    fig_gastos_frota = px.bar(
-                                        gastos_por_frota,
-                                        x='custo',
-                                        y='label_frota',
-                                        orientation='h',
-                                        text='custo_formatado',
-                                        title="Gastos por Frota Individual",
-                                        labels={'custo': 'Custo (R$)', 'label_frota': 'Frota'},
-                                        color='custo',
-                                        color_continuous_scale='Reds'
-                                    )
-                                    fig_gastos_frota.update_traces(
-                                        textposition='outside',
-                                        texttemplate='%{text}',
-                                        textfont=dict(size=11, color='white'),
-                                        cliponaxis=False,
-                                        marker=dict(line=dict(width=1, color='black'))
-                                    )
-                                    fig_gastos_frota.update_layout(
-                                        yaxis={'categoryorder':'total ascending'},
-                                        xaxis_title="Custo Total (R$)",
-                                        yaxis_title="Frota",
-                                        height=600,
-                                        showlegend=False,
-                                        margin=dict(l=20, r=20, t=40, b=20),
-                                        font=dict(size=12),
-                                        bargap=0.3,
-                                        bargroupgap=0.1
-                                    )
-                                    # Configurar eixo Y para mostrar todas as categorias
-                                    fig_gastos_frota.update_yaxes(
-                                        type='category',
-                                        categoryorder='total ascending'
-                                    )
-                                    st.plotly_chart(fig_gastos_frota, use_container_width=True)
-                                    
-                                    # Gráfico criado com sucesso
-                                else:
-                                    st.warning("Não há frotas com gastos maiores que zero.")
-                            else:
-                                st.info("Não há dados de gastos por frota.")
-                        
-                        with col_gastos2:
-                            st.subheader("🏗️ Top 10 Gastos por Classe")
-                            if not gastos_por_classe.empty:
-                                fig_gastos_classe = px.bar(
-                                    gastos_por_classe,
-                                    x='custo',
-                                    y='Classe_Operacional',
-                                    orientation='h',
-                                    text='custo_formatado',
-                                    title="Gastos por Classe Operacional",
-                                    labels={'custo': 'Custo (R$)', 'Classe_Operacional': 'Classe'},
-                                    color='custo',
-                                    color_continuous_scale='Blues'
-                                )
-                                fig_gastos_classe.update_traces(
-                                    textposition='outside',
-                                    texttemplate='%{text}',
-                                    textfont=dict(size=11, color='white'),
-                                    cliponaxis=False,
-                                    marker=dict(line=dict(width=1, color='black'))
-                                )
-                                fig_gastos_classe.update_layout(
-                                    yaxis={'categoryorder':'total ascending'},
-                                    xaxis_title="Custo Total (R$)",
-                                    yaxis_title="Classe Operacional",
-                                    height=600,
-                                    showlegend=False,
-                                    margin=dict(l=20, r=20, t=40, b=20),
-                                    font=dict(size=12),
-                                    bargap=0.3,
-                                    bargroupgap=0.1
-                                )
-                                # Configurar eixo Y para mostrar todas as categorias
-                                fig_gastos_classe.update_yaxes(
-                                    type='category',
-                                    categoryorder='total ascending'
-                                )
-                                st.plotly_chart(fig_gastos_classe, use_container_width=True)
-                            else:
-                                st.info("Não há dados de gastos por classe.")
-                        
-                        # Resumo dos totais
-                        st.markdown("---")
-                        col_resumo1, col_resumo2, col_resumo3 = st.columns(3)
-                        with col_resumo1:
-                            st.metric(
-                                "Total Gastos (Período)", 
-                                formatar_brasileiro(df_gastos['custo'].sum(), 'R$ ')
-                            )
-                        with col_resumo2:
-                            if not gastos_por_frota.empty:
-                                frota_maior_gasto = gastos_por_frota.iloc[0]
-                                st.metric(
-                                    "Frota com Maior Gasto", 
-                                    f"{frota_maior_gasto['Cod_Equip']}",
-                                    f"{frota_maior_gasto['custo_formatado']}"
-                                )
-                            else:
-                                st.metric("Frota com Maior Gasto", "N/A")
-                        with col_resumo3:
-                            st.metric(
-                                "Classe com Maior Gasto", 
-                                f"{gastos_por_classe.iloc[0]['Classe_Operacional'] if not gastos_por_classe.empty else 'N/A'}"
-                            )
-                    else:
-                        st.warning("Cadastre os preços de combustível na aba Importar > Preços para visualizar os gastos.")
-
-                    st.markdown("---")
-                    st.subheader("📈 Média de Consumo por Classe Operacional")
-                    df_media = df_f[(df_f['Media'].notna()) & (df_f['Media'] > 0)].copy()
-
-                    classes_para_excluir = ['MOTOCICLETA', 'VEICULOS LEVES', 'USINA', 'MINI CARREGADEIRA']
-
-                    # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                    if 'Classe_Operacional' in df_media.columns:
-                        df_media_filtrado = df_media[~df_media['Classe_Operacional'].str.upper().isin(classes_para_excluir)]
-                    else:
-                        df_media_filtrado = df_media
-
-                    if not df_media_filtrado.empty: # Usa o novo DataFrame filtrado
-                        media_por_classe = df_media_filtrado.groupby('Classe_Operacional')['Media'].mean().sort_values(ascending=True)
-                        
-                        df_media_grafico = media_por_classe.reset_index()
-                        df_media_grafico['texto_formatado'] = df_media_grafico['Media'].apply(
-                            lambda x: formatar_brasileiro(x)
-                        )
-                        
-                        # Cria o gráfico de barras
-                        fig_media_classe = px.bar(
-                            df_media_grafico,
-                            x='Media',
-                            y='Classe_Operacional',
-                            orientation='h',
-                            title="Média de Consumo (L/h ou Km/L) por Classe",
-                            text='texto_formatado'
-                        )
-                        fig_media_classe.update_traces(
-                            textposition='outside',
-                            marker_color='#1f77b4'
-                        )
-                        fig_media_classe.update_layout(
-                            yaxis_title="Classe Operacional",
-                            xaxis_title="Média de Consumo"
-                        )
-                        st.plotly_chart(fig_media_classe, use_container_width=True)
-                    else:
-                        st.info("Não há dados de consumo médio para exibir com os filtros e exclusões aplicadas.")
-
-                    st.markdown("---")
-                    st.subheader("💰 Total de Gasto por Motorista")
-                    precos_map = get_precos_combustivel_map()
-                    if precos_map:
-                        # Vincula combustível por frota e multiplica litros por preço
-                        df_tmp = df_f.copy()
-                        
-                        # Verificar se a coluna tipo_combustivel existe em df_frotas
-                        if 'tipo_combustivel' in df_frotas.columns:
-                            df_tmp = df_tmp.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                            # Verificar se a coluna foi criada após o merge
-                            if 'tipo_combustivel' in df_tmp.columns:
-                                df_tmp['tipo_combustivel'] = df_tmp['tipo_combustivel'].fillna('Diesel S500')
-                            else:
-                                df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        else:
-                            # Se não existir, criar a coluna com valor padrão
-                            df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        # Garantir que a coluna tipo_combustivel existe antes de mapear preços
-                        if 'tipo_combustivel' not in df_tmp.columns:
-                            df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        
-                        df_tmp['preco_unit'] = df_tmp['tipo_combustivel'].map(precos_map).fillna(0.0)
-                        df_tmp['custo'] = df_tmp['Qtde Litros'].fillna(0.0) * df_tmp['preco_unit']
-                        # Agrupar por matrícula
-                        if 'Matricula' in df_tmp.columns:
-                            gasto_motorista = df_tmp.groupby('Matricula').agg({'custo':'sum', 'Qtde Litros':'sum'}).sort_values('custo', ascending=False)
-                            gasto_motorista = gasto_motorista[gasto_motorista['custo']>0]
-                            if not gasto_motorista.empty:
-                                gasto_motorista = gasto_motorista.reset_index()
-                                gasto_motorista['Custo (R$)'] = gasto_motorista['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                                gasto_motorista['Litros'] = gasto_motorista['Qtde Litros'].apply(formatar_brasileiro_int)
-                                st.dataframe(gasto_motorista[['Matricula','Litros','Custo (R$)']])
-                                try:
-                                    fig_gasto = px.bar(gasto_motorista.head(10), x='custo', y='Matricula', orientation='h', text='Custo (R$)', labels={'custo':'Custo (R$)','Matricula':'Matrícula'})
-                                    st.plotly_chart(fig_gasto, use_container_width=True)
-                                except Exception:
-                                    pass
-                            else:
-                                st.info("Sem dados suficientes de custo (verifique preços cadastrados).")
-                        else:
-                            st.info("Não há coluna de matrícula nos abastecimentos para calcular o gasto por motorista.")
-                    else:
-                        st.info("Cadastre os preços de combustível na aba Importar > Preços.")
-
-                    st.markdown("---")
-                    st.subheader("🔄 Análise de Proporções por Classe e Combustível")
-                
-                # Criar DataFrame com informações de combustível
-                df_consumo_combustivel = df.copy()
-                
-                # Verificar se a coluna tipo_combustivel existe em df_frotas
-                if 'tipo_combustivel' in df_frotas.columns:
-                    try:
-                        # Renomear a coluna COD_EQUIPAMENTO para Cod_Equip em df_frotas
-                        df_frotas_temp = df_frotas.copy()
-                        df_frotas_temp = df_frotas_temp.rename(columns={"COD_EQUIPAMENTO": "Cod_Equip"}, errors='ignore')
-                        
-                        frotas_combustivel = df_frotas_temp[['Cod_Equip', 'tipo_combustivel']].copy()
-                        frotas_combustivel['tipo_combustivel'] = frotas_combustivel['tipo_combustivel'].fillna('Diesel S500')
-                        
-                        # Renomear a coluna "Cód. Equip." para "Cod_Equip" em df_consumo_combustivel
-                        df_consumo_combustivel = df_consumo_combustivel.rename(columns={"Cód. Equip.": "Cod_Equip"}, errors='ignore')
-                        
-                        df_consumo_combustivel = df_consumo_combustivel.merge(
-                            frotas_combustivel, 
-                            on='Cod_Equip', 
-                            how='left'
-                        )
-                        # Verificar se a coluna foi criada após o merge
-                        if 'tipo_combustivel' not in df_consumo_combustivel.columns:
-                            df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                    except Exception:
-                        df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                else:
-                    df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                
-                # Garantir que a coluna tipo_combustivel existe
-                if 'tipo_combustivel' not in df_consumo_combustivel.columns:
-                    df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                
-                col_grafico1, col_grafico2 = st.columns(2)
-                
-                with col_grafico1:
-                    st.subheader("📊 Consumo por Classe (Visão Macro)")
-                    # Excluir "Usina" e frotas sem classe, usar Classe_Operacional
-                    classes_a_excluir_macro = ['USINA', 'USINA MOBILE', 'USINA FIXA']
-                    # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                    if 'Classe_Operacional' in df_consumo_combustivel.columns:
-                        df_consumo_classe_macro = df_consumo_combustivel[
-                            (df_consumo_combustivel['Classe_Operacional'].notna()) & 
-                            (~df_consumo_combustivel['Classe_Operacional'].str.upper().isin(classes_a_excluir_macro))
-                        ]
-                    else:
-                        df_consumo_classe_macro = df_consumo_combustivel
-                    
-                    if not df_consumo_classe_macro.empty:
-                        try:
-                            consumo_por_classe_macro = df_consumo_classe_macro.groupby("Classe_Operacional")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
-                            
-                            # Criar gráfico de pizza
-                            fig_pizza_classe = px.pie(
-                                consumo_por_classe_macro, 
-                                values='Qtde Litros', 
-                                names='Classe_Operacional',
-                                title="Proporção de Consumo por Classe",
-                                hole=0.3
-                            )
-                            fig_pizza_classe.update_traces(textposition='inside', textinfo='percent+label')
-                            fig_pizza_classe.update_layout(height=400)
-                            st.plotly_chart(fig_pizza_classe, use_container_width=True)
-                            
-                            # Mostrar totais
-                            st.info(f"**Total de classes analisadas:** {len(consumo_por_classe_macro)}")
-                            st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_classe_macro['Qtde Litros'].sum())} L")
-                        except Exception as e:
-                            st.error(f"Erro ao criar gráfico de classe: {e}")
-                    else:
-                        st.warning("Não há dados suficientes para análise por classe.")
-                
-                with col_grafico2:
-                    st.subheader("⛽ Consumo por Tipo de Combustível")
-                    if not df_consumo_combustivel.empty:
-                        try:
-                            # Filtrar apenas registros que realmente têm consumo (Qtde Litros > 0)
-                            df_consumo_real = df_consumo_combustivel[df_consumo_combustivel['Qtde Litros'] > 0].copy()
-                            
-                            if not df_consumo_real.empty:
-                                # Obter tipos de combustível apenas das frotas que realmente abasteceram
-                                if 'tipo_combustivel' in df_frotas.columns:
-                                    # Pegar apenas os equipamentos que têm histórico de abastecimento
-                                    equipamentos_com_consumo = df_consumo_real['Cod_Equip'].unique()
-                                    
-                                    # Filtrar df_frotas para incluir apenas equipamentos com consumo
-                                    frotas_com_consumo = df_frotas[df_frotas['Cod_Equip'].isin(equipamentos_com_consumo)].copy()
-                                    
-                                    # Verificar se há valores duplicados em Cod_Equip e tratar adequadamente
-                                    if frotas_com_consumo['Cod_Equip'].duplicated().any():
-                                        # Se há duplicatas, pegar o primeiro valor de cada equipamento
-                                        frotas_com_consumo = frotas_com_consumo.drop_duplicates(subset=['Cod_Equip'], keep='first')
-                                    
-                                    # Criar mapeamento de tipo de combustível apenas para equipamentos com consumo
-                                    combustivel_map = frotas_com_consumo.set_index('Cod_Equip')['tipo_combustivel'].fillna('Diesel S500')
-                                    
-                                    # Aplicar o mapeamento apenas aos registros com consumo
-                                    df_consumo_real['tipo_combustivel'] = df_consumo_real['Cod_Equip'].map(combustivel_map).fillna('Diesel S500')
-                                else:
-                                    df_consumo_real['tipo_combustivel'] = 'Diesel S500'
-                                
-                                # Agrupar por tipo de combustível
-                                consumo_por_combustivel = df_consumo_real.groupby("tipo_combustivel")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
-                                
-                                if not consumo_por_combustivel.empty:
-                                    # Criar gráfico de pizza
-                                    fig_pizza_combustivel = px.pie(
-                                        consumo_por_combustivel, 
-                                        values='Qtde Litros', 
-                                        names='tipo_combustivel',
-                                        title="Proporção de Consumo por Combustível (Apenas Frotas com Histórico)",
-                                        hole=0.3
-                                    )
-                                    fig_pizza_combustivel.update_traces(textposition='inside', textinfo='percent+label')
-                                    fig_pizza_combustivel.update_layout(height=400)
-                                    st.plotly_chart(fig_pizza_combustivel, use_container_width=True)
-                                    
-                                    # Mostrar totais
-                                    st.info(f"**Total de tipos de combustível:** {len(consumo_por_combustivel)}")
-                                    st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_combustivel['Qtde Litros'].sum())} L")
-                                    st.info(f"**Frotas com histórico de abastecimento:** {len(equipamentos_com_consumo)}")
-                                else:
-                                    st.warning("Não há dados de consumo para análise por combustível.")
-                            else:
-                                st.warning("Não há registros com consumo de combustível.")
-                        except Exception as e:
-                            st.error(f"Erro ao criar gráfico de combustível: {e}")
-                            st.info("Verificando dados disponíveis...")
-                            if 'tipo_combustivel' in df_consumo_combustivel.columns:
-                                consumo_por_combustivel = df_consumo_combustivel.groupby("tipo_combustivel")["Qtde Litros"].sum().reset_index()
-                                st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_combustivel['Qtde Litros'].sum())} L")
-                            else:
-                                st.error("Coluna tipo_combustivel não encontrada")
-                    else:
-                        st.warning("Não há dados suficientes para análise por combustível.")
-                
-                # Fechar as colunas anteriores e criar nova seção com largura total
-                st.markdown("---")
-                st.subheader("📊 Demonstrativos Detalhados dos Pneus")
-
-                df_pneus_all = get_pneus_historico()
-                if not df_pneus_all.empty:
-                    # Adicione colunas de status e vida se não existirem
-                    if 'status' not in df_pneus_all.columns:
-                        df_pneus_all['status'] = 'Ativo'
-                    if 'vida_atual' not in df_pneus_all.columns:
-                        df_pneus_all['vida_atual'] = 1
-
-                    total_pneus = len(df_pneus_all)
-                    ativos = df_pneus_all[df_pneus_all['status'].str.lower() == 'ativo'].shape[0]
-                    sucateados = df_pneus_all[df_pneus_all['status'].str.lower() == 'sucateado'].shape[0]
-                    reformados = df_pneus_all[df_pneus_all['status'].str.lower() == 'reformado'].shape[0]
-                    vidas = df_pneus_all['vida_atual'].value_counts().sort_index()
-                    marcas = df_pneus_all['marca'].value_counts()
-                    modelos = df_pneus_all['modelo'].value_counts()
-                    posicoes = df_pneus_all['posicao'].value_counts()
-
-                    col1, col2, col3, col4 = st.columns(4)
-                    col1.metric("Total de Pneus", total_pneus)
-                    col2.metric("Ativos", ativos)
-                    col3.metric("Sucateados", sucateados)
-                    col4.metric("Reformados", reformados)
-
-                    # Gráficos melhorados com rótulos de dados
-                    st.markdown("#### 📊 Gráficos de Distribuição")
-                    
-                    # Criar DataFrame de status para o gráfico
-                    status_df = df_pneus_all['status'].value_counts().reset_index()
-                    status_df.columns = ["Status", "Quantidade"]
-                    
-                    # Gráfico de Status (Pizza)
-                    fig_status = px.pie(status_df, names='Status', values='Quantidade', title='Status dos Pneus')
-                    fig_status.update_traces(
-                        textposition='inside',
-                        textinfo='percent+label',
-                        textfont=dict(size=12, color='white')
-                    )
-                    fig_status.update_layout(
-                        height=400,
-                        showlegend=True,
-                        font=dict(size=12)
-                    )
-                    st.plotly_chart(fig_status, use_container_width=True)
-
-                    # Gráfico de Marcas (Barras)
-                    fig_marcas = px.bar(
-                        marcas.reset_index(), 
-                        x='marca', 
-                        y='count', 
-                        title='Quantidade por Marca',
-                        text='count'
-                    )
-                    fig_marcas.update_traces(
-                        textposition='outside',
-                        texttemplate='%{text}',
-                        textfont=dict(size=11, color='white'),
-                        marker=dict(line=dict(width=1, color='black'))
-                    )
-                    fig_marcas.update_layout(
-                        xaxis_title="Marca",
-                        yaxis_title="Quantidade",
-                        height=400,
-                        bargap=0.3,
-                        bargroupgap=0.1
-                    )
-                    st.plotly_chart(fig_marcas, use_container_width=True)
-
-                    # Gráfico de Modelos (Barras)
-                    fig_modelos = px.bar(
-                        modelos.reset_index(), 
-                        x='modelo', 
-                        y='count', 
-                        title='Quantidade por Medida',
-                        text='count'
-                    )
-                    fig_modelos.update_traces(
-                        textposition='outside',
-                        texttemplate='%{text}',
-                        textfont=dict(size=11, color='white'),
-                        marker=dict(line=dict(width=1, color='black'))
-                    )
-                    fig_modelos.update_layout(
-                        xaxis_title="Modelo",
-                        yaxis_title="Quantidade",
-                        height=400,
-                        bargap=0.3,
-                        bargroupgap=0.1
-                    )
-                    st.plotly_chart(fig_modelos, use_container_width=True)
-
-
-
-                    # Botões de exportação
-                    st.markdown("#### 📊 Exportar Dados")
-                    col_export1, col_export2, col_export3 = st.columns(3)
-                    
-                    with col_export1:
-                        export_dataframe(status_df, "status_pneus", "csv")
-                    
-                    with col_export2:
-                        export_dataframe(marcas.reset_index(), "marcas_pneus", "csv")
-                    
-                    with col_export3:
-                        export_dataframe(modelos.reset_index(), "modelos_pneus", "csv")
-                    
-                    # Informações adicionais
-                    st.markdown("---")
-                    st.markdown("""
-                    <div class="info-box">
-                        <strong>💡 Dicas:</strong><br>
-                        • Use os filtros para analisar períodos específicos<br>
-                        • Exporte os dados para análises externas<br>
-                        • Os gráficos são interativos - clique para mais detalhes
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.info("Nenhum pneu cadastrado para demonstrativo.")
-
-                st.markdown("---")
-                st.subheader("🛢️ Demonstrativos de Lubrificantes")
-
-                ensure_lubrificantes_schema()
-                conn = sqlite3.connect(DB_PATH)
-                df_lub = pd.read_sql("SELECT * FROM lubrificantes", conn)
-                df_mov = pd.read_sql("SELECT * FROM lubrificantes_movimentacoes", conn)
-
-                st.write("**Estoque Atual de Lubrificantes:**")
-                if not df_lub.empty:
-                    # Separar por tipo
-                    df_oleos = df_lub[df_lub['tipo'].str.lower() == 'óleo']
-                    df_graxas = df_lub[df_lub['tipo'].str.lower() == 'graxa']
-
-                    col_o, col_g = st.columns(2)
-                    with col_o:
-                        st.markdown("#### Estoque de Óleos")
-                        if not df_oleos.empty:
-                            fig_oleos = px.bar(
-                                df_oleos,
-                                x='nome',
-                                y='quantidade_estoque',
-                                color='viscosidade',
-                                text='quantidade_estoque',
-                                title="Óleos - Estoque Atual",
-                                labels={'quantidade_estoque': 'Qtd. Estoque', 'nome': 'Óleo'}
-                            )
-                            st.plotly_chart(fig_oleos, use_container_width=True)
-                        else:
-                            st.info("Nenhum óleo cadastrado.")
-
-                    with col_g:
-                        st.markdown("#### Estoque de Graxas")
-                        if not df_graxas.empty:
-                            fig_graxas = px.bar(
-                                df_graxas,
-                                x='nome',
-                                y='quantidade_estoque',
-                                color='viscosidade',
-                                text='quantidade_estoque',
-                                title="Graxas - Estoque Atual",
-                                labels={'quantidade_estoque': 'Qtd. Estoque', 'nome': 'Graxa'}
-                            )
-                            st.plotly_chart(fig_graxas, use_container_width=True)
-                        else:
-                            st.info("Nenhuma graxa cadastrada.")
-
-                    # Pizza geral
-                    df_lub['tipo'] = df_lub['tipo'].fillna('óleo')
-                    fig_pizza = px.pie(
-                        df_lub,
-                        names='tipo',
-                        values='quantidade_estoque',
-                        title="Proporção de Estoque: Óleos vs Graxas"
-                    )
-                    st.plotly_chart(fig_pizza, use_container_width=True)
-
-                    st.write("**Movimentações Recentes:**")
-                    df_mov['data'] = pd.to_datetime(df_mov['data'], errors='coerce')
-                    df_mov = df_mov.sort_values('data', ascending=False)
-                    st.dataframe(df_mov.head(20))
-                else:
-                    st.info("Nenhum lubrificante cadastrado.")
-
-                conn.close()
-            
-import streamlit as st
-import pandas as pd
-import numpy as np
-import sqlite3
-from datetime import datetime, date, timedelta
-import os
-import plotly.express as px
-import hashlib
-import json
-import base64
-import io
-
-# Configuração de tema (após set_page_config)
-if 'theme' not in st.session_state:
-    st.session_state.theme = 'dark'
-
-# Configuração de tema
-
-
-# CSS personalizado para tema claro/escuro
-def get_theme_css():
-    if st.session_state.theme == 'dark':
-        return """
-        <style>
-        .stApp {
-            background-color: #0e1117;
-            color: #fafafa;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-    else:
-        return """
-        <style>
-        .stApp {
-            background-color: #ffffff;
-            color: #262730;
-        }
-        .stButton > button {
-            background-color: #00ff88;
-            color: #000;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            font-weight: 600;
-        }
-        .stButton > button:hover {
-            background-color: #00cc6a;
-            color: #000;
-        }
-        .metric-container {
-            background: linear-gradient(135deg, rgba(0, 255, 136, 0.1), rgba(0, 255, 136, 0.05));
-            border: 1px solid #00ff88;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .info-box {
-            background: rgba(0, 255, 136, 0.1);
-            border-left: 4px solid #00ff88;
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        </style>
-        """
-
-# Aplicar CSS do tema
-st.markdown(get_theme_css(), unsafe_allow_html=True)
-
-# Função para alternar tema
-def toggle_theme():
-    st.session_state.theme = 'light' if st.session_state.theme == 'dark' else 'dark'
-    st.rerun()
-
-# Função para exportar dados
-def export_dataframe(df, filename, file_type='csv'):
-    """Exporta DataFrame em diferentes formatos"""
-    if file_type == 'csv':
-        csv = df.to_csv(index=False, sep=';', decimal=',', encoding='utf-8-sig')
-        st.download_button(
-            label=f"📥 Download {filename}.csv",
-            data=csv,
-            file_name=f"{filename}.csv",
-            mime="text/csv",
-            help=f"Baixar {filename} em formato CSV"
-        )
-    elif file_type == 'excel':
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Dados')
-        buffer.seek(0)
-        st.download_button(
-            label=f"📥 Download {filename}.xlsx",
-            data=buffer,
-            file_name=f"{filename}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help=f"Baixar {filename} em formato Excel"
-        )
-
-# Função para mostrar loading
-def show_loading(message="Carregando dados..."):
-    """Mostra indicador de carregamento"""
-    with st.spinner(message):
-        st.info(f"⏳ {message}")
-        return True
-
-# Função para tooltip informativo
-def info_tooltip(text, help_text):
-    """Cria um elemento com tooltip informativo"""
-    col1, col2 = st.columns([20, 1])
-    with col1:
-        st.write(text)
-    with col2:
-        st.info("ℹ️", help=help_text)
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(SCRIPT_DIR, "frotas_data.db")
-
-ALERTAS_MANUTENCAO = {
-    'HORAS': { 'default': 20 },
-    'QUILÔMETROS': { 'default': 500 }
-}
-
-def formatar_brasileiro(valor: float, prefixo='') -> str:
-    """Formata um número com casas decimais para o padrão brasileiro."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{prefixo}{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-@st.cache_data(ttl=300)
-def para_csv(df: pd.DataFrame):
-    """Converte um DataFrame para CSV para download."""
-    return df.to_csv(index=False, sep=';', decimal=',').encode('utf-8-sig')
-
-def formatar_brasileiro_int(valor: float) -> str:
-    """Formata um número inteiro para o padrão brasileiro (ex: 123.456)."""
-    if pd.isna(valor) or not np.isfinite(valor):
-        return "–"
-    return f"{int(valor):,}".replace(",", ".")
-
-def detect_equipment_type(df_completo: pd.DataFrame) -> pd.DataFrame:
-    df = df_completo.copy()
-    df['Tipo_Controle'] = df.get('Unid', pd.Series(index=df.index)).map({'HORAS': 'HORAS', 'QUILÔMETROS': 'QUILÔMETROS'})
-    def inferir_tipo_por_classe(row):
-        if pd.notna(row['Tipo_Controle']): return row['Tipo_Controle']
-        classe = str(row.get('Classe_Operacional', '')).upper()
-        if any(p in classe for p in ['TRATOR', 'COLHEITADEIRA', 'PULVERIZADOR', 'PLANTADEIRA', 'PÁ CARREGADEIRA', 'RETROESCAVADEIRA']): return 'HORAS'
-        if any(p in classe for p in ['CAMINHÃO', 'CAMINHAO', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']): return 'QUILÔMETROS'
-        return 'HORAS'
-    df['Tipo_Controle'] = df.apply(inferir_tipo_por_classe, axis=1)
-    return df
-
-def hash_password(password):
-    """Gera um hash seguro da palavra-passe."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def check_login_db(username, password):
-    """Verifica as credenciais contra a base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("SELECT password_hash, role FROM utilizadores WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        conn.close()
-        if result:
-            password_hash_db, role = result
-            if password_hash_db == hash_password(password):
-                return role
-        return None
-    except Exception as e:
-        st.error(f"Erro ao aceder à base de dados de utilizadores: {e}")
-        return None
-
-def get_all_users():
-    """Busca todos os utilizadores da base de dados."""
-    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-        return pd.read_sql_query("SELECT id, username, role FROM utilizadores", conn)
-
-def add_user(username, password, role):
-    """Adiciona um novo utilizador à base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO utilizadores (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, hash_password(password), role)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador adicionado com sucesso!"
-    except sqlite3.IntegrityError:
-        return False, f"Erro: O nome de utilizador '{username}' já existe."
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def update_user(user_id, new_username, new_role):
-    """Atualiza o nome e a função de um utilizador."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE utilizadores SET username = ?, role = ? WHERE id = ?",
-            (new_username, new_role, user_id)
-        )
-        conn.commit()
-        conn.close()
-        return True, "Utilizador atualizado com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-def delete_user(user_id):
-    """Remove um utilizador da base de dados."""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM utilizadores WHERE id = ?", (user_id,))
-        conn.commit()
-        conn.close()
-        return True, "Utilizador removido com sucesso!"
-    except Exception as e:
-        return False, f"Ocorreu um erro: {e}"
-
-    
-# APAGUE A SUA FUNÇÃO "load_data_from_db" INTEIRA E SUBSTITUA-A POR ESTE BLOCO FINAL
-
-@st.cache_data(show_spinner="Carregando e processando dados...", ttl=300)
-def load_data_from_db(db_path: str, ver_frotas: int=None, ver_abast: int=None, ver_manut: int=None, ver_comp: int=None, ver_chk: int=None):
-    if not os.path.exists(db_path):
-        st.error(f"Arquivo de banco de dados '{db_path}' não encontrado.")
-        st.stop()
-
-    try:
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            df_abast = pd.read_sql_query("SELECT rowid, * FROM abastecimentos", conn)
-            df_frotas = pd.read_sql_query("SELECT * FROM frotas", conn)
-            df_manutencoes = pd.read_sql_query("SELECT rowid, * FROM manutencoes", conn)
-            df_comp_regras = pd.read_sql_query("SELECT * FROM componentes_regras", conn)
-            df_comp_historico = pd.read_sql_query("SELECT rowid, * FROM componentes_historico", conn)
-            df_checklist_regras = pd.read_sql_query("SELECT * FROM checklist_regras", conn)
-            df_checklist_itens = pd.read_sql_query("SELECT * FROM checklist_itens", conn)
-            df_checklist_historico = pd.read_sql_query("SELECT rowid, * FROM checklist_historico", conn)
-
-        # --- Início do Processamento Integrado ---
-        
-        # Renomeia colunas para um padrão consistente
-        df_abast = df_abast.rename(columns={"Cód. Equip.": "Cod_Equip", "Qtde Litros": "Qtde Litros", "Mês": "Mes", "Média": "Media"}, errors='ignore')
-        df_frotas = df_frotas.rename(columns={"COD_EQUIPAMENTO": "Cod_Equip", "Classe Operacional": "Classe_Operacional"}, errors='ignore')
-
-        # Cria o dataframe principal mesclando abastecimentos e frotas
-        df_merged = pd.merge(df_abast, df_frotas, on="Cod_Equip", how="left")
-        
-        # Trata colunas de classe operacional que podem ter vindo da mesclagem
-        if 'Classe_Operacional_x' in df_merged.columns:
-            df_merged['Classe_Operacional'] = np.where(df_merged['Classe_Operacional_x'].notna(), df_merged['Classe_Operacional_x'], df_merged['Classe_Operacional_y'])
-            df_merged.drop(columns=['Classe_Operacional_x', 'Classe_Operacional_y'], inplace=True)
-        
-        # Converte a coluna de data e cria colunas de tempo
-        df_merged["Data"] = pd.to_datetime(df_merged["Data"], errors='coerce')
-        df_merged.dropna(subset=["Data"], inplace=True)
-        df_merged["Ano"] = df_merged["Data"].dt.year
-        df_merged["AnoMes"] = df_merged["Data"].dt.to_period("M").astype(str)
-        
-        # Limpa e converte colunas numéricas
-        for col in ["Qtde Litros", "Media", "Hod_Hor_Atual"]:
-            if col in df_merged.columns:
-                series = df_merged[col].astype(str)
-                series = series.str.replace(',', '.', regex=False).str.replace('-', '', regex=False).str.strip()
-                df_merged[col] = pd.to_numeric(series, errors='coerce')
-        
-        # Cria a coluna "label" no dataframe de frotas para uso em seletores
-        df_frotas["label"] = df_frotas["Cod_Equip"].astype(str) + " - " + df_frotas.get("DESCRICAO_EQUIPAMENTO", "").fillna("") + " (" + df_frotas.get("PLACA", "").fillna("Sem Placa") + ")"
-
-        # Vincula informações de motorista aos abastecimentos (merge durante o load)
-        try:
-            with sqlite3.connect(db_path, check_same_thread=False) as conn:
-                df_motoristas = pd.read_sql_query("SELECT codigo_pessoa, matricula, nome FROM motoristas", conn)
-            if not df_motoristas.empty:
-                df_merged = df_merged.merge(
-                    df_motoristas.rename(columns={"codigo_pessoa": "Cod_Pessoa", "matricula": "Matricula", "nome": "Nome_Motorista"}),
-                    on=["Cod_Pessoa", "Matricula"], how="left"
-                )
-        except Exception:
-            pass
-        
-        # Garante que a classe operacional em df_frotas está atualizada
-        classe_map = df_merged.dropna(subset=['Classe_Operacional']).groupby('Cod_Equip')['Classe_Operacional'].first()
-        df_frotas['Classe_Operacional'] = df_frotas['Cod_Equip'].map(classe_map).fillna(df_frotas.get('Classe_Operacional'))
-
-        # Adiciona coluna de tipo de combustível se não existir
-        if 'tipo_combustivel' not in df_frotas.columns:
-            df_frotas['tipo_combustivel'] = 'Diesel S500'  # Valor padrão
-        else:
-            # Se a coluna existe, apenas preencher valores nulos com padrão
-            df_frotas['tipo_combustivel'] = df_frotas['tipo_combustivel'].fillna('Diesel S500')
-
-        # Determina o tipo de controle (Horas ou Quilômetros) para cada equipamento
-        def determinar_tipo_controle(row):
-            texto_para_verificar = (
-                str(row.get('DESCRICAO_EQUIPAMENTO', '')) + ' ' + 
-                str(row.get('Classe_Operacional', ''))
-            ).upper()
-            km_keywords = ['CAMINH', 'VEICULO', 'PICKUP', 'CAVALO MECANICO']
-            if any(p in texto_para_verificar for p in km_keywords):
-                return 'QUILÔMETROS'
-            return 'HORAS'
-        df_frotas['Tipo_Controle'] = df_frotas.apply(determinar_tipo_controle, axis=1)
-
-        # Retorna todos os dataframes processados
-        return (
-            df_merged, df_frotas, df_manutencoes,
-            df_comp_regras, df_comp_historico,
-            df_checklist_regras, df_checklist_itens, df_checklist_historico
-        )
-
-    except Exception as e:
-        st.error(f"Erro ao ler e processar o banco de dados: {e}")
-        st.stop()
-        # Retorna dataframes vazios em caso de erro
-        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
-                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
-
-                
-    
-def inserir_abastecimento(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO abastecimentos (
-                "Cód. Equip.", Data, "Qtde Litros", Hod_Hor_Atual,
-                Safra, "Mês", "Classe Operacional", Matricula, Cod_Pessoa
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['data'],
-            dados['qtde_litros'],
-            dados['hod_hor_atual'],
-            dados['safra'],
-            dados['mes'],
-            dados['classe_operacional'],
-            dados.get('matricula'),
-            dados.get('cod_pessoa')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao inserir dados no banco de dados: {e}")
-        return False
-
-def excluir_abastecimento(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de abastecimento do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        # Usar rowid é a forma mais segura de deletar uma linha específica
-        sql = "DELETE FROM abastecimentos WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir dados do banco de dados: {e}")
-        return False
-
-def excluir_manutencao_componente(db_path: str, cod_equip: int, nome_componente: str, data: str, hod_hor: float) -> bool:
-    """Exclui um registro de manutenção de componente do banco de dados usando uma combinação única de campos."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Converter tipos de dados para garantir compatibilidade
-        cod_equip = int(cod_equip)
-        nome_componente = str(nome_componente)
-        data = str(data)
-        hod_hor = float(hod_hor)
-        
-        # Debug: verificar todos os registros na tabela
-        cursor.execute("SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico")
-        all_records = cursor.fetchall()
-        
-        # Debug: verificar se há registros com valores similares
-        cursor.execute(
-            "SELECT rowid, Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico FROM componentes_historico WHERE Cod_Equip = ?", 
-            (cod_equip,)
-        )
-        similar_records = cursor.fetchall()
-        
-        # Primeiro, vamos verificar se o registro existe
-        cursor.execute(
-            "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
-            
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Nome Componente: {nome_componente} (tipo: {type(nome_componente)})
-            - Data: {data} (tipo: {type(data)})
-            - Hod_Hor: {hod_hor} (tipo: {type(hod_hor)})
-            
-            Registros similares encontrados (mesmo Cod_Equip):
-            {similar_records}
-            
-            Todos os registros na tabela:
-            {all_records}
-            """
-            st.error(debug_info)
-            return False
-        
-        # Agora vamos excluir
-        cursor.execute(
-            "DELETE FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-            (cod_equip, nome_componente, data, hod_hor)
-        )
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
-            cursor.execute(
-                "SELECT COUNT(*) FROM componentes_historico WHERE Cod_Equip = ? AND nome_componente = ? AND Data = ? AND Hod_Hor_No_Servico = ?", 
-                (cod_equip, nome_componente, data, hod_hor)
-            )
-            count_after = cursor.fetchone()[0]
-            
-            if count_after == 0:
-                # Forçar sincronização do banco
-                cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                cursor.execute("PRAGMA synchronous=FULL")
-                conn.commit()
-                
-                # Salvar backup automático para persistência no Streamlit Cloud
-                backup_success, backup_msg = save_backup_to_session_state()
-                if backup_success:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Backup salvo: {backup_msg}")
-                else:
-                    st.success(f"Manutenção de componente excluída com sucesso! ({rows_deleted} registro(s) removido(s)) | Aviso: {backup_msg}")
-                
-                conn.close()
-                return True
-            else:
-                st.error("Erro: Registro ainda existe após exclusão")
-                conn.close()
-                return False
-        else:
-            st.error("Nenhum registro foi excluído")
-            conn.close()
-            return False
-            
-    except Exception as e:
-        st.error(f"Erro ao excluir manutenção de componente do banco de dados: {e}")
-        return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
-
-def excluir_manutencao(db_path: str, rowid: int) -> bool:
-    """Exclui um registro de manutenção do banco de dados usando seu rowid."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = "DELETE FROM manutencoes WHERE rowid = ?"
-        cursor.execute(sql, (rowid,))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao excluir manutenção do banco de dados: {e}")
-        return False
-
-def inserir_manutencao(db_path: str, dados: dict) -> bool:
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = 'INSERT INTO manutencoes (Cod_Equip, Data, Tipo_Servico, Hod_Hor_No_Servico) VALUES (?, ?, ?, ?)'
-        params = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'])
-        cursor.execute(sql, params)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-
-def inserir_frota(db_path: str, dados: dict) -> bool:
-    """Insere um novo registro de frota no banco de dados."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO frotas (
-                COD_EQUIPAMENTO, DESCRICAO_EQUIPAMENTO, PLACA, 
-                "Classe Operacional", ATIVO, tipo_combustivel
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['descricao'],
-            dados['placa'],
-            dados['classe_op'],
-            dados['ativo'],
-            dados.get('tipo_combustivel', 'Diesel S500')
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro no banco de dados: {e}")
-        return False
-    
-
-def editar_abastecimento(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de abastecimento existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE abastecimentos SET
-                "Cód. Equip." = ?, Data = ?, "Qtde Litros" = ?, Hod_Hor_Atual = ?, Safra = ?, Matricula = ?, Cod_Pessoa = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'], dados['data'], dados['qtde_litros'], dados['hod_hor_atual'], dados['safra'],
-            dados.get('matricula'), dados.get('cod_pessoa'), rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar abastecimento: {e}")
-        return False
-
-def editar_manutencao(db_path: str, rowid: int, dados: dict) -> bool:
-    """Atualiza um registro de manutenção existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE manutencoes SET
-                Cod_Equip = ?, Data = ?, Tipo_Servico = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (dados['cod_equip'], dados['data'], dados['tipo_servico'], dados['hod_hor_servico'], rowid)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error as e:
-        st.error(f"Erro ao atualizar manutenção: {e}")
-        return False
-
-def editar_manutencao_componente(db_path: str, rowid: int, dados: dict) -> bool:
-    """Edita um registro de manutenção de componente existente."""
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE componentes_historico 
-            SET Cod_Equip = ?, nome_componente = ?, Observacoes = ?, Data = ?, Hod_Hor_No_Servico = ?
-            WHERE rowid = ?
-        """
-        valores = (
-            dados['cod_equip'],
-            dados['componente'],
-            dados['acao'],
-            dados['data'],
-            dados['hod_hor_servico'],
-            rowid
-        )
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        st.error(f"Erro ao editar manutenção de componente no banco de dados: {e}")
-        return False
-
-def importar_abastecimentos_de_planilha(db_path: str, arquivo_carregado) -> tuple[int, int, str]:
-    """Lê uma planilha, verifica por duplicados, e insere os novos dados. Aceita opcionalmente as colunas Matricula e Cod_Pessoa."""
-    try:
-        df_novo = pd.read_excel(arquivo_carregado)
-        
-        mapa_colunas = {
-            "Cód. Equip.": "Cód. Equip.",
-            "Data": "Data",
-            "Qtde Litros": "Qtde Litros",
-            "Hod. Hor. Atual": "Hod_Hor_Atual",
-            "Safra": "Safra",
-            "Mês": "Mês",
-            "Classe Operacional": "Classe Operacional",
-            "Matricula": "Matricula",
-            "Cod_Pessoa": "Cod_Pessoa",
-        }
-        df_novo = df_novo.rename(columns={k: v for k, v in mapa_colunas.items() if k in df_novo.columns})
-
-        colunas_necessarias = ["Cód. Equip.", "Data", "Qtde Litros", "Hod_Hor_Atual", "Safra", "Mês", "Classe Operacional"]
-        colunas_opcionais = ["Matricula", "Cod_Pessoa"]
-        colunas_faltando = [col for col in colunas_necessarias if col not in df_novo.columns]
-        if colunas_faltando:
-            return 0, 0, f"Erro: Colunas não encontradas: {', '.join(colunas_faltando)}"
-        conn = sqlite3.connect(db_path)
-        df_existente = pd.read_sql_query("SELECT * FROM abastecimentos", conn)
-        
-        df_novo['Data'] = pd.to_datetime(df_novo['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        df_existente['Data'] = pd.to_datetime(df_existente['Data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        df_novo['chave_unica'] = df_novo['Cód. Equip.'].astype(str) + '_' + df_novo['Data'] + '_' + df_novo['Qtde Litros'].astype(str)
-        df_existente['chave_unica'] = df_existente['Cód. Equip.'].astype(str) + '_' + df_existente['Data'] + '_' + df_existente['Qtde Litros'].astype(str)
-
-        df_para_inserir = df_novo[~df_novo['chave_unica'].isin(df_existente['chave_unica'])]
-        
-        num_duplicados = len(df_novo) - len(df_para_inserir)
-
-        if df_para_inserir.empty:
-            return 0, num_duplicados, "Nenhum registo novo para importar. Todos os registos da planilha já existem na base de dados."
+    Retorna (df, colunas_faltando, sem_data): sem colunas faltando, df traz a data
+    no formato do banco e os números já tipados, sem as linhas de data inválida.
+    """
+    df_novo = df_novo.rename(columns={k: v for k, v in MAPA_COLUNAS_PLANILHA_ABASTECIMENTOS.items() if k in df_novo.columns})
+    colunas_faltando = [col for col in COLUNAS_PLANILHA_ABASTECIMENTOS if col not in df_novo.columns]
+    if colunas_faltando:
+        return df_novo, colunas_faltando, 0
+
+    datas = _normalizar_datas(df_novo['Data'])
+    sem_data = int(datas.isna().sum())
+    df_novo = df_novo[datas.notna()].copy()
+    df_novo['Data'] = datas[datas.notna()].dt.strftime(FORMATO_DATA_BANCO)
+
+    # Grava os números já tipados, como a leitura espera
+    for col in ("Qtde Litros", "Hod_Hor_Atual"):
+        df_novo[col] = _normalizar_numeros(df_novo[col])
+    return df_novo, [], sem_data
+
+def _registros_abastecimentos(df: pd.DataFrame):
+    """Colunas e tuplas a inserir em abastecimentos, com None no lugar de valores ausentes."""
+    colunas_insert = COLUNAS_PLANILHA_ABASTECIMENTOS + [c for c in COLUNAS_OPCIONAIS_PLANILHA_ABASTECIMENTOS if c in df.columns]
+    df_final = df[colunas_insert].astype(object).where(df[colunas_insert].notna(), None)
+    return colunas_insert, [tuple(x) for x in df_final.to_numpy()]
+
+def importar_abastecimentos_de_planilha(db_path: str, arquivo_carregado, ao_progredir=None, inicio: int = 0) -> tuple[bool, int, int, str]:
+    """Lê uma planilha, verifica por duplicados, e insere os novos dados. Aceita opcionalmente as colunas Matricula e Cod_Pessoa.
+
+    A planilha é lida em lotes de LINHAS_POR_LOTE_IMPORTACAO linhas, cada um
+    gravado em sua própria transação, de modo que a memória usada não cresce com
+    o tamanho do arquivo. `ao_progredir(linhas_lidas, total_estimado, inseridos, duplicados)`
+    é chamada dentro da transação de cada lote, de modo que o que ela gravar com
+    conexao_escrita é confirmado junto com o lote. Com `inicio`, as primeiras
+    linhas da planilha (já importadas antes) são puladas.
+    """
+    num_inseridos = num_duplicados = num_sem_data = 0
+    linhas_lidas = inicio
+    try:
+        for df_lido, total_estimado in ler_planilha_em_lotes(arquivo_carregado, pular=inicio):
+            df_novo, colunas_faltando, sem_data = _preparar_planilha_abastecimentos(df_lido)
+            if colunas_faltando:
+                return False, 0, 0, f"Erro: Colunas não encontradas: {', '.join(colunas_faltando)}"
+            linhas_lidas += len(df_lido)
+            num_sem_data += sem_data
+
+            # Repetições dentro da própria planilha também contam como duplicados
+            df_para_inserir = df_novo.drop_duplicates(subset=CHAVE_PLANILHA_ABASTECIMENTOS)
+            num_duplicados += len(df_novo) - len(df_para_inserir)
+
+            inseridos = duplicados = 0
+            with conexao_escrita(db_path) as conn:
+                if not df_para_inserir.empty:
+                    colunas_insert, registros = _registros_abastecimentos(df_para_inserir)
+                    inseridos, duplicados = inserir_sem_duplicatas(conn, 'abastecimentos', colunas_insert, registros)
+                    if inseridos:
+                        atualizar_derivados_abastecimentos(conn, df_para_inserir['Cód. Equip.'].unique())
+
+                if ao_progredir is not None:
+                    ao_progredir(linhas_lidas, total_estimado, num_inseridos + inseridos, num_duplicados + duplicados)
+            num_inseridos += inseridos
+            num_duplicados += duplicados
+
+        if linhas_lidas == 0:
+            return True, 0, 0, "A planilha não contém registos."
+        if num_inseridos == 0:
+            return True, 0, num_duplicados, "Nenhum registo novo para importar. Todos os registos da planilha já existem na base de dados."
 
-        colunas_insert = colunas_necessarias + [c for c in colunas_opcionais if c in df_para_inserir.columns]
-        df_para_inserir_final = df_para_inserir[colunas_insert]
-        registros = [tuple(x) for x in df_para_inserir_final.to_numpy()]
-        
-        cursor = conn.cursor()
-        placeholders = ", ".join(["?"] * len(colunas_insert))
-        sql = f"INSERT INTO abastecimentos ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-        cursor.executemany(sql, registros)
-        
-        conn.commit()
-        num_inseridos = cursor.rowcount
-        conn.close()
-        
         mensagem_sucesso = f"{num_inseridos} registos novos foram importados com sucesso."
         if num_duplicados > 0:
             mensagem_sucesso += f" {num_duplicados} registos duplicados foram ignorados."
-            
-        return num_inseridos, num_duplicados, mensagem_sucesso
+        if num_sem_data > 0:
+            mensagem_sucesso += f" {num_sem_data} registos sem data válida foram ignorados."
+
+        return True, num_inseridos, num_duplicados, mensagem_sucesso
+
+    except Exception as e:
+        mensagem = f"Ocorreu um erro inesperado durante a importação: {e}"
+        if num_inseridos > 0:
+            mensagem += f" Os {num_inseridos} registos dos lotes anteriores já foram gravados."
+        return False, 0, num_duplicados, mensagem
+
+def _arquivos_do_lote(diretorio: str) -> list:
+    """Planilhas de um lote, em ordem de nome; arquivos .zip são extraídos no próprio diretório."""
+    for nome in sorted(os.listdir(diretorio)):
+        if nome.lower().endswith('.zip'):
+            with zipfile.ZipFile(os.path.join(diretorio, nome)) as pacote:
+                for membro in pacote.namelist():
+                    base = os.path.basename(membro)
+                    if base.lower().endswith(EXTENSOES_PLANILHA) and not base.startswith(('.', '~$')):
+                        with pacote.open(membro) as origem, open(os.path.join(diretorio, f"{nome}__{base}"), 'wb') as destino:
+                            shutil.copyfileobj(origem, destino)
+    return sorted(
+        os.path.join(diretorio, nome) for nome in os.listdir(diretorio) if nome.lower().endswith(EXTENSOES_PLANILHA)
+    )
 
-    except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação: {e}"
+def importar_abastecimentos_em_lote(db_path: str, diretorio: str, ao_progredir=None) -> tuple[bool, int, int, str]:
+    """Importa de uma vez várias planilhas de abastecimentos (.xlsx, .csv ou dentro de .zip).
+
+    Os arquivos são lidos em paralelo em processos separados; os registros são
+    deduplicados entre os arquivos e contra o banco e gravados em uma única
+    transação. A mensagem traz um relatório por arquivo.
+    """
+    try:
+        caminhos = _arquivos_do_lote(diretorio)
+        if not caminhos:
+            return False, 0, 0, "Nenhuma planilha .xlsx ou .csv encontrada no lote."
+        lidos = ler_planilhas_em_paralelo(caminhos)
+
+        relatorio, preparados = {}, []
+        for caminho in caminhos:
+            nome = os.path.basename(caminho).split('_', 1)[-1]
+            df_lido, erro = lidos[caminho]
+            if erro is not None:
+                relatorio[caminho] = f"{nome}: erro de leitura ({erro})"
+                continue
+            df_novo, colunas_faltando, sem_data = _preparar_planilha_abastecimentos(df_lido)
+            if colunas_faltando:
+                relatorio[caminho] = f"{nome}: colunas não encontradas ({', '.join(colunas_faltando)})"
+                continue
+            preparados.append((caminho, nome, len(df_lido), sem_data, df_novo))
+
+        # Duplicados entre arquivos: vale a primeira ocorrência, na ordem dos arquivos
+        vistos = pd.concat([df[CHAVE_PLANILHA_ABASTECIMENTOS] for *_, df in preparados], ignore_index=True) if preparados else None
+        repetidos = vistos.duplicated().to_numpy() if vistos is not None else None
+
+        num_inseridos = num_duplicados = 0
+        inicio_arquivo = 0
+        cods_importados = set()
+        with conexao_escrita(db_path) as conn:
+            for ordem, (caminho, nome, linhas, sem_data, df_novo) in enumerate(preparados, start=1):
+                repetidos_arquivo = repetidos[inicio_arquivo:inicio_arquivo + len(df_novo)]
+                inicio_arquivo += len(df_novo)
+                df_para_inserir = df_novo[~repetidos_arquivo]
+                inseridos, duplicados = 0, int(repetidos_arquivo.sum())
+                if not df_para_inserir.empty:
+                    colunas_insert, registros = _registros_abastecimentos(df_para_inserir)
+                    inseridos, duplicados_banco = inserir_sem_duplicatas(conn, 'abastecimentos', colunas_insert, registros)
+                    duplicados += duplicados_banco
+                    if inseridos:
+                        cods_importados.update(df_para_inserir['Cód. Equip.'].unique())
+                num_inseridos += inseridos
+                num_duplicados += duplicados
+
+                linha_relatorio = f"{nome}: {linhas} linhas, {inseridos} importadas, {duplicados} duplicadas"
+                if sem_data:
+                    linha_relatorio += f", {sem_data} sem data válida"
+                relatorio[caminho] = linha_relatorio
+                if ao_progredir is not None:
+                    ao_progredir(ordem, len(preparados), num_inseridos, num_duplicados)
+            atualizar_derivados_abastecimentos(conn, cods_importados)
+
+        resumo = f"{num_inseridos} registos importados de {len(caminhos)} arquivos; {num_duplicados} duplicados ignorados."
+        return True, num_inseridos, num_duplicados, "\n\n".join([resumo] + [relatorio[c] for c in caminhos])
+
+    except Exception as e:
+        return False, 0, 0, f"Ocorreu um erro inesperado durante a importação em lote: {e}"
 
 def editar_frota(db_path: str, cod_equip: int, dados: dict) -> bool:
     """Atualiza um registro de frota existente."""
     try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        cursor = conn.cursor()
-        sql = """
-            UPDATE frotas SET
-                DESCRICAO_EQUIPAMENTO = ?, PLACA = ?, "Classe Operacional" = ?, ATIVO = ?, tipo_combustivel = ?
-            WHERE COD_EQUIPAMENTO = ?
-        """
-        valores = (dados['descricao'], dados['placa'], dados['classe_op'], dados['ativo'], dados.get('tipo_combustivel', 'Diesel S500'), cod_equip)
-        cursor.execute(sql, valores)
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            sql = """
+                UPDATE frotas SET
+                    DESCRICAO_EQUIPAMENTO = ?, PLACA = ?, "Classe Operacional" = ?, ATIVO = ?, tipo_combustivel = ?, tipo_controle = ?
+                WHERE COD_EQUIPAMENTO = ?
+            """
+            valores = (
+                dados['descricao'], dados['placa'], dados['classe_op'], dados['ativo'], dados.get('tipo_combustivel', 'Diesel S500'),
+                _tipo_controle_de(dados['descricao'], dados['classe_op']), cod_equip
+            )
+            cursor.execute(sql, valores)
+            atualizar_derivados_abastecimentos(conn, [cod_equip])
         return True
     except sqlite3.Error as e:
         st.error(f"Erro ao atualizar frota: {e}")
@@ -12249,18 +1924,19 @@ def editar_frota(db_path: str, cod_equip: int, dados: dict) -> bool:
 
 def get_component_rules():
     """Busca todas as regras de componentes da base de dados."""
-    with sqlite3.connect(DB_PATH) as conn:
+    with obter_conexao(DB_PATH) as conn:
         return pd.read_sql_query("SELECT * FROM componentes_regras", conn)
 
 def add_component_rule(classe, componente, intervalo):
     """Adiciona uma nova regra de componente à base de dados."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao) VALUES (?, ?, ?)",
                 (classe, componente, intervalo)
             )
+            atualizar_componentes_status(conn)
             conn.commit()
         return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
     except Exception as e:
@@ -12269,7 +1945,7 @@ def add_component_rule(classe, componente, intervalo):
 def add_component_rule_advanced(classe, componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca", capacidade_litros=0.0):
     """Adiciona uma nova regra de componente com informações de lubrificante e tipo de manutenção."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             
             # Verificar se a tabela tem as colunas necessárias
@@ -12286,6 +1962,7 @@ def add_component_rule_advanced(classe, componente, intervalo, lubrificante_id=N
                 "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, tipo_manutencao, capacidade_litros) VALUES (?, ?, ?, ?, ?, ?)",
                 (classe, componente, intervalo, lubrificante_id, tipo_manutencao, capacidade_litros)
             )
+            atualizar_componentes_status(conn)
             conn.commit()
         return True, f"Componente '{componente}' adicionado com sucesso à classe '{classe}'."
     except Exception as e:
@@ -12294,9 +1971,10 @@ def add_component_rule_advanced(classe, componente, intervalo, lubrificante_id=N
 def delete_component_rule(rule_id):
     """Remove uma regra de componente da base de dados."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM componentes_regras WHERE id_regra = ?", (rule_id,))
+            atualizar_componentes_status(conn)
             conn.commit()
         return True, "Componente removido com sucesso."
     except Exception as e:
@@ -12305,12 +1983,13 @@ def delete_component_rule(rule_id):
 def add_component_service(cod_equip, componente, data, hod_hor, obs):
     """Adiciona um novo registo de serviço de componente ao histórico."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, Observacoes) VALUES (?, ?, ?, ?, ?)",
                 (cod_equip, componente, data, hod_hor, obs)
             )
+            atualizar_componentes_status(conn, [cod_equip])
             conn.commit()
         return True, "Serviço de componente registado com sucesso."
     except Exception as e:
@@ -12319,7 +1998,7 @@ def add_component_service(cod_equip, componente, data, hod_hor, obs):
 def add_component_service_advanced(cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado=None, obs=""):
     """Adiciona um novo registo de serviço de componente com informações detalhadas."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             
             # Verificar se a tabela tem as colunas necessárias
@@ -12336,6 +2015,7 @@ def add_component_service_advanced(cod_equip, componente, data, hod_hor, tipo_se
                 "INSERT INTO componentes_historico (Cod_Equip, nome_componente, Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes) VALUES (?, ?, ?, ?, ?, ?, ?)",
                 (cod_equip, componente, data, hod_hor, tipo_servico, lubrificante_utilizado, obs)
             )
+            atualizar_componentes_status(conn, [cod_equip])
             conn.commit()
         return True, "Serviço de componente registado com sucesso."
     except Exception as e:
@@ -12344,34 +2024,15 @@ def add_component_service_advanced(cod_equip, componente, data, hod_hor, tipo_se
 def get_component_status(cod_equip, componente):
     """Obtém o status atual de um componente específico de um equipamento."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with obter_conexao(DB_PATH) as conn:
             # Buscar a última manutenção do componente
-            query = """
-            SELECT Data, Hod_Hor_No_Servico, tipo_servico, lubrificante_utilizado, Observacoes
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            ORDER BY Data DESC, Hod_Hor_No_Servico DESC
-            LIMIT 1
-            """
-            df_ultima = pd.read_sql_query(query, conn, params=(cod_equip, componente))
+            df_ultima = pd.read_sql_query(SQL_ULTIMA_MANUTENCAO_COMPONENTE, conn, params=(cod_equip, componente))
             
             # Buscar a regra do componente para obter o intervalo
-            query_regra = """
-            SELECT intervalo_padrao, lubrificante_id, tipo_manutencao
-            FROM componentes_regras cr
-            JOIN frotas f ON cr.classe_operacional = f."Classe Operacional"
-            WHERE f.COD_EQUIPAMENTO = ? AND cr.nome_componente = ?
-            """
-            df_regra = pd.read_sql_query(query_regra, conn, params=(cod_equip, componente))
+            df_regra = pd.read_sql_query(SQL_REGRA_COMPONENTE_EQUIPAMENTO, conn, params=(cod_equip, componente))
             
             # Buscar o hodômetro/horímetro atual do equipamento
-            query_hod = """
-            SELECT Hod_Hor_Atual FROM abastecimentos 
-            WHERE Cod_Equip = ? 
-            ORDER BY Data DESC, Hod_Hor_Atual DESC 
-            LIMIT 1
-            """
-            df_hod = pd.read_sql_query(query_hod, conn, params=(cod_equip,))
+            df_hod = pd.read_sql_query(SQL_ULTIMA_LEITURA_EQUIPAMENTO, conn, params=(cod_equip,))
             
             return df_ultima, df_regra, df_hod
             
@@ -12379,18 +2040,37 @@ def get_component_status(cod_equip, componente):
         st.error(f"Erro ao obter status do componente: {e}")
         return None, None, None
 
+@cache_por_tabelas(tabelas=('abastecimentos',), max_entradas=64)
+def ultima_leitura_equipamento(cod_equip, db_path: str = DB_PATH):
+    """Hodômetro/horímetro do abastecimento mais recente do equipamento (None se não houver)."""
+    with obter_conexao(db_path) as conn:
+        linha = conn.execute(SQL_ULTIMA_LEITURA_EQUIPAMENTO, (int(cod_equip),)).fetchone()
+    return None if linha is None else _normalizar_numero(linha[0])
+
+def equipamentos_com_abastecimento(db_path: str = DB_PATH) -> set:
+    """Códigos de equipamento com ao menos um abastecimento."""
+    with obter_conexao(db_path) as conn:
+        return {linha[0] for linha in conn.execute(SQL_EQUIPAMENTOS_COM_ABASTECIMENTO)}
+
+@cache_por_tabelas(tabelas=('componentes_regras', 'componentes_historico', 'lubrificantes'), max_entradas=32)
+def status_componentes_equipamento(cod_equip, classe_operacional, db_path: str = DB_PATH):
+    """Componentes da classe do equipamento e seu histórico, em duas consultas.
+
+    Retorna (componentes, historico): uma linha por regra da classe, com
+    intervalo, lubrificante, contagens de manutenções, trocas e remontas, a
+    última manutenção e a última troca (registros sem tipo contam como troca);
+    e o histórico de componentes do equipamento, do mais recente ao mais antigo.
+    """
+    with obter_conexao(db_path) as conn:
+        componentes = pd.read_sql_query(SQL_COMPONENTES_EQUIPAMENTO, conn, params=(int(cod_equip), classe_operacional))
+        historico = pd.read_sql_query(SQL_HISTORICO_COMPONENTES_EQUIPAMENTO, conn, params=(int(cod_equip),))
+    return componentes, historico
+
 def get_component_maintenance_count(cod_equip, componente):
     """Obtém o número total de manutenções realizadas em um componente."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-            SELECT COUNT(*) as total_manutencoes,
-                   COUNT(CASE WHEN tipo_servico = 'Troca' THEN 1 END) as total_trocas,
-                   COUNT(CASE WHEN tipo_servico = 'Remonta' THEN 1 END) as total_remontas
-            FROM componentes_historico 
-            WHERE Cod_Equip = ? AND nome_componente = ?
-            """
-            df_count = pd.read_sql_query(query, conn, params=(cod_equip, componente))
+        with obter_conexao(DB_PATH) as conn:
+            df_count = pd.read_sql_query(SQL_CONTAGEM_MANUTENCOES_COMPONENTE, conn, params=(cod_equip, componente))
             return df_count.iloc[0] if not df_count.empty else {'total_manutencoes': 0, 'total_trocas': 0, 'total_remontas': 0}
             
     except Exception as e:
@@ -12400,7 +2080,7 @@ def get_component_maintenance_count(cod_equip, componente):
 def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
     """Edita uma manutenção de componente com informações avançadas."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             
             # Verificar se a tabela tem as colunas necessárias
@@ -12413,6 +2093,9 @@ def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
             if 'lubrificante_utilizado' not in columns:
                 cursor.execute("ALTER TABLE componentes_historico ADD COLUMN lubrificante_utilizado TEXT")
             
+            cursor.execute("SELECT Cod_Equip FROM componentes_historico WHERE rowid = ?", (rowid,))
+            cods_afetados = [linha[0] for linha in cursor.fetchall()] + [dados_editados['cod_equip']]
+            
             # Atualizar os dados
             cursor.execute("""
                 UPDATE componentes_historico 
@@ -12429,6 +2112,7 @@ def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
                 dados_editados['lubrificante_utilizado'],
                 rowid
             ))
+            atualizar_componentes_status(conn, cods_afetados)
             conn.commit()
         return True, "Manutenção de componente atualizada com sucesso."
     except Exception as e:
@@ -12437,7 +2121,7 @@ def editar_manutencao_componente_advanced(DB_PATH, rowid, dados_editados):
 def update_component_rule(rule_id, nome_componente, intervalo, lubrificante_id=None, tipo_manutencao="Troca"):
     """Atualiza uma regra de componente existente."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             
             # Verificar se a tabela tem as colunas necessárias
@@ -12456,6 +2140,7 @@ def update_component_rule(rule_id, nome_componente, intervalo, lubrificante_id=N
                 SET nome_componente = ?, intervalo_padrao = ?, lubrificante_id = ?, tipo_manutencao = ?
                 WHERE id_regra = ?
             """, (nome_componente, intervalo, lubrificante_id, tipo_manutencao, rule_id))
+            atualizar_componentes_status(conn)
             conn.commit()
         return True, f"Componente '{nome_componente}' atualizado com sucesso."
     except Exception as e:
@@ -12464,7 +2149,7 @@ def update_component_rule(rule_id, nome_componente, intervalo, lubrificante_id=N
 def get_frota_combustivel(cod_equip):
     """Obtém o tipo de combustível de uma frota específica."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with obter_conexao(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT tipo_combustivel FROM frotas WHERE COD_EQUIPAMENTO = ?", (cod_equip,))
             result = cursor.fetchone()
@@ -12476,9 +2161,10 @@ def get_frota_combustivel(cod_equip):
 def update_frota_combustivel(cod_equip, tipo_combustivel):
     """Atualiza o tipo de combustível de uma frota específica."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE COD_EQUIPAMENTO = ?", (tipo_combustivel, cod_equip))
+            atualizar_consumo_mensal(conn, [cod_equip])
             conn.commit()
         return True, f"Tipo de combustível atualizado para {tipo_combustivel}"
     except Exception as e:
@@ -12487,19 +2173,21 @@ def update_frota_combustivel(cod_equip, tipo_combustivel):
 def update_classe_combustivel(classe_operacional, tipo_combustivel):
     """Atualiza o tipo de combustível de todas as frotas de uma classe."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("UPDATE frotas SET tipo_combustivel = ? WHERE \"Classe Operacional\" = ?", (tipo_combustivel, classe_operacional))
             rows_updated = cursor.rowcount
+            cursor.execute("SELECT COD_EQUIPAMENTO FROM frotas WHERE \"Classe Operacional\" = ?", (classe_operacional,))
+            atualizar_consumo_mensal(conn, [linha[0] for linha in cursor.fetchall()])
             conn.commit()
         return True, f"Tipo de combustível atualizado para {tipo_combustivel} em {rows_updated} frotas da classe {classe_operacional}"
     except Exception as e:
         return False, f"Erro ao atualizar tipo de combustível da classe: {e}"
 
-def add_tipo_combustivel_column():
+def add_tipo_combustivel_column(db_path: str = DB_PATH):
     """Adiciona a coluna tipo_combustivel à tabela frotas se ela não existir."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(db_path) as conn:
             cursor = conn.cursor()
             # Verificar se a coluna existe
             cursor.execute("PRAGMA table_info(frotas)")
@@ -12507,17 +2195,46 @@ def add_tipo_combustivel_column():
             
             if 'tipo_combustivel' not in columns:
                 cursor.execute("ALTER TABLE frotas ADD COLUMN tipo_combustivel TEXT DEFAULT 'Diesel S500'")
-                conn.commit()
                 return True, "Coluna tipo_combustivel adicionada com sucesso"
             else:
                 return True, "Coluna tipo_combustivel já existe"
     except Exception as e:
         return False, f"Erro ao adicionar coluna tipo_combustivel: {e}"
 
-def ensure_motoristas_schema():
+def _tipo_controle_de(descricao, classe) -> str:
+    """Tipo de controle de um único equipamento, para gravações linha a linha."""
+    return classificar_tipo_controle(pd.Series([descricao], dtype=object), pd.Series([classe], dtype=object)).iloc[0]
+
+def ensure_tipo_controle_frotas(db_path: str = DB_PATH):
+    """Adiciona a coluna tipo_controle em frotas e classifica as frotas que ainda não a têm."""
+    try:
+        with conexao_escrita(db_path) as conn:
+            colunas = [c[1] for c in conn.execute("PRAGMA table_info(frotas)").fetchall()]
+            if not colunas:
+                return True, "Tabela frotas não existe"
+            if 'tipo_controle' not in colunas:
+                conn.execute("ALTER TABLE frotas ADD COLUMN tipo_controle TEXT")
+            descricao = 'DESCRICAO_EQUIPAMENTO' if 'DESCRICAO_EQUIPAMENTO' in colunas else "''"
+            classe = '"Classe Operacional"' if 'Classe Operacional' in colunas else "''"
+            df = pd.read_sql_query(
+                f"SELECT rowid AS rowid, {descricao} AS descricao, {classe} AS classe FROM frotas WHERE tipo_controle IS NULL",
+                conn
+            )
+            if df.empty:
+                return True, "Tipo de controle das frotas já preenchido"
+            tipos = classificar_tipo_controle(df['descricao'], df['classe'])
+            conn.executemany(
+                "UPDATE frotas SET tipo_controle = ? WHERE rowid = ?",
+                list(zip(tipos.tolist(), df['rowid'].tolist()))
+            )
+        return True, f"Tipo de controle preenchido para {len(df)} frotas"
+    except Exception as e:
+        return False, f"Erro ao preencher tipo de controle das frotas: {e}"
+
+def ensure_motoristas_schema(db_path: str = DB_PATH):
     """Garante a existência da tabela de motoristas e das colunas de vínculo em abastecimentos."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(db_path) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -12539,7 +2256,6 @@ def ensure_motoristas_schema():
                 cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Matricula TEXT")
             if 'Cod_Pessoa' not in cols:
                 cursor.execute("ALTER TABLE abastecimentos ADD COLUMN Cod_Pessoa TEXT")
-            conn.commit()
         return True, "Esquema de motoristas verificado"
     except Exception as e:
         return False, f"Erro ao verificar esquema de motoristas: {e}"
@@ -12547,7 +2263,7 @@ def ensure_motoristas_schema():
 def get_all_motoristas() -> pd.DataFrame:
     """Retorna o DataFrame de motoristas."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with obter_conexao(DB_PATH) as conn:
             return pd.read_sql_query("SELECT * FROM motoristas", conn)
     except Exception:
         return pd.DataFrame(columns=['id', 'codigo_pessoa', 'matricula', 'nome', 'ativo'])
@@ -12566,7 +2282,7 @@ def importar_motoristas_de_planilha(db_path: str, arquivo_carregado):
         obrig = ['Matricula', 'Nome']
         faltando = [c for c in obrig if c not in df_mot.columns]
         if faltando:
-            return 0, 0, f"Erro: Colunas obrigatórias não encontradas: {', '.join(faltando)}"
+            return False, 0, 0, f"Erro: Colunas obrigatórias não encontradas: {', '.join(faltando)}"
         if 'Cod_Pessoa' not in df_mot.columns:
             df_mot['Cod_Pessoa'] = None
         df_mot = df_mot.dropna(subset=['Matricula', 'Nome']).copy()
@@ -12574,12 +2290,12 @@ def importar_motoristas_de_planilha(db_path: str, arquivo_carregado):
         df_mot['Nome'] = df_mot['Nome'].astype(str).str.strip()
         df_mot['Cod_Pessoa'] = df_mot['Cod_Pessoa'].astype(str).str.strip()
         df_mot = df_mot.drop_duplicates(subset=['Matricula'])
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
+        with conexao_escrita(db_path) as conn:
             existentes = pd.read_sql_query("SELECT matricula FROM motoristas", conn)
             set_exist = set(existentes['matricula'].astype(str)) if not existentes.empty else set()
             df_novos = df_mot[~df_mot['Matricula'].isin(set_exist)].copy()
             if df_novos.empty:
-                return 0, len(df_mot), "Nenhum motorista novo para importar. Todos já existem."
+                return True, 0, len(df_mot), "Nenhum motorista novo para importar. Todos já existem."
             registros = [
                 (row.get('Cod_Pessoa', None), row['Matricula'], row['Nome'], 'ATIVO')
                 for _, row in df_novos.iterrows()
@@ -12592,14 +2308,14 @@ def importar_motoristas_de_planilha(db_path: str, arquivo_carregado):
             conn.commit()
             inseridos = cur.rowcount if cur.rowcount is not None else len(registros)
             duplicados = len(df_mot) - len(df_novos)
-            return inseridos, duplicados, f"{inseridos} motoristas importados com sucesso. {duplicados} já existiam."
+            return True, inseridos, duplicados, f"{inseridos} motoristas importados com sucesso. {duplicados} já existiam."
     except Exception as e:
-        return 0, 0, f"Ocorreu um erro inesperado durante a importação de motoristas: {e}"
+        return False, 0, 0, f"Ocorreu um erro inesperado durante a importação de motoristas: {e}"
     
-def ensure_pneus_schema():
+def ensure_pneus_schema(db_path: str = DB_PATH):
     """Garante a existência da tabela de histórico de pneus."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(db_path) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS pneus_historico (
@@ -12626,7 +2342,7 @@ def ensure_pneus_schema():
                 cursor.execute("ALTER TABLE pneus_historico ADD COLUMN vida_atual INTEGER DEFAULT 1")
             if 'numero_fogo' not in cols:
                 cursor.execute("ALTER TABLE pneus_historico ADD COLUMN numero_fogo TEXT")
-            conn.commit()
+            criar_indices(conn, ('pneus_historico',))
         return True, "Tabela de pneus verificada"
     except Exception as e:
         return False, f"Erro ao criar tabela de pneus: {e}"
@@ -12639,7 +2355,7 @@ def importar_pneus_de_planilha(db_path: str, arquivo_carregado):
         obrig = ['Cod_Equip', 'posicao', 'marca', 'modelo', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao']
         faltando = [c for c in obrig if c not in df_pneus.columns]
         if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
+            return False, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
         
             if 'observacoes' not in df_pneus.columns:
                     df_pneus['observacoes'] = ""
@@ -12657,82 +2373,45 @@ def importar_pneus_de_planilha(db_path: str, arquivo_carregado):
         # Remover duplicatas na própria planilha baseada em chave única
         df_pneus = df_pneus.drop_duplicates(subset=['Cod_Equip', 'posicao', 'numero_fogo', 'data_instalacao', 'hodometro_instalacao'])
         
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Buscar registros existentes para verificar duplicatas
-            df_existente = pd.read_sql_query("SELECT Cod_Equip, posicao, numero_fogo, data_instalacao, hodometro_instalacao FROM pneus_historico", conn)
-            
-            if not df_existente.empty:
-                # Normalizar dados existentes para comparação
-                df_existente['Cod_Equip'] = df_existente['Cod_Equip'].astype(str)
-                df_existente['posicao'] = df_existente['posicao'].astype(str).str.strip()
-                df_existente['numero_fogo'] = df_existente['numero_fogo'].astype(str).str.strip()
-                df_existente['data_instalacao'] = pd.to_datetime(df_existente['data_instalacao']).dt.strftime('%Y-%m-%d')
-                
-                # Criar chaves únicas para comparação
-                df_pneus['chave_unica'] = (df_pneus['Cod_Equip'] + '_' + 
-                                          df_pneus['posicao'] + '_' + 
-                                          df_pneus['numero_fogo'] + '_' + 
-                                          df_pneus['data_instalacao'] + '_' + 
-                                          df_pneus['hodometro_instalacao'].astype(str))
-                
-                df_existente['chave_unica'] = (df_existente['Cod_Equip'] + '_' + 
-                                              df_existente['posicao'] + '_' + 
-                                              df_existente['numero_fogo'] + '_' + 
-                                              df_existente['data_instalacao'] + '_' + 
-                                              df_existente['hodometro_instalacao'].astype(str))
-                
-                # Filtrar apenas registros que não existem
-                df_para_inserir = df_pneus[~df_pneus['chave_unica'].isin(df_existente['chave_unica'])]
-            else:
-                df_para_inserir = df_pneus
-            
-            num_duplicados = len(df_pneus) - len(df_para_inserir)
-            
-            if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum pneu novo para importar. Todos os registros da planilha já existem na base de dados."
-            
-            # Preparar registros para inserção
-            colunas_insert = obrig + ['observacoes']
-            # Garantir que a coluna observacoes exista no DataFrame
-            if 'observacoes' not in df_para_inserir.columns:
-                df_para_inserir['observacoes'] = ''
-            df_para_inserir_final = df_para_inserir[colunas_insert]
-            registros = [tuple(x) for x in df_para_inserir_final.fillna('').to_numpy()]
-            
-            cur = conn.cursor()
-            placeholders = ", ".join(["?"] * len(colunas_insert))
-            sql = f"INSERT INTO pneus_historico ({', '.join(f'\"{col}\"' for col in colunas_insert)}) VALUES ({placeholders})"
-            cur.executemany(sql, registros)
-            conn.commit()
-            
-            num_inseridos = len(registros)
-            
-            mensagem_sucesso = f"{num_inseridos} pneus novos foram importados com sucesso."
-            if num_duplicados > 0:
-                mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
-            
-            return num_inseridos, num_duplicados, mensagem_sucesso
-            
+        # Preparar registros para inserção
+        colunas_insert = obrig + ['observacoes']
+        # Garantir que a coluna observacoes exista no DataFrame
+        if 'observacoes' not in df_pneus.columns:
+            df_pneus['observacoes'] = ''
+        registros = [tuple(x) for x in df_pneus[colunas_insert].fillna('').to_numpy()]
+
+        with conexao_escrita(db_path) as conn:
+            num_inseridos, num_duplicados = inserir_sem_duplicatas(conn, 'pneus_historico', colunas_insert, registros)
+
+        if num_inseridos == 0:
+            return True, 0, num_duplicados, "Nenhum pneu novo para importar. Todos os registros da planilha já existem na base de dados."
+
+        mensagem_sucesso = f"{num_inseridos} pneus novos foram importados com sucesso."
+        if num_duplicados > 0:
+            mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
+
+        return True, num_inseridos, num_duplicados, mensagem_sucesso
+
     except Exception as e:
-        return 0, 0, f"Erro ao importar pneus: {e}"
+        return False, 0, 0, f"Erro ao importar pneus: {e}"
 
 def get_pneus_historico(cod_equip=None):
     """Retorna o histórico de pneus, opcionalmente filtrando por frota."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-            query = "SELECT * FROM pneus_historico"
-            params = ()
+        with obter_conexao(DB_PATH) as conn:
             if cod_equip:
-                query += " WHERE Cod_Equip = ?"
-                params = (cod_equip,)
-            return pd.read_sql_query(query, conn, params=params)
+                return pd.read_sql_query(SQL_PNEUS_EQUIPAMENTO, conn, params=(cod_equip,))
+            return pd.read_sql_query("SELECT * FROM pneus_historico", conn)
     except Exception:
         return pd.DataFrame()
 
-def ensure_precos_combustivel_schema():
-    """Garante a existência da tabela de preços por tipo de combustível."""
+# Preço de cada combustível em cada data; precos_combustivel guarda só o preço atual
+VIGENCIA_INICIAL_PRECOS = '1900-01-01'
+
+def ensure_precos_combustivel_schema(db_path: str = DB_PATH):
+    """Garante as tabelas de preço atual e de histórico de preços por tipo de combustível."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(db_path) as conn:
             cur = conn.cursor()
             cur.execute(
                 """
@@ -12744,8 +2423,33 @@ def ensure_precos_combustivel_schema():
             )
             tipos = ['Diesel S500', 'Diesel S10', 'Gasolina', 'Etanol', 'Biodiesel']
             for t in tipos:
-                cur.execute("INSERT OR IGNORE INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?)", (t, NULL))
-            conn.commit()
+                cur.execute("INSERT OR IGNORE INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?)", (t, None))
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS precos_combustivel_historico (
+                    tipo_combustivel TEXT NOT NULL,
+                    vigente_desde TEXT NOT NULL,
+                    preco REAL,
+                    PRIMARY KEY (tipo_combustivel, vigente_desde)
+                )
+                """
+            )
+            # Sem histórico, o preço atual passa a valer para todos os abastecimentos já registrados
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO precos_combustivel_historico (tipo_combustivel, vigente_desde, preco)
+                SELECT tipo_combustivel, ?, preco FROM precos_combustivel
+                WHERE preco IS NOT NULL
+                  AND tipo_combustivel NOT IN (SELECT tipo_combustivel FROM precos_combustivel_historico)
+                """,
+                (VIGENCIA_INICIAL_PRECOS,)
+            )
+            existentes = {r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+            if '_versoes_tabelas' in existentes:
+                criar_gatilhos_versao(conn, 'precos_combustivel_historico')
+            # O custo de consumo_mensal passa a usar o preço vigente na data de cada abastecimento
+            if {'consumo_mensal', 'frotas', 'abastecimentos_equip'} <= existentes:
+                atualizar_consumo_mensal(conn)
         return True, "Tabela de preços verificada"
     except Exception as e:
         return False, f"Erro ao verificar tabela de preços: {e}"
@@ -12753,30 +2457,92 @@ def ensure_precos_combustivel_schema():
 def get_precos_combustivel_map() -> dict:
     """Retorna um dicionário {tipo_combustivel: preco}."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with obter_conexao(DB_PATH) as conn:
             dfp = pd.read_sql_query("SELECT tipo_combustivel, preco FROM precos_combustivel", conn)
         return {row['tipo_combustivel']: row['preco'] for _, row in dfp.iterrows()}
     except Exception:
         return {}
 
-def upsert_preco_combustivel(tipo: str, preco: float) -> tuple[bool, str]:
-    """Cria/atualiza preço para um tipo de combustível."""
+@cache_por_tabelas(tabelas=('precos_combustivel_historico',), max_entradas=2)
+def get_historico_precos_combustivel(db_path: str = DB_PATH) -> pd.DataFrame:
+    """Histórico de preços (tipo_combustivel, vigente_desde, preco), do mais recente ao mais antigo."""
+    try:
+        with obter_conexao(db_path) as conn:
+            return pd.read_sql_query(
+                "SELECT tipo_combustivel, vigente_desde, preco FROM precos_combustivel_historico ORDER BY vigente_desde DESC, tipo_combustivel",
+                conn
+            )
+    except Exception:
+        return pd.DataFrame(columns=['tipo_combustivel', 'vigente_desde', 'preco'])
+
+def custo_abastecimentos(df_abastecimentos: pd.DataFrame, db_path: str = DB_PATH) -> pd.Series:
+    """Custo de cada abastecimento com o preço vigente na sua data, no mesmo índice de `df_abastecimentos`.
+
+    O preço é casado por merge_asof na data e no combustível da frota;
+    abastecimentos anteriores ao primeiro preço cadastrado usam o mais antigo.
+    """
+    litros = df_abastecimentos['Qtde Litros'].astype(float).fillna(0.0).to_numpy()
+    precos = get_historico_precos_combustivel(db_path).dropna(subset=['preco'])
+    unitario = np.zeros(len(df_abastecimentos))
+    if not precos.empty and len(df_abastecimentos):
+        precos['vigente_desde'] = pd.to_datetime(precos['vigente_desde']).astype('datetime64[ns]')
+        precos = precos.sort_values('vigente_desde')
+        if 'tipo_combustivel' in df_abastecimentos.columns:
+            tipos = df_abastecimentos['tipo_combustivel'].astype(object).fillna('Diesel S500').to_numpy()
+        else:
+            tipos = 'Diesel S500'
+        linhas = pd.DataFrame({
+            'posicao': np.arange(len(df_abastecimentos)),
+            'Data': pd.to_datetime(df_abastecimentos['Data'], errors='coerce').astype('datetime64[ns]').to_numpy(),
+            'tipo_combustivel': tipos,
+        }).dropna(subset=['Data']).sort_values('Data', kind='stable')
+        casados = pd.merge_asof(linhas, precos, left_on='Data', right_on='vigente_desde', by='tipo_combustivel', direction='backward')
+        primeiro_preco = precos.groupby('tipo_combustivel')['preco'].first()
+        preco = casados['preco'].fillna(casados['tipo_combustivel'].map(primeiro_preco)).fillna(0.0)
+        unitario[casados['posicao'].to_numpy()] = preco.to_numpy(dtype=float)
+    return pd.Series(litros * unitario, index=df_abastecimentos.index, name='custo')
+
+def upsert_preco_combustivel(tipo: str, preco: float, vigente_desde=None) -> tuple[bool, str]:
+    """Registra o preço de um tipo de combustível a partir de `vigente_desde` (padrão: hoje).
+
+    Abastecimentos anteriores mantêm o preço da época. Se o preço vigente na
+    data já é o informado, nada é gravado.
+    """
+    vigente_desde = pd.Timestamp(vigente_desde or date.today()).strftime('%Y-%m-%d')
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cur = conn.cursor()
+            vigente = cur.execute(
+                "SELECT vigente_desde, preco FROM precos_combustivel_historico WHERE tipo_combustivel = ? AND vigente_desde <= ? ORDER BY vigente_desde DESC LIMIT 1",
+                (tipo, vigente_desde)
+            ).fetchone()
+            if vigente is not None and vigente[1] == preco:
+                return True, f"Preço de {tipo} sem alteração"
+            cur.execute(
+                "INSERT INTO precos_combustivel_historico (tipo_combustivel, vigente_desde, preco) VALUES (?, ?, ?) ON CONFLICT(tipo_combustivel, vigente_desde) DO UPDATE SET preco=excluded.preco",
+                (tipo, vigente_desde, preco)
+            )
+            # precos_combustivel acompanha o preço mais recente do histórico
             cur.execute(
-                "INSERT INTO precos_combustivel (tipo_combustivel, preco) VALUES (?, ?) ON CONFLICT(tipo_combustivel) DO UPDATE SET preco=excluded.preco",
-                (tipo, preco)
+                """
+                INSERT INTO precos_combustivel (tipo_combustivel, preco)
+                SELECT tipo_combustivel, preco FROM precos_combustivel_historico
+                WHERE tipo_combustivel = ? ORDER BY vigente_desde DESC LIMIT 1
+                ON CONFLICT(tipo_combustivel) DO UPDATE SET preco=excluded.preco
+                """,
+                (tipo,)
             )
+            cods = [r[0] for r in cur.execute("SELECT DISTINCT Cod_Equip FROM consumo_mensal WHERE tipo_combustivel = ?", (tipo,))]
+            atualizar_consumo_mensal(conn, cods)
             conn.commit()
         return True, f"Preço atualizado para {tipo}"
     except Exception as e:
         return False, f"Erro ao atualizar preço: {e}"
     
-def ensure_lubrificantes_schema():
+def ensure_lubrificantes_schema(db_path: str = DB_PATH):
     """Garante a existência da tabela de lubrificantes, movimentações e almoxarifados."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(db_path) as conn:
             cursor = conn.cursor()
             
             # Tabela de lubrificantes
@@ -12847,7 +2613,7 @@ def ensure_lubrificantes_schema():
             if 'id_almoxarifado' not in cols_mov:
                 cursor.execute("ALTER TABLE lubrificantes_movimentacoes ADD COLUMN id_almoxarifado INTEGER")
             
-            conn.commit()
+            criar_indices(conn, ('lubrificantes',))
         return True, "Tabelas de lubrificantes e almoxarifados verificadas"
     except Exception as e:
         return False, f"Erro ao criar tabelas de lubrificantes: {e}"
@@ -12855,7 +2621,7 @@ def ensure_lubrificantes_schema():
 def add_almoxarifado(nome, tipo="fixo", localizacao="", responsavel="", observacoes=""):
     """Adiciona um novo almoxarifado."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cur = conn.cursor()
             cur.execute(
                 "INSERT INTO almoxarifados (nome, tipo, localizacao, responsavel, observacoes) VALUES (?, ?, ?, ?, ?)",
@@ -12869,7 +2635,7 @@ def add_almoxarifado(nome, tipo="fixo", localizacao="", responsavel="", observac
 def get_almoxarifados():
     """Retorna todos os almoxarifados ativos."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with obter_conexao(DB_PATH) as conn:
             df = pd.read_sql("SELECT * FROM almoxarifados WHERE ativo = 1 ORDER BY nome", conn)
         return df
     except Exception as e:
@@ -12878,7 +2644,7 @@ def get_almoxarifados():
 def get_estoque_por_almoxarifado(id_lubrificante):
     """Retorna o estoque de um lubrificante distribuído por almoxarifados."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with obter_conexao(DB_PATH) as conn:
             query = """
             SELECT 
                 a.nome as almoxarifado,
@@ -12901,7 +2667,7 @@ def get_estoque_por_almoxarifado(id_lubrificante):
 def atualizar_estoque_almoxarifado(id_almoxarifado, id_lubrificante, quantidade, unidade):
     """Atualiza o estoque de um lubrificante em um almoxarifado específico."""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT OR REPLACE INTO almoxarifado_estoque 
@@ -12915,7 +2681,7 @@ def atualizar_estoque_almoxarifado(id_almoxarifado, id_lubrificante, quantidade,
 
 def add_lubrificante(nome, viscosidade, quantidade, unidade, observacoes=""):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cur = conn.cursor()
             cur.execute(
                 "INSERT INTO lubrificantes (nome, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?)",
@@ -12951,7 +2717,7 @@ def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
         obrig = ['nome']
         faltando = [c for c in obrig if c not in df_lub.columns]
         if faltando:
-            return 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
+            return False, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
         
         # Adicionar colunas opcionais se não existirem
         if 'tipo' not in df_lub.columns:
@@ -12977,10 +2743,7 @@ def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
         # Remover duplicatas na própria planilha baseada no nome
         df_lub = df_lub.drop_duplicates(subset=['nome'])
         
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que a tabela existe com a coluna tipo
-            ensure_lubrificantes_schema()
-            
+        with conexao_escrita(db_path) as conn:
             # Buscar lubrificantes existentes
             df_existente = pd.read_sql_query("SELECT nome FROM lubrificantes", conn)
             
@@ -12996,7 +2759,7 @@ def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
             num_duplicados = len(df_lub) - len(df_para_inserir)
             
             if df_para_inserir.empty:
-                return 0, num_duplicados, "Nenhum lubrificante novo para importar. Todos os registros da planilha já existem na base de dados."
+                return True, 0, num_duplicados, "Nenhum lubrificante novo para importar. Todos os registros da planilha já existem na base de dados."
             
             # Preparar registros para inserção
             colunas_insert = ['nome', 'tipo', 'viscosidade', 'quantidade_estoque', 'unidade', 'observacoes']
@@ -13015,10 +2778,20 @@ def importar_lubrificantes_de_planilha(db_path: str, arquivo_carregado):
             if num_duplicados > 0:
                 mensagem_sucesso += f" {num_duplicados} registros duplicados foram ignorados."
             
-            return num_inseridos, num_duplicados, mensagem_sucesso
+            return True, num_inseridos, num_duplicados, mensagem_sucesso
             
     except Exception as e:
-        return 0, 0, f"Erro ao importar lubrificantes: {e}"
+        return False, 0, 0, f"Erro ao importar lubrificantes: {e}"
+
+def _ids_lubrificantes_por_nome(conn, nomes: list) -> dict:
+    """Mapeia nome -> id dos lubrificantes cadastrados com esses nomes (o menor id, se houver repetidos)."""
+    if not nomes:
+        return {}
+    linhas = conn.execute(
+        "SELECT nome, MIN(id) FROM lubrificantes WHERE nome IN (SELECT value FROM json_each(?)) GROUP BY nome",
+        (json.dumps(nomes),)
+    ).fetchall()
+    return {nome: int(id_lub) for nome, id_lub in linhas}
 
 def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_operacional: str):
     """Importa componentes de uma planilha Excel, verificando duplicatas e criando lubrificantes se necessário."""
@@ -13047,7 +2820,7 @@ def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_ope
         obrig = ['nome_componente', 'intervalo_padrao']
         faltando = [c for c in obrig if c not in df_comp.columns]
         if faltando:
-            return 0, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
+            return False, 0, 0, 0, f"Colunas obrigatórias faltando: {', '.join(faltando)}"
         
         # Adicionar colunas opcionais se não existirem
         if 'lubrificante_nome' not in df_comp.columns:
@@ -13060,16 +2833,14 @@ def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_ope
         df_comp['nome_componente'] = df_comp['nome_componente'].astype(str).str.strip()
         df_comp['intervalo_padrao'] = pd.to_numeric(df_comp['intervalo_padrao'], errors='coerce')
         df_comp = df_comp.dropna(subset=['intervalo_padrao'])
-        df_comp['lubrificante_nome'] = df_comp['lubrificante_nome'].astype(str).str.strip().replace('nan', None)
+        nomes_lub = df_comp['lubrificante_nome'].astype(str).str.strip()
+        df_comp['lubrificante_nome'] = nomes_lub.where(~nomes_lub.isin(['nan', 'None', '']), None)
         df_comp['capacidade_litros'] = pd.to_numeric(df_comp['capacidade_litros'], errors='coerce').fillna(0.0)
         
         # Remover duplicatas na própria planilha baseada no nome do componente
         df_comp = df_comp.drop_duplicates(subset=['nome_componente'])
         
-        with sqlite3.connect(db_path, check_same_thread=False) as conn:
-            # Garantir que as tabelas existem
-            ensure_lubrificantes_schema()
-            
+        with conexao_escrita(db_path) as conn:
             # Verificar se a tabela componentes_regras tem a coluna capacidade_litros
             cursor = conn.cursor()
             cursor.execute("PRAGMA table_info(componentes_regras)")
@@ -13096,42 +2867,34 @@ def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_ope
             num_duplicados = len(df_comp) - len(df_para_inserir)
             
             if df_para_inserir.empty:
-                return 0, num_duplicados, 0, "Nenhum componente novo para importar. Todos os registros da planilha já existem na classe selecionada."
-            
-            # Processar lubrificantes
-            lubrificantes_criados = 0
-            for _, row in df_para_inserir.iterrows():
-                if pd.notna(row['lubrificante_nome']) and row['lubrificante_nome']:
-                    # Verificar se o lubrificante existe
-                    df_lub_existente = pd.read_sql_query(
-                        "SELECT id FROM lubrificantes WHERE nome = ?", 
-                        conn, params=(row['lubrificante_nome'],)
-                    )
-                    
-                    if df_lub_existente.empty:
-                        # Criar lubrificante automaticamente
-                        cur = conn.cursor()
-                        cur.execute(
-                            "INSERT INTO lubrificantes (nome, tipo, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-                            (row['lubrificante_nome'], 'óleo', '', 0, 'L', f'Criado automaticamente durante importação de componentes')
-                        )
-                        lubrificantes_criados += 1
-                        
-                        # Buscar o ID do lubrificante criado
-                        lub_id = cur.lastrowid
-                    else:
-                        lub_id = df_lub_existente.iloc[0]['id']
-                else:
-                    lub_id = None
-                
-                # Inserir componente
-                cur = conn.cursor()
-                cur.execute(
-                    "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, capacidade_litros) VALUES (?, ?, ?, ?, ?)",
-                    (classe_operacional, row['nome_componente'], row['intervalo_padrao'], lub_id, row['capacidade_litros'])
+                return True, 0, num_duplicados, 0, "Nenhum componente novo para importar. Todos os registros da planilha já existem na classe selecionada."
+            
+            # Resolver os lubrificantes de uma vez: os que não existem são criados em lote
+            nomes_lubrificantes = df_para_inserir['lubrificante_nome'].dropna().unique().tolist()
+            ids_lubrificantes = _ids_lubrificantes_por_nome(conn, nomes_lubrificantes)
+            lubrificantes_faltando = [nome for nome in nomes_lubrificantes if nome not in ids_lubrificantes]
+            if lubrificantes_faltando:
+                conn.executemany(
+                    "INSERT INTO lubrificantes (nome, tipo, viscosidade, quantidade_estoque, unidade, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(nome, 'óleo', '', 0, 'L', 'Criado automaticamente durante importação de componentes') for nome in lubrificantes_faltando]
                 )
+                ids_lubrificantes.update(_ids_lubrificantes_por_nome(conn, lubrificantes_faltando))
+            lubrificantes_criados = len(lubrificantes_faltando)
+
+            lubrificante_ids = df_para_inserir['lubrificante_nome'].map(ids_lubrificantes).astype(object)
+            registros = list(zip(
+                [classe_operacional] * len(df_para_inserir),
+                df_para_inserir['nome_componente'].tolist(),
+                df_para_inserir['intervalo_padrao'].astype(float).tolist(),
+                lubrificante_ids.where(lubrificante_ids.notna(), None).tolist(),
+                df_para_inserir['capacidade_litros'].astype(float).tolist(),
+            ))
+            conn.executemany(
+                "INSERT INTO componentes_regras (classe_operacional, nome_componente, intervalo_padrao, lubrificante_id, capacidade_litros) VALUES (?, ?, ?, ?, ?)",
+                registros
+            )
+            atualizar_componentes_status(conn)
             
-            conn.commit()
             num_inseridos = len(df_para_inserir)
             
             mensagem_sucesso = f"{num_inseridos} componentes foram importados com sucesso para a classe '{classe_operacional}'."
@@ -13140,14 +2903,297 @@ def importar_componentes_de_planilha(db_path: str, arquivo_carregado, classe_ope
             if lubrificantes_criados > 0:
                 mensagem_sucesso += f" {lubrificantes_criados} lubrificantes foram criados automaticamente."
             
-            return num_inseridos, num_duplicados, lubrificantes_criados, mensagem_sucesso
+            return True, num_inseridos, num_duplicados, lubrificantes_criados, mensagem_sucesso
             
     except Exception as e:
-        return 0, 0, 0, f"Erro ao importar componentes: {e}"
+        return False, 0, 0, 0, f"Erro ao importar componentes: {e}"
+
+# ---------------------------
+# Importações em segundo plano
+# ---------------------------
+
+# As planilhas recebidas ficam em disco até o fim da importação, para que ela possa ser retomada
+DIRETORIO_IMPORTACOES = os.path.join(SCRIPT_DIR, "importacoes_pendentes")
+MAX_IMPORTACOES_SIMULTANEAS = 2
+STATUS_IMPORTACAO_ATIVOS = ('pendente', 'executando')
+# Intervalo, em segundos, com que o painel de importações se atualiza enquanto há importações ativas
+INTERVALO_ATUALIZACAO_IMPORTACOES = 2
+
+def ensure_import_jobs_schema(db_path: str = DB_PATH):
+    """Garante a tabela em que as importações registram estado, progresso e resultado."""
+    try:
+        with conexao_escrita(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS import_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tipo TEXT NOT NULL,
+                    arquivo_nome TEXT,
+                    arquivo_caminho TEXT,
+                    parametros TEXT,
+                    status TEXT NOT NULL DEFAULT 'pendente',
+                    linhas_processadas INTEGER NOT NULL DEFAULT 0,
+                    total_estimado INTEGER,
+                    inseridos INTEGER NOT NULL DEFAULT 0,
+                    duplicados INTEGER NOT NULL DEFAULT 0,
+                    mensagem TEXT,
+                    criado_em TEXT,
+                    atualizado_em TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs (status)")
+        return True, "Tabela de importações verificada"
+    except Exception as e:
+        return False, f"Erro ao criar tabela de importações: {e}"
+
+def ensure_colunas_componentes(db_path: str = DB_PATH):
+    """Garante as colunas de tipo de serviço e lubrificante das tabelas de componentes."""
+    colunas_por_tabela = {
+        'componentes_historico': (
+            ('tipo_servico', "TEXT DEFAULT 'Troca'"),
+            ('lubrificante_utilizado', 'TEXT'),
+        ),
+        'componentes_regras': (
+            ('lubrificante_id', 'INTEGER'),
+            ('tipo_manutencao', "TEXT DEFAULT 'Troca'"),
+        ),
+    }
+    try:
+        with conexao_escrita(db_path) as conn:
+            for tabela, colunas in colunas_por_tabela.items():
+                existentes = {c[1] for c in conn.execute(f"PRAGMA table_info({tabela})").fetchall()}
+                if not existentes:
+                    continue
+                for coluna, tipo in colunas:
+                    if coluna not in existentes:
+                        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+        return True, "Colunas dos componentes verificadas"
+    except Exception as e:
+        return False, f"Erro ao verificar colunas dos componentes: {e}"
+
+def ensure_componentes_status_schema(db_path: str = DB_PATH):
+    """Garante a tabela componentes_status e a preenche com a situação atual de todas as frotas."""
+    try:
+        with conexao_escrita(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS componentes_status (
+                    Cod_Equip INTEGER NOT NULL,
+                    nome_componente TEXT NOT NULL,
+                    ordem_regra INTEGER,
+                    tipo_controle TEXT,
+                    intervalo REAL,
+                    leitura_atual REAL,
+                    ultimo_servico REAL,
+                    data_ultimo_servico TEXT,
+                    proximo_servico REAL,
+                    restante REAL,
+                    em_alerta INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (Cod_Equip, nome_componente)
+                )
+            """)
+            # A tabela é nova: os gatilhos de versão criados na inicialização do processo não a cobrem
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS _versoes_tabelas (
+                    tabela TEXT PRIMARY KEY,
+                    versao INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            criar_gatilhos_versao(conn, 'componentes_status')
+            existentes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+            if not {'frotas', 'abastecimentos_equip', 'componentes_regras', 'componentes_historico'} <= existentes:
+                return True, "Tabela de situação dos componentes criada"
+            linhas = atualizar_componentes_status(conn)
+        return True, f"Situação de {linhas} componentes calculada"
+    except Exception as e:
+        return False, f"Erro ao criar tabela de situação dos componentes: {e}"
+
+def ensure_consumo_mensal_schema(db_path: str = DB_PATH):
+    """Garante a tabela consumo_mensal e a preenche a partir de todos os abastecimentos."""
+    try:
+        with conexao_escrita(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS consumo_mensal (
+                    AnoMes TEXT NOT NULL,
+                    Cod_Equip INTEGER,
+                    Classe_Operacional TEXT,
+                    tipo_combustivel TEXT,
+                    Matricula TEXT,
+                    Safra,
+                    litros REAL,
+                    custo REAL,
+                    soma_media REAL,
+                    leituras_media INTEGER,
+                    abastecimentos INTEGER,
+                    primeira_data TEXT,
+                    ultima_data TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_consumo_mensal_equip ON consumo_mensal (Cod_Equip)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS _versoes_tabelas (
+                    tabela TEXT PRIMARY KEY,
+                    versao INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            criar_gatilhos_versao(conn, 'consumo_mensal')
+            existentes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+            if not {'frotas', 'abastecimentos_equip', 'precos_combustivel_historico'} <= existentes:
+                return True, "Tabela de consumo mensal criada"
+            # Dias dos meses incompletos de um período são somados direto de abastecimentos
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_abastecimentos_data ON abastecimentos (Data)")
+            atualizar_consumo_mensal(conn)
+        return True, "Consumo mensal calculado"
+    except Exception as e:
+        return False, f"Erro ao criar tabela de consumo mensal: {e}"
+
+def _sem_retomada(funcao):
+    """Adapta um importador (db_path, arquivo) -> (ok, inseridos, duplicados, msg) que grava tudo em uma transação.
+
+    Se o processo cair no meio, nada foi gravado e a importação é refeita do início.
+    """
+    def executar(db_path, caminho, parametros, inicio, ao_progredir):
+        return funcao(db_path, caminho)
+    return executar
+
+def _importar_abastecimentos_job(db_path, caminho, parametros, inicio, ao_progredir):
+    return importar_abastecimentos_de_planilha(db_path, caminho, ao_progredir=ao_progredir, inicio=inicio)
+
+def _importar_abastecimentos_lote_job(db_path, caminho, parametros, inicio, ao_progredir):
+    # O lote é gravado em uma transação só: ao retomar, recomeça do início
+    return importar_abastecimentos_em_lote(db_path, caminho, ao_progredir=ao_progredir)
+
+def _importar_componentes_job(db_path, caminho, parametros, inicio, ao_progredir):
+    ok, inseridos, duplicados, _, msg = importar_componentes_de_planilha(db_path, caminho, parametros['classe_operacional'])
+    return ok, inseridos, duplicados, msg
+
+# Importações que podem rodar em segundo plano; 'executar' recebe
+# (db_path, caminho, parametros, inicio, ao_progredir) e devolve (ok, inseridos, duplicados, msg).
+# Rodam nas threads de importação: o resultado vai para import_jobs e é o painel
+# da aba de importação que o mostra, nunca o próprio importador (st.* fora da sessão)
+TIPOS_IMPORTACAO = {
+    'abastecimentos': {'descricao': 'Abastecimentos', 'executar': _importar_abastecimentos_job},
+    'abastecimentos_lote': {'descricao': 'Abastecimentos (lote)', 'executar': _importar_abastecimentos_lote_job},
+    'motoristas': {'descricao': 'Motoristas', 'executar': _sem_retomada(lambda db_path, caminho: importar_motoristas_de_planilha(db_path, caminho))},
+    'pneus': {'descricao': 'Pneus', 'executar': _sem_retomada(lambda db_path, caminho: importar_pneus_de_planilha(db_path, caminho))},
+    'lubrificantes': {'descricao': 'Lubrificantes', 'executar': _sem_retomada(lambda db_path, caminho: importar_lubrificantes_de_planilha(db_path, caminho))},
+    'componentes': {'descricao': 'Componentes', 'executar': _importar_componentes_job},
+}
+
+@st.cache_resource
+def _obter_executor_importacoes() -> ThreadPoolExecutor:
+    """Threads que executam as importações, compartilhadas por todas as sessões do processo."""
+    return ThreadPoolExecutor(max_workers=MAX_IMPORTACOES_SIMULTANEAS, thread_name_prefix="importacao")
+
+def _atualizar_importacao(db_path: str, job_id: int, **campos):
+    campos['atualizado_em'] = datetime.now().strftime(FORMATO_DATA_BANCO)
+    atribuicoes = ", ".join(f"{c} = ?" for c in campos)
+    with conexao_escrita(db_path) as conn:
+        conn.execute(f"UPDATE import_jobs SET {atribuicoes} WHERE id = ?", (*campos.values(), job_id))
+
+def _executar_importacao(job_id: int, db_path: str):
+    """Executa (ou retoma, a partir do último ponto gravado) uma importação da tabela import_jobs."""
+    with conexao_escrita(db_path) as conn:
+        # Só uma thread assume a importação: a que a tira de pendente
+        assumida = conn.execute(
+            "UPDATE import_jobs SET status = 'executando', atualizado_em = ? WHERE id = ? AND status = 'pendente'",
+            (datetime.now().strftime(FORMATO_DATA_BANCO), job_id)
+        ).rowcount
+        if not assumida:
+            return
+        conn.row_factory = sqlite3.Row
+        job = conn.execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+
+    base_inseridos, base_duplicados, inicio = job['inseridos'], job['duplicados'], job['linhas_processadas']
+    progresso = {'inseridos': 0, 'duplicados': 0}
+
+    def ao_progredir(linhas_lidas, total_estimado, inseridos, duplicados):
+        # Chamada dentro da transação do lote: o ponto de retomada é gravado junto com os dados
+        progresso.update(inseridos=inseridos, duplicados=duplicados)
+        _atualizar_importacao(
+            db_path, job_id, linhas_processadas=linhas_lidas, total_estimado=total_estimado,
+            inseridos=base_inseridos + inseridos, duplicados=base_duplicados + duplicados,
+        )
+
+    try:
+        executar = TIPOS_IMPORTACAO[job['tipo']]['executar']
+        parametros = json.loads(job['parametros'] or '{}')
+        ok, inseridos, duplicados, mensagem = executar(db_path, job['arquivo_caminho'], parametros, inicio, ao_progredir)
+        if inicio:
+            mensagem += f" Importação retomada após {inicio} linhas já gravadas."
+        # Um importador interrompido devolve 0, mas os lotes já confirmados constam do progresso
+        _atualizar_importacao(
+            db_path, job_id, status='concluido' if ok else 'erro', mensagem=mensagem,
+            inseridos=base_inseridos + max(inseridos, progresso['inseridos']),
+            duplicados=base_duplicados + max(duplicados, progresso['duplicados']),
+        )
+    except Exception as e:
+        _atualizar_importacao(db_path, job_id, status='erro', mensagem=f"Erro na importação: {e}")
+    finally:
+        caminho = job['arquivo_caminho']
+        if caminho and os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+        elif caminho and os.path.exists(caminho):
+            os.remove(caminho)
+
+def enfileirar_importacao(tipo: str, arquivo_carregado, parametros: dict = None, db_path: str = DB_PATH) -> int:
+    """Grava a planilha em disco, registra a importação como pendente e a entrega às threads de importação.
+
+    `arquivo_carregado` pode ser uma lista de arquivos: eles são gravados juntos
+    em um diretório, que passa a ser o caminho da importação.
+    """
+    os.makedirs(DIRETORIO_IMPORTACOES, exist_ok=True)
+    if isinstance(arquivo_carregado, list):
+        nome = f"{len(arquivo_carregado)} arquivos"
+        caminho = os.path.join(DIRETORIO_IMPORTACOES, uuid.uuid4().hex)
+        os.makedirs(caminho)
+        for indice, arquivo in enumerate(arquivo_carregado):
+            # O prefixo mantém a ordem de envio e evita colisão entre arquivos de mesmo nome
+            with open(os.path.join(caminho, f"{indice:04d}_{os.path.basename(arquivo.name)}"), 'wb') as destino:
+                destino.write(arquivo.getvalue())
+    else:
+        nome = os.path.basename(getattr(arquivo_carregado, 'name', 'planilha.xlsx'))
+        caminho = os.path.join(DIRETORIO_IMPORTACOES, f"{uuid.uuid4().hex}_{nome}")
+        with open(caminho, 'wb') as destino:
+            destino.write(arquivo_carregado.getvalue())
+
+    agora = datetime.now().strftime(FORMATO_DATA_BANCO)
+    with conexao_escrita(db_path) as conn:
+        cursor = conn.execute(
+            "INSERT INTO import_jobs (tipo, arquivo_nome, arquivo_caminho, parametros, status, criado_em, atualizado_em) VALUES (?, ?, ?, ?, 'pendente', ?, ?)",
+            (tipo, nome, caminho, json.dumps(parametros or {}, ensure_ascii=False), agora, agora)
+        )
+        job_id = cursor.lastrowid
+    _obter_executor_importacoes().submit(_executar_importacao, job_id, db_path)
+    return job_id
+
+@st.cache_resource
+def _retomar_importacoes_uma_vez(db_path: str) -> int:
+    """Reenvia às threads as importações que ficaram pendentes ou em execução quando o processo anterior parou."""
+    with conexao_escrita(db_path) as conn:
+        # A thread que as executava morreu com o processo: voltam a pendente para serem assumidas de novo
+        conn.execute("UPDATE import_jobs SET status = 'pendente' WHERE status = 'executando'")
+        ids = [linha[0] for linha in conn.execute("SELECT id FROM import_jobs WHERE status = 'pendente' ORDER BY id")]
+    executor = _obter_executor_importacoes()
+    for job_id in ids:
+        executor.submit(_executar_importacao, job_id, db_path)
+    return len(ids)
+
+def listar_importacoes(db_path: str = DB_PATH, limite: int = 10) -> pd.DataFrame:
+    """Importações mais recentes, da mais nova para a mais antiga."""
+    try:
+        with obter_conexao(db_path) as conn:
+            return pd.read_sql_query(
+                """
+                SELECT id, tipo, arquivo_nome, status, linhas_processadas, total_estimado,
+                       inseridos, duplicados, mensagem, criado_em, atualizado_em
+                FROM import_jobs ORDER BY id DESC LIMIT ?
+                """, conn, params=(limite,)
+            )
+    except Exception:
+        return pd.DataFrame()
 
 def movimentar_lubrificante(id_lubrificante, tipo, quantidade, data, cod_equip=None, observacoes=""):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cur = conn.cursor()
             cur.execute(
                 "INSERT INTO lubrificantes_movimentacoes (id_lubrificante, tipo, quantidade, data, cod_equip, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
@@ -13164,147 +3210,443 @@ def movimentar_lubrificante(id_lubrificante, tipo, quantidade, data, cod_equip=N
     except Exception as e:
         return False, f"Erro: {e}"
 
-@st.cache_data(ttl=120)
-def filtrar_dados(df: pd.DataFrame, opts: dict) -> pd.DataFrame:
-    # Garante que a coluna de data é do tipo datetime
-    df['Data'] = pd.to_datetime(df['Data'])
-    
-    # Filtra por período de datas
-    df_filtrado = df[
-        (df['Data'].dt.date >= opts['data_inicio']) & 
-        (df['Data'].dt.date <= opts['data_fim'])
-    ]
-    
-    # Filtra pelas outras seleções, se existirem
-    if opts.get("classes_op"):
-        df_filtrado = df_filtrado[df_filtrado["Classe_Operacional"].isin(opts["classes_op"])]
-    
-    if opts.get("safras"):
-        df_filtrado = df_filtrado[df_filtrado["Safra"].isin(opts["safras"])]
-        
-    return df_filtrado.copy()
-
-@st.cache_data(show_spinner="Calculando plano de manutenção...", ttl=300)
-def build_component_maintenance_plan(_df_frotas: pd.DataFrame, _df_abastecimentos: pd.DataFrame, _df_componentes_regras: pd.DataFrame, _df_componentes_historico: pd.DataFrame) -> pd.DataFrame:
-    latest_readings = _df_abastecimentos.sort_values('Data').groupby('Cod_Equip')['Hod_Hor_Atual'].last()
-    plan_data = []
+def indice_equipamentos(df: pd.DataFrame) -> dict:
+    """Índice dos abastecimentos por equipamento para a Ficha Individual, montado por load_data_from_db.
 
-    for _, frota_row in _df_frotas.iterrows():
-        cod_equip = frota_row['Cod_Equip']
-        classe_op = frota_row.get('Classe_Operacional')
-        hod_hor_atual = latest_readings.get(cod_equip)
-
-        if pd.isna(hod_hor_atual) or not classe_op:
-            continue
-        
-        regras_da_classe = _df_componentes_regras[_df_componentes_regras['classe_operacional'] == classe_op]
-        if regras_da_classe.empty:
-            continue
+    'ordem' são as posições das linhas ordenadas por (Cod_Equip, Data); as de
+    cods[i] ocupam ordem[inicio[i]:inicio[i + 1]] e 'datas' acompanha essa
+    ordem. 'litros' e 'custo' são somas acumuladas na mesma ordem, com um zero
+    inicial, para que o total de um trecho seja a diferença de duas posições.
+    'classes' traz, por classe, litros, custo e a média das médias positivas.
+    """
+    cods = pd.to_numeric(df['Cod_Equip'], errors='coerce').to_numpy(dtype=float)
+    datas = pd.to_datetime(df['Data'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+    com_cod = np.flatnonzero(~np.isnan(cods))
+    ordem = com_cod[np.lexsort((datas[com_cod], cods[com_cod]))]
+    cods_unicos, inicio = np.unique(cods[ordem], return_index=True)
+
+    litros = df['Qtde Litros'].astype(float).fillna(0.0).to_numpy()
+    custo = df['custo'].astype(float).fillna(0.0).to_numpy() if 'custo' in df.columns else np.zeros(len(df))
+    media = df['Media'].astype(float) if 'Media' in df.columns else pd.Series(np.nan, index=df.index)
+    por_classe = pd.DataFrame({
+        'Classe_Operacional': df['Classe_Operacional'].astype(object),
+        'litros': litros, 'custo': custo, 'media': media.where(media > 0).to_numpy(),
+    }).groupby('Classe_Operacional').agg(litros=('litros', 'sum'), custo=('custo', 'sum'), media=('media', 'mean'))
+
+    indice = {
+        'ordem': ordem,
+        'cods': cods_unicos,
+        'inicio': np.append(inicio, len(ordem)),
+        'datas': datas[ordem],
+        'litros': np.concatenate(([0.0], np.cumsum(litros[ordem]))),
+        'custo': np.concatenate(([0.0], np.cumsum(custo[ordem]))),
+        'classes': por_classe.to_dict('index'),
+    }
+    # Compartilhado entre as sessões: nenhum array pode ser alterado
+    for chave in ('ordem', 'cods', 'inicio', 'datas', 'litros', 'custo'):
+        indice[chave].flags.writeable = False
+    return indice
+
+def _trecho_equipamento(indice: dict, cod_equip) -> tuple:
+    """(início, fim) das linhas de `cod_equip` em indice['ordem']; (0, 0) se não houver."""
+    i = int(np.searchsorted(indice['cods'], float(cod_equip)))
+    if i < len(indice['cods']) and indice['cods'][i] == float(cod_equip):
+        return int(indice['inicio'][i]), int(indice['inicio'][i + 1])
+    return 0, 0
+
+def abastecimentos_do_equipamento(_df: pd.DataFrame, indice: dict, cod_equip) -> pd.DataFrame:
+    """Linhas de `_df` do equipamento, na ordem original."""
+    de, ate = _trecho_equipamento(indice, cod_equip)
+    return _df.iloc[np.sort(indice['ordem'][de:ate])]
+
+def total_equipamento(indice: dict, cod_equip, medida: str = 'litros', desde=None) -> float:
+    """Soma de `medida` ('litros' ou 'custo') do equipamento; com `desde`, só dos abastecimentos a partir dessa data."""
+    de, ate = _trecho_equipamento(indice, cod_equip)
+    if desde is not None:
+        de += int(np.searchsorted(indice['datas'][de:ate], np.datetime64(pd.Timestamp(desde), 'ns'), side='left'))
+    acumulado = indice[medida]
+    return float(acumulado[ate] - acumulado[de])
+
+# Situação de cada (frota, componente) mantida em componentes_status: as escritas em
+# abastecimentos, frotas, regras e histórico de componentes recalculam só as frotas afetadas
+SQL_FROTAS_STATUS_COMPONENTES = """
+            SELECT f.COD_EQUIPAMENTO, f.DESCRICAO_EQUIPAMENTO, f.tipo_controle, f."Classe Operacional",
+                   (SELECT a.Hod_Hor_Atual FROM abastecimentos_equip a
+                    WHERE a.cod_equip = f.COD_EQUIPAMENTO AND a.Hod_Hor_Atual IS NOT NULL
+                    ORDER BY a.Data DESC, a.Hod_Hor_Atual DESC LIMIT 1)
+            FROM frotas f
+            """
+SQL_ULTIMOS_SERVICOS_COMPONENTES = """
+            SELECT Cod_Equip, nome_componente, MAX(CAST(Hod_Hor_No_Servico AS REAL)), Data
+            FROM componentes_historico
+            WHERE Hod_Hor_No_Servico IS NOT NULL
+            """
+SQL_PLANO_MANUTENCAO = """
+            SELECT s.Cod_Equip, f.DESCRICAO_EQUIPAMENTO AS Equipamento, s.leitura_atual, s.tipo_controle,
+                   s.nome_componente, s.restante, s.em_alerta
+            FROM componentes_status s
+            JOIN frotas f ON f.COD_EQUIPAMENTO = s.Cod_Equip
+            ORDER BY f.rowid, s.ordem_regra
+            """
+COLUNAS_COMPONENTES_STATUS = [
+    'Cod_Equip', 'nome_componente', 'ordem_regra', 'tipo_controle', 'intervalo', 'leitura_atual',
+    'ultimo_servico', 'data_ultimo_servico', 'proximo_servico', 'restante', 'em_alerta',
+]
+
+def _codigos_equipamento(valores) -> list:
+    """Códigos de equipamento distintos como inteiros, como em abastecimentos_equip."""
+    codigos = pd.to_numeric(pd.Series(list(valores), dtype=object), errors='coerce').dropna()
+    return sorted({int(c) for c in codigos})
+
+def atualizar_componentes_status(conn, cods_equip=None):
+    """Recalcula componentes_status das frotas em `cods_equip` (todas, se None) na conexão dada.
+
+    Deve rodar na mesma transação da escrita que mudou leituras, regras ou
+    histórico, para que a tabela nunca fique atrás dos dados. O próximo serviço
+    é o primeiro múltiplo do intervalo acima do último serviço que não fica para
+    trás da leitura atual; o alerta dispara quando o restante chega ao limite
+    do tipo de controle da frota.
+    """
+    if cods_equip is None:
+        params, nas_frotas = (), ""
+    else:
+        cods_equip = _codigos_equipamento(cods_equip)
+        if not cods_equip:
+            return 0
+        params, nas_frotas = (json.dumps(cods_equip),), "IN (SELECT value FROM json_each(?))"
+    conn.execute("DELETE FROM componentes_status" + (f" WHERE Cod_Equip {nas_frotas}" if params else ""), params)
+
+    frotas = pd.DataFrame.from_records(
+        conn.execute(SQL_FROTAS_STATUS_COMPONENTES + (f" WHERE f.COD_EQUIPAMENTO {nas_frotas}" if params else ""), params).fetchall(),
+        columns=['Cod_Equip', 'descricao', 'tipo_controle', 'classe_operacional', 'leitura_atual'],
+    )
+    frotas = frotas[frotas['leitura_atual'].notna() & frotas['classe_operacional'].notna() & (frotas['classe_operacional'].astype(str) != '')]
+    if frotas.empty:
+        return 0
+    faltando = ~frotas['tipo_controle'].isin(TIPOS_CONTROLE)
+    if faltando.any():
+        frotas.loc[faltando, 'tipo_controle'] = classificar_tipo_controle(
+            frotas.loc[faltando, 'descricao'], frotas.loc[faltando, 'classe_operacional']
+        )
 
-        unidade = 'km' if frota_row['Tipo_Controle'] == 'QUILÔMETROS' else 'h'
-        alerta_default = ALERTAS_MANUTENCAO.get(frota_row['Tipo_Controle'], {}).get('default', 500)
-        
-        record = {
-            'Cod_Equip': cod_equip, 
-            'Equipamento': frota_row.get('DESCRICAO_EQUIPAMENTO'), 
-            'Leitura_Atual': hod_hor_atual, 
-            'Unidade': unidade, 
-            'Qualquer_Alerta': False, 
-            'Alertas': []
-        }
+    regras = pd.DataFrame.from_records(
+        conn.execute("SELECT rowid, classe_operacional, nome_componente, intervalo_padrao FROM componentes_regras ORDER BY rowid").fetchall(),
+        columns=['ordem_regra', 'classe_operacional', 'nome_componente', 'intervalo_padrao'],
+    )
+    # Regra repetida para a mesma classe e componente: vale a última
+    pares = frotas.merge(regras, on='classe_operacional', how='inner').drop_duplicates(['Cod_Equip', 'nome_componente'], keep='last')
+    if pares.empty:
+        return 0
+
+    ultimos = pd.DataFrame.from_records(
+        conn.execute(
+            SQL_ULTIMOS_SERVICOS_COMPONENTES + (f" AND Cod_Equip {nas_frotas}" if params else "") + " GROUP BY Cod_Equip, nome_componente",
+            params,
+        ).fetchall(),
+        columns=['Cod_Equip', 'nome_componente', 'ultimo_servico', 'data_ultimo_servico'],
+    )
+    ultimos['Cod_Equip'] = pd.to_numeric(ultimos['Cod_Equip'], errors='coerce')
+    pares = pares.merge(ultimos.dropna(subset=['Cod_Equip']), on=['Cod_Equip', 'nome_componente'], how='left')
+
+    # Sem histórico, conta-se a partir de 0
+    ultimo = pares['ultimo_servico'].fillna(0).to_numpy(dtype=float)
+    intervalo = pd.to_numeric(pares['intervalo_padrao'], errors='coerce').to_numpy(dtype=float)
+    leitura = pares['leitura_atual'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proximo = (ultimo // intervalo) * intervalo + intervalo
+        # Intervalos que faltam para o próximo serviço alcançar a leitura atual
+        atraso = np.ceil((leitura - proximo) / intervalo)
+        proximo = np.where(proximo < leitura, proximo + atraso * intervalo, proximo)
+    # Intervalo ausente, zero ou negativo não define próximo serviço
+    proximo = np.where(intervalo > 0, proximo, np.nan)
+    pares['intervalo'] = intervalo
+    pares['proximo_servico'] = proximo
+    pares['restante'] = proximo - leitura
+    limite = pares['tipo_controle'].map(lambda tipo: ALERTAS_MANUTENCAO.get(tipo, {}).get('default', 500)).astype(float)
+    pares['em_alerta'] = (pares['restante'] <= limite).astype(int)
+
+    valores = pares[COLUNAS_COMPONENTES_STATUS].astype(object)
+    registros = list(valores.where(pares[COLUNAS_COMPONENTES_STATUS].notna(), None).itertuples(index=False, name=None))
+    conn.executemany(
+        f"INSERT INTO componentes_status ({', '.join(COLUNAS_COMPONENTES_STATUS)}) VALUES ({', '.join('?' * len(COLUNAS_COMPONENTES_STATUS))})",
+        registros,
+    )
+    return len(registros)
 
-        for _, regra in regras_da_classe.iterrows():
-            componente = regra['nome_componente']
-            intervalo = regra['intervalo_padrao']
-            
-            historico_componente = _df_componentes_historico[
-                (_df_componentes_historico['Cod_Equip'] == cod_equip) &
-                (_df_componentes_historico['nome_componente'] == componente)
-            ]
-            
-            ultimo_servico_hod_hor = 0
-            if not historico_componente.empty:
-                ultimo_servico_hod_hor = historico_componente['Hod_Hor_No_Servico'].max()
+@cache_por_tabelas(tabelas=('componentes_status', 'frotas'), max_entradas=4)
+def carregar_plano_manutencao(db_path: str = DB_PATH) -> pd.DataFrame:
+    """Plano de manutenção lido de componentes_status: uma linha por frota com leitura atual e regras na sua classe.
 
-            prox_servico = ((ultimo_servico_hod_hor // intervalo) * intervalo) + intervalo
-            while prox_servico < hod_hor_atual:
-                prox_servico += intervalo
+    Colunas Cod_Equip, Equipamento, Leitura_Atual, Unidade, Qualquer_Alerta,
+    Alertas e uma Restante_<componente> por componente, na ordem das regras.
+    """
+    colunas_base = ['Cod_Equip', 'Equipamento', 'Leitura_Atual', 'Unidade', 'Qualquer_Alerta', 'Alertas']
+    with obter_conexao(db_path) as conn:
+        status = pd.read_sql_query(SQL_PLANO_MANUTENCAO, conn)
+    if status.empty:
+        return pd.DataFrame(columns=colunas_base)
+    status = status.drop_duplicates(['Cod_Equip', 'nome_componente'])
+    status['em_alerta'] = status['em_alerta'].astype(bool)
+
+    plano = status.drop_duplicates('Cod_Equip').set_index('Cod_Equip')[['Equipamento', 'leitura_atual', 'tipo_controle']]
+    plano = plano.rename(columns={'leitura_atual': 'Leitura_Atual'})
+    plano['Unidade'] = np.where(plano['tipo_controle'] == 'QUILÔMETROS', 'km', 'h')
+    alertas = status[status['em_alerta']].groupby('Cod_Equip', sort=False)['nome_componente'].agg(list)
+    plano['Alertas'] = [alertas.get(cod, []) for cod in plano.index]
+    plano['Qualquer_Alerta'] = plano['Alertas'].map(bool)
+
+    componentes = pd.unique(status['nome_componente'])
+    restantes = (
+        status.pivot(index='Cod_Equip', columns='nome_componente', values='restante')
+        .reindex(index=plano.index, columns=componentes)
+    )
+    restantes.columns = [f'Restante_{componente}' for componente in componentes]
 
-            restante = prox_servico - hod_hor_atual
-            
-            record[f'Restante_{componente}'] = restante
-            
-            if restante <= alerta_default:
-                record['Qualquer_Alerta'] = True
-                record['Alertas'].append(componente)
+    return pd.concat([plano, restantes], axis=1).reset_index()[colunas_base + list(restantes.columns)]
 
-        plan_data.append(record)
+# Janela final, em dias, das leituras usadas para estimar o uso diário de cada equipamento
+JANELA_USO_DIAS = 90
 
-    # 🔹 Garante que sempre retorna um DataFrame com as colunas básicas
-    if not plan_data:
-        return pd.DataFrame(columns=['Cod_Equip', 'Equipamento', 'Leitura_Atual', 'Unidade', 'Qualquer_Alerta', 'Alertas'])
+@cache_por_tabelas(tabelas=('abastecimentos',), max_entradas=4)
+def taxa_uso_diaria(_df_abastecimentos: pd.DataFrame, janela_dias: int = JANELA_USO_DIAS) -> pd.Series:
+    """Uso diário (h ou km por dia) de cada equipamento, indexado por Cod_Equip.
 
-    return pd.DataFrame(plan_data)
+    As leituras são reduzidas à maior de cada dia e, dentro dos últimos
+    `janela_dias` de cada equipamento, vale a mediana das taxas entre dias
+    consecutivos com leitura. Um hodômetro digitado errado gera um salto e uma
+    queda, que não movem a mediana; quedas (leituras que voltam) são descartadas.
+    """
+    leituras = _df_abastecimentos[['Cod_Equip', 'Data', 'Hod_Hor_Atual']].dropna()
+    leituras = leituras[leituras['Hod_Hor_Atual'] > 0]
+    diarias = (
+        leituras.groupby([leituras['Cod_Equip'], leituras['Data'].dt.normalize()], observed=True)['Hod_Hor_Atual']
+        .max().reset_index()
+    )
+    ultimo_dia = diarias.groupby('Cod_Equip', observed=True)['Data'].transform('max')
+    diarias = diarias[diarias['Data'] >= ultimo_dia - pd.Timedelta(days=janela_dias)].reset_index(drop=True)
+
+    # Linhas ordenadas por equipamento e dia: a diferença só vale dentro do mesmo equipamento
+    cods = diarias['Cod_Equip'].to_numpy()
+    mesmo_equip = np.r_[False, cods[1:] == cods[:-1]] if len(cods) else np.zeros(0, dtype=bool)
+    uso = diarias['Hod_Hor_Atual'].diff().to_numpy(dtype=float)
+    dias = diarias['Data'].diff().dt.days.to_numpy(dtype=float)
+    validas = mesmo_equip & (uso >= 0) & (dias > 0)
+    taxas = pd.Series(uso[validas] / dias[validas]).groupby(cods[validas]).median()
+    return taxas[taxas > 0]
 
 def prever_manutencoes(df_veiculos: pd.DataFrame, df_abastecimentos: pd.DataFrame, plan_df: pd.DataFrame) -> pd.DataFrame:
-    """Estima as datas das próximas manutenções com base no uso médio."""
-    if plan_df.empty or 'Leitura_Atual' not in plan_df.columns:
+    """Estima as datas das próximas manutenções com base no uso diário de cada equipamento (taxa_uso_diaria)."""
+    colunas_restante = [col for col in plan_df.columns if col.startswith('Restante_')]
+    if plan_df.empty or 'Leitura_Atual' not in plan_df.columns or not colunas_restante:
         return pd.DataFrame()
 
-    # Calcula o uso diário médio de cada veículo
-    uso_diario = {}
-    for cod_equip in df_abastecimentos['Cod_Equip'].unique():
-        dados_equip = df_abastecimentos[df_abastecimentos['Cod_Equip'] == cod_equip].sort_values('Data')
-        if len(dados_equip) > 1:
-            total_dias = (dados_equip['Data'].max() - dados_equip['Data'].min()).days
-            total_uso = dados_equip['Hod_Hor_Atual'].max() - dados_equip['Hod_Hor_Atual'].min()
-            if total_dias > 0 and total_uso > 0: # Garante que houve uso e passagem de tempo
-                uso_diario[cod_equip] = total_uso / total_dias
-
-    previsoes = []
-    servicos_nomes = [col.replace('Restante_', '') for col in plan_df.columns if 'Restante_' in col]
-
-    for _, row in plan_df.iterrows():
-        cod_equip = row['Cod_Equip']
-        uso = uso_diario.get(cod_equip)
-        if uso:
-            for nome_servico in servicos_nomes:
-                col_restante = f'Restante_{nome_servico}'
-                if col_restante in row and pd.notna(row[col_restante]):
-                    dias_para_manut = row[col_restante] / uso
-                    data_prevista = datetime.now() + pd.Timedelta(days=dias_para_manut)
-                    previsoes.append({
-                        'Equipamento': row['Equipamento'],
-                        'Manutenção': nome_servico,
-                        'Data Prevista': data_prevista.strftime('%d/%m/%Y'),
-                        'Dias Restantes': int(dias_para_manut)
-                    })
-
-    if not previsoes:
+    # Uma linha por (equipamento, manutenção) com restante definido
+    longo = plan_df.melt(
+        id_vars=['Cod_Equip', 'Equipamento'], value_vars=colunas_restante, var_name='Manutenção', value_name='Restante'
+    ).dropna(subset=['Restante'])
+    uso = longo['Cod_Equip'].map(taxa_uso_diaria(df_abastecimentos)).to_numpy(dtype=float)
+    com_uso = uso > 0
+    if not com_uso.any():
         return pd.DataFrame()
+    longo = longo[com_uso]
+    dias = longo['Restante'].to_numpy(dtype=float) / uso[com_uso]
+
+    df_previsoes = pd.DataFrame({
+        'Equipamento': longo['Equipamento'].to_numpy(),
+        'Manutenção': longo['Manutenção'].str[len('Restante_'):].to_numpy(),
+        # Uso quase nulo projeta datas além do que Timestamp representa: limitado a 100 anos
+        'Data Prevista': (pd.Timestamp.now() + pd.to_timedelta(np.clip(dias, -36500, 36500), unit='D')).strftime('%d/%m/%Y'),
+        'Dias Restantes': dias.astype(int),
+    })
+    return df_previsoes.sort_values('Dias Restantes', kind='stable')
+
+# ---------------------------
+# Consumo mensal agregado
+# ---------------------------
+
+# consumo_mensal guarda os abastecimentos somados por mês, equipamento, classe, combustível,
+# matrícula e safra (a safra entra no grão porque também é filtro da análise). A classe é só
+# a da frota, como em df: equipamentos sem frota cadastrada ficam sem classe nos dois
+DIMENSOES_CONSUMO_MENSAL = ['AnoMes', 'Cod_Equip', 'Classe_Operacional', 'tipo_combustivel', 'Matricula', 'Safra']
+MEDIDAS_CONSUMO_MENSAL = ['litros', 'custo', 'soma_media', 'leituras_media', 'abastecimentos', 'primeira_data', 'ultima_data']
+SQL_CONSUMO_AGREGADO = """
+            SELECT strftime('%Y-%m', a.Data), a.cod_equip,
+                   f."Classe Operacional",
+                   COALESCE(f.tipo_combustivel, 'Diesel S500'), a.Matricula, a.Safra,
+                   SUM(a."Qtde Litros"),
+                   SUM(COALESCE(a."Qtde Litros", 0) * COALESCE(
+                       (SELECT h.preco FROM precos_combustivel_historico h
+                        WHERE h.tipo_combustivel = COALESCE(f.tipo_combustivel, 'Diesel S500') AND h.vigente_desde <= a.Data AND h.preco IS NOT NULL
+                        ORDER BY h.vigente_desde DESC LIMIT 1),
+                       (SELECT h.preco FROM precos_combustivel_historico h
+                        WHERE h.tipo_combustivel = COALESCE(f.tipo_combustivel, 'Diesel S500') AND h.preco IS NOT NULL
+                        ORDER BY h.vigente_desde LIMIT 1),
+                       0)),
+                   SUM(CASE WHEN {media} > 0 THEN {media} END),
+                   COUNT(CASE WHEN {media} > 0 THEN 1 END),
+                   COUNT(*), MIN(a.Data), MAX(a.Data)
+            FROM abastecimentos_equip a
+            LEFT JOIN frotas f ON f.COD_EQUIPAMENTO = a.cod_equip
+            WHERE strftime('%Y-%m', a.Data) IS NOT NULL {filtro}
+            GROUP BY 1, 2, 3, 4, 5, 6
+            """
+
+def _sql_consumo_agregado(conn, filtro: str = "") -> str:
+    """SQL_CONSUMO_AGREGADO para este banco: a coluna "Média" só existe nas bases vindas da planilha original."""
+    colunas = {c[1] for c in conn.execute("PRAGMA table_info(abastecimentos)").fetchall()}
+    return SQL_CONSUMO_AGREGADO.format(media='a."Média"' if 'Média' in colunas else 'NULL', filtro=filtro)
+
+def atualizar_consumo_mensal(conn, cods_equip=None):
+    """Recalcula consumo_mensal dos equipamentos em `cods_equip` (todos, se None) na conexão dada.
+
+    Como atualizar_componentes_status, roda na transação da escrita que mudou
+    abastecimentos, frotas ou preços; cada equipamento é relido pelo índice de
+    abastecimentos_equip.
+    """
+    if cods_equip is None:
+        conn.execute("DELETE FROM consumo_mensal")
+        conn.execute(f"INSERT INTO consumo_mensal SELECT * FROM ({_sql_consumo_agregado(conn)})")
+        return
+    cods_equip = _codigos_equipamento(cods_equip)
+    if not cods_equip:
+        return
+    params = (json.dumps(cods_equip),)
+    conn.execute("DELETE FROM consumo_mensal WHERE Cod_Equip IN (SELECT value FROM json_each(?))", params)
+    conn.execute(
+        f"INSERT INTO consumo_mensal SELECT * FROM ({_sql_consumo_agregado(conn, 'AND a.cod_equip IN (SELECT value FROM json_each(?))')})",
+        params,
+    )
+
+def atualizar_derivados_abastecimentos(conn, cods_equip=None):
+    """Atualiza as tabelas derivadas de abastecimentos e frotas: componentes_status e consumo_mensal."""
+    atualizar_componentes_status(conn, cods_equip)
+    atualizar_consumo_mensal(conn, cods_equip)
+
+@cache_por_tabelas(tabelas=('consumo_mensal',), max_entradas=2)
+def carregar_consumo_mensal(db_path: str = DB_PATH) -> pd.DataFrame:
+    """Conteúdo de consumo_mensal."""
+    with obter_conexao(db_path) as conn:
+        return pd.read_sql_query("SELECT * FROM consumo_mensal", conn)
+
+@cache_por_tabelas(tabelas=('abastecimentos', 'frotas', 'precos_combustivel_historico'), max_entradas=8)
+def _consumo_dos_dias(inicio: str, fim: str, db_path: str = DB_PATH) -> pd.DataFrame:
+    """Abastecimentos de [inicio, fim) agregados no grão de consumo_mensal, para meses incompletos do período."""
+    with obter_conexao(db_path) as conn:
+        return pd.DataFrame.from_records(
+            conn.execute(_sql_consumo_agregado(conn, "AND a.Data >= ? AND a.Data < ?"), (inicio, fim)).fetchall(),
+            columns=DIMENSOES_CONSUMO_MENSAL + MEDIDAS_CONSUMO_MENSAL,
+        )
+
+def consumo_agregado(dimensoes, opts: dict = None, db_path: str = DB_PATH) -> pd.DataFrame:
+    """Litros, custo, média de consumo e contagens somados por `dimensoes` (colunas de DIMENSOES_CONSUMO_MENSAL).
+
+    `opts` são os filtros da análise (data_inicio, data_fim, classes_op e safras).
+    Os meses inteiros do período vêm de consumo_mensal; só os dias dos meses
+    incompletos das pontas são somados a partir dos abastecimentos. A coluna
+    media é a média das médias positivas.
+    """
+    base = carregar_consumo_mensal(db_path)
+    if opts:
+        inicio, fim = pd.Timestamp(opts['data_inicio']), pd.Timestamp(opts['data_fim']) + pd.Timedelta(days=1)
+        primeiro_mes = pd.Period(inicio, 'M') if inicio.day == 1 else pd.Period(inicio, 'M') + 1
+        ultimo_mes = pd.Period(fim, 'M') - 1
+        if primeiro_mes <= ultimo_mes:
+            partes = [base[(base['AnoMes'] >= str(primeiro_mes)) & (base['AnoMes'] <= str(ultimo_mes))]]
+            bordas = [(inicio, primeiro_mes.start_time), ((ultimo_mes + 1).start_time, fim)]
+        else:
+            partes, bordas = [], [(inicio, fim)]
+        partes += [
+            _consumo_dos_dias(de.strftime('%Y-%m-%d'), ate.strftime('%Y-%m-%d'), db_path)
+            for de, ate in bordas if de < ate
+        ]
+        base = pd.concat(partes, ignore_index=True) if partes else base.iloc[0:0]
+        if opts.get('classes_op'):
+            base = base[base['Classe_Operacional'].isin(opts['classes_op'])]
+        if opts.get('safras'):
+            base = base[base['Safra'].isin(opts['safras'])]
+
+    agregado = base.groupby(list(dimensoes)).agg(
+        litros=('litros', 'sum'), custo=('custo', 'sum'),
+        soma_media=('soma_media', 'sum'), leituras_media=('leituras_media', 'sum'),
+        abastecimentos=('abastecimentos', 'sum'),
+        primeira_data=('primeira_data', 'min'), ultima_data=('ultima_data', 'max'),
+    ).reset_index()
+    agregado['media'] = agregado['soma_media'] / agregado['leituras_media'].where(agregado['leituras_media'] > 0)
+    return agregado
+
+# ---------------------------
+# Ranking de eficiência
+# ---------------------------
+
+def ranking_eficiencia(df_abastecimentos: pd.DataFrame, df_frotas: pd.DataFrame,
+                       metas_classe: dict = None, metas_individuais: dict = None) -> pd.DataFrame:
+    """Eficiência média (%) de cada equipamento em relação à meta de consumo ou, sem meta, à média da classe.
+
+    A meta individual vale quando é positiva e marcada para sobrescrever a da
+    classe; senão vale a meta da classe. Para equipamentos controlados por horas
+    (L/h) menor é melhor; para os demais (km/L), maior. Sem meta, compara a média
+    da classe com a média positiva do equipamento. As metas são os dicionários
+    guardados na sessão (intervalos_por_classe e metas_individuals), para que a
+    função possa ser chamada fora do Streamlit.
+    """
+    colunas_grupo = ['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'Classe_Operacional']
+    metas_classe = metas_classe or {}
+    metas_individuais = metas_individuais or {}
+    if df_abastecimentos.empty or 'Media' not in df_abastecimentos.columns:
+        return pd.DataFrame(columns=['Cod_Equip', 'Equipamento', 'Classe_Operacional', 'Eficiência (%)'])
+
+    dados = df_abastecimentos[colunas_grupo + ['Media']]
+    media = dados['Media'].to_numpy(dtype=float)
+    media_classe = dados.groupby('Classe_Operacional', observed=True)['Media'].transform('mean').to_numpy(dtype=float)
+
+    # Meta de cada linha: individual (se sobrescreve a da classe) ou da classe
+    meta_individual = {
+        cod: meta.get('meta_consumo') or 0 for cod, meta in metas_individuais.items()
+        if (meta.get('meta_consumo') or 0) > 0 and meta.get('sobrescrever_classe', False)
+    }
+    meta_da_classe = {classe: meta.get('meta_consumo') or 0 for classe, meta in metas_classe.items()}
+    meta = (
+        dados['Cod_Equip'].map(meta_individual).astype(float)
+        .fillna(dados['Classe_Operacional'].astype(object).map(meta_da_classe).astype(float))
+        .to_numpy()
+    )
+
+    if 'Tipo_Controle' in df_frotas.columns:
+        tipos = df_frotas.drop_duplicates('Cod_Equip').set_index('Cod_Equip')['Tipo_Controle']
+        por_horas = (dados['Cod_Equip'].map(tipos) == 'HORAS').to_numpy()
+    else:
+        por_horas = np.zeros(len(dados), dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eficiencia = np.where(
+            meta > 0,
+            np.where(por_horas, meta - media, media - meta) / meta * 100,
+            (media_classe / np.where(media > 0, media, np.nan) - 1) * 100,
+        )
 
-    df_previsoes = pd.DataFrame(previsoes)
-    return df_previsoes.sort_values('Dias Restantes')
+    ranking = dados[colunas_grupo].assign(eficiencia=eficiencia).groupby(colunas_grupo, observed=True)['eficiencia'].mean()
+    ranking = ranking.sort_values(ascending=False).reset_index()
+    return ranking.rename(columns={'DESCRICAO_EQUIPAMENTO': 'Equipamento', 'eficiencia': 'Eficiência (%)'})
 
 # ---------------------------
 # Funções para Checklists
 # ---------------------------
 
-@st.cache_data(ttl=120)
+@cache_por_tabelas(tabelas=('checklist_regras',))
 def get_checklist_rules():
     """Busca todas as regras de checklist do banco de dados."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with obter_conexao(DB_PATH) as conn:
             return pd.read_sql_query("SELECT * FROM checklist_regras", conn)
     except Exception as e:
         st.error(f"Erro ao buscar regras de checklist: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=120)
+@cache_por_tabelas(tabelas=('checklist_itens',), max_entradas=64)
 def get_checklist_items(id_regra):
     """Busca os itens de checklist para uma determinada regra."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with obter_conexao(DB_PATH) as conn:
             return pd.read_sql_query(
                 "SELECT * FROM checklist_itens WHERE id_regra = ?",
                 conn,
@@ -13321,7 +3663,7 @@ def get_checklist_items(id_regra):
 def add_checklist_rule(classe_operacional, titulo_checklist, turno, frequencia):
     """Adiciona uma nova regra de checklist ao banco de dados."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -13342,7 +3684,7 @@ def add_checklist_rule_and_get_id(classe_operacional, titulo_checklist, turno, f
     necessário o ID imediatamente após a criação, utilize esta função.
     """
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -13360,7 +3702,7 @@ def add_checklist_rule_and_get_id(classe_operacional, titulo_checklist, turno, f
 def edit_checklist_rule(id_regra, classe_operacional, titulo_checklist, turno, frequencia):
     """Edita uma regra de checklist existente."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -13378,7 +3720,7 @@ def edit_checklist_rule(id_regra, classe_operacional, titulo_checklist, turno, f
 def delete_checklist_rule(id_regra):
     """Remove uma regra de checklist e seus itens associados."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM checklist_itens WHERE id_regra = ?", (id_regra,))
             cursor.execute("DELETE FROM checklist_regras WHERE id_regra = ?", (id_regra,))
@@ -13390,7 +3732,7 @@ def delete_checklist_rule(id_regra):
 def add_checklist_item(id_regra, nome_item):
     """Adiciona um novo item de checklist a uma regra existente."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -13407,7 +3749,7 @@ def add_checklist_item(id_regra, nome_item):
 def edit_checklist_item(id_item, nome_item):
     """Edita um item de checklist existente."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -13425,7 +3767,7 @@ def edit_checklist_item(id_item, nome_item):
 def delete_checklist_item(id_item):
     """Remove um item de checklist."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM checklist_itens WHERE id_item = ?", (id_item,))
             conn.commit()
@@ -13436,7 +3778,7 @@ def delete_checklist_item(id_item):
 def save_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno, status_geral):
     """Salva um checklist preenchido no histórico."""
     try:
-        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        with conexao_escrita(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -13453,80 +3795,70 @@ def save_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turn
 def delete_checklist_history(cod_equip, titulo_checklist, data_preenchimento, turno):
     """Remove um registro do histórico de checklists usando uma combinação única de campos."""
     try:
-        # Primeira tentativa: usar conexão direta
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
         # Converter tipos de dados para garantir compatibilidade
         cod_equip = int(cod_equip)  # Converter numpy.int64 para int
         titulo_checklist = str(titulo_checklist)
         data_preenchimento = str(data_preenchimento)
         turno = str(turno)
         
-        # Debug: verificar todos os registros na tabela ANTES da exclusão
-        cursor.execute("SELECT rowid, Cod_Equip, titulo_checklist, data_preenchimento, turno FROM checklist_historico")
-        all_records_before = cursor.fetchall()
-        
-        # Tentar encontrar o registro com diferentes abordagens
-        rowid = None
-        
-        # Primeira tentativa: busca exata
-        cursor.execute(
-            "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND data_preenchimento = ? AND turno = ?", 
-            (cod_equip, titulo_checklist, data_preenchimento, turno)
-        )
-        result = cursor.fetchone()
-        
-        if result:
-            rowid = result[0]
-        else:
-            # Segunda tentativa: buscar apenas por Cod_Equip, título e turno (ignorar data)
-            cursor.execute(
-                "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND turno = ?", 
-                (cod_equip, titulo_checklist, turno)
-            )
+        with conexao_escrita(DB_PATH) as conn:
+            cursor = conn.cursor()
+            
+            # Debug: verificar todos os registros na tabela ANTES da exclusão
+            cursor.execute("SELECT rowid, Cod_Equip, titulo_checklist, data_preenchimento, turno FROM checklist_historico")
+            all_records_before = cursor.fetchall()
+            
+            # Tentar encontrar o registro com diferentes abordagens
+            rowid = None
+            
+            # Primeira tentativa: busca exata
+            cursor.execute(SQL_CHECKLIST_PREENCHIDO, (cod_equip, titulo_checklist, data_preenchimento, turno))
             result = cursor.fetchone()
             
             if result:
                 rowid = result[0]
             else:
-                # Terceira tentativa: buscar apenas por Cod_Equip e título
+                # Segunda tentativa: buscar apenas por Cod_Equip, título e turno (ignorar data)
                 cursor.execute(
-                    "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ?", 
-                    (cod_equip, titulo_checklist)
+                    "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ? AND turno = ?", 
+                    (cod_equip, titulo_checklist, turno)
                 )
                 result = cursor.fetchone()
                 
                 if result:
                     rowid = result[0]
-        
-        if rowid is None:
-            # Debug: retornar informações sobre o que foi encontrado
-            debug_info = f"""
-            Registro não encontrado para exclusão.
+                else:
+                    # Terceira tentativa: buscar apenas por Cod_Equip e título
+                    cursor.execute(
+                        "SELECT rowid FROM checklist_historico WHERE Cod_Equip = ? AND titulo_checklist = ?", 
+                        (cod_equip, titulo_checklist)
+                    )
+                    result = cursor.fetchone()
+                    
+                    if result:
+                        rowid = result[0]
             
-            Valores procurados (após conversão):
-            - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
-            - Título: {titulo_checklist} (tipo: {type(titulo_checklist)})
-            - Data: {data_preenchimento} (tipo: {type(data_preenchimento)})
-            - Turno: {turno} (tipo: {type(turno)})
+            if rowid is None:
+                # Debug: retornar informações sobre o que foi encontrado
+                debug_info = f"""
+                Registro não encontrado para exclusão.
+                
+                Valores procurados (após conversão):
+                - Cod_Equip: {cod_equip} (tipo: {type(cod_equip)})
+                - Título: {titulo_checklist} (tipo: {type(titulo_checklist)})
+                - Data: {data_preenchimento} (tipo: {type(data_preenchimento)})
+                - Turno: {turno} (tipo: {type(turno)})
+                
+                Todos os registros na tabela ANTES da exclusão:
+                {all_records_before}
+                """
+                return False, debug_info
             
-            Todos os registros na tabela ANTES da exclusão:
-            {all_records_before}
-            """
-            conn.close()
-            return False, debug_info
-        
-        # Agora vamos excluir usando rowid
-        cursor.execute("DELETE FROM checklist_historico WHERE rowid = ?", (rowid,))
-        
-        # Forçar commit imediato
-        conn.commit()
-        
-        # Verificar se foi realmente excluído
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            # Verificar novamente se o registro foi realmente excluído
+            # Agora vamos excluir usando rowid
+            cursor.execute("DELETE FROM checklist_historico WHERE rowid = ?", (rowid,))
+            rows_deleted = cursor.rowcount
+            
+            # Verificar se foi realmente excluído
             cursor.execute("SELECT COUNT(*) FROM checklist_historico WHERE rowid = ?", (rowid,))
             count_after = cursor.fetchone()[0]
             
@@ -13537,47 +3869,39 @@ def delete_checklist_history(cod_equip, titulo_checklist, data_preenchimento, tu
             )
             count_by_fields = cursor.fetchone()[0]
             
-            if count_after == 0 and count_by_fields == 0:
-                 # Verificar o total de registros na tabela
-                 cursor.execute("SELECT COUNT(*) FROM checklist_historico")
-                 total_after = cursor.fetchone()[0]
-                 
-                 # Forçar sincronização do banco
-                 cursor.execute("PRAGMA wal_checkpoint(FULL)")
-                 cursor.execute("PRAGMA synchronous=FULL")
-                 conn.commit()
-                 
-                 success_msg = f"Checklist excluído com sucesso! ({rows_deleted} registro(s) removido(s)). Total na tabela: {total_after}"
-                 
-                 # Salvar backup automático para persistência no Streamlit Cloud
-                 backup_success, backup_msg = save_backup_to_session_state()
-                 if backup_success:
-                     success_msg += f" | Backup salvo: {backup_msg}"
-                 else:
-                     success_msg += f" | Aviso: {backup_msg}"
-                 
-                 conn.close()
-                 return True, success_msg
-            else:
-                conn.close()
-                return False, f"Erro: Registro ainda existe após exclusão. Count by rowid: {count_after}, Count by fields: {count_by_fields}"
+            # Verificar o total de registros na tabela
+            cursor.execute("SELECT COUNT(*) FROM checklist_historico")
+            total_after = cursor.fetchone()[0]
+        
+        if rows_deleted <= 0:
+            return False, "Nenhum registro foi excluído"
+        if count_after != 0 or count_by_fields != 0:
+            return False, f"Erro: Registro ainda existe após exclusão. Count by rowid: {count_after}, Count by fields: {count_by_fields}"
+        
+        success_msg = f"Checklist excluído com sucesso! ({rows_deleted} registro(s) removido(s)). Total na tabela: {total_after}"
+        
+        # Salvar backup automático para persistência no Streamlit Cloud
+        backup_success, backup_msg = save_backup_to_session_state()
+        if backup_success:
+            success_msg += f" | Backup salvo: {backup_msg}"
         else:
-            conn.close()
-            return False, "Nenhum registro foi excluído"
-                
+            success_msg += f" | Aviso: {backup_msg}"
+        return True, success_msg
+    
     except Exception as e:
-        if 'conn' in locals():
-            conn.close()
         return False, f"Erro ao excluir checklist: {e}"
 
 def force_cache_clear():
-    """Força a limpeza completa de todos os caches."""
+    """Força a limpeza completa dos caches de dados e a releitura completa do banco."""
     try:
         # Limpar cache de dados
+        limpar_cache()
         st.cache_data.clear()
         
-        # Limpar cache de recursos
-        st.cache_resource.clear()
+        # Os recursos (conexões, threads de importação) ficam: só os dados em memória da carga são descartados
+        estado = _obter_estado_carga(DB_PATH)
+        with estado['lock']:
+            _reiniciar_estado_carga(estado)
         
         # Forçar rerun da aplicação
         st.rerun()
@@ -13587,25 +3911,16 @@ def force_cache_clear():
 def force_database_sync():
     """Força a sincronização do banco de dados com o disco."""
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        # Forçar commit
-        conn.commit()
-        
-        # Executar PRAGMA para forçar sincronização
-        cursor.execute("PRAGMA wal_checkpoint(FULL)")
-        cursor.execute("PRAGMA synchronous=FULL")
-        cursor.execute("PRAGMA journal_mode=DELETE")
-        
-        # Forçar commit novamente
-        conn.commit()
-        
-        # Verificar se o banco está em modo WAL
-        cursor.execute("PRAGMA journal_mode")
-        journal_mode = cursor.fetchone()[0]
-        
-        conn.close()
+        with conexao_escrita(DB_PATH) as conn:
+            cursor = conn.cursor()
+            
+            # Grava o WAL no arquivo principal e o trunca; o modo WAL é mantido
+            # porque as conexões do pool dependem dele
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            
+            # Verificar o modo journal
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
         
         return True, f"Banco sincronizado. Modo journal: {journal_mode}"
     except Exception as e:
@@ -13614,7 +3929,7 @@ def force_database_sync():
 def export_database_backup():
     """Exporta todos os dados do banco para um arquivo de backup."""
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn = obter_conexao(DB_PATH)
         
         # Obter todas as tabelas
         cursor = conn.cursor()
@@ -13647,46 +3962,46 @@ def export_database_backup():
 def import_database_backup(backup_data):
     """Importa dados de backup para o banco."""
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        cursor = conn.cursor()
-        
-        for table_name, records in backup_data.items():
-            if records:  # Se a tabela tem dados
-                # Limpar tabela existente
-                cursor.execute(f"DELETE FROM {table_name}")
-                
-                # Inserir novos dados
-                for record in records:
-                    columns = list(record.keys())
-                    placeholders = ', '.join(['?' for _ in columns])
-                    values = list(record.values())
-                    
-                    # Converter tipos de dados
-                    converted_values = []
-                    for value in values:
-                        if isinstance(value, str):
-                            # Tentar converter para datetime se for uma data
-                            try:
-                                if 'T' in value or '-' in value:
-                                    dt = pd.to_datetime(value)
-                                    converted_values.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
-                                else:
+        with conexao_escrita(DB_PATH) as conn:
+            cursor = conn.cursor()
+            
+            for table_name, records in backup_data.items():
+                if records:  # Se a tabela tem dados
+                    # Limpar tabela existente
+                    cursor.execute(f"DELETE FROM {table_name}")
+                    
+                    # Inserir novos dados
+                    for record in records:
+                        columns = list(record.keys())
+                        placeholders = ', '.join(['?' for _ in columns])
+                        values = list(record.values())
+                        
+                        # Converter tipos de dados
+                        converted_values = []
+                        for value in values:
+                            if isinstance(value, str):
+                                # Tentar converter para datetime se for uma data
+                                try:
+                                    if 'T' in value or '-' in value:
+                                        dt = pd.to_datetime(value)
+                                        converted_values.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
+                                    else:
+                                        converted_values.append(value)
+                                except:
                                     converted_values.append(value)
-                            except:
+                            else:
                                 converted_values.append(value)
-                        else:
-                            converted_values.append(value)
-                    
-                    cursor.execute(
-                        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
-                        converted_values
-                    )
-        
-        conn.commit()
-        conn.close()
+                        
+                        cursor.execute(
+                            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
+                            converted_values
+                        )
+            
+            # Situação dos componentes e consumo mensal são derivados das tabelas restauradas
+            atualizar_derivados_abastecimentos(conn)
         
         return True, "Backup restaurado com sucesso!"
-        
+    
     except Exception as e:
         return False, f"Erro ao restaurar backup: {e}"
 
@@ -13729,7 +4044,7 @@ def auto_restore_backup_on_startup():
     try:
         if 'database_backup' in st.session_state:
             # Verificar se o banco está vazio
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+            conn = obter_conexao(DB_PATH)
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
             num_tables = cursor.fetchone()[0]
@@ -13838,16 +4153,30 @@ def main():
         # Tentar restaurar backup automaticamente na inicialização
         auto_restore_backup_on_startup()
         
-        # Adicionar coluna de tipo de combustível se não existir
-        add_tipo_combustivel_column()
-        
-        # Setup de esquemas (motoristas, preços, combustível)
-        ensure_motoristas_schema()
-        ensure_precos_combustivel_schema()
-
-        # Passo um fingerprint simples das tabelas para invalidar cache quando necessário
-        ver_frotas = int(os.path.getmtime(DB_PATH)) if os.path.exists(DB_PATH) else 0
-        df, df_frotas, df_manutencoes, df_comp_regras, df_comp_historico, df_checklist_regras, df_checklist_itens, df_checklist_historico = load_data_from_db(DB_PATH, ver_frotas, ver_frotas, ver_frotas, ver_frotas, ver_frotas)
+        # Esquema do banco: as migrações pendentes rodam uma vez por processo
+        try:
+            _aplicar_migracoes_uma_vez(DB_PATH)
+            _retomar_importacoes_uma_vez(DB_PATH)
+        except RuntimeError as e:
+            st.warning(f"⚠️ {e}")
+
+        # Escritas de fora do app não atualizam componentes_status e consumo_mensal
+        sincronizar_derivados(DB_PATH)
+
+        # Versão de cada tabela: só as escritas nas tabelas de cada grupo invalidam o cache
+        versoes = ler_versoes_tabelas(DB_PATH)
+        if versoes:
+            def versao_de(*tabelas):
+                return sum(versoes.get(t, 0) for t in tabelas)
+            ver_frotas = versao_de('frotas')
+            ver_abast = versao_de('abastecimentos', 'motoristas')
+            ver_manut = versao_de('manutencoes')
+            ver_comp = versao_de('componentes_regras', 'componentes_historico')
+            ver_chk = versao_de('checklist_regras', 'checklist_itens', 'checklist_historico')
+        else:
+            # Sem controle de versões: usa a data de modificação do arquivo
+            ver_frotas = ver_abast = ver_manut = ver_comp = ver_chk = int(os.path.getmtime(DB_PATH)) if os.path.exists(DB_PATH) else 0
+        df, df_frotas, df_manutencoes, df_comp_regras, df_comp_historico, df_checklist_regras, df_checklist_itens, df_checklist_historico, indice_eq = load_data_from_db(DB_PATH, ver_frotas, ver_abast, ver_manut, ver_comp, ver_chk)
         
 
         if 'intervalos_por_classe' not in st.session_state:
@@ -13940,9 +4269,7 @@ def main():
                 "safras": sel_safras
             }
     #----------------------------------------------------- aba principal --------------------------------------
-        # df_f será calculado apenas para a aba Análise Geral
-        df_f = None
-        plan_df = build_component_maintenance_plan(df_frotas, df, df_comp_regras, df_comp_historico)
+        plan_df = carregar_plano_manutencao(DB_PATH)
 
         # CSS para barra de rolagem horizontal nas abas com design moderno
         st.markdown("""
@@ -14143,12 +4470,19 @@ def main():
 
         def rerun_keep_tab(tab_title: str, clear_cache: bool = True):
             if clear_cache:
-                st.cache_data.clear()
+                # Descarta apenas o cache das funções que dependem das tabelas alteradas
+                invalidar_tabelas()
             try:
                 st.session_state['active_tab_index'] = tabs_para_mostrar.index(tab_title)
             except Exception:
                 pass
             st.rerun()
+
+        def iniciar_importacao(tipo: str, arquivo, parametros: dict = None):
+            """Coloca a importação na fila e passa a acompanhá-la no painel da aba de importação."""
+            job_id = enfileirar_importacao(tipo, arquivo, parametros)
+            st.session_state.setdefault('importacoes_acompanhadas', set()).add(job_id)
+            rerun_keep_tab("📤 Importar Dados", clear_cache=False)
         
 
                 
@@ -14156,166 +4490,123 @@ def main():
             with tab_analise:
                 st.header("📈 Análise Gráfica de Consumo")
 
-                # Aplica filtros apenas nesta aba
+                # Aplica filtros apenas nesta aba; os gráficos leem o consumo já agregado por mês (consumo_agregado)
                 opts = st.session_state.get('filtro_opts_analise', None)
-                df_f = filtrar_dados(df, opts) if opts else df.copy()
+                consumo_combustivel_periodo = consumo_agregado(['tipo_combustivel'], opts)
 
-                if not df_f.empty:
+                if not consumo_combustivel_periodo.empty:
                     # KPIs melhorados com análise por tipo de combustível
                     st.subheader("📊 Indicadores de Consumo por Combustível")
-                    
-                    # Obter tipos de combustível das frotas
-                    if 'tipo_combustivel' in df_frotas.columns:
-                        # Filtrar apenas registros que realmente têm consumo (Qtde Litros > 0)
-                        df_f_com_consumo = df_f[df_f['Qtde Litros'] > 0].copy()
-                        
-                        if not df_f_com_consumo.empty:
-                            # Pegar apenas os equipamentos que têm histórico de abastecimento
-                            equipamentos_com_consumo = df_f_com_consumo['Cod_Equip'].unique()
-                            
-                            # Filtrar df_frotas para incluir apenas equipamentos com consumo
-                            frotas_com_consumo = df_frotas[df_frotas['Cod_Equip'].isin(equipamentos_com_consumo)].copy()
-                            
-                            # Verificar se há valores duplicados em Cod_Equip e tratar adequadamente
-                            if frotas_com_consumo['Cod_Equip'].duplicated().any():
-                                # Se há duplicatas, pegar o primeiro valor de cada equipamento
-                                frotas_com_consumo = frotas_com_consumo.drop_duplicates(subset=['Cod_Equip'], keep='first')
-                            
-                            # Criar mapeamento de tipo de combustível apenas para equipamentos com consumo
-                            combustivel_map = frotas_com_consumo.set_index('Cod_Equip')['tipo_combustivel'].fillna('Diesel S500')
-                            
-                            # Aplicar o mapeamento apenas aos registros com consumo
-                            df_f_com_consumo['tipo_combustivel'] = df_f_com_consumo['Cod_Equip'].map(combustivel_map).fillna('Diesel S500')
-                            
-                            # Calcular consumo por tipo de combustível
-                            consumo_por_combustivel = df_f_com_consumo.groupby('tipo_combustivel')['Qtde Litros'].sum().sort_values(ascending=False)
-                        else:
-                            # Se não há registros com consumo, criar um DataFrame vazio
-                            consumo_por_combustivel = pd.Series(dtype='float64')
-                        
-                        # Criar colunas dinâmicas baseadas no número de tipos de combustível
-                        num_tipos = len(consumo_por_combustivel)
-                        if num_tipos <= 2:
-                            cols = st.columns(2)
-                        elif num_tipos <= 3:
-                            cols = st.columns(3)
-                        elif num_tipos <= 4:
-                            cols = st.columns(4)
-                        else:
-                            cols = st.columns(5)
-                        
-                        # Exibir KPIs por tipo de combustível
-                        for i, (tipo, litros) in enumerate(consumo_por_combustivel.items()):
-                            if i < len(cols):
-                                with cols[i]:
-                                    # Calcular percentual do total
-                                    percentual = (litros / df_f["Qtde Litros"].sum()) * 100
-                                    
-                                    # Definir cor baseada no tipo de combustível
-                                    if 'Diesel S500' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🚛"
-                                    elif 'Diesel S10' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🚛"
-                                    elif 'Gasolina' in tipo:
-                                        delta_color = "normal"
-                                        icon = "⛽"
-                                    elif 'Etanol' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🌱"
-                                    elif 'Biodiesel' in tipo:
-                                        delta_color = "normal"
-                                        icon = "🌿"
-                                    else:
-                                        delta_color = "normal"
-                                        icon = "⛽"
-                                    
-                                    cols[i].metric(
-                                        f"{icon} {tipo}",
-                                        f"{formatar_brasileiro_int(litros)} L",
-                                        f"{percentual:.1f}% do total",
-                                        delta_color=delta_color
-                                    )
-                        
-                        # Adicionar linha separadora
-                        st.markdown("---")
-                        
-                        # KPI adicional: Total geral e média por equipamento
-                        k1, k2, k3 = st.columns(3)
-                        
-                        with k1:
-                            total_litros = df_f["Qtde Litros"].sum()
-                            k1.metric(
-                                "🛢️ Total Geral",
-                                f"{formatar_brasileiro_int(total_litros)} L",
-                                f"{len(consumo_por_combustivel)} tipos de combustível"
+                    total_litros = consumo_combustivel_periodo['litros'].sum()
+
+                    # Apenas combustíveis que realmente tiveram consumo no período
+                    consumo_por_combustivel = consumo_combustivel_periodo[consumo_combustivel_periodo['litros'] > 0].set_index('tipo_combustivel')['litros'].sort_values(ascending=False)
+
+                    # Criar colunas dinâmicas baseadas no número de tipos de combustível
+                    num_tipos = len(consumo_por_combustivel)
+                    if num_tipos <= 2:
+                        cols = st.columns(2)
+                    elif num_tipos <= 3:
+                        cols = st.columns(3)
+                    elif num_tipos <= 4:
+                        cols = st.columns(4)
+                    else:
+                        cols = st.columns(5)
+
+                    # Exibir KPIs por tipo de combustível
+                    for i, (tipo, litros) in enumerate(consumo_por_combustivel.items()):
+                        if i < len(cols):
+                            with cols[i]:
+                                # Calcular percentual do total
+                                percentual = (litros / total_litros) * 100
+
+                                # Definir cor baseada no tipo de combustível
+                                if 'Diesel S500' in tipo:
+                                    delta_color = "normal"
+                                    icon = "🚛"
+                                elif 'Diesel S10' in tipo:
+                                    delta_color = "normal"
+                                    icon = "🚛"
+                                elif 'Gasolina' in tipo:
+                                    delta_color = "normal"
+                                    icon = "⛽"
+                                elif 'Etanol' in tipo:
+                                    delta_color = "normal"
+                                    icon = "🌱"
+                                elif 'Biodiesel' in tipo:
+                                    delta_color = "normal"
+                                    icon = "🌿"
+                                else:
+                                    delta_color = "normal"
+                                    icon = "⛽"
+                                
+                                cols[i].metric(
+                                    f"{icon} {tipo}",
+                                    f"{formatar_brasileiro_int(litros)} L",
+                                    f"{percentual:.1f}% do total",
+                                    delta_color=delta_color
+                                )
+
+                    # Adicionar linha separadora
+                    st.markdown("---")
+
+                    # KPI adicional: Total geral e média por equipamento
+                    k1, k2, k3 = st.columns(3)
+
+                    with k1:
+                        k1.metric(
+                            "🛢️ Total Geral",
+                            f"{formatar_brasileiro_int(total_litros)} L",
+                            f"{len(consumo_por_combustivel)} tipos de combustível"
+                        )
+
+                    with k2:
+                        leituras_media = consumo_combustivel_periodo['leituras_media'].sum()
+                        if leituras_media > 0:
+                            media_geral = consumo_combustivel_periodo['soma_media'].sum() / leituras_media
+                            k2.metric(
+                                "📈 Média Geral",
+                                f"{formatar_brasileiro(media_geral)}",
+                                "Média de consumo por equipamento"
                             )
-                        
-                        with k2:
-                            if 'Media' in df_f.columns:
-                                media_geral = df_f['Media'].mean()
+                        else:
+                            # Sem médias registradas: litros por equipamento
+                            equipamentos_unicos = len(consumo_agregado(['Cod_Equip'], opts))
+                            if equipamentos_unicos > 0:
                                 k2.metric(
-                                    "📈 Média Geral",
-                                    f"{formatar_brasileiro(media_geral)}",
-                                    "Média de consumo por equipamento"
+                                    "📈 Média por Equipamento",
+                                    f"{formatar_brasileiro(total_litros / equipamentos_unicos)} L",
+                                    f"{equipamentos_unicos} equipamentos"
                                 )
                             else:
-                                # Calcular média manual se não existir coluna Media
-                                equipamentos_unicos = df_f['Cod_Equip'].nunique()
-                                if equipamentos_unicos > 0:
-                                    media_manual = total_litros / equipamentos_unicos
-                                    k2.metric(
-                                        "📈 Média por Equipamento",
-                                        f"{formatar_brasileiro(media_manual)} L",
-                                        f"{equipamentos_unicos} equipamentos"
-                                    )
-                                else:
-                                    k2.metric("📈 Média por Equipamento", "N/A")
-                        
-                        with k3:
-                            # Calcular eficiência (litros por dia se houver dados de data)
-                            if 'Data' in df_f.columns:
-                                try:
-                                    df_f['Data'] = pd.to_datetime(df_f['Data'])
-                                    dias_periodo = (df_f['Data'].max() - df_f['Data'].min()).days + 1
-                                    if dias_periodo > 0:
-                                        litros_por_dia = total_litros / dias_periodo
-                                        k3.metric(
-                                            "📅 Consumo Diário",
-                                            f"{formatar_brasileiro(litros_por_dia)} L/dia",
-                                            f"{dias_periodo} dias analisados"
-                                        )
-                                    else:
-                                        k3.metric("📅 Consumo Diário", "N/A")
-                                except:
-                                    k3.metric("📅 Consumo Diário", "N/A")
-                            else:
-                                k3.metric("📅 Consumo Diário", "N/A")
-                    else:
-                        # Fallback se não houver coluna tipo_combustivel
-                        k1, k2 = st.columns(2)
-                        k1.metric("Litros Consumidos (período)", formatar_brasileiro_int(df_f["Qtde Litros"].sum()))
-                        if 'Media' in df_f.columns:
-                            k2.metric("Média Consumo (período)", f"{formatar_brasileiro(df_f['Media'].mean())}")
+                                k2.metric("📈 Média por Equipamento", "N/A")
+
+                    with k3:
+                        # Litros por dia entre o primeiro e o último abastecimento do período
+                        primeira = pd.to_datetime(consumo_combustivel_periodo['primeira_data'], errors='coerce').min()
+                        ultima = pd.to_datetime(consumo_combustivel_periodo['ultima_data'], errors='coerce').max()
+                        dias_periodo = (ultima - primeira).days + 1 if pd.notna(primeira) and pd.notna(ultima) else 0
+                        if dias_periodo > 0:
+                            k3.metric(
+                                "📅 Consumo Diário",
+                                f"{formatar_brasileiro(total_litros / dias_periodo)} L/dia",
+                                f"{dias_periodo} dias analisados"
+                            )
                         else:
-                            equipamentos_unicos = df_f['Cod_Equip'].nunique()
-                            if equipamentos_unicos > 0:
-                                media_manual = df_f["Qtde Litros"].sum() / equipamentos_unicos
-                                k2.metric("Média por Equipamento", f"{formatar_brasileiro(media_manual)} L")
+                            k3.metric("📅 Consumo Diário", "N/A")
                     st.markdown("---")
                     st.subheader("📊 Análise de Consumo por Classe e Equipamentos")
                     c1, c2 = st.columns(2)
 
+                    # Consumo, custo e média por classe saem da mesma consulta
+                    consumo_classe_periodo = consumo_agregado(['Classe_Operacional'], opts)
+
                     with c1:
                         st.subheader("Consumo por Classe Operacional")
                         classes_a_excluir = ['VEICULOS LEVES', 'MOTOCICLETA', 'MINI CARREGADEIRA', 'USINA']
-                        # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                        if 'Classe_Operacional' in df_f.columns:
-                            df_consumo_classe = df_f[~df_f['Classe_Operacional'].str.upper().isin(classes_a_excluir)]
-                        else:
-                            df_consumo_classe = df_f
-                        consumo_por_classe = df_consumo_classe.groupby("Classe_Operacional")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
+                        consumo_por_classe = consumo_classe_periodo[
+                            ~consumo_classe_periodo['Classe_Operacional'].str.upper().isin(classes_a_excluir)
+                        ][['Classe_Operacional', 'litros']].rename(columns={'litros': 'Qtde Litros'}).sort_values('Qtde Litros', ascending=False)
 
                         if not consumo_por_classe.empty:
                             consumo_por_classe['texto_formatado'] = consumo_por_classe['Qtde Litros'].apply(formatar_brasileiro_int)
@@ -14336,16 +4627,17 @@ def main():
                             )
                             st.plotly_chart(fig_classe, use_container_width=True)
 
+                    consumo_equip_periodo = consumo_agregado(['Cod_Equip'], opts)
+
                     with c2:
                         st.subheader("Top 10 Equipamentos com Maior Consumo")
                         # Melhorar o gráfico com informações mais claras
-                        consumo_por_equip = df_f.groupby("Cod_Equip").agg({'Qtde Litros': 'sum'}).dropna()
-                        consumo_por_equip = consumo_por_equip[consumo_por_equip.index != 550]
+                        consumo_por_equip = consumo_equip_periodo[consumo_equip_periodo['Cod_Equip'] != 550]
+                        consumo_por_equip = consumo_por_equip[['Cod_Equip', 'litros']].rename(columns={'litros': 'Qtde Litros'})
                         consumo_por_equip = consumo_por_equip.sort_values(by="Qtde Litros", ascending=False).head(10)
 
                         if not consumo_por_equip.empty:
                             # Adicionar informações da frota para melhor identificação
-                            consumo_por_equip = consumo_por_equip.reset_index()
                             consumo_por_equip = consumo_por_equip.merge(
                                 df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA']], 
                                 on='Cod_Equip', 
@@ -14354,7 +4646,7 @@ def main():
                             
                             # Criar label mais informativo: Código - Descrição (Placa)
                             consumo_por_equip['label_grafico'] = consumo_por_equip.apply(
-                                lambda row: f"{row['Cod_Equip']} - {row['DESCRICAO_EQUIPAMENTO'][:30]}{'...' if len(str(row['DESCRICAO_EQUIPAMENTO'])) > 30 else ''} ({row['PLACA']})", 
+                                lambda row: f"{row['Cod_Equip']} - {str(row['DESCRICAO_EQUIPAMENTO'])[:30]}{'...' if len(str(row['DESCRICAO_EQUIPAMENTO'])) > 30 else ''} ({row['PLACA']})", 
                                 axis=1
                             )
                             
@@ -14391,55 +4683,22 @@ def main():
                     # NOVA SEÇÃO: Top 10 de Gastos por Frota e por Classe
                     st.subheader("💰 Top 10 de Gastos por Frota e Classe")
                     
-                    # Calcular gastos por frota
+                    # O custo já vem calculado em consumo_mensal com o preço vigente na data de cada abastecimento
                     precos_map = get_precos_combustivel_map()
                     if precos_map:
-                        df_gastos = df_f.copy()
-                        
-                        # Verificar se a coluna tipo_combustivel existe em df_frotas
-                        if 'tipo_combustivel' in df_frotas.columns:
-                            df_gastos = df_gastos.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                            # Verificar se a coluna foi criada após o merge
-                            if 'tipo_combustivel' in df_gastos.columns:
-                                df_gastos['tipo_combustivel'] = df_gastos['tipo_combustivel'].fillna('Diesel S500')
-                            else:
-                                df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        else:
-                            # Se não existir, criar a coluna com valor padrão
-                            df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        
-                        # Garantir que a coluna tipo_combustivel existe antes de mapear preços
-                        if 'tipo_combustivel' not in df_gastos.columns:
-                            df_gastos['tipo_combustivel'] = 'Diesel S500'
-                        
-                        df_gastos['preco_unit'] = df_gastos['tipo_combustivel'].map(precos_map).fillna(0.0)
-                        df_gastos['custo'] = df_gastos['Qtde Litros'].fillna(0.0) * df_gastos['preco_unit']
-                        
-                        # Adicionar informações da frota para filtro
-                        df_gastos_com_info = df_gastos.merge(
-                            df_frotas[['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'PLACA', 'Classe_Operacional']], 
-                            on='Cod_Equip', 
-                            how='left'
-                        )
-                        
-                        # Garantir que a coluna Classe_Operacional existe
-                        if 'Classe_Operacional' not in df_gastos_com_info.columns:
-                            df_gastos_com_info['Classe_Operacional'] = 'N/A'
-                        
                         # Filtro para excluir a frota 550 (usina) por padrão
                         mostrar_usinas = st.checkbox("🏭 Incluir Frota 550 (Usina) no Top 10 de Gastos por Frota", value=False)
                         
                         if not mostrar_usinas:
-                            # Excluir a frota 550 (usina) do DataFrame
-                            df_gastos_filtrado = df_gastos_com_info[df_gastos_com_info['Cod_Equip'] != 550]
+                            # Excluir a frota 550 (usina)
+                            gastos_filtrado = consumo_equip_periodo[consumo_equip_periodo['Cod_Equip'] != 550]
                         else:
-                            df_gastos_filtrado = df_gastos_com_info
+                            gastos_filtrado = consumo_equip_periodo
                         
                         # Top 10 gastos por frota individual (após filtro)
-                        gastos_por_frota = df_gastos_filtrado.groupby('Cod_Equip').agg({
-                            'custo': 'sum',
-                            'Qtde Litros': 'sum'
-                        }).sort_values('custo', ascending=False).head(10).reset_index()
+                        gastos_por_frota = gastos_filtrado[['Cod_Equip', 'custo', 'litros']].rename(
+                            columns={'litros': 'Qtde Litros'}
+                        ).sort_values('custo', ascending=False).head(10)
                         
                         # Adicionar informações da frota
                         gastos_por_frota = gastos_por_frota.merge(
@@ -14451,12 +4710,10 @@ def main():
                         gastos_por_frota['custo_formatado'] = gastos_por_frota['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
                         
                         # Top 10 gastos por classe operacional
-                        gastos_por_classe = df_gastos.groupby('Classe_Operacional').agg({
-                            'custo': 'sum',
-                            'Qtde Litros': 'sum'
-                        }).sort_values('custo', ascending=False).head(10).reset_index()
+                        gastos_por_classe = consumo_classe_periodo[['Classe_Operacional', 'custo', 'litros']].rename(
+                            columns={'litros': 'Qtde Litros'}
+                        ).sort_values('custo', ascending=False).head(10)
                         gastos_por_classe['custo_formatado'] = gastos_por_classe['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                        
                         # Criar layout em 2 colunas para os gráficos
                         col_gastos1, col_gastos2 = st.columns(2)
                         
@@ -14567,7 +4824,7 @@ def main():
                         with col_resumo1:
                             st.metric(
                                 "Total Gastos (Período)", 
-                                formatar_brasileiro(df_gastos['custo'].sum(), 'R$ ')
+                                formatar_brasileiro(consumo_combustivel_periodo['custo'].sum(), 'R$ ')
                             )
                         with col_resumo2:
                             if not gastos_por_frota.empty:
@@ -14589,20 +4846,15 @@ def main():
 
                     st.markdown("---")
                     st.subheader("📈 Média de Consumo por Classe Operacional")
-                    df_media = df_f[(df_f['Media'].notna()) & (df_f['Media'] > 0)].copy()
-
                     classes_para_excluir = ['MOTOCICLETA', 'VEICULOS LEVES', 'USINA', 'MINI CARREGADEIRA']
 
-                    # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                    if 'Classe_Operacional' in df_media.columns:
-                        df_media_filtrado = df_media[~df_media['Classe_Operacional'].str.upper().isin(classes_para_excluir)]
-                    else:
-                        df_media_filtrado = df_media
+                    # media considera apenas as médias positivas registradas
+                    df_media_grafico = consumo_classe_periodo[
+                        consumo_classe_periodo['media'].notna()
+                        & ~consumo_classe_periodo['Classe_Operacional'].str.upper().isin(classes_para_excluir)
+                    ][['Classe_Operacional', 'media']].rename(columns={'media': 'Media'}).sort_values('Media')
 
-                    if not df_media_filtrado.empty: # Usa o novo DataFrame filtrado
-                        media_por_classe = df_media_filtrado.groupby('Classe_Operacional')['Media'].mean().sort_values(ascending=True)
-                        
-                        df_media_grafico = media_por_classe.reset_index()
+                    if not df_media_grafico.empty:
                         df_media_grafico['texto_formatado'] = df_media_grafico['Media'].apply(
                             lambda x: formatar_brasileiro(x)
                         )
@@ -14652,50 +4904,11 @@ def main():
                         """)
                     
                     if 'Media' in df.columns and not df['Media'].dropna().empty:
-                        media_por_classe = df.groupby('Classe_Operacional')['Media'].mean().to_dict()
-                        ranking_df = df.copy()
-                        ranking_df['Media_Classe'] = ranking_df['Classe_Operacional'].map(media_por_classe)
-                            
-                            # Calcular eficiência considerando metas de consumo
-                        def calcular_eficiencia_com_meta(row):
-                                media_equip = row['Media']
-                                media_classe = row['Media_Classe']
-                                cod_equip = row['Cod_Equip']
-                                classe = row['Classe_Operacional']
-                                
-                                # Verificar se há meta individual para esta frota
-                                meta_individual = 0
-                                if 'metas_individuals' in st.session_state:
-                                    meta_individual = st.session_state.metas_individuals.get(cod_equip, {}).get('meta_consumo', 0)
-                                
-                                # Verificar meta da classe
-                                meta_classe = 0
-                                if 'intervalos_por_classe' in st.session_state:
-                                    meta_classe = st.session_state.intervalos_por_classe.get(classe, {}).get('meta_consumo', 0)
-                                
-                                # Usar meta individual se existir e sobrescrever classe, senão usar meta da classe
-                                meta_final = meta_individual if meta_individual > 0 and st.session_state.metas_individuals.get(cod_equip, {}).get('sobrescrever_classe', False) else meta_classe
-                                
-                                # Se há meta definida, calcular eficiência vs meta
-                                if meta_final > 0:
-                                    # Para L/h: menor é melhor, para Km/L: maior é melhor
-                                    # Assumindo que o tipo de controle está em df_frotas
-                                    tipo_controle = df_frotas[df_frotas['Cod_Equip'] == cod_equip]['Tipo_Controle'].iloc[0] if 'Tipo_Controle' in df_frotas.columns else 'QUILÔMETROS'
-                                    
-                                    if tipo_controle == 'HORAS':  # L/h - menor é melhor
-                                        eficiencia_vs_meta = ((meta_final - media_equip) / meta_final) * 100
-                                    else:  # Km/L - maior é melhor
-                                        eficiencia_vs_meta = ((media_equip - meta_final) / meta_final) * 100
-                                    
-                                    return eficiencia_vs_meta
-                                else:
-                                    # Se não há meta, usar comparação com média da classe
-                                    return ((media_classe / media_equip) - 1) * 100
-                            
-                        ranking_df['Eficiencia_%'] = ranking_df.apply(calcular_eficiencia_com_meta, axis=1)
-                        
-                        ranking = ranking_df.groupby(['Cod_Equip', 'DESCRICAO_EQUIPAMENTO', 'Classe_Operacional'])['Eficiencia_%'].mean().sort_values(ascending=False).reset_index()
-                        ranking.rename(columns={'DESCRICAO_EQUIPAMENTO': 'Equipamento', 'Eficiencia_%': 'Eficiência (%)'}, inplace=True)
+                        ranking = ranking_eficiencia(
+                            df, df_frotas,
+                            st.session_state.get('intervalos_por_classe', {}),
+                            st.session_state.get('metas_individuals', {}),
+                        )
                         
                         # Adicionar informações da frota
                         ranking = ranking.merge(
@@ -14829,9 +5042,11 @@ def main():
                 # ===== SEÇÃO: TENDÊNCIA DE CONSUMO MENSAAL MELHORADA =====
                 st.markdown("**📊 Tendência de Consumo Mensal**")
                 
-                if not df.empty and 'Qtde Litros' in df.columns:
-                    # Agrupa os dados por Ano/Mês e soma o consumo
-                    consumo_mensal = df.groupby('AnoMes')['Qtde Litros'].sum().reset_index().sort_values('AnoMes')
+                # Tendência e eficiência consideram todo o histórico, mês a mês
+                consumo_por_mes = consumo_agregado(['AnoMes']).sort_values('AnoMes')
+
+                if not consumo_por_mes.empty:
+                    consumo_mensal = consumo_por_mes[['AnoMes', 'litros']].rename(columns={'litros': 'Qtde Litros'})
                     
                     if not consumo_mensal.empty:
                         # Calcular estatísticas da tendência
@@ -14900,12 +5115,9 @@ def main():
                 st.markdown("---")
                 st.markdown("**🎯 Análise de Eficiência Temporal**")
                 
-                if 'Media' in df.columns and not df['Media'].dropna().empty:
-                    # Análise de eficiência ao longo do tempo
-                    df_eficiencia_tempo = df[df['Media'].notna()].copy()
-                    df_eficiencia_tempo['AnoMes'] = df_eficiencia_tempo['AnoMes'] if 'AnoMes' in df_eficiencia_tempo.columns else '2024-01'
-                    
-                    eficiencia_temporal = df_eficiencia_tempo.groupby('AnoMes')['Media'].mean().reset_index()
+                if consumo_por_mes['media'].notna().any():
+                    # Análise de eficiência ao longo do tempo (média das médias positivas de cada mês)
+                    eficiencia_temporal = consumo_por_mes[consumo_por_mes['media'].notna()][['AnoMes', 'media']].rename(columns={'media': 'Media'})
                     
                     if not eficiencia_temporal.empty:
                         fig_eficiencia_tempo = px.line(
@@ -14944,102 +5156,41 @@ def main():
                     st.subheader("💰 Total de Gasto por Motorista")
                     precos_map = get_precos_combustivel_map()
                     if precos_map:
-                        # Vincula combustível por frota e multiplica litros por preço
-                        df_tmp = df_f.copy()
-                        
-                        # Verificar se a coluna tipo_combustivel existe em df_frotas
-                        if 'tipo_combustivel' in df_frotas.columns:
-                            df_tmp = df_tmp.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                            # Verificar se a coluna foi criada após o merge
-                            if 'tipo_combustivel' in df_tmp.columns:
-                                df_tmp['tipo_combustivel'] = df_tmp['tipo_combustivel'].fillna('Diesel S500')
-                            else:
-                                df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        else:
-                            # Se não existir, criar a coluna com valor padrão
-                            df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        # Garantir que a coluna tipo_combustivel existe antes de mapear preços
-                        if 'tipo_combustivel' not in df_tmp.columns:
-                            df_tmp['tipo_combustivel'] = 'Diesel S500'
-                        
-                        df_tmp['preco_unit'] = df_tmp['tipo_combustivel'].map(precos_map).fillna(0.0)
-                        df_tmp['custo'] = df_tmp['Qtde Litros'].fillna(0.0) * df_tmp['preco_unit']
-                        # Agrupar por matrícula
-                        if 'Matricula' in df_tmp.columns:
-                            gasto_motorista = df_tmp.groupby('Matricula').agg({'custo':'sum', 'Qtde Litros':'sum'}).sort_values('custo', ascending=False)
-                            gasto_motorista = gasto_motorista[gasto_motorista['custo']>0]
-                            if not gasto_motorista.empty:
-                                gasto_motorista = gasto_motorista.reset_index()
-                                gasto_motorista['Custo (R$)'] = gasto_motorista['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
-                                gasto_motorista['Litros'] = gasto_motorista['Qtde Litros'].apply(formatar_brasileiro_int)
-                                st.dataframe(gasto_motorista[['Matricula','Litros','Custo (R$)']])
-                                try:
-                                    fig_gasto = px.bar(gasto_motorista.head(10), x='custo', y='Matricula', orientation='h', text='Custo (R$)', labels={'custo':'Custo (R$)','Matricula':'Matrícula'})
-                                    st.plotly_chart(fig_gasto, use_container_width=True)
-                                except Exception:
-                                    pass
-                            else:
-                                st.info("Sem dados suficientes de custo (verifique preços cadastrados).")
+                        # Litros e custo por matrícula vêm de consumo_mensal
+                        gasto_motorista = consumo_agregado(['Matricula'], opts).rename(columns={'litros': 'Qtde Litros'})
+                        gasto_motorista = gasto_motorista.set_index('Matricula')[['custo', 'Qtde Litros']].sort_values('custo', ascending=False)
+                        gasto_motorista = gasto_motorista[gasto_motorista['custo']>0]
+                        if not gasto_motorista.empty:
+                            gasto_motorista = gasto_motorista.reset_index()
+                            gasto_motorista['Custo (R$)'] = gasto_motorista['custo'].apply(lambda x: formatar_brasileiro(x, 'R$ '))
+                            gasto_motorista['Litros'] = gasto_motorista['Qtde Litros'].apply(formatar_brasileiro_int)
+                            st.dataframe(gasto_motorista[['Matricula','Litros','Custo (R$)']])
+                            try:
+                                fig_gasto = px.bar(gasto_motorista.head(10), x='custo', y='Matricula', orientation='h', text='Custo (R$)', labels={'custo':'Custo (R$)','Matricula':'Matrícula'})
+                                st.plotly_chart(fig_gasto, use_container_width=True)
+                            except Exception:
+                                pass
                         else:
-                            st.info("Não há coluna de matrícula nos abastecimentos para calcular o gasto por motorista.")
+                            st.info("Sem dados suficientes de custo (verifique preços cadastrados).")
                     else:
                         st.info("Cadastre os preços de combustível na aba Importar > Preços.")
 
                     st.markdown("---")
                     st.subheader("🔄 Análise de Proporções por Classe e Combustível")
                 
-                # Criar DataFrame com informações de combustível
-                df_consumo_combustivel = df.copy()
-                
-                # Verificar se a coluna tipo_combustivel existe em df_frotas
-                if 'tipo_combustivel' in df_frotas.columns:
-                    try:
-                        # Renomear a coluna COD_EQUIPAMENTO para Cod_Equip em df_frotas
-                        df_frotas_temp = df_frotas.copy()
-                        df_frotas_temp = df_frotas_temp.rename(columns={"COD_EQUIPAMENTO": "Cod_Equip"}, errors='ignore')
-                        
-                        frotas_combustivel = df_frotas_temp[['Cod_Equip', 'tipo_combustivel']].copy()
-                        frotas_combustivel['tipo_combustivel'] = frotas_combustivel['tipo_combustivel'].fillna('Diesel S500')
-                        
-                        # Renomear a coluna "Cód. Equip." para "Cod_Equip" em df_consumo_combustivel
-                        df_consumo_combustivel = df_consumo_combustivel.rename(columns={"Cód. Equip.": "Cod_Equip"}, errors='ignore')
-                        
-                        df_consumo_combustivel = df_consumo_combustivel.merge(
-                            frotas_combustivel, 
-                            on='Cod_Equip', 
-                            how='left'
-                        )
-                        # Verificar se a coluna foi criada após o merge
-                        if 'tipo_combustivel' not in df_consumo_combustivel.columns:
-                            df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                    except Exception:
-                        df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                else:
-                    df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                
-                # Garantir que a coluna tipo_combustivel existe
-                if 'tipo_combustivel' not in df_consumo_combustivel.columns:
-                    df_consumo_combustivel['tipo_combustivel'] = 'Diesel S500'
-                
                 col_grafico1, col_grafico2 = st.columns(2)
                 
                 with col_grafico1:
                     st.subheader("📊 Consumo por Classe (Visão Macro)")
                     # Excluir "Usina" e frotas sem classe, usar Classe_Operacional
                     classes_a_excluir_macro = ['USINA', 'USINA MOBILE', 'USINA FIXA']
-                    # Verificar se a coluna Classe_Operacional existe antes de filtrar
-                    if 'Classe_Operacional' in df_consumo_combustivel.columns:
-                        df_consumo_classe_macro = df_consumo_combustivel[
-                            (df_consumo_combustivel['Classe_Operacional'].notna()) & 
-                            (~df_consumo_combustivel['Classe_Operacional'].str.upper().isin(classes_a_excluir_macro))
-                        ]
-                    else:
-                        df_consumo_classe_macro = df_consumo_combustivel
+                    consumo_classe_total = consumo_agregado(['Classe_Operacional'])
+                    consumo_por_classe_macro = consumo_classe_total[
+                        ~consumo_classe_total['Classe_Operacional'].str.upper().isin(classes_a_excluir_macro)
+                    ][['Classe_Operacional', 'litros']].rename(columns={'litros': 'Qtde Litros'}).sort_values('Qtde Litros', ascending=False)
                     
-                    if not df_consumo_classe_macro.empty:
+                    if not consumo_por_classe_macro.empty:
                         try:
-                            consumo_por_classe_macro = df_consumo_classe_macro.groupby("Classe_Operacional")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
-                            
                             # Criar gráfico de pizza
                             fig_pizza_classe = px.pie(
                                 consumo_por_classe_macro, 
@@ -15062,67 +5213,37 @@ def main():
                 
                 with col_grafico2:
                     st.subheader("⛽ Consumo por Tipo de Combustível")
-                    if not df_consumo_combustivel.empty:
+                    # Apenas combustíveis e frotas que realmente abasteceram
+                    consumo_por_combustivel = consumo_agregado(['tipo_combustivel'])
+                    consumo_por_combustivel = consumo_por_combustivel[consumo_por_combustivel['litros'] > 0][['tipo_combustivel', 'litros']].rename(
+                        columns={'litros': 'Qtde Litros'}
+                    ).sort_values('Qtde Litros', ascending=False)
+                    
+                    if not consumo_por_combustivel.empty:
                         try:
-                            # Filtrar apenas registros que realmente têm consumo (Qtde Litros > 0)
-                            df_consumo_real = df_consumo_combustivel[df_consumo_combustivel['Qtde Litros'] > 0].copy()
+                            consumo_equip_total = consumo_agregado(['Cod_Equip'])
+                            equipamentos_com_consumo = consumo_equip_total.loc[consumo_equip_total['litros'] > 0, 'Cod_Equip']
                             
-                            if not df_consumo_real.empty:
-                                # Obter tipos de combustível apenas das frotas que realmente abasteceram
-                                if 'tipo_combustivel' in df_frotas.columns:
-                                    # Pegar apenas os equipamentos que têm histórico de abastecimento
-                                    equipamentos_com_consumo = df_consumo_real['Cod_Equip'].unique()
-                                    
-                                    # Filtrar df_frotas para incluir apenas equipamentos com consumo
-                                    frotas_com_consumo = df_frotas[df_frotas['Cod_Equip'].isin(equipamentos_com_consumo)].copy()
-                                    
-                                    # Verificar se há valores duplicados em Cod_Equip e tratar adequadamente
-                                    if frotas_com_consumo['Cod_Equip'].duplicated().any():
-                                        # Se há duplicatas, pegar o primeiro valor de cada equipamento
-                                        frotas_com_consumo = frotas_com_consumo.drop_duplicates(subset=['Cod_Equip'], keep='first')
-                                    
-                                    # Criar mapeamento de tipo de combustível apenas para equipamentos com consumo
-                                    combustivel_map = frotas_com_consumo.set_index('Cod_Equip')['tipo_combustivel'].fillna('Diesel S500')
-                                    
-                                    # Aplicar o mapeamento apenas aos registros com consumo
-                                    df_consumo_real['tipo_combustivel'] = df_consumo_real['Cod_Equip'].map(combustivel_map).fillna('Diesel S500')
-                                else:
-                                    df_consumo_real['tipo_combustivel'] = 'Diesel S500'
-                                
-                                # Agrupar por tipo de combustível
-                                consumo_por_combustivel = df_consumo_real.groupby("tipo_combustivel")["Qtde Litros"].sum().sort_values(ascending=False).reset_index()
-                                
-                                if not consumo_por_combustivel.empty:
-                                    # Criar gráfico de pizza
-                                    fig_pizza_combustivel = px.pie(
-                                        consumo_por_combustivel, 
-                                        values='Qtde Litros', 
-                                        names='tipo_combustivel',
-                                        title="Proporção de Consumo por Combustível (Apenas Frotas com Histórico)",
-                                        hole=0.3
-                                    )
-                                    fig_pizza_combustivel.update_traces(textposition='inside', textinfo='percent+label')
-                                    fig_pizza_combustivel.update_layout(height=400)
-                                    st.plotly_chart(fig_pizza_combustivel, use_container_width=True)
-                                    
-                                    # Mostrar totais
-                                    st.info(f"**Total de tipos de combustível:** {len(consumo_por_combustivel)}")
-                                    st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_combustivel['Qtde Litros'].sum())} L")
-                                    st.info(f"**Frotas com histórico de abastecimento:** {len(equipamentos_com_consumo)}")
-                                else:
-                                    st.warning("Não há dados de consumo para análise por combustível.")
-                            else:
-                                st.warning("Não há registros com consumo de combustível.")
+                            # Criar gráfico de pizza
+                            fig_pizza_combustivel = px.pie(
+                                consumo_por_combustivel, 
+                                values='Qtde Litros', 
+                                names='tipo_combustivel',
+                                title="Proporção de Consumo por Combustível (Apenas Frotas com Histórico)",
+                                hole=0.3
+                            )
+                            fig_pizza_combustivel.update_traces(textposition='inside', textinfo='percent+label')
+                            fig_pizza_combustivel.update_layout(height=400)
+                            st.plotly_chart(fig_pizza_combustivel, use_container_width=True)
+                            
+                            # Mostrar totais
+                            st.info(f"**Total de tipos de combustível:** {len(consumo_por_combustivel)}")
+                            st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_combustivel['Qtde Litros'].sum())} L")
+                            st.info(f"**Frotas com histórico de abastecimento:** {len(equipamentos_com_consumo)}")
                         except Exception as e:
                             st.error(f"Erro ao criar gráfico de combustível: {e}")
-                            st.info("Verificando dados disponíveis...")
-                            if 'tipo_combustivel' in df_consumo_combustivel.columns:
-                                consumo_por_combustivel = df_consumo_combustivel.groupby("tipo_combustivel")["Qtde Litros"].sum().reset_index()
-                                st.info(f"**Total de litros consumidos:** {formatar_brasileiro_int(consumo_por_combustivel['Qtde Litros'].sum())} L")
-                            else:
-                                st.error("Coluna tipo_combustivel não encontrada")
                     else:
-                        st.warning("Não há dados suficientes para análise por combustível.")
+                        st.warning("Não há registros com consumo de combustível.")
                 
                 # Fechar as colunas anteriores e criar nova seção com largura total
                 st.markdown("---")
@@ -15249,8 +5370,7 @@ def main():
                 st.markdown("---")
                 st.subheader("🛢️ Demonstrativos de Lubrificantes")
 
-                ensure_lubrificantes_schema()
-                conn = sqlite3.connect(DB_PATH)
+                conn = obter_conexao(DB_PATH)
                 df_lub = pd.read_sql("SELECT * FROM lubrificantes", conn)
                 df_mov = pd.read_sql("SELECT * FROM lubrificantes_movimentacoes", conn)
 
@@ -15325,12 +5445,12 @@ def main():
                 if equip_label:
                     cod_sel = int(equip_label.split(" - ")[0])
                     dados_eq = df_frotas.query("Cod_Equip == @cod_sel").iloc[0]
-                    consumo_eq = df.query("Cod_Equip == @cod_sel")
+                    consumo_eq = abastecimentos_do_equipamento(df, indice_eq, cod_sel)
                     
                     st.subheader(f"{dados_eq.get('DESCRICAO_EQUIPAMENTO','–')} ({dados_eq.get('PLACA','–')})")
                     
-                    ultimo_registro = consumo_eq.dropna(subset=['Hod_Hor_Atual']).sort_values("Data", ascending=False).iloc[0] if not consumo_eq.dropna(subset=['Hod_Hor_Atual']).empty else None
-                    valor_atual_display = formatar_brasileiro_int(ultimo_registro['Hod_Hor_Atual']) if ultimo_registro is not None else "–"
+                    leitura_atual = ultima_leitura_equipamento(cod_sel)
+                    valor_atual_display = formatar_brasileiro_int(leitura_atual) if leitura_atual is not None else "–"
                     
                     c1, c2, c3 = st.columns(3)
                     c1.metric("Status", dados_eq.get("ATIVO", "–"))
@@ -15343,7 +5463,7 @@ def main():
                     
                     if not consumo_eq.empty and 'Matricula' in consumo_eq.columns:
                         # Análise por motorista (matrícula)
-                        uso_por_motorista = consumo_eq.groupby('Matricula').agg({
+                        uso_por_motorista = consumo_eq.groupby('Matricula', observed=True).agg({
                             'Qtde Litros': 'sum',
                             'Data': 'count'
                         }).rename(columns={'Data': 'Abastecimentos'}).sort_values('Qtde Litros', ascending=False)
@@ -15461,52 +5581,11 @@ def main():
                     
                     precos_map = get_precos_combustivel_map()
                     if precos_map:
-                        # Calcular gasto da frota selecionada
-                        df_frota_gastos = consumo_eq.copy()
-                        # Verificar se a coluna tipo_combustivel existe em df_frotas
-                        if 'tipo_combustivel' in df_frotas.columns:
-                            df_frota_gastos = df_frota_gastos.merge(
-                                df_frotas[['Cod_Equip', 'tipo_combustivel']], 
-                                on='Cod_Equip', 
-                                how='left'
-                            )
-                            # Verificar se a coluna foi criada após o merge
-                            if 'tipo_combustivel' in df_frota_gastos.columns:
-                                df_frota_gastos['tipo_combustivel'] = df_frota_gastos['tipo_combustivel'].fillna('Diesel S500')
-                            else:
-                                df_frota_gastos['tipo_combustivel'] = 'Diesel S500'
-                        else:
-                            # Se não existir, criar a coluna com valor padrão
-                            df_frota_gastos['tipo_combustivel'] = 'Diesel S500'
-                        df_frota_gastos['preco_unit'] = df_frota_gastos['tipo_combustivel'].map(precos_map).fillna(0.0)
-                        df_frota_gastos['custo'] = df_frota_gastos['Qtde Litros'].fillna(0.0) * df_frota_gastos['preco_unit']
+                        # Gastos da frota e da sua classe a partir do custo já calculado em df
+                        gasto_frota = total_equipamento(indice_eq, cod_sel, 'custo')
                         
-                        gasto_frota = df_frota_gastos['custo'].sum()
-                        
-                        # Calcular gasto total da classe
                         classe_selecionada = dados_eq.get('Classe_Operacional')
-                        gasto_classe_total = 0
-                        if classe_selecionada:
-                            df_classe_gastos = df[df['Classe_Operacional'] == classe_selecionada].copy()
-                            # Verificar se a coluna tipo_combustivel existe em df_frotas
-                            if 'tipo_combustivel' in df_frotas.columns:
-                                df_classe_gastos = df_classe_gastos.merge(
-                                    df_frotas[['Cod_Equip', 'tipo_combustivel']], 
-                                    on='Cod_Equip', 
-                                    how='left'
-                                )
-                                # Verificar se a coluna foi criada após o merge
-                                if 'tipo_combustivel' in df_classe_gastos.columns:
-                                    df_classe_gastos['tipo_combustivel'] = df_classe_gastos['tipo_combustivel'].fillna('Diesel S500')
-                                else:
-                                    df_classe_gastos['tipo_combustivel'] = 'Diesel S500'
-                            else:
-                                # Se não existir, criar a coluna com valor padrão
-                                df_classe_gastos['tipo_combustivel'] = 'Diesel S500'
-                            
-                            df_classe_gastos['preco_unit'] = df_classe_gastos['tipo_combustivel'].map(precos_map).fillna(0.0)
-                            df_classe_gastos['custo'] = df_classe_gastos['Qtde Litros'].fillna(0.0) * df_classe_gastos['preco_unit']
-                            gasto_classe_total = df_classe_gastos['custo'].sum()
+                        gasto_classe_total = indice_eq['classes'].get(classe_selecionada, {}).get('custo', 0) if classe_selecionada else 0
                         
                         # Calcular porcentagem
                         porcentagem_classe = (gasto_frota / gasto_classe_total * 100) if gasto_classe_total > 0 else 0
@@ -15574,7 +5653,7 @@ def main():
 
                     if not consumo_eq.empty:
                         # Calcular consumo total em litros
-                        consumo_total_litros = consumo_eq['Qtde Litros'].sum()
+                        consumo_total_litros = total_equipamento(indice_eq, cod_sel)
 
                         # Calcular consumo por período (últimos 30, 90, 365 dias)
                         hoje = pd.Timestamp.now()
@@ -15586,16 +5665,13 @@ def main():
 
                         consumos_periodo = {}
                         for nome_periodo, dias in periodos.items():
-                            data_limite = hoje - pd.Timedelta(days=dias)
-                            consumo_periodo = consumo_eq[consumo_eq['Data'] >= data_limite]['Qtde Litros'].sum()
-                            consumos_periodo[nome_periodo] = consumo_periodo
+                            consumos_periodo[nome_periodo] = total_equipamento(indice_eq, cod_sel, desde=hoje - pd.Timedelta(days=dias))
 
                         # Calcular consumo da classe para comparação
                         classe_selecionada = dados_eq.get('Classe_Operacional')
                         consumo_classe_total = 0
                         if classe_selecionada:
-                            df_classe_consumo = df[df['Classe_Operacional'] == classe_selecionada]
-                            consumo_classe_total = df_classe_consumo['Qtde Litros'].sum()
+                            consumo_classe_total = indice_eq['classes'].get(classe_selecionada, {}).get('litros', 0)
 
                         # Calcular porcentagem do consumo da classe
                         porcentagem_consumo_classe = (consumo_total_litros / consumo_classe_total * 100) if consumo_classe_total > 0 else 0
@@ -15745,7 +5821,7 @@ def main():
 
                         # Gráfico de evolução mensal do consumo
                         if len(consumo_eq) > 1:
-                            consumo_mensal_frota = consumo_eq.groupby('AnoMes')['Qtde Litros'].sum().reset_index().sort_values('AnoMes')
+                            consumo_mensal_frota = consumo_eq.groupby('AnoMes', observed=True)['Qtde Litros'].sum().reset_index().sort_values('AnoMes')
 
                             if not consumo_mensal_frota.empty:
                                 # Melhorar formatação dos dados para o gráfico
@@ -15831,8 +5907,7 @@ def main():
                         media_da_classe = np.nan
 
                         if classe_selecionada:
-                            consumo_classe = df[(df['Classe_Operacional'] == classe_selecionada) & (df['Media'].notna()) & (df['Media'] > 0)]
-                            media_da_classe = consumo_classe['Media'].mean()
+                            media_da_classe = indice_eq['classes'].get(classe_selecionada, {}).get('media', np.nan)
                             
                             # Verificar meta da classe
                             meta_consumo = st.session_state.intervalos_por_classe.get(classe_selecionada, {}).get('meta_consumo', 0)
@@ -15935,109 +6010,65 @@ def main():
                     # --- INÍCIO DA MELHORIA 2: Histórico de Manutenção por Componente ---
                     st.subheader("Histórico de Manutenções de Componentes")
                     
-                    # Buscar componentes configurados para este equipamento
-                    classe_equip = df_frotas[df_frotas['Cod_Equip'] == cod_sel]['Classe_Operacional'].iloc[0]
-                    componentes_configurados = df_comp_regras[df_comp_regras['classe_operacional'] == classe_equip]
+                    # Regras, lubrificantes, contagens e histórico de todos os componentes em duas consultas
+                    frota_ficha = df_frotas[df_frotas['Cod_Equip'] == cod_sel].iloc[0]
+                    classe_equip = frota_ficha['Classe_Operacional']
+                    componentes_configurados, historico_componentes = status_componentes_equipamento(
+                        cod_sel, None if pd.isna(classe_equip) else classe_equip
+                    )
+                    unidade_equip = 'km' if frota_ficha['Tipo_Controle'] == 'QUILÔMETROS' else 'h'
+                    hod_atual = consumo_eq['Hod_Hor_Atual'].max()
                     
                     if not componentes_configurados.empty:
                         # Criar abas para cada componente
-                        componentes_nomes = componentes_configurados['nome_componente'].tolist()
-                        if componentes_nomes:
-                            tab_componentes = st.tabs(componentes_nomes)
-                            
-                            for i, componente in enumerate(componentes_nomes):
-                                with tab_componentes[i]:
-                                    # Buscar histórico do componente
-                                    historico_componente = df_comp_historico[
-                                        (df_comp_historico['Cod_Equip'] == cod_sel) & 
-                                        (df_comp_historico['nome_componente'] == componente)
-                                    ].sort_values("Data", ascending=False)
-                                    
-                                    # Buscar informações da regra do componente
-                                    regra_componente = componentes_configurados[componentes_configurados['nome_componente'] == componente].iloc[0]
-                                    intervalo_padrao = regra_componente['intervalo_padrao']
-                                    
-                                    # Buscar informações do lubrificante se existir
-                                    lubrificante_info = ""
-                                    if 'lubrificante_id' in regra_componente and regra_componente['lubrificante_id']:
-                                        conn = sqlite3.connect(DB_PATH)
-                                        df_lub = pd.read_sql("SELECT nome, viscosidade FROM lubrificantes WHERE id = ?", conn, params=(regra_componente['lubrificante_id'],))
-                                        conn.close()
-                                        if not df_lub.empty:
-                                            lub = df_lub.iloc[0]
-                                            lubrificante_info = f"{lub['nome']} ({lub['viscosidade']})"
-                                    
-                                    # Mostrar informações do componente
-                                    col1, col2, col3 = st.columns(3)
-                                    with col1:
-                                        st.metric("Intervalo Padrão", f"{intervalo_padrao} {'km' if df_frotas[df_frotas['Cod_Equip'] == cod_sel]['Tipo_Controle'].iloc[0] == 'QUILÔMETROS' else 'h'}")
-                                    with col2:
-                                        if lubrificante_info:
-                                            st.metric("Lubrificante", lubrificante_info)
-                                        else:
-                                            st.metric("Lubrificante", "Não aplicável")
-                                    with col3:
-                                        # Contar manutenções
-                                        total_manutencoes = len(historico_componente)
-                                        st.metric("Total de Manutenções", total_manutencoes)
-                                    
-                                    # Mostrar status atual se houver histórico
-                                    if not historico_componente.empty:
-                                        # Verificar se a coluna tipo_servico existe
-                                        if 'tipo_servico' in historico_componente.columns:
-                                            # Buscar a última TROCA (não remonta) para calcular km restantes
-                                            ultimas_trocas = historico_componente[
-                                                (historico_componente['tipo_servico'] == 'Troca') | 
-                                                (historico_componente['tipo_servico'].isna())  # Para registros antigos sem tipo
-                                            ]
-                                        else:
-                                            # Se a coluna não existe, considerar todos como trocas (registros antigos)
-                                            ultimas_trocas = historico_componente
-                                        
-                                        if not ultimas_trocas.empty:
-                                            ultima_troca = ultimas_trocas.iloc[0]
-                                            hod_ultima_troca = ultima_troca['Hod_Hor_No_Servico']
+                        tab_componentes = st.tabs(componentes_configurados['nome_componente'].tolist())
+                        
+                        for tab_componente, info in zip(tab_componentes, componentes_configurados.itertuples(index=False)):
+                            with tab_componente:
+                                componente = info.nome_componente
+                                historico_componente = historico_componentes[historico_componentes['nome_componente'] == componente]
+                                
+                                # Mostrar informações do componente
+                                col1, col2, col3 = st.columns(3)
+                                with col1:
+                                    st.metric("Intervalo Padrão", f"{info.intervalo_padrao} {unidade_equip}")
+                                with col2:
+                                    if pd.notna(info.lubrificante_nome):
+                                        st.metric("Lubrificante", f"{info.lubrificante_nome} ({info.lubrificante_viscosidade})")
+                                    else:
+                                        st.metric("Lubrificante", "Não aplicável")
+                                with col3:
+                                    st.metric("Total de Manutenções", int(info.total_manutencoes))
+                                
+                                # Mostrar status atual se houver histórico
+                                if info.total_manutencoes > 0:
+                                    # A última TROCA (não remonta) define o restante
+                                    if pd.notna(info.data_ultima_troca):
+                                        hod_ultima_troca = info.hod_ultima_troca
+                                        if pd.notna(hod_atual):
+                                            km_restantes = (hod_ultima_troca + info.intervalo_padrao) - hod_atual
                                             
-                                            # Buscar hodômetro atual
-                                            hod_atual = df[df['Cod_Equip'] == cod_sel]['Hod_Hor_Atual'].max()
-                                            if pd.notna(hod_atual):
-                                                km_restantes = (hod_ultima_troca + intervalo_padrao) - hod_atual
-                                                
-                                                col_status1, col_status2 = st.columns(2)
-                                                with col_status1:
-                                                    if km_restantes > 0:
-                                                        st.success(f"🟢 **{formatar_brasileiro_int(km_restantes)}** restantes")
-                                                    else:
-                                                        st.error(f"🔴 **{formatar_brasileiro_int(abs(km_restantes))}** em atraso")
-                                                
-                                                with col_status2:
-                                                    st.info(f"Última troca: {ultima_troca['Data']} ({formatar_brasileiro_int(hod_ultima_troca)})")
-                                        else:
-                                            st.warning("⚠️ Nenhuma troca registrada. Remontas não reiniciam o contador.")
-                                        
-                                        # Mostrar última manutenção (qualquer tipo)
-                                        ultima_manutencao = historico_componente.iloc[0]
-                                        tipo_ultima = ultima_manutencao.get('tipo_servico', 'N/A') if 'tipo_servico' in historico_componente.columns else 'N/A'
-                                        st.info(f"Última manutenção: {ultima_manutencao['Data']} - {tipo_ultima}")
+                                            col_status1, col_status2 = st.columns(2)
+                                            with col_status1:
+                                                if km_restantes > 0:
+                                                    st.success(f"🟢 **{formatar_brasileiro_int(km_restantes)}** restantes")
+                                                else:
+                                                    st.error(f"🔴 **{formatar_brasileiro_int(abs(km_restantes))}** em atraso")
+                                            
+                                            with col_status2:
+                                                st.info(f"Última troca: {info.data_ultima_troca} ({formatar_brasileiro_int(hod_ultima_troca)})")
+                                    else:
+                                        st.warning("⚠️ Nenhuma troca registrada. Remontas não reiniciam o contador.")
+                                    
+                                    # Mostrar última manutenção (qualquer tipo)
+                                    tipo_ultima = info.tipo_ultima_manutencao if pd.notna(info.tipo_ultima_manutencao) else 'N/A'
+                                    st.info(f"Última manutenção: {info.data_ultima_manutencao} - {tipo_ultima}")
                                     
                                     # Mostrar histórico detalhado
-                                    if not historico_componente.empty:
-                                        st.subheader("Histórico Detalhado")
-                                        # Selecionar colunas disponíveis
-                                        colunas_disponiveis = ['Data', 'Hod_Hor_No_Servico', 'Observacoes']
-                                        
-                                        # Verificar e adicionar colunas se existirem
-                                        if 'tipo_servico' in historico_componente.columns:
-                                            colunas_disponiveis.insert(2, 'tipo_servico')
-                                        if 'lubrificante_utilizado' in historico_componente.columns:
-                                            colunas_disponiveis.insert(3, 'lubrificante_utilizado')
-                                        
-                                        # Filtrar apenas colunas que existem no DataFrame
-                                        colunas_finais = [col for col in colunas_disponiveis if col in historico_componente.columns]
-                                        
-                                        st.dataframe(historico_componente[colunas_finais])
-                                    else:
-                                        st.info("Nenhum histórico de manutenção para este componente.")
+                                    st.subheader("Histórico Detalhado")
+                                    st.dataframe(historico_componente[['Data', 'Hod_Hor_No_Servico', 'tipo_servico', 'lubrificante_utilizado', 'Observacoes']])
+                                else:
+                                    st.info("Nenhum histórico de manutenção para este componente.")
                     else:
                         st.info("Nenhum componente configurado para esta classe de equipamento.")
                     
@@ -16116,20 +6147,7 @@ def main():
                     consumo_eq = df.copy()
                 
                 if precos_map:
-                    df_gastos_insights = consumo_eq.copy()
-                    if 'tipo_combustivel' in df_frotas.columns:
-                        df_gastos_insights = df_gastos_insights.merge(df_frotas[['Cod_Equip','tipo_combustivel']], on='Cod_Equip', how='left')
-                        # Verificar se a coluna foi criada após o merge
-                        if 'tipo_combustivel' in df_gastos_insights.columns:
-                            df_gastos_insights['tipo_combustivel'] = df_gastos_insights['tipo_combustivel'].fillna('Diesel S500')
-                        else:
-                            df_gastos_insights['tipo_combustivel'] = 'Diesel S500'
-                    else:
-                        df_gastos_insights['tipo_combustivel'] = 'Diesel S500'
-                    
-                    df_gastos_insights['preco_unit'] = df_gastos_insights['tipo_combustivel'].map(precos_map).fillna(0.0)
-                    df_gastos_insights['custo'] = df_gastos_insights['Qtde Litros'].fillna(0.0) * df_gastos_insights['preco_unit']
-                    gasto_total_combustivel_insights = df_gastos_insights['custo'].sum()
+                    gasto_total_combustivel_insights = consumo_eq['custo'].sum()
                 
                 # Gerar insights baseados nos dados
                 insights = []
@@ -16333,7 +6351,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                         
                         # Buscar informações do lubrificante se existir
                         if info['lubrificante_id']:
-                            conn = sqlite3.connect(DB_PATH)
+                            conn = obter_conexao(DB_PATH)
                             df_lub = pd.read_sql("SELECT nome, viscosidade, quantidade_estoque, unidade FROM lubrificantes WHERE id = ?", conn, params=(info['lubrificante_id'],))
                             conn.close()
                             if not df_lub.empty:
@@ -16375,7 +6393,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                         # Lubrificante utilizado (se aplicável)
                         lubrificante_utilizado = None
                         if componente_servico and componente_servico in componente_info and info['lubrificante_id']:
-                            conn = sqlite3.connect(DB_PATH)
+                            conn = obter_conexao(DB_PATH)
                             df_lub = pd.read_sql("SELECT nome, quantidade_estoque, unidade FROM lubrificantes WHERE id = ?", conn, params=(info['lubrificante_id'],))
                             conn.close()
                             if not df_lub.empty:
@@ -16421,30 +6439,28 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                 # Atualizar estoque de lubrificante se aplicável
                                 if lubrificante_utilizado and tipo_servico in ["Troca", "Remonta"]:
                                     try:
-                                        conn = sqlite3.connect(DB_PATH)
-                                        cursor = conn.cursor()
-                                        
-                                        # Buscar a capacidade do componente
-                                        cursor.execute(
-                                            "SELECT capacidade_litros FROM componentes_regras WHERE nome_componente = ? AND classe_operacional = (SELECT Classe_Operacional FROM frotas WHERE Cod_Equip = ?)",
-                                            (componente_servico, cod_equip)
-                                        )
-                                        result = cursor.fetchone()
-                                        capacidade = result[0] if result and result[0] else 1.0  # Padrão 1L se não definido
-                                        
-                                        # Reduzir estoque do lubrificante baseado na capacidade
-                                        cursor.execute(
-                                            "UPDATE lubrificantes SET quantidade_estoque = quantidade_estoque - ? WHERE nome = ?",
-                                            (capacidade, lubrificante_utilizado)
-                                        )
-                                        conn.commit()
-                                        conn.close()
-                                        # Buscar o novo estoque após a atualização
-                                        cursor.execute(
-                                            "SELECT quantidade_estoque, unidade FROM lubrificantes WHERE nome = ?",
-                                            (lubrificante_utilizado,)
-                                        )
-                                        result_estoque = cursor.fetchone()
+                                        with conexao_escrita(DB_PATH) as conn:
+                                            cursor = conn.cursor()
+                                            
+                                            # Buscar a capacidade do componente
+                                            cursor.execute(
+                                                "SELECT capacidade_litros FROM componentes_regras WHERE nome_componente = ? AND classe_operacional = (SELECT Classe_Operacional FROM frotas WHERE Cod_Equip = ?)",
+                                                (componente_servico, cod_equip)
+                                            )
+                                            result = cursor.fetchone()
+                                            capacidade = result[0] if result and result[0] else 1.0  # Padrão 1L se não definido
+                                            
+                                            # Reduzir estoque do lubrificante baseado na capacidade
+                                            cursor.execute(
+                                                "UPDATE lubrificantes SET quantidade_estoque = quantidade_estoque - ? WHERE nome = ?",
+                                                (capacidade, lubrificante_utilizado)
+                                            )
+                                            # Buscar o novo estoque após a atualização
+                                            cursor.execute(
+                                                "SELECT quantidade_estoque, unidade FROM lubrificantes WHERE nome = ?",
+                                                (lubrificante_utilizado,)
+                                            )
+                                            result_estoque = cursor.fetchone()
                                         novo_estoque = result_estoque[0] if result_estoque else 0
                                         unidade_estoque = result_estoque[1] if result_estoque else 'L'
                                         
@@ -16465,8 +6481,8 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                         st.warning(f"Não foi possível atualizar o estoque do lubrificante: {e}")
                                 
                                 # Atualizar cache para refletir mudanças
-                                st.cache_data.clear()
-                                rerun_keep_tab("🛠️ Controle de Manutenção")
+                                invalidar_tabelas('componentes_historico', 'lubrificantes')
+                                rerun_keep_tab("🛠️ Controle de Manutenção", clear_cache=False)
                             else:
                                 st.error(f"Erro ao salvar manutenção: {message}")
                         else:
@@ -16660,8 +6676,8 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                 if excluir_abastecimento(DB_PATH, rowid_para_excluir):
                                                     st.success("Registro excluído com sucesso!")
                                                     # Invalidar cache para atualizar contadores
-                                                    st.cache_data.clear()
-                                                    rerun_keep_tab("⚙️ Gerir Lançamentos")
+                                                    invalidar_tabelas('abastecimentos')
+                                                    rerun_keep_tab("⚙️ Gerir Lançamentos", clear_cache=False)
                                     
                                     elif tipo_exclusao == "Manutenção":
                                         st.subheader("🗑️ Excluir Manutenção")
@@ -16706,8 +6722,8 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                 if excluir_manutencao(DB_PATH, rowid_para_excluir):
                                                     st.success("Manutenção excluída com sucesso!")
                                                     # Invalidar cache para atualizar contadores
-                                                    st.cache_data.clear()
-                                                    rerun_keep_tab("⚙️ Gerir Lançamentos")
+                                                    invalidar_tabelas('manutencoes')
+                                                    rerun_keep_tab("⚙️ Gerir Lançamentos", clear_cache=False)
                                     
                                     elif tipo_exclusao == "Manutenção de Componentes":
                                         st.subheader("🗑️ Excluir Manutenção de Componentes")
@@ -17053,8 +7069,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
             if tab_gerir_lub is not None:
                 with tab_gerir_lub:
                         st.header("🛢️ Gestão de Lubrificantes")
-                        ensure_lubrificantes_schema()
-                        conn = sqlite3.connect(DB_PATH)
+                        conn = obter_conexao(DB_PATH)
                         df_lub = pd.read_sql("SELECT * FROM lubrificantes", conn)
                         df_mov = pd.read_sql("SELECT * FROM lubrificantes_movimentacoes", conn)
                         df_almoxarifados = get_almoxarifados()
@@ -17707,16 +7722,14 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                 # Filtro por histórico de abastecimento
                                 if filtro_abastecimento != 'Todas':
                                     try:
-                                        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                        with obter_conexao(DB_PATH) as conn:
                                             cur = conn.cursor()
                                             
                                             # Verificar se a tabela abastecimentos existe
                                             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='abastecimentos'")
                                             if cur.fetchone():
                                                 # Obter códigos de equipamentos com abastecimentos
-                                                # A coluna original é "Cód. Equip." (com acento e ponto)
-                                                cur.execute("SELECT DISTINCT \"Cód. Equip.\" FROM abastecimentos")
-                                                equip_com_abastecimento = [row[0] for row in cur.fetchall()]
+                                                equip_com_abastecimento = equipamentos_com_abastecimento(DB_PATH)
                                                 
                                                 if filtro_abastecimento == 'Com Abastecimento':
                                                     df_filtrado = df_filtrado[df_filtrado['Cod_Equip'].isin(equip_com_abastecimento)]
@@ -17735,13 +7748,11 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                 # Verificar frotas sem abastecimento de uma vez só (mais eficiente)
                                 equip_com_abastecimento = set()
                                 try:
-                                    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                    with obter_conexao(DB_PATH) as conn:
                                         cur = conn.cursor()
                                         cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='abastecimentos'")
                                         if cur.fetchone():
-                                            # A coluna original é "Cód. Equip." (com acento e ponto)
-                                            cur.execute("SELECT DISTINCT \"Cód. Equip.\" FROM abastecimentos")
-                                            equip_com_abastecimento = {row[0] for row in cur.fetchall()}
+                                            equip_com_abastecimento = equipamentos_com_abastecimento(DB_PATH)
                                             st.info(f"🔍 Debug: Encontrados {len(equip_com_abastecimento)} códigos de equipamentos com abastecimento")
                                         else:
                                             st.warning("⚠️ Tabela 'abastecimentos' não encontrada no banco de dados")
@@ -17794,7 +7805,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                             st.warning("⚠️ Esta ação excluirá TODAS as frotas sem histórico de abastecimento!")
                                             if st.button("✅ CONFIRMAR EXCLUSÃO EM LOTE", key="confirm_delete_lote", type="primary"):
                                                 try:
-                                                    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                                    with conexao_escrita(DB_PATH) as conn:
                                                         cur = conn.cursor()
                                                         
                                                         # Obter códigos das frotas sem abastecimento
@@ -17838,6 +7849,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                             # Excluir todas as frotas sem abastecimento
                                                             placeholders = ','.join(['?' for _ in frotas_sem_abastecimento_codigos])
                                                             cur.execute(f"DELETE FROM frotas WHERE Cod_Equip IN ({placeholders})", frotas_sem_abastecimento_codigos)
+                                                            atualizar_derivados_abastecimentos(conn, frotas_sem_abastecimento_codigos)
                                                             conn.commit()
                                                             st.success(f"✅ {len(frotas_sem_abastecimento_codigos)} frotas sem abastecimento excluídas com sucesso!")
                                                             rerun_keep_tab("⚙️ Gerir Frotas")
@@ -17892,7 +7904,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                                key=f"confirm_classe_lote_{idx_classe_lote}", 
                                                                type="primary"):
                                                         try:
-                                                            with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                                            with conexao_escrita(DB_PATH) as conn:
                                                                 cur = conn.cursor()
                                                                 
                                                                 # Obter códigos das frotas da classe
@@ -17934,6 +7946,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                                     # Excluir todas as frotas da classe
                                                                     placeholders = ','.join(['?' for _ in frotas_classe_codigos])
                                                                     cur.execute(f"DELETE FROM frotas WHERE Cod_Equip IN ({placeholders})", frotas_classe_codigos)
+                                                                    atualizar_derivados_abastecimentos(conn, frotas_classe_codigos)
                                                                     conn.commit()
                                                                     st.success(f"✅ Classe '{classe_info['classe']}' e {classe_info['num_frotas']} frotas excluídas com sucesso!")
                                                                     rerun_keep_tab("⚙️ Gerir Frotas")
@@ -18039,7 +8052,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                 # Confirmar exclusão
                                                 if st.button("✅ Confirmar Exclusão", key=f"confirm_delete_{idx}", type="primary"):
                                                     try:
-                                                        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                                        with conexao_escrita(DB_PATH) as conn:
                                                             cur = conn.cursor()
                                                             
                                                             # Verificar se há dados relacionados
@@ -18050,8 +8063,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                             # Verificar se as tabelas existem antes de consultar
                                                             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='abastecimentos'")
                                                             if cur.fetchone():
-                                                                # A coluna original é "Cód. Equip." (com acento e ponto)
-                                                                cur.execute("SELECT COUNT(*) FROM abastecimentos WHERE \"Cód. Equip.\" = ?", (frota['Cod_Equip'],))
+                                                                cur.execute(SQL_CONTAGEM_ABASTECIMENTOS_EQUIPAMENTO, (int(frota['Cod_Equip']),))
                                                                 num_abastecimentos = cur.fetchone()[0]
                                                             
                                                             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='pneus_historico'")
@@ -18061,7 +8073,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                             
                                                             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='manutencoes'")
                                                             if cur.fetchone():
-                                                                cur.execute("SELECT COUNT(*) FROM manutencoes WHERE Cod_Equip = ?", (frota['Cod_Equip'],))
+                                                                cur.execute(SQL_CONTAGEM_MANUTENCOES_EQUIPAMENTO, (frota['Cod_Equip'],))
                                                                 num_manutencoes = cur.fetchone()[0]
                                                             
                                                             if num_abastecimentos > 0 or num_pneus > 0 or num_manutencoes > 0:
@@ -18078,6 +8090,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                             else:
                                                                 # Excluir a frota
                                                                 cur.execute("DELETE FROM frotas WHERE Cod_Equip = ?", (frota['Cod_Equip'],))
+                                                                atualizar_derivados_abastecimentos(conn, [frota['Cod_Equip']])
                                                                 conn.commit()
                                                                 st.success(f"✅ Frota '{frota['DESCRICAO_EQUIPAMENTO']}' excluída com sucesso!")
                                                                 rerun_keep_tab("⚙️ Gerir Frotas")
@@ -18131,7 +8144,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                 # Confirmar exclusão
                                                 if st.button("✅ Confirmar Exclusão", key=f"confirm_delete_classe_{idx_classe}", type="primary"):
                                                     try:
-                                                        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                                        with conexao_escrita(DB_PATH) as conn:
                                                             cur = conn.cursor()
                                                             
                                                             # Verificar se há dados relacionados
@@ -18145,8 +8158,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='abastecimentos'")
                                                             if cur.fetchone():
                                                                 placeholders = ','.join(['?' for _ in frotas_codigos])
-                                                                # A coluna original é "Cód. Equip." (com acento e ponto)
-                                                                cur.execute(f"SELECT COUNT(*) FROM abastecimentos WHERE \"Cód. Equip.\" IN ({placeholders})", frotas_codigos)
+                                                                cur.execute(f"SELECT COUNT(*) FROM abastecimentos_equip WHERE cod_equip IN ({placeholders})", [int(c) for c in frotas_codigos])
                                                                 num_abastecimentos = cur.fetchone()[0]
                                                             
                                                             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='pneus_historico'")
@@ -18175,6 +8187,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                             else:
                                                                 # Excluir todas as frotas da classe
                                                                 cur.execute(f"DELETE FROM frotas WHERE Cod_Equip IN ({placeholders})", frotas_codigos)
+                                                                atualizar_derivados_abastecimentos(conn, frotas_codigos)
                                                                 conn.commit()
                                                                 st.success(f"✅ Classe '{classe}' e {num_frotas} frotas excluídas com sucesso!")
                                                                 rerun_keep_tab("⚙️ Gerir Frotas")
@@ -18235,7 +8248,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                         if success:
                                             st.success(message)
                                             # Limpar cache para atualizar dados
-                                            st.cache_data.clear()
+                                            invalidar_tabelas('frotas')
                                             st.rerun()
                                         else:
                                             st.error(message)
@@ -18302,7 +8315,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                         if success:
                                             st.success(message)
                                             # Limpar cache para atualizar dados
-                                            st.cache_data.clear()
+                                            invalidar_tabelas('frotas')
                                             st.rerun()
                                         else:
                                             st.error(message)
@@ -18712,15 +8725,12 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                 # --- Gestão de Componentes e Lubrificantes ---
                 exp_comp_open = st.session_state.get('open_expander_config_componentes', False)
                 with st.expander("Configurar Componentes e Lubrificantes por Classe", expanded=bool(exp_comp_open)):
-                    # Garantir que a tabela de lubrificantes existe
-                    ensure_lubrificantes_schema()
-                    
                     classes_operacionais = sorted([c for c in df_frotas['Classe_Operacional'].unique() if pd.notna(c) and str(c).strip()])
                     df_comp_regras = get_component_rules() # Busca os dados mais recentes
                     
                     # Carregar lubrificantes disponíveis
                     try:
-                        conn = sqlite3.connect(DB_PATH)
+                        conn = obter_conexao(DB_PATH)
                         df_lubrificantes = pd.read_sql("SELECT id, nome, tipo, viscosidade FROM lubrificantes ORDER BY nome", conn)
                         conn.close()
                     except Exception as e:
@@ -18777,7 +8787,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                             if lub_info != "Sem lubrificante":
                                                 # Buscar estoque do lubrificante
                                                 try:
-                                                    conn = sqlite3.connect(DB_PATH)
+                                                    conn = obter_conexao(DB_PATH)
                                                     df_lub_estoque = pd.read_sql(
                                                         "SELECT quantidade_estoque, unidade FROM lubrificantes WHERE nome = ?", 
                                                         conn, params=(lub_info,)
@@ -19124,6 +9134,38 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
         if tab_importar is not None:
             with tab_importar:
                 st.header("📤 Importar Dados")
+
+                importacoes_recentes = listar_importacoes(DB_PATH)
+                ha_importacoes_ativas = not importacoes_recentes.empty and importacoes_recentes['status'].isin(STATUS_IMPORTACAO_ATIVOS).any()
+
+                @st.fragment(run_every=INTERVALO_ATUALIZACAO_IMPORTACOES if ha_importacoes_ativas else None)
+                def painel_importacoes():
+                    df_jobs = listar_importacoes(DB_PATH)
+                    if df_jobs.empty:
+                        return
+                    with st.expander("📋 Importações recentes", expanded=bool(df_jobs['status'].isin(STATUS_IMPORTACAO_ATIVOS).any())):
+                        for _, job in df_jobs.iterrows():
+                            titulo = f"#{job['id']} {TIPOS_IMPORTACAO.get(job['tipo'], {}).get('descricao', job['tipo'])} - {job['arquivo_nome']}"
+                            if job['status'] in STATUS_IMPORTACAO_ATIVOS:
+                                total = job['total_estimado']
+                                fracao = min(job['linhas_processadas'] / total, 1.0) if pd.notna(total) and total else 0.0
+                                andamento = f"{job['linhas_processadas']}/{int(total)}" if pd.notna(total) and total else f"{job['linhas_processadas']}"
+                                st.progress(fracao, text=f"{titulo}: {job['status']} ({andamento})")
+                            elif job['status'] == 'erro':
+                                st.error(f"{titulo}: {job['mensagem']}")
+                            elif job['inseridos'] > 0:
+                                st.success(f"{titulo}: {job['mensagem']}")
+                            else:
+                                st.warning(f"{titulo}: {job['mensagem']}")
+
+                    # Quando uma importação iniciada nesta sessão termina, recarrega o painel com os dados novos
+                    acompanhadas = st.session_state.get('importacoes_acompanhadas', set())
+                    concluidas = acompanhadas & set(df_jobs.loc[~df_jobs['status'].isin(STATUS_IMPORTACAO_ATIVOS), 'id'])
+                    if concluidas:
+                        acompanhadas -= concluidas
+                        rerun_keep_tab("📤 Importar Dados")
+
+                painel_importacoes()
                 sub_tab_abastec, sub_tab_motoristas, sub_tab_precos, sub_tab_pneus, sub_tab_lubrificantes, sub_tab_componentes, sub_tab_sucateamento = st.tabs(
                     ["⛽ Abastecimentos", "👤 Motoristas", "💲 Preços de Combustível", "🚚 Pneus", "🛢️ Lubrificantes", "⚙️ Componentes", "📊 Análise Sucateamento"]
                 )
@@ -19139,22 +9181,25 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                         st.markdown("---")
                         st.write("Pré-visualização:")
                         try:
-                            df_preview = pd.read_excel(arquivo_carregado)
-                            st.dataframe(df_preview.head())
+                            df_preview = pre_visualizar_planilha(arquivo_carregado)
+                            st.dataframe(df_preview)
                             if st.button("Confirmar e Inserir Dados", type="primary"):
-                                with st.spinner("Importando dados..."):
-                                    num_inseridos, num_duplicados, mensagem = importar_abastecimentos_de_planilha(DB_PATH, arquivo_carregado)
-                                if num_inseridos > 0:
-                                    msg_sucesso = f"{num_inseridos} registos importados."
-                                    if num_duplicados > 0:
-                                        msg_sucesso += f" {num_duplicados} duplicados ignorados."
-                                    st.success(msg_sucesso)
-                                    rerun_keep_tab("📤 Importar Dados")
-                                else:
-                                    st.error(mensagem)
+                                iniciar_importacao('abastecimentos', arquivo_carregado)
                         except Exception as e:
                             st.error(f"Não foi possível ler a planilha: {e}")
 
+                    st.markdown("---")
+                    st.subheader("Importação em Lote")
+                    st.info("Envie de uma vez as planilhas de todos os postos do mês (.xlsx, .csv ou um .zip com elas), com as mesmas colunas acima. Registros repetidos entre os arquivos são importados uma vez só.")
+                    arquivos_lote = st.file_uploader(
+                        "Selecione as planilhas do lote",
+                        type=['xlsx', 'csv', 'zip'], accept_multiple_files=True, key="upl_abast_lote"
+                    )
+                    if arquivos_lote:
+                        st.write(f"{len(arquivos_lote)} arquivo(s) selecionado(s): {', '.join(a.name for a in arquivos_lote)}")
+                        if st.button("Importar Lote", type="primary", key="btn_importar_lote"):
+                            iniciar_importacao('abastecimentos_lote', list(arquivos_lote))
+
                 with sub_tab_motoristas:
                     st.subheader("Importar Motoristas por Planilha")
                     st.info("Colunas esperadas: `Matricula`, `Nome`, opcional `Cod_Pessoa`. A matrícula será exibida nos gráficos; na consulta será mostrada matrícula e nome.")
@@ -19164,40 +9209,45 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                 df_prev = pd.read_excel(arquivo_motoristas)
                                 st.dataframe(df_prev.head())
                                 if st.button("Confirmar e Inserir Motoristas", type="primary"):
-                                    with st.spinner("Importando motoristas..."):
-                                        ensure_motoristas_schema()
-                                        inseridos, duplicados, msg = importar_motoristas_de_planilha(DB_PATH, arquivo_motoristas)
-                                    if inseridos > 0:
-                                        st.success(f"{msg}")
-                                        rerun_keep_tab("📤 Importar Dados")
-                                    else:
-                                        st.error(msg)
+                                    iniciar_importacao('motoristas', arquivo_motoristas)
                             except Exception as e:
                                 st.error(f"Erro ao ler planilha: {e}")
 
                 with sub_tab_precos:
                     st.subheader("Definir Preços por Tipo de Combustível")
-                    ok, msg = ensure_precos_combustivel_schema()
-                    if not ok:
-                        st.warning(msg)
-                        precos_map = get_precos_combustivel_map()
-                        tipos = ['Diesel S500', 'Diesel S10', 'Gasolina', 'Etanol', 'Biodiesel']
-                        cols = st.columns(5)
-                        novos_precos = {}
-                        for i, t in enumerate(tipos):
-                            with cols[i % 5]:
-                                valor = st.number_input(f"{t}", min_value=0.0, format="%.3f", value=float(precos_map.get(t) or 0.0), key=f"preco_{t}")
-                                novos_precos[t] = valor
-                        if st.button("Salvar Preços", type="secondary"):
-                            with st.spinner("Salvando preços..."):
-                                ok_all = True
-                                for t, p in novos_precos.items():
-                                    ok, _ = upsert_preco_combustivel(t, float(p) if p is not None else None)
-                                    ok_all = ok_all and ok
-                                if ok_all:
-                                    st.success("Preços atualizados.")
-                                else:
-                                    st.warning("Alguns preços podem não ter sido salvos.")
+                    precos_map = get_precos_combustivel_map()
+                    tipos = ['Diesel S500', 'Diesel S10', 'Gasolina', 'Etanol', 'Biodiesel']
+                    cols = st.columns(5)
+                    novos_precos = {}
+                    for i, t in enumerate(tipos):
+                        with cols[i % 5]:
+                            valor = st.number_input(f"{t}", min_value=0.0, format="%.3f", value=float(precos_map.get(t) or 0.0), key=f"preco_{t}")
+                            novos_precos[t] = valor
+                    vigente_desde = st.date_input(
+                        "Vigentes a partir de", value=date.today(), key="precos_vigencia",
+                        help="Abastecimentos anteriores a esta data mantêm o preço da época."
+                    )
+                    if st.button("Salvar Preços", type="secondary"):
+                        with st.spinner("Salvando preços..."):
+                            ok_all = True
+                            for t, p in novos_precos.items():
+                                ok, _ = upsert_preco_combustivel(t, float(p) if p is not None else None, vigente_desde)
+                                ok_all = ok_all and ok
+                            if ok_all:
+                                st.success("Preços atualizados.")
+                            else:
+                                st.warning("Alguns preços podem não ter sido salvos.")
+
+                    with st.expander("Histórico de preços"):
+                        historico_precos = get_historico_precos_combustivel()
+                        if not historico_precos.empty:
+                            historico_precos['vigente_desde'] = pd.to_datetime(historico_precos['vigente_desde']).dt.strftime('%d/%m/%Y')
+                            st.dataframe(
+                                historico_precos.rename(columns={'tipo_combustivel': 'Combustível', 'vigente_desde': 'Vigente desde', 'preco': 'Preço (R$/L)'}),
+                                use_container_width=True, hide_index=True
+                            )
+                        else:
+                            st.info("Nenhum preço cadastrado.")
                                     
                 with sub_tab_pneus:
                     st.subheader("Importar Histórico de Pneus")
@@ -19211,13 +9261,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                 df_prev = pd.read_excel(arquivo_pneus)
                                 st.dataframe(df_prev.head())
                                 if st.button("Confirmar e Inserir Pneus", type="primary"):
-                                    ensure_pneus_schema()
-                                    inseridos, duplicados, msg = importar_pneus_de_planilha(DB_PATH, arquivo_pneus)
-                                    if inseridos > 0:
-                                        st.success(f"{msg}")
-                                        st.rerun()
-                                    else:
-                                        st.error(msg)
+                                    iniciar_importacao('pneus', arquivo_pneus)
                             except Exception as e:
                                 st.error(f"Erro ao ler planilha: {e}")
 
@@ -19236,9 +9280,8 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                             status = st.selectbox("Status do Pneu", ["Ativo", "Sucateado", "Reformado"])
                             vida_atual = st.number_input("Vida Atual do Pneu", min_value=1, step=1, value=1)
                             if st.form_submit_button("Salvar Pneu"):
-                                ensure_pneus_schema()
                                 try:
-                                    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                    with conexao_escrita(DB_PATH) as conn:
                                         cur = conn.cursor()
                                         cur.execute(
                                             "INSERT INTO pneus_historico (Cod_Equip, posicao, marca, modelo, numero_fogo, data_instalacao, hodometro_instalacao, observacoes, status, vida_atual) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
@@ -19415,7 +9458,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                             novas_obs = st.text_area("Observações", value=pneu_row['observacoes'], height=50)
                                             if st.form_submit_button("Salvar Alterações"):
                                                 try:
-                                                    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                                    with conexao_escrita(DB_PATH) as conn:
                                                         cur = conn.cursor()
                                                         cur.execute(
                                                             "UPDATE pneus_historico SET posicao=?, marca=?, modelo=?, numero_fogo=?, data_instalacao=?, hodometro_instalacao=?, observacoes=? WHERE id=?",
@@ -19456,7 +9499,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                                 
                                                 if st.form_submit_button("🚫 Confirmar Sucateamento"):
                                                     try:
-                                                        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                                        with conexao_escrita(DB_PATH) as conn:
                                                             cur = conn.cursor()
                                                             
                                                             # Verificar se a coluna causa_sucateamento existe
@@ -19488,7 +9531,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                     
                                     if st.button("Excluir Pneu Selecionado", type="primary"):
                                         try:
-                                            with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                                            with conexao_escrita(DB_PATH) as conn:
                                                 cur = conn.cursor()
                                                 cur.execute("DELETE FROM pneus_historico WHERE id=?", (pneu_row['id'],))
                                                 conn.commit()
@@ -19507,13 +9550,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                 df_lub_import = pd.read_excel(arquivo_lub)
                                 st.dataframe(df_lub_import.head())
                                 if st.button("Confirmar e Inserir Lubrificantes", type="primary"):
-                                    with st.spinner("Importando lubrificantes..."):
-                                        inseridos, duplicados, msg = importar_lubrificantes_de_planilha(DB_PATH, arquivo_lub)
-                                    if inseridos > 0:
-                                        st.success(f"{msg}")
-                                        st.rerun()
-                                    else:
-                                        st.error(msg)
+                                    iniciar_importacao('lubrificantes', arquivo_lub)
                             except Exception as e:
                                 st.error(f"Erro ao importar lubrificantes: {e}")
 
@@ -19527,7 +9564,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                             unidade = st.selectbox("Unidade", ["L", "kg", "gal"])
                             obs = st.text_area("Observações")
                             if st.form_submit_button("Salvar Lubrificante"):
-                                with sqlite3.connect(DB_PATH) as conn:
+                                with conexao_escrita(DB_PATH) as conn:
                                     cur = conn.cursor()
                                     cur.execute("PRAGMA table_info(lubrificantes)")
                                     cols = [c[1] for c in cur.fetchall()]
@@ -19567,27 +9604,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                             st.dataframe(df_comp_import.head())
                             
                             if st.button("Confirmar e Inserir Componentes", type="primary"):
-                                with st.spinner("Importando componentes..."):
-                                    # Garantir que as tabelas existem
-                                    ensure_lubrificantes_schema()
-                                    
-                                    # Importar componentes
-                                    inseridos, duplicados, lubrificantes_criados, msg = importar_componentes_de_planilha(
-                                        DB_PATH, arquivo_componentes, classe_selecionada
-                                    )
-                                
-                                if inseridos > 0:
-                                    msg_sucesso = f"✅ **{inseridos}** componentes importados com sucesso!"
-                                    if duplicados > 0:
-                                        msg_sucesso += f"\n⚠️ **{duplicados}** componentes duplicados ignorados"
-                                    if lubrificantes_criados > 0:
-                                        msg_sucesso += f"\n🛢️ **{lubrificantes_criados}** lubrificantes criados automaticamente"
-                                    
-                                    st.success(msg_sucesso)
-                                    st.info(f"📋 **Detalhes:** {msg}")
-                                    rerun_keep_tab("📤 Importar Dados")
-                                else:
-                                    st.error(f"❌ Erro na importação: {msg}")
+                                iniciar_importacao('componentes', arquivo_componentes, {'classe_operacional': classe_selecionada})
                         except Exception as e:
                             st.error(f"Erro ao ler planilha: {e}")
                     
@@ -19639,7 +9656,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                     col1_stats, col2_stats, col3_stats, col4_stats = st.columns(4)
                     
                     try:
-                        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                        with obter_conexao(DB_PATH) as conn:
                             # Total de pneus
                             total_pneus = pd.read_sql_query("SELECT COUNT(*) as total FROM pneus_historico", conn).iloc[0]['total']
                             
@@ -19674,7 +9691,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                     st.subheader("🔍 Análise por Causa de Sucateamento")
                     
                     try:
-                        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                        with obter_conexao(DB_PATH) as conn:
                             # Verificar se a coluna existe
                             cur = conn.cursor()
                             cur.execute("PRAGMA table_info(pneus_historico)")
@@ -19741,7 +9758,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                     st.subheader("📋 Lista Detalhada de Pneus Sucateados")
                     
                     try:
-                        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+                        with obter_conexao(DB_PATH) as conn:
                             # Verificar se as colunas existem
                             cur = conn.cursor()
                             cur.execute("PRAGMA table_info(pneus_historico)")
@@ -20104,7 +10121,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                 if st.button("🔄 Backup Automático", type="secondary"):
                     with st.spinner("Verificando e criando backup automático..."):
                         # Verificar se há dados no banco
-                        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+                        conn = obter_conexao(DB_PATH)
                         cursor = conn.cursor()
                         cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
                         num_tables = cursor.fetchone()[0]
@@ -20131,7 +10148,7 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                 if st.button("🔍 Verificar Integridade", type="primary"):
                     with st.spinner("Verificando integridade dos dados..."):
                         try:
-                            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+                            conn = obter_conexao(DB_PATH)
                             cursor = conn.cursor()
                             
                             # Verificar tabelas existentes
@@ -20256,6 +10273,42 @@ Relatório gerado automaticamente pelo sistema de gestão de frotas.
                                 st.write(inc)
                         else:
                             st.success("✅ Nenhuma inconsistência encontrada!")
+                
+                # Desempenho do cache
+                st.markdown("---")
+                st.subheader("⚡ Desempenho do Cache")
+                df_cache = estatisticas_cache()
+                if df_cache.empty:
+                    st.info("Nenhuma função em cache foi executada neste processo ainda.")
+                else:
+                    st.dataframe(df_cache, use_container_width=True, hide_index=True)
+                if st.button("🧹 Limpar Cache", key="limpar_cache_saude"):
+                    limpar_cache()
+                    st.success("Cache limpo.")
+                
+                # Planos das consultas frequentes
+                st.markdown("---")
+                st.subheader("🧭 Planos de Consulta")
+                if st.button("🧭 Verificar Planos de Consulta", key="verificar_planos_saude"):
+                    df_planos = verificar_planos_consulta(DB_PATH)
+                    varreduras = int(df_planos['Varredura Completa'].sum())
+                    if varreduras:
+                        st.warning(f"⚠️ {varreduras} consulta(s) fazem varredura completa de tabela ou falharam")
+                    else:
+                        st.success("✅ Todas as consultas frequentes usam índices")
+                    st.dataframe(df_planos, use_container_width=True, hide_index=True)
+                
+                # Memória dos DataFrames carregados
+                st.markdown("---")
+                st.subheader("🧠 Uso de Memória")
+                df_memoria = relatorio_memoria({
+                    'Abastecimentos': df, 'Frotas': df_frotas, 'Manutenções': df_manutencoes,
+                    'Regras de Componentes': df_comp_regras, 'Histórico de Componentes': df_comp_historico,
+                    'Regras de Checklist': df_checklist_regras, 'Itens de Checklist': df_checklist_itens,
+                    'Histórico de Checklist': df_checklist_historico,
+                })
+                st.metric("Total (MB)", formatar_brasileiro(df_memoria['Memória (MB)'].sum()))
+                st.dataframe(df_memoria, use_container_width=True, hide_index=True)
         
         # Aba de Gerir Utilizadores
         if tab_gerir_users is not None:
@@ -0,0 +1,110 @@
+"""Mede o tempo de inicialização do dashboard.
+
+Reporta duas medidas, cada uma repetida algumas vezes (mediana, mínimo e máximo):
+
+- importação a frio: tempo para importar `acompanhamento` em um processo Python novo;
+- primeira renderização: tempo da primeira execução completa do script pelo
+  AppTest do Streamlit, também em um processo novo.
+
+Uso:
+    python benchmark_inicializacao.py [--repeticoes 5] [--saida historico.jsonl]
+
+Com --saida, cada execução acrescenta uma linha JSON ao arquivo, para acompanhar
+a evolução do tempo de inicialização entre versões.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_APP = os.path.join(DIRETORIO, "acompanhamento.py")
+
+CODIGO_IMPORTACAO = """
+import sys, time
+sys.path.insert(0, {diretorio!r})
+inicio = time.perf_counter()
+import acompanhamento
+fim = time.perf_counter()
+print(fim - inicio)
+print(int("plotly.express" in sys.modules))
+"""
+
+CODIGO_RENDERIZACAO = """
+import time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({arquivo!r}, default_timeout=120)
+inicio = time.perf_counter()
+app.run()
+fim = time.perf_counter()
+print(fim - inicio)
+print(len(app.exception))
+"""
+
+
+def _executar(codigo: str):
+    """Executa o código em um interpretador novo e devolve as linhas impressas."""
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=DIRETORIO, capture_output=True, text=True, check=False,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip() or f"código de saída {resultado.returncode}")
+    return resultado.stdout.strip().splitlines()[-2:]
+
+
+def _resumo(tempos):
+    return {
+        "mediana_s": round(statistics.median(tempos), 3),
+        "minimo_s": round(min(tempos), 3),
+        "maximo_s": round(max(tempos), 3),
+    }
+
+
+def medir_importacao(repeticoes: int) -> dict:
+    tempos, plotly_carregado = [], False
+    for _ in range(repeticoes):
+        tempo, plotly = _executar(CODIGO_IMPORTACAO.format(diretorio=DIRETORIO))
+        tempos.append(float(tempo))
+        plotly_carregado = plotly_carregado or plotly == "1"
+    return {**_resumo(tempos), "plotly_carregado": plotly_carregado}
+
+
+def medir_primeira_renderizacao(repeticoes: int) -> dict:
+    tempos, erros = [], 0
+    for _ in range(repeticoes):
+        tempo, excecoes = _executar(CODIGO_RENDERIZACAO.format(arquivo=ARQUIVO_APP))
+        tempos.append(float(tempo))
+        erros += int(excecoes)
+    return {**_resumo(tempos), "excecoes": erros}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5, help="execuções por medida (padrão: 5)")
+    parser.add_argument("--saida", help="arquivo JSONL ao qual o resultado é acrescentado")
+    args = parser.parse_args()
+
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "importacao_a_frio": medir_importacao(args.repeticoes),
+        "primeira_renderizacao": medir_primeira_renderizacao(args.repeticoes),
+    }
+
+    imp, ren = resultado["importacao_a_frio"], resultado["primeira_renderizacao"]
+    print(f"Importação a frio:     {imp['mediana_s']:.3f}s (mín {imp['minimo_s']:.3f}s, máx {imp['maximo_s']:.3f}s)"
+          f" - plotly carregado: {'sim' if imp['plotly_carregado'] else 'não'}")
+    print(f"Primeira renderização: {ren['mediana_s']:.3f}s (mín {ren['minimo_s']:.3f}s, máx {ren['maximo_s']:.3f}s)"
+          f" - exceções: {ren['excecoes']}")
+
+    if args.saida:
+        with open(args.saida, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Leitura de planilhas (.xlsx e .csv) em processos separados, para as importações em lote.
+
+Não depende do Streamlit nem de `acompanhamento`, para que os processos do pool
+possam importá-lo sem carregar o dashboard.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+EXTENSOES_PLANILHA = ('.xlsx', '.csv')
+
+
+def ler_planilha(caminho: str) -> pd.DataFrame:
+    """Lê a primeira aba de um .xlsx ou um .csv (separador detectado; datas dd/mm/aaaa)."""
+    if caminho.lower().endswith('.csv'):
+        df = pd.read_csv(caminho, sep=None, engine='python', dtype=str, encoding='utf-8-sig')
+        df.columns = [str(c).strip() for c in df.columns]
+        if 'Data' in df.columns:
+            datas = pd.to_datetime(df['Data'], errors='coerce', format='ISO8601')
+            restantes = datas.isna() & df['Data'].notna()
+            if restantes.any():
+                datas[restantes] = pd.to_datetime(df.loc[restantes, 'Data'], errors='coerce', dayfirst=True)
+            df['Data'] = datas
+        return df
+    df = pd.read_excel(caminho, engine='openpyxl')
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def _ler_com_erro(caminho: str):
+    try:
+        return ler_planilha(caminho), None
+    except Exception as e:
+        return None, str(e)
+
+
+def ler_planilhas_em_paralelo(caminhos: list, max_processos: int = None) -> dict:
+    """Lê vários arquivos em paralelo; devolve {caminho: (DataFrame ou None, erro ou None)}."""
+    if not caminhos:
+        return {}
+    max_processos = max_processos or min(len(caminhos), os.cpu_count() or 1)
+    if max_processos <= 1 or len(caminhos) == 1:
+        return {caminho: _ler_com_erro(caminho) for caminho in caminhos}
+    # spawn: o processo do servidor tem várias threads, e um fork herdaria locks em uso
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_processos, mp_context=contexto) as executor:
+        return dict(zip(caminhos, executor.map(_ler_com_erro, caminhos)))
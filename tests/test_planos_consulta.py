@@ -0,0 +1,58 @@
+"""As consultas frequentes do painel usam índice em um banco com todas as migrações aplicadas."""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import acompanhamento as app  # noqa: E402
+
+# Tabelas que vêm das planilhas de origem, antes de qualquer migração
+ESQUEMA_BASE = """
+    CREATE TABLE frotas (
+        COD_EQUIPAMENTO INTEGER, DESCRICAO_EQUIPAMENTO TEXT, PLACA TEXT, "Classe Operacional" TEXT, ATIVO TEXT
+    );
+    CREATE TABLE abastecimentos (
+        "Cód. Equip." INTEGER, Data TEXT, "Qtde Litros" REAL, Hod_Hor_Atual REAL,
+        Safra TEXT, "Mês" TEXT, "Classe Operacional" TEXT, "Média" REAL
+    );
+    CREATE TABLE manutencoes (Cod_Equip INTEGER, Data TEXT, Tipo_Servico TEXT, Hod_Hor_No_Servico REAL, Observacoes TEXT);
+    CREATE TABLE componentes_regras (classe_operacional TEXT, nome_componente TEXT, intervalo_padrao REAL);
+    CREATE TABLE componentes_historico (
+        Cod_Equip INTEGER, nome_componente TEXT, Data TEXT, Hod_Hor_No_Servico REAL, Observacoes TEXT
+    );
+    CREATE TABLE checklist_regras (titulo_checklist TEXT, classe_operacional TEXT, frequencia TEXT);
+    CREATE TABLE checklist_itens (titulo_checklist TEXT, nome_item TEXT);
+    CREATE TABLE checklist_historico (
+        Cod_Equip INTEGER, titulo_checklist TEXT, data_preenchimento TEXT, turno TEXT, status_geral TEXT
+    );
+"""
+
+
+@pytest.fixture
+def banco(tmp_path):
+    caminho = str(tmp_path / "planos.db")
+    conn = sqlite3.connect(caminho)
+    try:
+        conn.executescript(ESQUEMA_BASE)
+    finally:
+        conn.close()
+    ok, msg = app.aplicar_migracoes(caminho)
+    assert ok, msg
+    return caminho
+
+
+def test_consultas_frequentes_usam_indice(banco):
+    relatorio = app.verificar_planos_consulta(banco)
+    assert list(relatorio['Consulta']) == list(app.CONSULTAS_FREQUENTES)
+    varreduras = relatorio[relatorio['Varredura Completa'].astype(bool)]
+    assert varreduras.empty, varreduras.to_string()
+
+
+def test_consulta_sem_tabela_falha(banco):
+    with app.conexao_escrita(banco) as conn:
+        conn.execute("DROP TABLE manutencoes")
+    relatorio = app.verificar_planos_consulta(banco).set_index('Consulta')
+    assert relatorio.loc['Manutenções do equipamento', 'Varredura Completa']
@@ -0,0 +1,56 @@
+"""Confere, com EXPLAIN QUERY PLAN, que as consultas frequentes do dashboard usam índices.
+
+As migrações são aplicadas sobre uma cópia do banco (o original não é alterado)
+e cada consulta de CONSULTAS_FREQUENTES tem o plano verificado. Sai com código 1
+se alguma consulta fizer varredura completa de tabela ou não puder ser preparada.
+
+Uso:
+    python verificar_planos_consulta.py [caminho/do/banco.db]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, DIRETORIO)
+
+import acompanhamento as app  # noqa: E402
+
+
+def main():
+    banco = sys.argv[1] if len(sys.argv) > 1 else app.DB_PATH
+    if not os.path.exists(banco):
+        print(f"Banco de dados '{banco}' não encontrado.")
+        return 2
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        copia = os.path.join(diretorio, "verificacao.db")
+        origem, destino = sqlite3.connect(banco), sqlite3.connect(copia)
+        try:
+            origem.backup(destino)
+        finally:
+            origem.close()
+            destino.close()
+
+        ok, msg = app.aplicar_migracoes(copia)
+        print(msg)
+        if not ok:
+            return 2
+
+        relatorio = app.verificar_planos_consulta(copia)
+
+    for _, linha in relatorio.iterrows():
+        marca = "VARREDURA" if linha['Varredura Completa'] else "ok"
+        print(f"[{marca:>9}] {linha['Consulta']}: {linha['Plano']}")
+
+    varreduras = int(relatorio['Varredura Completa'].sum())
+    if varreduras:
+        print(f"{varreduras} consulta(s) com varredura completa de tabela ou com erro.")
+        return 1
+    print("Todas as consultas frequentes usam índices.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())